@@ -28,7 +28,9 @@ class Settings(BaseSettings):
     sync_retry_attempts: int = 3
     sync_retry_backoff_seconds: int = 5
     sync_retry_backoff_multiplier: float = 2.0
+    sync_ingest_chunk_size: int = 5000
     raw_storage_dir: str = './data/raw'
+    doc_text_cache_dir: str = './data/text_cache'
     supplement_sync_enabled: bool = False
     supplement_sync_interval_hours: int = 24
     supplement_sync_batch_size: int = 1000
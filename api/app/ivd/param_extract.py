@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 from app.ivd.ontology import PARAM_ONTOLOGY
@@ -20,10 +22,6 @@ _TEMP_RANGE_PAT = re.compile(_RANGE + r"\s*(?:°C|℃|C)")
 _TEMP_SINGLE_PAT = re.compile(_NUM + r"\s*(?:°C|℃|C)")
 
 
-def _contains_any(haystack_lower: str, aliases: list[str]) -> bool:
-    return any(a and a in haystack_lower for a in aliases)
-
-
 def normalize_units(unit: str | None) -> str | None:
     if unit is None:
         return None
@@ -139,30 +137,94 @@ def conflict_detect(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return out
 
 
-def extract_from_text(text: str, ontology: dict[str, dict[str, Any]] | None = None) -> list[dict[str, Any]]:
-    ont = ontology or PARAM_ONTOLOGY
-    t = str(text or "")
-    lines = [x.strip() for x in t.splitlines() if x.strip()]
-    out: list[dict[str, Any]] = []
-    for line in lines:
-        lower = line.lower()
-        for code, meta in ont.items():
-            aliases = [str(x).lower() for x in (meta.get("aliases") or [])]
-            if not _contains_any(lower, aliases):
+@dataclass(frozen=True)
+class CompiledExtractor:
+    """Alias matcher for one ontology version.
+
+    `pattern` is a single zero-width alternation over every alias: one C-level scan per line finds
+    every position where some alias starts (lookahead matches overlap). Only lines with a hit are
+    resolved to param codes and run through the value regexes.
+    """
+
+    codes: tuple[str, ...]
+    pattern: re.Pattern[str] | None
+    # first char -> ((alias, code indexes), ...)
+    aliases_by_first: dict[str, tuple[tuple[str, frozenset[int]], ...]]
+
+    def codes_in(self, lower: str) -> list[str]:
+        if self.pattern is None:
+            return []
+        hits: set[int] = set()
+        for m in self.pattern.finditer(lower):
+            i = m.start()
+            for alias, idxs in self.aliases_by_first.get(lower[i], ()):
+                if not idxs <= hits and lower.startswith(alias, i):
+                    hits |= idxs
+        return [self.codes[i] for i in sorted(hits)]
+
+    def extract(self, text: str) -> list[dict[str, Any]]:
+        t = str(text or "")
+        out: list[dict[str, Any]] = []
+        for raw_line in t.splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            codes = self.codes_in(line.lower())
+            if not codes:
                 continue
             v = _extract_value(line)
-            out.append(
-                {
-                    "param_code": str(code),
-                    "value_num": v.get("value_num"),
-                    "value_text": v.get("value_text"),
-                    "unit": v.get("unit"),
-                    "range_low": v.get("range_low"),
-                    "range_high": v.get("range_high"),
-                    "conditions": {},
-                    "evidence_text": line[:500],
-                    "confidence": 0.70,
-                }
-            )
-    return conflict_detect(out)
+            for code in codes:
+                out.append(
+                    {
+                        "param_code": code,
+                        "value_num": v.get("value_num"),
+                        "value_text": v.get("value_text"),
+                        "unit": v.get("unit"),
+                        "range_low": v.get("range_low"),
+                        "range_high": v.get("range_high"),
+                        "conditions": {},
+                        "evidence_text": line[:500],
+                        "confidence": 0.70,
+                    }
+                )
+        return conflict_detect(out)
+
+
+def _ontology_key(ontology: dict[str, dict[str, Any]]) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    return tuple(
+        (str(code), tuple(str(x).lower() for x in (meta.get("aliases") or [])))
+        for code, meta in ontology.items()
+    )
+
+
+@lru_cache(maxsize=8)
+def _compile(key: tuple[tuple[str, tuple[str, ...]], ...]) -> CompiledExtractor:
+    codes = tuple(code for code, _aliases in key)
+    alias_codes: dict[str, set[int]] = {}
+    for idx, (_code, aliases) in enumerate(key):
+        for alias in aliases:
+            if alias:
+                alias_codes.setdefault(alias, set()).add(idx)
+    by_first: dict[str, list[tuple[str, frozenset[int]]]] = {}
+    for alias, idxs in alias_codes.items():
+        by_first.setdefault(alias[0], []).append((alias, frozenset(idxs)))
+    pattern = None
+    if alias_codes:
+        # The leading first-char class lets the engine reject most positions without trying alternatives.
+        first_chars = re.escape("".join(sorted(by_first)))
+        alternation = "|".join(re.escape(a) for a in sorted(alias_codes, key=len, reverse=True))
+        pattern = re.compile(f"(?=[{first_chars}])(?=(?:{alternation}))")
+    return CompiledExtractor(
+        codes=codes,
+        pattern=pattern,
+        aliases_by_first={k: tuple(v) for k, v in by_first.items()},
+    )
+
+
+def compile_extractor(ontology: dict[str, dict[str, Any]] | None = None) -> CompiledExtractor:
+    """Compiled extractor for `ontology` (default PARAM_ONTOLOGY), cached per alias content."""
+    return _compile(_ontology_key(ontology or PARAM_ONTOLOGY))
 
+
+def extract_from_text(text: str, ontology: dict[str, dict[str, Any]] | None = None) -> list[dict[str, Any]]:
+    return compile_extractor(ontology).extract(text)
@@ -8,7 +8,7 @@ from typing import Literal
 from uuid import UUID
 
 from fastapi import BackgroundTasks, Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from secrets import compare_digest
@@ -61,7 +61,15 @@ from app.repositories.data_sources import (
 from app.repositories.company_tracking import get_company_tracking_detail, list_company_tracking
 from app.repositories.changes import get_change_detail, get_change_stats, list_recent_changes
 from app.repositories.procurement import upsert_manual_registration_map
-from app.repositories.products import admin_search_products, get_company, get_product, list_full_products, search_products
+from app.repositories.products import (
+    TotalMode,
+    admin_search_products,
+    get_company,
+    get_product,
+    list_full_products,
+    next_cursor,
+    search_products,
+)
 from app.repositories.product_params import list_product_params
 from app.repositories.radar import get_admin_config, get_product_timeline, list_admin_configs, upsert_admin_config
 from app.repositories.radar import count_active_subscriptions_by_subscriber, create_subscription
@@ -176,15 +184,29 @@ from app.services.auth import (
     verify_password,
 )
 from app.services.entitlements import get_entitlements, get_membership_info
-from app.services.exports import export_changes_to_csv, export_search_to_csv
+from app.services.exports import (
+    enforce_export_quota,
+    export_job_status,
+    new_export_job,
+    run_export_job,
+    stream_changes_export,
+    stream_search_export,
+)
 from app.services.crypto import decrypt_json, encrypt_json
-from app.services.plan import compute_plan
+from app.services.plan import compute_plan, invalidate_plan_cache
+from app.services.lri_latest import lri_map_groups, lri_top_rows, lri_top_total
 from app.services.source_audit import run_source_audit
 from app.services.data_quality import run_data_quality_audit
 from app.services.company_resolution import backfill_products_for_alias, normalize_company_name
 from app.services.methodology_v1 import map_methodologies_v1
 from app.services.normalize_keys import normalize_registration_no
-from app.services.source_contract import apply_field_policy, registration_contract_summary, upsert_registration_with_contract
+from app.services.source_contract import (
+    apply_field_policy,
+    invalidate_source_policy_cache,
+    registration_contract_summary,
+    source_policy_cache_stats,
+    upsert_registration_with_contract,
+)
 from app.services.ingest_runner import upsert_structured_record_via_runner
 from app.common.errors import IngestErrorCode
 from app.pipeline.ingest import save_raw_document
@@ -195,6 +217,7 @@ from app.services.supplement_sync import (
     run_supplement_sync_now,
 )
 from app.services.ivd_dictionary import IVD_SCOPE_ALLOWLIST
+from app.services.udi_coverage import INSERTED_FLAG, bump_udi_coverage_counts, mapped_di_delta
 from app.api.signals import router as signals_router
 
 app = FastAPI(title='IVD产品雷达 API', version='0.4.0')
@@ -227,7 +250,7 @@ app.add_middleware(
 )
 
 
-SortBy = Literal['updated_at', 'approved_date', 'expiry_date', 'name']
+SortBy = Literal['updated_at', 'approved_date', 'expiry_date', 'name', 'relevance']
 SortOrder = Literal['asc', 'desc']
 SearchMode = Literal['limited', 'full']
 security = HTTPBasic()
@@ -1061,73 +1084,8 @@ def dashboard_lri_top(
     """
     plan_is_pro = _is_pro_user(current_user, db)
 
-    total = int(
-        db.execute(
-            text(
-                """
-                WITH latest AS (
-                  SELECT DISTINCT ON (s.registration_id)
-                    s.registration_id,
-                    s.product_id,
-                    s.lri_norm
-                  FROM lri_scores s
-                  WHERE s.model_version = :mv
-                  ORDER BY s.registration_id, s.calculated_at DESC, s.id ASC
-                )
-                SELECT COUNT(1)
-                FROM latest l
-                JOIN products p ON p.id = l.product_id
-                WHERE p.is_ivd IS TRUE
-                """
-            ),
-            {'mv': str(model_version)},
-        ).scalar()
-        or 0
-    )
-
-    rows = db.execute(
-        text(
-            """
-            WITH latest AS (
-              SELECT DISTINCT ON (s.registration_id)
-                s.registration_id,
-                s.product_id,
-                s.tte_days,
-                s.competitive_count,
-                s.gp_new_12m,
-                s.tte_score,
-                s.rh_score,
-                s.cd_score,
-                s.gp_score,
-                s.lri_norm,
-                s.risk_level,
-                s.calculated_at
-              FROM lri_scores s
-              WHERE s.model_version = :mv
-              ORDER BY s.registration_id, s.calculated_at DESC, s.id ASC
-            )
-            SELECT
-              p.id AS product_id,
-              p.name AS product_name,
-              l.risk_level,
-              l.lri_norm,
-              l.tte_days,
-              l.competitive_count,
-              l.gp_new_12m,
-              l.tte_score,
-              l.rh_score,
-              l.cd_score,
-              l.gp_score,
-              l.calculated_at
-            FROM latest l
-            JOIN products p ON p.id = l.product_id
-            WHERE p.is_ivd IS TRUE
-            ORDER BY l.lri_norm DESC NULLS LAST, l.calculated_at DESC, p.id ASC
-            LIMIT :limit OFFSET :offset
-            """
-        ),
-        {'mv': str(model_version), 'limit': int(limit), 'offset': int(offset)},
-    ).mappings().all()
+    total = lri_top_total(db, model_version=str(model_version))
+    rows = lri_top_rows(db, model_version=str(model_version), limit=int(limit), offset=int(offset))
 
     items = [
         DashboardLriTopItemOut(
@@ -1164,83 +1122,10 @@ def dashboard_lri_map(
     """
     plan_is_pro = _is_pro_user(current_user, db)
 
-    total = int(
-        db.execute(
-            text(
-                """
-                WITH latest AS (
-                  SELECT DISTINCT ON (s.registration_id)
-                    s.registration_id,
-                    s.product_id,
-                    s.methodology_id,
-                    s.lri_norm,
-                    s.risk_level,
-                    s.gp_new_12m
-                  FROM lri_scores s
-                  WHERE s.model_version = :mv
-                  ORDER BY s.registration_id, s.calculated_at DESC, s.id ASC
-                )
-                SELECT COUNT(1)
-                FROM (
-                  SELECT
-                    l.methodology_id,
-                    COALESCE(NULLIF(btrim(p.ivd_category), ''), NULLIF(btrim(p.category), ''), 'unknown') AS ivd_category
-                  FROM latest l
-                  JOIN products p ON p.id = l.product_id
-                  WHERE p.is_ivd IS TRUE
-                  GROUP BY 1, 2
-                ) x
-                """
-            ),
-            {'mv': str(model_version)},
-        ).scalar()
-        or 0
-    )
-
-    rows = db.execute(
-        text(
-            """
-            WITH latest AS (
-              SELECT DISTINCT ON (s.registration_id)
-                s.registration_id,
-                s.product_id,
-                s.methodology_id,
-                s.lri_norm,
-                s.risk_level,
-                s.gp_new_12m
-              FROM lri_scores s
-              WHERE s.model_version = :mv
-              ORDER BY s.registration_id, s.calculated_at DESC, s.id ASC
-            ),
-            dim AS (
-              SELECT
-                l.methodology_id,
-                COALESCE(NULLIF(btrim(p.ivd_category), ''), NULLIF(btrim(p.category), ''), 'unknown') AS ivd_category,
-                l.lri_norm,
-                l.risk_level,
-                l.gp_new_12m
-              FROM latest l
-              JOIN products p ON p.id = l.product_id
-              WHERE p.is_ivd IS TRUE
-            )
-            SELECT
-              d.methodology_id,
-              m.code AS methodology_code,
-              m.name_cn AS methodology_name_cn,
-              d.ivd_category,
-              COUNT(1)::int AS total_count,
-              COUNT(1) FILTER (WHERE d.risk_level IN ('HIGH', 'CRITICAL'))::int AS high_risk_count,
-              COALESCE(AVG(d.lri_norm), 0)::float AS avg_lri_norm,
-              COALESCE(MAX(d.gp_new_12m), 0)::int AS gp_new_12m
-            FROM dim d
-            LEFT JOIN methodology_master m ON m.id = d.methodology_id
-            GROUP BY 1, 2, 3, 4
-            ORDER BY high_risk_count DESC, avg_lri_norm DESC, total_count DESC, ivd_category ASC
-            LIMIT :limit OFFSET :offset
-            """
-        ),
-        {'mv': str(model_version), 'limit': int(limit), 'offset': int(offset)},
-    ).mappings().all()
+    # Aggregated once per LRI compute (cached by refresh token); pages are slices of it.
+    groups = lri_map_groups(db, model_version=str(model_version))
+    total = len(groups)
+    rows = groups[int(offset) : int(offset) + int(limit)]
 
     items = [
         DashboardLriMapItemOut(
@@ -1269,6 +1154,10 @@ def search(
     page_size: int = Query(default=20, ge=1, le=100),
     sort_by: SortBy = Query(default='updated_at'),
     sort_order: SortOrder = Query(default='desc'),
+    cursor: str | None = Query(default=None, description='keyset cursor from a previous page (next_cursor); ignores page'),
+    total_mode: TotalMode | None = Query(
+        default=None, description='exact COUNT(*) or short-TTL cached total; defaults to cached when cursor is set'
+    ),
     mode: SearchMode | None = Query(default=None, description='limited (free) or full (pro)'),
     include_unverified: bool = Query(default=False, description='Include UDI stubs (unverified by NMPA)'),
     current_user: User | None = Depends(_get_current_user_optional),
@@ -1288,6 +1177,7 @@ def search(
         # Enforce "first 10 only" regardless of requested pagination params.
         page = 1
         page_size = 10
+        cursor = None
 
     # Pro-only search features:
     # - larger page size
@@ -1298,18 +1188,23 @@ def search(
         if sort_by == 'expiry_date':
             raise HTTPException(status_code=403, detail='Sorting by expiry_date is available on Pro only. Upgrade to Pro.')
 
-    products, total = search_products(
-        db,
-        query=q,
-        company=company,
-        reg_no=reg_no,
-        status=status,
-        include_unverified=bool(include_unverified),
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
+    try:
+        products, total = search_products(
+            db,
+            query=q,
+            company=company,
+            reg_no=reg_no,
+            status=status,
+            include_unverified=bool(include_unverified),
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     serializer = serialize_product if effective_mode == 'full' else serialize_product_limited
     data = SearchData(
         total=total,
@@ -1318,6 +1213,11 @@ def search(
         sort_by=sort_by,
         sort_order=sort_order,
         items=[SearchItem(product=serializer(item)) for item in products],
+        next_cursor=(
+            None
+            if effective_mode == 'limited' and not plan_is_pro
+            else next_cursor(products, page_size=page_size, sort_by=sort_by, sort_order=sort_order)
+        ),
     )
     return _ok(data)
 
@@ -1335,24 +1235,33 @@ def admin_products(
     page_size: int = Query(default=20, ge=1, le=200),
     sort_by: SortBy = Query(default='updated_at'),
     sort_order: SortOrder = Query(default='desc'),
+    cursor: str | None = Query(default=None, description='keyset cursor from a previous page (next_cursor); ignores page'),
+    total_mode: TotalMode | None = Query(
+        default=None, description='exact COUNT(*) or short-TTL cached total; defaults to cached when cursor is set'
+    ),
     _admin: User = Depends(_require_admin_user),
     db: Session = Depends(get_db),
 ) -> ApiResponseSearch:
     ivd_filter = True if is_ivd == 'true' else False if is_ivd == 'false' else None
-    products, total = admin_search_products(
-        db,
-        query=q,
-        company=company,
-        reg_no=reg_no,
-        status=status,
-        is_ivd=ivd_filter,
-        ivd_category=ivd_category,
-        ivd_version=ivd_version,
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
+    try:
+        products, total = admin_search_products(
+            db,
+            query=q,
+            company=company,
+            reg_no=reg_no,
+            status=status,
+            is_ivd=ivd_filter,
+            ivd_category=ivd_category,
+            ivd_version=ivd_version,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     data = SearchData(
         total=total,
         page=page,
@@ -1360,6 +1269,7 @@ def admin_products(
         sort_by=sort_by,
         sort_order=sort_order,
         items=[SearchItem(product=serialize_product(item)) for item in products],
+        next_cursor=next_cursor(products, page_size=page_size, sort_by=sort_by, sort_order=sort_order),
     )
     return _ok(data)
 
@@ -1572,24 +1482,33 @@ def products_full(
     page_size: int = Query(default=30, ge=1, le=200),
     sort_by: SortBy = Query(default='updated_at'),
     sort_order: SortOrder = Query(default='desc'),
+    cursor: str | None = Query(default=None, description='keyset cursor from a previous page (next_cursor); ignores page'),
+    total_mode: TotalMode | None = Query(
+        default=None, description='exact COUNT(*) or short-TTL cached total; defaults to cached when cursor is set'
+    ),
     include_unverified: bool = Query(default=False, description='Include UDI stubs (unverified by NMPA)'),
     _user: User = Depends(require_pro),
     db: Session = Depends(get_db),
 ) -> ApiResponseSearch:
-    items, total = list_full_products(
-        db,
-        query=q,
-        company=company,
-        reg_no=reg_no,
-        status=status,
-        include_unverified=bool(include_unverified),
-        class_prefix=class_prefix,
-        ivd_category=ivd_category,
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
+    try:
+        items, total = list_full_products(
+            db,
+            query=q,
+            company=company,
+            reg_no=reg_no,
+            status=status,
+            include_unverified=bool(include_unverified),
+            class_prefix=class_prefix,
+            ivd_category=ivd_category,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     data = SearchData(
         total=total,
         page=page,
@@ -1597,15 +1516,42 @@ def products_full(
         sort_by=sort_by,
         sort_order=sort_order,
         items=[SearchItem(product=serialize_product(item)) for item in items],
+        next_cursor=next_cursor(items, page_size=page_size, sort_by=sort_by, sort_order=sort_order),
     )
     return _ok(data)
 
 
+ExportMode = Literal['stream', 'job']
+
+
+def _export_response(
+    body,
+    *,
+    filename: str,
+    gzip: bool,
+    mode: ExportMode,
+    owner_id,
+    background_tasks: BackgroundTasks,
+) -> Response:
+    if mode == 'job':
+        job = new_export_job(owner_id, gzip=gzip)
+        background_tasks.add_task(run_export_job, job['path'], body)
+        return _ok({'job_id': job['job_id'], 'status': job['status'], 'download_url': f"/api/export/jobs/{job['job_id']}"})
+    if gzip:
+        headers = {'Content-Disposition': f'attachment; filename="{filename}.gz"'}
+        return StreamingResponse(body, media_type='application/gzip', headers=headers)
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    return StreamingResponse(body, media_type='text/csv; charset=utf-8', headers=headers)
+
+
 @app.get('/api/export/search.csv')
 def export_search_csv(
+    background_tasks: BackgroundTasks,
     q: str | None = Query(default=None),
     company: str | None = Query(default=None),
     reg_no: str | None = Query(default=None),
+    gzip: bool = Query(default=False, description='gzip-compress the CSV body'),
+    mode: ExportMode = Query(default='stream', description='stream now, or job: write to storage and poll /api/export/jobs/{id}'),
     current_user: User = Depends(_require_current_user),
     db: Session = Depends(get_db),
 ) -> Response:
@@ -1613,32 +1559,63 @@ def export_search_csv(
     if not ent.can_export:
         raise HTTPException(status_code=403, detail='Export is not available on your plan. Upgrade to Pro.')
 
-    csv_text = export_search_to_csv(db, plan='pro', q=q, company=company, registration_no=reg_no)
-    headers = {'Content-Disposition': 'attachment; filename="ivd_search_export.csv"'}
-    return Response(content=csv_text, media_type='text/csv; charset=utf-8', headers=headers)
+    enforce_export_quota(db, 'pro')
+    body = stream_search_export(q=q, company=company, registration_no=reg_no, gzip=bool(gzip))
+    return _export_response(
+        body,
+        filename='ivd_search_export.csv',
+        gzip=bool(gzip),
+        mode=mode,
+        owner_id=current_user.id,
+        background_tasks=background_tasks,
+    )
 
 
 @app.get('/api/export/changes.csv')
 def export_changes_csv(
+    background_tasks: BackgroundTasks,
     days: int = Query(default=30, ge=1, le=365),
     change_type: str | None = Query(default=None),
     q: str | None = Query(default=None),
     company: str | None = Query(default=None),
     reg_no: str | None = Query(default=None),
+    gzip: bool = Query(default=False, description='gzip-compress the CSV body'),
+    mode: ExportMode = Query(default='stream', description='stream now, or job: write to storage and poll /api/export/jobs/{id}'),
     _pro: User = Depends(require_pro),
     db: Session = Depends(get_db),
 ) -> Response:
-    csv_text = export_changes_to_csv(
-        db,
-        plan='pro',
+    enforce_export_quota(db, 'pro')
+    body = stream_changes_export(
         days=days,
         change_type=change_type,
         q=q,
         company=company,
         reg_no=reg_no,
+        gzip=bool(gzip),
+    )
+    return _export_response(
+        body,
+        filename='ivd_changes_export.csv',
+        gzip=bool(gzip),
+        mode=mode,
+        owner_id=_pro.id,
+        background_tasks=background_tasks,
     )
-    headers = {'Content-Disposition': 'attachment; filename="ivd_changes_export.csv"'}
-    return Response(content=csv_text, media_type='text/csv; charset=utf-8', headers=headers)
+
+
+@app.get('/api/export/jobs/{job_id}')
+def export_job_download(
+    job_id: str,
+    current_user: User = Depends(_require_current_user),
+) -> Response:
+    job = export_job_status(current_user.id, job_id)
+    if job['status'] == 'not_found':
+        raise HTTPException(status_code=404, detail='Export job not found')
+    if job['status'] != 'done':
+        return _ok(job)
+    filename = os.path.basename(job['path'])
+    media_type = 'application/gzip' if job['gzip'] else 'text/csv; charset=utf-8'
+    return FileResponse(job['path'], media_type=media_type, filename=filename)
 
 
 @app.post('/api/subscriptions', response_model=ApiResponseSubscription)
@@ -2951,10 +2928,10 @@ def admin_resolve_pending_record(
     )
     map_written = False
     if di:
-        db.execute(
+        deleted = db.execute(
             text("DELETE FROM product_udi_map WHERE di = :di AND registration_no <> :registration_no"),
             {'di': di, 'registration_no': upsert_res.registration_no},
-        )
+        ).rowcount
         map_stmt = insert(ProductUdiMap).values(
             registration_no=upsert_res.registration_no,
             di=di,
@@ -2972,7 +2949,8 @@ def admin_resolve_pending_record(
                 'updated_at': text('NOW()'),
             },
         )
-        db.execute(map_stmt)
+        inserted = db.execute(map_stmt.returning(INSERTED_FLAG)).scalar()
+        bump_udi_coverage_counts(db, mapped=mapped_di_delta(deleted=deleted, inserted=bool(inserted)))
         map_written = True
 
     before_status = str(rec.status or '')
@@ -3517,10 +3495,10 @@ def _admin_resolve_pending_udi_link(
     )
 
     # Keep DI tied to one canonical registration_no.
-    db.execute(
+    deleted = db.execute(
         text("DELETE FROM product_udi_map WHERE di = :di AND registration_no <> :registration_no"),
         {'di': di, 'registration_no': reg_res.registration_no},
-    )
+    ).rowcount
     stmt = insert(ProductUdiMap).values(
         registration_no=reg_res.registration_no,
         di=di,
@@ -3539,7 +3517,8 @@ def _admin_resolve_pending_udi_link(
             'updated_at': text('NOW()'),
         },
     )
-    db.execute(stmt)
+    inserted = db.execute(stmt.returning(INSERTED_FLAG)).scalar()
+    bump_udi_coverage_counts(db, mapped=mapped_di_delta(deleted=deleted, inserted=bool(inserted)))
 
     before_status = str(getattr(pending, 'status', '') or '')
     before_resolved_at = getattr(pending, 'resolved_at', None)
@@ -4502,7 +4481,7 @@ def admin_list_sources_api(
         row = _source_item(d, cfg)
         row['compat'] = {**_source_binding_meta(d.source_key, cfg), **_legacy_binding_runtime_status(db, d.source_key, cfg)}
         items.append(row)
-    return _ok({'items': items, 'count': len(items)})
+    return _ok({'items': items, 'count': len(items), 'policy_cache': source_policy_cache_stats()})
 
 
 @app.post('/api/admin/sources')
@@ -4561,6 +4540,7 @@ def admin_create_source_config_api(
     db.add(cfg)
     db.commit()
     db.refresh(cfg)
+    invalidate_source_policy_cache(source_key)
     compat = _sync_source_config_to_legacy_data_source(db, defn=defn, cfg=cfg)
     item = _source_item(defn, cfg)
     item['compat'] = {**_source_binding_meta(defn.source_key, cfg), **compat}
@@ -4620,6 +4600,7 @@ def admin_patch_source_config_api(
     db.add(cfg)
     db.commit()
     db.refresh(cfg)
+    invalidate_source_policy_cache(source_key)
     compat = _sync_source_config_to_legacy_data_source(db, defn=defn, cfg=cfg)
     item = _source_item(defn, cfg)
     item['compat'] = {**_source_binding_meta(defn.source_key, cfg), **compat}
@@ -4707,6 +4688,7 @@ def admin_membership_grant(
         if str(e) == 'already_active_pro':
             raise HTTPException(status_code=409, detail='User already has active Pro. Use /extend instead.')
         raise
+    invalidate_plan_cache(user_id)
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
     return _ok(_admin_user_item_out(user))
@@ -4748,6 +4730,7 @@ def admin_membership_extend(
         reason=str(reason).strip() if isinstance(reason, str) and reason.strip() else None,
         note=str(note).strip() if isinstance(note, str) and note.strip() else None,
     )
+    invalidate_plan_cache(user_id)
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
     return _ok(_admin_user_item_out(user))
@@ -4766,6 +4749,7 @@ def admin_membership_suspend(
         reason=payload.reason,
         note=payload.note,
     )
+    invalidate_plan_cache(payload.user_id)
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
     return _ok(_admin_user_item_out(user))
@@ -4784,6 +4768,7 @@ def admin_membership_revoke(
         reason=payload.reason,
         note=payload.note,
     )
+    invalidate_plan_cache(payload.user_id)
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
     return _ok(_admin_user_item_out(user))
@@ -4,11 +4,27 @@ import uuid
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Integer, Numeric, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    event,
+    func,
+    inspect,
+    select,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm.util import identity_key
 
 from app.db.session import Base
+from app.services.normalize_keys import company_raw_name, normalize_company_name
 
 
 class Company(Base):
@@ -78,9 +94,13 @@ class Product(Base):
     ivd_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     ivd_source: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     ivd_confidence: Mapped[Optional[float]] = mapped_column(Numeric(3, 2), nullable=True)
+    # sha256 of the classifier inputs (name + class code) at the last reclassify_ivd write.
+    ivd_input_sha: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     company_id: Mapped[Optional[uuid.UUID]] = mapped_column(
         UUID(as_uuid=True), ForeignKey('companies.id'), nullable=True
     )
+    # normalize_company_name(company name or raw company text); indexed lookup key for alias rebinds.
+    company_name_norm: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     registration_id: Mapped[Optional[uuid.UUID]] = mapped_column(
         UUID(as_uuid=True), ForeignKey('registrations.id'), nullable=True
     )
@@ -95,6 +115,31 @@ class Product(Base):
     registration: Mapped[Optional[Registration]] = relationship('Registration', back_populates='products')
 
 
+_COMPANY_NORM_INPUTS = ('company_id', 'raw_json', 'raw')
+
+
+@event.listens_for(Product, 'before_insert')
+@event.listens_for(Product, 'before_update')
+def _sync_product_company_name_norm(_mapper, connection, target: Product) -> None:
+    # ORM writes keep products.company_name_norm current; Core bulk writes must set it themselves.
+    state = inspect(target)
+    if state.persistent and not any(state.attrs[k].history.has_changes() for k in _COMPANY_NORM_INPUTS):
+        return
+    company_name = None
+    if 'company' not in state.unloaded and target.company is not None:
+        company_name = target.company.name
+    elif target.company_id is not None:
+        # Ingest only sets company_id, but the Company is normally already loaded in this session
+        # (IngestLookupCache); read it from the identity map before paying a round trip.
+        cached = None
+        if state.session is not None:
+            cached = state.session.identity_map.get(identity_key(Company, target.company_id))
+        company_name = inspect(cached).dict.get('name') if cached is not None else None
+        if company_name is None:
+            company_name = connection.execute(select(Company.name).where(Company.id == target.company_id)).scalar()
+    target.company_name_norm = normalize_company_name(company_raw_name(company_name, target.raw_json, target.raw))
+
+
 class ProductArchive(Base):
     __tablename__ = 'products_archive'
 
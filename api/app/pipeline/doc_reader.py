@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import json
+import os
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Iterable, Iterator
 
 from bs4 import BeautifulSoup
 
+from app.core.config import get_settings
+
+# Bump when page text extraction changes (pypdf handling, HTML cleanup): cached text is keyed by it.
+TEXT_EXTRACTOR_VERSION = 'doc_text_v1'
+
 
 @dataclass
 class PageText:
@@ -17,6 +25,43 @@ def read_file_bytes(storage_uri: str) -> bytes:
     return Path(str(storage_uri)).read_bytes()
 
 
+def _doc_kind(doc_type: str | None, filename: str | None) -> str:
+    name = (filename or '').lower()
+    dtype = (doc_type or '').lower()
+    if dtype == 'pdf' or name.endswith('.pdf'):
+        return 'pdf'
+    if dtype == 'html' or name.endswith('.html') or name.endswith('.htm'):
+        return 'html'
+    return 'text'
+
+
+def _iter_pdf_pages(stream: IO[bytes]) -> Iterator[PageText]:
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except Exception as exc:  # pragma: no cover
+        # Keep error explicit; callers can store it in parse_log.
+        raise RuntimeError('pypdf is required to parse PDF documents') from exc
+
+    reader = PdfReader(stream)
+    for i, page in enumerate(reader.pages, start=1):
+        try:
+            txt = page.extract_text() or ''
+        except Exception:
+            txt = ''
+        if txt.strip():
+            yield PageText(page=i, text=txt)
+
+
+def _html_page(content: bytes) -> PageText:
+    text = content.decode('utf-8', errors='ignore')
+    soup = BeautifulSoup(text, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    cleaned = soup.get_text(separator='\n')
+    lines = [x.strip() for x in cleaned.splitlines() if x.strip()]
+    return PageText(page=None, text='\n'.join(lines))
+
+
 def iter_text_pages(*, content: bytes, doc_type: str | None = None, filename: str | None = None) -> Iterable[PageText]:
     """Extract page-level text with best-effort, staying within project dependencies.
 
@@ -24,39 +69,112 @@ def iter_text_pages(*, content: bytes, doc_type: str | None = None, filename: st
     - For HTML: uses BeautifulSoup to extract visible text.
     - Otherwise: decodes as UTF-8 with errors ignored.
     """
-    name = (filename or '').lower()
-    dtype = (doc_type or '').lower()
-    is_pdf = dtype == 'pdf' or name.endswith('.pdf')
-    if is_pdf:
-        try:
-            from pypdf import PdfReader  # type: ignore
-        except Exception as exc:  # pragma: no cover
-            # Keep error explicit; callers can store it in parse_log.
-            raise RuntimeError('pypdf is required to parse PDF documents') from exc
-
-        # PdfReader accepts file-like; use bytes buffer.
+    kind = _doc_kind(doc_type, filename)
+    if kind == 'pdf':
         import io
 
-        reader = PdfReader(io.BytesIO(content))
-        for i, page in enumerate(reader.pages, start=1):
-            try:
-                txt = page.extract_text() or ''
-            except Exception:
-                txt = ''
-            if txt.strip():
-                yield PageText(page=i, text=txt)
+        yield from _iter_pdf_pages(io.BytesIO(content))
         return
+    if kind == 'html':
+        yield _html_page(content)
+        return
+    yield PageText(page=None, text=content.decode('utf-8', errors='ignore'))
+
 
-    is_html = dtype == 'html' or name.endswith('.html') or name.endswith('.htm')
-    if is_html:
-        text = content.decode('utf-8', errors='ignore')
-        soup = BeautifulSoup(text, 'html.parser')
-        for tag in soup(['script', 'style', 'noscript']):
-            tag.decompose()
-        cleaned = soup.get_text(separator='\n')
-        lines = [x.strip() for x in cleaned.splitlines() if x.strip()]
-        yield PageText(page=None, text='\n'.join(lines))
+def iter_text_pages_from_path(path: str | Path, *, doc_type: str | None = None) -> Iterator[PageText]:
+    """Like iter_text_pages, but reads from the file: PDFs are parsed from the open handle page by page."""
+    fp = Path(str(path))
+    kind = _doc_kind(doc_type, fp.name)
+    if kind == 'pdf':
+        with fp.open('rb') as fh:
+            yield from _iter_pdf_pages(fh)
         return
+    # HTML / text are a single page and need the whole document anyway.
+    content = fp.read_bytes()
+    if kind == 'html':
+        yield _html_page(content)
+        return
+    yield PageText(page=None, text=content.decode('utf-8', errors='ignore'))
 
-    text = content.decode('utf-8', errors='ignore')
-    yield PageText(page=None, text=text)
+
+def text_cache_path(sha256: str, *, doc_type: str | None, filename: str | None, cache_dir: str | Path | None = None) -> Path:
+    root = Path(str(cache_dir or get_settings().doc_text_cache_dir)) / TEXT_EXTRACTOR_VERSION
+    sha = str(sha256).strip().lower()
+    return root / sha[:2] / f'{sha}.{_doc_kind(doc_type, filename)}.jsonl'
+
+
+def open_text_pages(
+    storage_uri: str,
+    *,
+    sha256: str | None,
+    doc_type: str | None = None,
+    cache_dir: str | Path | None = None,
+) -> tuple[bool, Iterator[PageText]]:
+    """Stream the pages of a stored document; returns (cache_hit, pages).
+
+    Page text is cached as JSON lines under doc_text_cache_dir, keyed by the content sha256,
+    the document kind and TEXT_EXTRACTOR_VERSION. A hit never opens the document; a miss streams
+    pages from the file and publishes the cache entry only once every page was consumed.
+    """
+    if not sha256:
+        return False, iter_text_pages_from_path(storage_uri, doc_type=doc_type)
+    path = text_cache_path(sha256, doc_type=doc_type, filename=Path(str(storage_uri)).name, cache_dir=cache_dir)
+    if path.is_file():
+        return True, _read_cached_pages(path)
+    return False, _write_through(iter_text_pages_from_path(storage_uri, doc_type=doc_type), path)
+
+
+def spool_text_pages(pages: Iterable[PageText]) -> Iterator[PageText]:
+    """Consume `pages` completely into an anonymous temp file, then return an iterator over it.
+
+    For callers that must not act on a document before every page was read (e.g. replacing stored
+    params): reader errors surface here, and a write-through cache entry is published by the drain.
+    """
+    spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+    try:
+        for p in pages:
+            spool.write(json.dumps({'page': p.page, 'text': p.text}, ensure_ascii=False) + '\n')
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return _iter_jsonl_pages(spool)
+
+
+def _read_cached_pages(path: Path) -> Iterator[PageText]:
+    return _iter_jsonl_pages(path.open('r', encoding='utf-8'))
+
+
+def _iter_jsonl_pages(fh: IO[str]) -> Iterator[PageText]:
+    with fh:
+        for line in fh:
+            if line.strip():
+                row = json.loads(line)
+                yield PageText(page=row.get('page'), text=str(row.get('text') or ''))
+
+
+def _write_through(pages: Iterator[PageText], path: Path) -> Iterator[PageText]:
+    # Cache setup is best-effort like publishing: without a writable cache dir, just stream.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer: concurrent requests (threadpool) for the same sha256 must not share a temp file.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    except OSError:
+        yield from pages
+        return
+    tmp = Path(tmp_name)
+    complete = False
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            for p in pages:
+                fh.write(json.dumps({'page': p.page, 'text': p.text}, ensure_ascii=False) + '\n')
+                yield p
+        # Publishing the cache entry is best-effort: the caller already has every page.
+        try:
+            os.replace(tmp, path)
+            complete = True
+        except OSError:
+            pass
+    finally:
+        if not complete:
+            tmp.unlink(missing_ok=True)
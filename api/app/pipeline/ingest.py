@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urlparse
@@ -13,6 +14,19 @@ from app.core.config import get_settings
 from app.models import RawDocument
 
 
+def write_raw_content(*, source: str, url: str | None, content: bytes) -> tuple[str, Path]:
+    """Store bytes under raw storage (content-addressed by sha256); returns (sha256, path)."""
+    cfg = get_settings()
+    sha = hashlib.sha256(content).hexdigest()
+    suffix = Path(urlparse(url or '').path).suffix or '.bin'
+    root = Path(cfg.raw_storage_dir) / source / datetime.now(timezone.utc).strftime('%Y%m%d')
+    root.mkdir(parents=True, exist_ok=True)
+    file_path = root / f'{sha}{suffix}'
+    if not file_path.exists():
+        file_path.write_bytes(content)
+    return sha, file_path
+
+
 def save_raw_document(
     db: Session,
     *,
@@ -22,7 +36,6 @@ def save_raw_document(
     doc_type: str,
     run_id: str,
 ) -> UUID:
-    cfg = get_settings()
     sha = hashlib.sha256(content).hexdigest()
     existing = db.scalar(
         select(RawDocument).where(
@@ -33,12 +46,7 @@ def save_raw_document(
     )
     if existing is not None:
         return existing.id
-    suffix = Path(urlparse(url or '').path).suffix or '.bin'
-    root = Path(cfg.raw_storage_dir) / source / datetime.now(timezone.utc).strftime('%Y%m%d')
-    root.mkdir(parents=True, exist_ok=True)
-    file_path = root / f'{sha}{suffix}'
-    if not file_path.exists():
-        file_path.write_bytes(content)
+    _, file_path = write_raw_content(source=source, url=url, content=content)
     doc = RawDocument(
         source=source,
         source_url=url,
@@ -63,16 +71,25 @@ def save_raw_document_from_path(
     file_path: Path,
     doc_type: str,
     run_id: str,
+    sha256: str | None = None,
+    prefer_hardlink: bool = False,
 ) -> UUID:
-    """Persist a downloaded file into raw storage and register it in raw_documents."""
+    """Persist a downloaded file into raw storage and register it in raw_documents.
+
+    Callers that already hashed the file pass `sha256` to skip a re-read; `prefer_hardlink`
+    links the file into raw storage (same filesystem) instead of copying its bytes.
+    """
     cfg = get_settings()
     suffix = Path(urlparse(url or '').path).suffix or file_path.suffix or '.bin'
 
-    h = hashlib.sha256()
-    with file_path.open('rb') as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b''):
-            h.update(chunk)
-    sha256_hex = h.hexdigest()
+    if sha256:
+        sha256_hex = sha256.lower()
+    else:
+        h = hashlib.sha256()
+        with file_path.open('rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        sha256_hex = h.hexdigest()
 
     existing = db.scalar(
         select(RawDocument).where(
@@ -87,6 +104,11 @@ def save_raw_document_from_path(
     root = Path(cfg.raw_storage_dir) / source / datetime.now(timezone.utc).strftime('%Y%m%d')
     root.mkdir(parents=True, exist_ok=True)
     dest_path = root / f'{sha256_hex}{suffix}'
+    if not dest_path.exists() and prefer_hardlink:
+        try:
+            os.link(file_path, dest_path)
+        except OSError:
+            pass
     if not dest_path.exists():
         with file_path.open('rb') as src, dest_path.open('wb') as dst:
             for chunk in iter(lambda: src.read(1024 * 1024), b''):
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import desc, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, desc, func, select
+from sqlalchemy.orm import Session, joinedload
 
 from app.models import ChangeLog, Company, Product
 
@@ -26,6 +26,37 @@ def get_change_stats(db: Session, *, days: int = 30) -> tuple[int, dict[str, int
     return total, by_type
 
 
+def build_changes_export_query(
+    *,
+    days: int = 30,
+    change_type: str | None = None,
+    q: str | None = None,
+    company: str | None = None,
+    reg_no: str | None = None,
+) -> Select[tuple[ChangeLog, Product]]:
+    """Same filters as list_recent_changes, unpaged and with a stable order for streaming exports."""
+    since = _since_days(days)
+    stmt = (
+        select(ChangeLog, Product)
+        .join(Product, ChangeLog.product_id == Product.id)
+        .options(joinedload(Product.company))
+        .where(
+            ChangeLog.entity_type == 'product',
+            ChangeLog.change_date >= since,
+            Product.is_ivd.is_(True),
+        )
+    )
+    if change_type:
+        stmt = stmt.where(ChangeLog.change_type == str(change_type).strip())
+    if q:
+        stmt = stmt.where(Product.name.ilike(f'%{str(q).strip()}%'))
+    if reg_no:
+        stmt = stmt.where(Product.reg_no.ilike(f'%{str(reg_no).strip()}%'))
+    if company:
+        stmt = stmt.join(Company, Company.id == Product.company_id).where(Company.name.ilike(f'%{str(company).strip()}%'))
+    return stmt.order_by(desc(ChangeLog.change_date), desc(ChangeLog.id))
+
+
 def list_recent_changes(
     db: Session,
     *,
@@ -85,30 +116,6 @@ def list_recent_changes(
     return list(db.execute(stmt).all()), total
 
 
-def list_changes_for_export(
-    db: Session,
-    *,
-    days: int = 30,
-    limit: int = 5000,
-    change_type: str | None = None,
-    q: str | None = None,
-    company: str | None = None,
-    reg_no: str | None = None,
-) -> list[tuple[ChangeLog, Product]]:
-    rows, _ = list_recent_changes(
-        db,
-        days=days,
-        limit=max(1, int(limit)),
-        page=1,
-        page_size=max(1, int(limit)),
-        change_type=change_type,
-        q=q,
-        company=company,
-        reg_no=reg_no,
-    )
-    return rows
-
-
 def get_change_detail(db: Session, *, change_id: int) -> ChangeLog | None:
     try:
         cid = int(change_id)
@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import base64
+import json
+import threading
 import uuid
-from typing import Literal
+from datetime import date, datetime
+from time import monotonic
+from typing import Any, Literal
 
-from sqlalchemy import Select, String, asc, desc, func, or_, select
+from sqlalchemy import Select, String, and_, asc, case, desc, func, literal, or_, select, tuple_, union
 from sqlalchemy.orm import Session, joinedload
 
 from app.models import Company, Product
 
-SortBy = Literal['updated_at', 'approved_date', 'expiry_date', 'name']
+SortBy = Literal['updated_at', 'approved_date', 'expiry_date', 'name', 'relevance']
 SortOrder = Literal['asc', 'desc']
+TotalMode = Literal['exact', 'cached']
+
+# Short-lived COUNT(*) cache for paged search. Totals only drift by ingest volume between pages,
+# so a deep cursor walk can reuse the page-1 count instead of recounting the filtered set.
+SEARCH_COUNT_CACHE_TTL_SECONDS = 60.0
+_SEARCH_COUNT_CACHE_MAX_ENTRIES = 2048
+_search_count_cache: dict[tuple, tuple[float, int]] = {}
+_search_count_cache_lock = threading.Lock()
+
+_SORT_COLUMNS = {
+    'updated_at': Product.updated_at,
+    'approved_date': Product.approved_date,
+    'expiry_date': Product.expiry_date,
+    'name': Product.name,
+}
 
 
 def build_search_query(
@@ -30,15 +50,7 @@ def build_search_query(
     elif ivd_filter is False:
         stmt = stmt.where(Product.is_ivd.is_(False))
     if query:
-        like = f'%{query}%'
-        stmt = stmt.where(
-            or_(
-                Product.name.ilike(like),
-                Product.udi_di.ilike(like),
-                Product.reg_no.ilike(like),
-                Company.name.ilike(like),
-            )
-        )
+        stmt = stmt.where(Product.id.in_(_matching_product_ids(query)))
     if company:
         stmt = stmt.where(Company.name.ilike(f'%{company}%'))
     if reg_no:
@@ -55,6 +67,157 @@ def build_search_query(
     return stmt
 
 
+def _matching_product_ids(query: str):
+    # One branch per indexed column (pg_trgm GIN, see migration 0003). A single OR across
+    # products and the joined companies table cannot use those indexes and degrades to a seq scan;
+    # a UNION of per-column id sets lets each branch run as a bitmap index scan.
+    like = f'%{query}%'
+    return union(
+        select(Product.id).where(Product.name.ilike(like)),
+        select(Product.id).where(Product.udi_di.ilike(like)),
+        select(Product.id).where(Product.reg_no.ilike(like)),
+        select(Product.id).join(Company, Product.company_id == Company.id).where(Company.name.ilike(like)),
+    )
+
+
+def _search_relevance(query: str):
+    """Relevance score in [0, 2]: exact identifier hits first, then prefix hits, then trigram similarity."""
+    q = query.strip()
+    exact = case(
+        (or_(Product.reg_no == q, Product.udi_di == q), literal(1.0)),
+        (or_(Product.name == q, Company.name == q), literal(0.8)),
+        (or_(Product.reg_no.ilike(f'{q}%'), Product.name.ilike(f'{q}%')), literal(0.5)),
+        else_=literal(0.0),
+    )
+    similarity = func.greatest(
+        func.similarity(func.coalesce(Product.name, ''), q),
+        func.similarity(func.coalesce(Product.reg_no, ''), q),
+        func.similarity(func.coalesce(Product.udi_di, ''), q),
+        func.similarity(func.coalesce(Company.name, ''), q) * 0.8,
+    )
+    return exact + similarity
+
+
+def _order_by(sort_by: SortBy, sort_order: SortOrder, query: str | None) -> tuple:
+    if sort_by == 'relevance':
+        if query and query.strip():
+            return (desc(_search_relevance(query)), Product.updated_at.desc(), Product.id.desc())
+        sort_by = 'updated_at'
+    sort_col = _SORT_COLUMNS[sort_by]
+    order_expr = asc(sort_col) if sort_order == 'asc' else desc(sort_col)
+    return (order_expr, Product.id.desc())
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(item: Product, sort_by: SortBy, sort_order: SortOrder) -> str:
+    """Opaque keyset cursor pointing just after `item` in (sort_col, id DESC) order."""
+    if sort_by == 'relevance':
+        raise ValueError('cursor pagination is not supported for sort_by=relevance')
+    payload = {
+        's': sort_by,
+        'o': sort_order,
+        'v': _cursor_value(getattr(item, sort_by)),
+        'id': str(item.id),
+    }
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('utf-8').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: SortBy, sort_order: SortOrder) -> tuple[Any, uuid.UUID]:
+    if sort_by == 'relevance':
+        raise ValueError('cursor pagination is not supported for sort_by=relevance')
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('utf-8')).decode('utf-8'))
+        last_id = uuid.UUID(str(payload['id']))
+        value = payload.get('v')
+    except Exception as exc:
+        raise ValueError('invalid cursor') from exc
+    if payload.get('s') != sort_by or payload.get('o') != sort_order:
+        raise ValueError('cursor does not match sort_by/sort_order')
+    if value is not None and sort_by == 'updated_at':
+        value = datetime.fromisoformat(str(value))
+    elif value is not None and sort_by in {'approved_date', 'expiry_date'}:
+        value = date.fromisoformat(str(value))
+    return value, last_id
+
+
+def _keyset_filter(sort_by: SortBy, sort_order: SortOrder, value: Any, last_id: uuid.UUID):
+    # Mirrors _order_by: sort_col ASC|DESC (Postgres default NULLS LAST for ASC, NULLS FIRST for DESC),
+    # then id DESC as the tie-breaker. The non-null part is written so it can seed an index range scan
+    # on the (sort_col, id DESC) indexes from migration 0056; the NULL tail is kept as its own branch.
+    col = _SORT_COLUMNS[sort_by]
+    tie = Product.id < last_id
+    if value is None:
+        same_null = and_(col.is_(None), tie)
+        return same_null if sort_order == 'asc' else or_(same_null, col.is_not(None))
+    if sort_order == 'asc':
+        # id sorts opposite to col here, so no row comparison applies: `col >= value` is the index
+        # bound and the OR only filters the ties on the boundary value.
+        after = and_(col >= value, or_(col > value, and_(col == value, tie)))
+        return or_(after, col.is_(None))
+    # Both columns sort DESC, so the row comparison matches the index order (NULL cols sort first
+    # and compare as unknown, which correctly drops them).
+    return tuple_(col, Product.id) < (value, last_id)
+
+
+def _resolve_total_mode(total_mode: TotalMode | None, cursor: str | None) -> TotalMode:
+    # Cursor pages default to the cached total: recounting the filtered set on every page would make
+    # a deep keyset walk O(catalogue) per request again.
+    if total_mode is not None:
+        return total_mode
+    return 'cached' if cursor else 'exact'
+
+
+def _count_total(db: Session, stmt: Select, *, scope: str, filters: dict[str, Any], total_mode: TotalMode) -> int:
+    if total_mode != 'cached':
+        return int(db.scalar(select(func.count()).select_from(stmt.subquery())) or 0)
+    key = (scope, tuple(sorted((k, str(v).strip() if v is not None else None) for k, v in filters.items())))
+    now = monotonic()
+    with _search_count_cache_lock:
+        hit = _search_count_cache.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+    total = int(db.scalar(select(func.count()).select_from(stmt.subquery())) or 0)
+    with _search_count_cache_lock:
+        if len(_search_count_cache) >= _SEARCH_COUNT_CACHE_MAX_ENTRIES:
+            for k in [k for k, (exp, _) in _search_count_cache.items() if exp <= now] or list(_search_count_cache)[:1]:
+                _search_count_cache.pop(k, None)
+        _search_count_cache[key] = (now + SEARCH_COUNT_CACHE_TTL_SECONDS, total)
+    return total
+
+
+def _fetch_page(
+    db: Session,
+    stmt: Select,
+    *,
+    query: str | None,
+    page: int,
+    page_size: int,
+    sort_by: SortBy,
+    sort_order: SortOrder,
+    cursor: str | None,
+) -> list[Product]:
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        stmt = stmt.where(_keyset_filter(sort_by, sort_order, value, last_id))
+        paged = stmt.order_by(*_order_by(sort_by, sort_order, query)).limit(page_size)
+    else:
+        paged = stmt.order_by(*_order_by(sort_by, sort_order, query)).offset((page - 1) * page_size).limit(page_size)
+    return list(db.scalars(paged).unique().all())
+
+
+def next_cursor(items: list[Product], *, page_size: int, sort_by: SortBy, sort_order: SortOrder) -> str | None:
+    if sort_by == 'relevance' or not items or len(items) < page_size:
+        return None
+    return encode_cursor(items[-1], sort_by, sort_order)
+
+
 def search_products(
     db: Session,
     query: str | None,
@@ -66,20 +229,27 @@ def search_products(
     page_size: int,
     sort_by: SortBy,
     sort_order: SortOrder,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
 ) -> tuple[list[Product], int]:
     base_stmt = build_search_query(query, company, reg_no, status, include_unverified=include_unverified)
-    total = db.scalar(select(func.count()).select_from(base_stmt.subquery())) or 0
-
-    sort_col = {
-        'updated_at': Product.updated_at,
-        'approved_date': Product.approved_date,
-        'expiry_date': Product.expiry_date,
-        'name': Product.name,
-    }[sort_by]
-    order_expr = asc(sort_col) if sort_order == 'asc' else desc(sort_col)
-
-    stmt = base_stmt.order_by(order_expr, Product.id.desc()).offset((page - 1) * page_size).limit(page_size)
-    items = list(db.scalars(stmt).unique().all())
+    total = _count_total(
+        db,
+        base_stmt,
+        scope='search',
+        filters={'q': query, 'company': company, 'reg_no': reg_no, 'status': status, 'unverified': include_unverified},
+        total_mode=_resolve_total_mode(total_mode, cursor),
+    )
+    items = _fetch_page(
+        db,
+        base_stmt,
+        query=query,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+    )
     return items, total
 
 
@@ -97,6 +267,8 @@ def list_full_products(
     page_size: int,
     sort_by: SortBy,
     sort_order: SortOrder,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
 ) -> tuple[list[Product], int]:
     stmt = build_search_query(query, company, reg_no, status, include_unverified=include_unverified)
     if class_prefix:
@@ -104,16 +276,32 @@ def list_full_products(
     if ivd_category:
         stmt = stmt.where(Product.ivd_category == ivd_category)
 
-    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
-    sort_col = {
-        'updated_at': Product.updated_at,
-        'approved_date': Product.approved_date,
-        'expiry_date': Product.expiry_date,
-        'name': Product.name,
-    }[sort_by]
-    order_expr = asc(sort_col) if sort_order == 'asc' else desc(sort_col)
-    rows = db.scalars(stmt.order_by(order_expr, Product.id.desc()).offset((page - 1) * page_size).limit(page_size))
-    return list(rows.unique().all()), int(total)
+    total = _count_total(
+        db,
+        stmt,
+        scope='full',
+        filters={
+            'q': query,
+            'company': company,
+            'reg_no': reg_no,
+            'status': status,
+            'unverified': include_unverified,
+            'class_prefix': class_prefix,
+            'ivd_category': ivd_category,
+        },
+        total_mode=_resolve_total_mode(total_mode, cursor),
+    )
+    items = _fetch_page(
+        db,
+        stmt,
+        query=query,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+    )
+    return items, int(total)
 
 
 def get_product(db: Session, product_id: str) -> Product | None:
@@ -139,6 +327,8 @@ def admin_search_products(
     page_size: int,
     sort_by: SortBy,
     sort_order: SortOrder,
+    cursor: str | None = None,
+    total_mode: TotalMode | None = None,
 ) -> tuple[list[Product], int]:
     base_stmt = build_search_query(query, company, reg_no, status, ivd_filter=is_ivd)
     if ivd_category:
@@ -146,16 +336,31 @@ def admin_search_products(
     if ivd_version:
         # ivd_version is numeric in current schema; compare as string for compatibility.
         base_stmt = base_stmt.where(func.cast(Product.ivd_version, String) == str(ivd_version))
-    total = db.scalar(select(func.count()).select_from(base_stmt.subquery())) or 0
-    sort_col = {
-        'updated_at': Product.updated_at,
-        'approved_date': Product.approved_date,
-        'expiry_date': Product.expiry_date,
-        'name': Product.name,
-    }[sort_by]
-    order_expr = asc(sort_col) if sort_order == 'asc' else desc(sort_col)
-    stmt = base_stmt.order_by(order_expr, Product.id.desc()).offset((page - 1) * page_size).limit(page_size)
-    items = list(db.scalars(stmt).unique().all())
+    total = _count_total(
+        db,
+        base_stmt,
+        scope='admin',
+        filters={
+            'q': query,
+            'company': company,
+            'reg_no': reg_no,
+            'status': status,
+            'is_ivd': is_ivd,
+            'ivd_category': ivd_category,
+            'ivd_version': ivd_version,
+        },
+        total_mode=_resolve_total_mode(total_mode, cursor),
+    )
+    items = _fetch_page(
+        db,
+        base_stmt,
+        query=query,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+    )
     return items, int(total)
 
 
@@ -93,6 +93,7 @@ class SearchData(BaseModel):
     sort_by: str
     sort_order: str
     items: list[SearchItem]
+    next_cursor: str | None = None
 
 
 class StatusItem(BaseModel):
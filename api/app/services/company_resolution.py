@@ -1,47 +1,18 @@
 from __future__ import annotations
 
 import json
-import re
-import unicodedata
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app.models import ChangeLog, Company, CompanyAlias, Product
-
-
-_DEFAULT_SUFFIXES = [
-    "有限责任公司",
-    "股份有限公司",
-    "有限公司",
-    "集团有限公司",
-    "集团",
-    "股份",
-    "公司",
-    "科技有限公司",
-    "科技",
-    "医疗器械有限公司",
-    "医疗器械",
-    "医疗",
-    "器械",
-    "生物科技有限公司",
-    "生物科技",
-    "生物",
-]
-
-_COMPANY_RAW_KEYS = (
-    "company_name",
-    "manufacturer",
-    "注册人名称",
-    "生产企业名称",
-    "ylqxzcrbarmc",
-)
+from app.services.normalize_keys import company_raw_name, normalize_company_name
 
 
 @dataclass
@@ -71,68 +42,15 @@ def load_company_alias_seed(path: str | Path) -> CompanyAliasSeed:
     return CompanyAliasSeed(remove_suffixes=remove_suffixes, replacements=repl)
 
 
-def normalize_company_name(name: str | None, *, seed: CompanyAliasSeed | None = None) -> str | None:
-    if name is None:
-        return None
-    s = str(name).strip()
-    if not s:
-        return None
-
-    s = unicodedata.normalize("NFKC", s)
-    s = s.replace("（", "(").replace("）", ")")
-    s = re.sub(r"\s+", "", s)
-
-    # Strip surrounding brackets/punct.
-    s = s.strip("()[]{}<>，,。.;；:：/\\|·")
-
-    # Apply seed replacements early (after basic normalization).
-    if seed and seed.replacements:
-        s = seed.replacements.get(s, s)
-
-    # Iteratively strip known suffixes (seed + default) only when at the end.
-    suffixes = list(dict.fromkeys((seed.remove_suffixes if seed else []) + _DEFAULT_SUFFIXES))
-    suffixes = sorted(suffixes, key=len, reverse=True)
-    changed = True
-    while changed:
-        changed = False
-        for suf in suffixes:
-            if suf and s.endswith(suf) and len(s) > len(suf):
-                s = s[: -len(suf)]
-                changed = True
-                break
-        if changed:
-            s = s.strip("()[]{}<>，,。.;；:：/\\|·")
-
-    # Final cleanup: keep Chinese chars, digits, ASCII letters.
-    out = []
-    for ch in s:
-        o = ord(ch)
-        if "0" <= ch <= "9":
-            out.append(ch)
-        elif "A" <= ch.upper() <= "Z":
-            out.append(ch.upper())
-        elif 0x4E00 <= o <= 0x9FFF:
-            out.append(ch)
-        # else drop
-    result = "".join(out)
-    return result or None
-
-
 def extract_company_raw_from_product(p: Product) -> str | None:
     # Prefer explicit company link.
+    company_name = None
     try:
         if getattr(p, "company", None) is not None and getattr(p.company, "name", None):
-            return str(p.company.name)
+            company_name = str(p.company.name)
     except Exception:
         pass
-
-    for payload in (getattr(p, "raw_json", None), getattr(p, "raw", None)):
-        if isinstance(payload, dict):
-            for k in _COMPANY_RAW_KEYS:
-                v = payload.get(k)
-                if v is not None and str(v).strip():
-                    return str(v).strip()
-    return None
+    return company_raw_name(company_name, getattr(p, "raw_json", None), getattr(p, "raw", None))
 
 
 def upsert_company_alias(
@@ -178,41 +96,99 @@ def upsert_company_alias(
 
 
 def backfill_products_for_alias(*, alias_name: str, company_id: UUID, batch_size: int = 500) -> dict[str, Any]:
-    """Best-effort rebind for products whose normalized company raw matches alias_name."""
+    """Rebind products whose products.company_name_norm equals alias_name.
+
+    Indexed lookup + one bulk UPDATE and one bulk change_log INSERT per batch, so the cost follows
+    the number of matching products. Rows whose key was never computed need `company:norm-backfill`.
+    """
     db = SessionLocal()
     try:
+        company_name = db.scalar(select(Company.name).where(Company.id == company_id))
+        new_norm = normalize_company_name(company_name) if company_name else alias_name
+        rows = db.execute(
+            select(Product.id, Product.company_id).where(
+                Product.company_name_norm == alias_name,
+                Product.company_id.is_distinct_from(company_id),
+            )
+        ).all()
         updated = 0
-        scanned = 0
-        q = select(Product).order_by(Product.updated_at.desc()).execution_options(yield_per=1000)
-        for p in db.execute(q).scalars():
-            scanned += 1
-            raw_name = extract_company_raw_from_product(p)
-            norm = normalize_company_name(raw_name)
-            if not norm or norm != alias_name:
-                continue
-            if p.company_id == company_id:
-                continue
-            before_json = {"company_id": (str(p.company_id) if p.company_id else None)}
-            p.company_id = company_id
-            after_json = {"company_id": str(company_id)}
-            db.add(p)
-            db.add(
-                ChangeLog(
-                    product_id=p.id,
-                    entity_type="product",
-                    entity_id=p.id,
-                    change_type="update",
-                    changed_fields={"company_id": {"old": before_json["company_id"], "new": after_json["company_id"]}},
-                    before_json=before_json,
-                    after_json=after_json,
-                    after_raw={"backfill": "company_alias_rebind", "alias_name": alias_name},
-                    source_run_id=None,
-                )
+        size = max(1, int(batch_size))
+        for i in range(0, len(rows), size):
+            chunk = rows[i : i + size]
+            db.execute(
+                update(Product)
+                .where(Product.id.in_([r.id for r in chunk]))
+                .values(company_id=company_id, company_name_norm=new_norm)
+                .execution_options(synchronize_session=False)
             )
-            updated += 1
-            if updated % max(1, batch_size) == 0:
-                db.commit()
-        db.commit()
-        return {"ok": True, "alias_name": alias_name, "company_id": str(company_id), "scanned": scanned, "updated": updated}
+            db.execute(
+                insert(ChangeLog),
+                [
+                    {
+                        "product_id": r.id,
+                        "entity_type": "product",
+                        "entity_id": r.id,
+                        "change_type": "update",
+                        "changed_fields": {
+                            "company_id": {"old": (str(r.company_id) if r.company_id else None), "new": str(company_id)}
+                        },
+                        "before_json": {"company_id": (str(r.company_id) if r.company_id else None)},
+                        "after_json": {"company_id": str(company_id)},
+                        "after_raw": {"backfill": "company_alias_rebind", "alias_name": alias_name},
+                        "source_run_id": None,
+                    }
+                    for r in chunk
+                ],
+            )
+            db.commit()
+            updated += len(chunk)
+        return {"ok": True, "alias_name": alias_name, "company_id": str(company_id), "scanned": len(rows), "updated": updated}
     finally:
         db.close()
+
+
+def backfill_company_name_norm(
+    db: Session,
+    *,
+    batch_size: int = 2000,
+    only_missing: bool = False,
+    product_ids: list[UUID] | None = None,
+) -> dict[str, Any]:
+    """(Re)compute products.company_name_norm in id-keyset batches; needed once after adding the column.
+
+    `product_ids` limits the pass to rows written outside the ORM (e.g. restored from products_archive).
+    """
+    if product_ids is not None and not product_ids:
+        return {"scanned": 0, "updated": 0, "only_missing": bool(only_missing)}
+    size = max(1, int(batch_size))
+    scanned = 0
+    updated = 0
+    last_id = None
+    while True:
+        stmt = (
+            select(Product.id, Product.company_name_norm, Company.name, Product.raw_json, Product.raw)
+            .outerjoin(Company, Company.id == Product.company_id)
+            .order_by(Product.id.asc())
+            .limit(size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(Product.id > last_id)
+        if only_missing:
+            stmt = stmt.where(Product.company_name_norm.is_(None))
+        if product_ids is not None:
+            stmt = stmt.where(Product.id.in_(product_ids))
+        rows = db.execute(stmt).all()
+        if not rows:
+            break
+        scanned += len(rows)
+        last_id = rows[-1][0]
+        changes = []
+        for pid, current, company_name, raw_json, raw in rows:
+            norm = normalize_company_name(company_raw_name(company_name, raw_json, raw))
+            if norm != current:
+                changes.append({"id": pid, "company_name_norm": norm})
+        if changes:
+            db.bulk_update_mappings(Product, changes)
+            updated += len(changes)
+        db.commit()
+    return {"scanned": scanned, "updated": updated, "only_missing": bool(only_missing)}
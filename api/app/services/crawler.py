@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import hashlib
+import io
+import os
 import re
 import tarfile
 import zipfile
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, BinaryIO, Iterable
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
 
 from app.core.config import Settings
+from app.sources.nmpa_udi.parser import iter_udi_csv_rows
 
 DAILY_PATTERN = re.compile(r'(daily|每日|update|增量)', re.IGNORECASE)
 MD5_PATTERN = re.compile(r'^[a-fA-F0-9]{32}$')
@@ -65,6 +69,12 @@ def fetch_latest_package_meta(settings: Settings) -> DailyPackage:
 
 
 def download_file(url: str, destination: Path) -> Path:
+    return download_file_with_hashes(url, destination, ())[0]
+
+
+def download_file_with_hashes(url: str, destination: Path, algorithms: Iterable[str]) -> tuple[Path, dict[str, str]]:
+    """Download `url` to `destination`, computing the requested digests over the bytes as they are written."""
+    hashers = {name: hashlib.new(name) for name in dict.fromkeys(a.lower() for a in algorithms)}
     destination.parent.mkdir(parents=True, exist_ok=True)
     with requests.get(url, timeout=120, stream=True) as response:
         response.raise_for_status()
@@ -72,7 +82,9 @@ def download_file(url: str, destination: Path) -> Path:
             for chunk in response.iter_content(chunk_size=8192):
                 if chunk:
                     f.write(chunk)
-    return destination
+                    for h in hashers.values():
+                        h.update(chunk)
+    return destination, {name: h.hexdigest() for name, h in hashers.items()}
 
 
 def _calculate_hash(file_path: Path, algorithm: str) -> str:
@@ -102,26 +114,21 @@ def verify_md5(file_path: Path, expected_md5: str | None) -> bool:
     return verify_checksum(file_path, expected_md5, 'md5')
 
 
-def extract_to_staging(archive_path: Path, staging_dir: Path) -> Path:
-    staging_dir.mkdir(parents=True, exist_ok=True)
-    def _extract_one(src: Path, dst: Path) -> bool:
-        # Prefer content-based detection because upstream attachments may carry
-        # non-canonical names (e.g. `download.html?path=...` while content is ZIP).
-        if zipfile.is_zipfile(src):
-            with zipfile.ZipFile(src, 'r') as zf:
-                zf.extractall(dst)
-            return True
-        if tarfile.is_tarfile(src) or src.suffix.lower() in {'.gz', '.tgz'} or src.name.endswith('.tar.gz'):
-            with tarfile.open(src, 'r:*') as tf:
-                tf.extractall(dst)
-            return True
-        return False
+def _extract_one(src: Path, dst: Path) -> bool:
+    # Prefer content-based detection because upstream attachments may carry
+    # non-canonical names (e.g. `download.html?path=...` while content is ZIP).
+    if zipfile.is_zipfile(src):
+        with zipfile.ZipFile(src, 'r') as zf:
+            zf.extractall(dst)
+        return True
+    if tarfile.is_tarfile(src) or src.suffix.lower() in {'.gz', '.tgz'} or src.name.endswith('.tar.gz'):
+        with tarfile.open(src, 'r:*') as tf:
+            tf.extractall(dst)
+        return True
+    return False
 
-    if not _extract_one(archive_path, staging_dir):
-        target = staging_dir / archive_path.name
-        target.write_bytes(archive_path.read_bytes())
-        return staging_dir
 
+def _extract_nested(staging_dir: Path) -> None:
     # Recursively extract nested archive files up to a safe depth.
     for _ in range(4):
         nested = [p for p in staging_dir.rglob('*') if p.is_file() and (zipfile.is_zipfile(p) or tarfile.is_tarfile(p))]
@@ -135,4 +142,81 @@ def extract_to_staging(archive_path: Path, staging_dir: Path) -> Path:
                 extracted_any = True
         if not extracted_any:
             break
+
+
+def extract_to_staging(archive_path: Path, staging_dir: Path) -> Path:
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    if not _extract_one(archive_path, staging_dir):
+        target = staging_dir / archive_path.name
+        target.write_bytes(archive_path.read_bytes())
+        return staging_dir
+
+    _extract_nested(staging_dir)
     return staging_dir
+
+
+@dataclass
+class PackageExtract:
+    variant_rows: list[dict[str, Any]]
+    csv_errors: list[dict[str, str]]
+
+
+class _TeeReader(io.RawIOBase):
+    """Raw reader that copies every byte read from `src` into `sink`."""
+
+    def __init__(self, src: BinaryIO, sink: BinaryIO) -> None:
+        self._src = src
+        self._sink = sink
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self._src.read(len(b))
+        n = len(data)
+        b[:n] = data
+        if n:
+            self._sink.write(data)
+        return n
+
+
+def _member_target(staging_dir: Path, member: zipfile.ZipInfo) -> Path:
+    # Same sanitising as ZipFile.extract on POSIX: drop drive letters, empty, "." and ".." components.
+    arcname = os.path.splitdrive(member.filename)[1]
+    parts = [x for x in arcname.split('/') if x not in ('', os.path.curdir, os.path.pardir)]
+    return staging_dir.joinpath(*parts)
+
+
+def extract_package_to_staging(archive_path: Path, staging_dir: Path) -> PackageExtract | None:
+    """Extract a UDI package in one pass over the archive, collecting top-level CSV variant rows.
+
+    CSV members are parsed while they are being written to staging. A CSV member that fails to
+    parse is still extracted in full; its error is returned in `csv_errors` and its rows dropped.
+    Returns None when the package is not a zip (no CSV variant rows available); staging
+    extraction then falls back to `extract_to_staging`.
+    """
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    if not zipfile.is_zipfile(archive_path):
+        extract_to_staging(archive_path, staging_dir)
+        return None
+
+    out = PackageExtract(variant_rows=[], csv_errors=[])
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        for member in zf.infolist():
+            if member.is_dir() or not member.filename.lower().endswith('.csv'):
+                zf.extract(member, staging_dir)
+                continue
+            target = _member_target(staging_dir, member)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(member) as src, target.open('wb') as sink:
+                tee = io.BufferedReader(_TeeReader(src, sink))
+                try:
+                    out.variant_rows.extend(list(iter_udi_csv_rows(tee)))
+                except Exception as exc:
+                    out.csv_errors.append({'file': member.filename, 'error': str(exc)})
+                # Finish writing whatever the CSV reader did not consume.
+                while tee.read(1024 * 1024):
+                    pass
+
+    _extract_nested(staging_dir)
+    return out
@@ -8,6 +8,7 @@ from sqlalchemy import delete, func, select, text
 from sqlalchemy.orm import Session
 
 from app.models import ChangeLog, DataCleanupRun, Product
+from app.services.company_resolution import backfill_company_name_norm
 from app.services.metrics import regenerate_daily_metrics
 
 
@@ -217,7 +218,7 @@ def rollback_non_ivd_cleanup(
             skipped_existing=0,
         )
 
-    restored = int(
+    restored_ids = list(
         db.execute(
             text(
                 """
@@ -238,12 +239,13 @@ def rollback_non_ivd_cleanup(
                     SELECT 1 FROM products p
                     WHERE p.id = a.id OR p.udi_di = a.udi_di
                   )
+                RETURNING id
                 """
             ),
             {'bid': batch_id},
-        ).rowcount
-        or 0
+        ).scalars()
     )
+    restored = len(restored_ids)
 
     # Restore change_log evidence for this batch (best-effort, idempotent).
     db.execute(
@@ -292,6 +294,9 @@ def rollback_non_ivd_cleanup(
         )
     )
     db.commit()
+    # Raw INSERT skips the ORM listener and products_archive has no company_name_norm to copy;
+    # without the key, restored rows would be invisible to company alias rebinds.
+    backfill_company_name_norm(db, product_ids=restored_ids)
     # Keep dashboard scope consistent after rollback.
     try:
         regenerate_daily_metrics(db, days=max(1, int(recompute_days)))
@@ -2,16 +2,36 @@ from __future__ import annotations
 
 import csv
 import io
+import logging
+import os
+import time
+import uuid
+import zlib
 from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.config import get_settings
-from app.repositories.changes import list_changes_for_export
-from app.repositories.products import search_products
+from app.db.session import SessionLocal
+from app.models import Product
+from app.repositories.changes import build_changes_export_query
+from app.repositories.products import build_search_query
 from app.repositories.radar import get_export_usage, increase_export_usage
 
+logger = logging.getLogger(__name__)
+
+# Rows fetched per server-side cursor round trip and rows buffered per yielded CSV chunk.
+EXPORT_FETCH_SIZE = 2000
+EXPORT_CHUNK_ROWS = 1000
+# Job files (finished, failed or abandoned) older than this are removed when a new job starts.
+EXPORT_JOB_TTL_SECONDS = 24 * 3600
+
+SEARCH_CSV_HEADER = ['product_id', 'udi_di', 'name', 'model', 'specification', 'category', 'company', 'registration_no']
+CHANGES_CSV_HEADER = ['change_id', 'change_type', 'change_date', 'product_id', 'product_name', 'reg_no', 'udi_di', 'ivd_category', 'company']
+
 
 def _plan_limit(plan: str) -> int:
     settings = get_settings()
@@ -35,71 +55,216 @@ def enforce_export_quota(db: Session, plan: str) -> None:
     increase_export_usage(db, today, plan)
 
 
-def export_search_to_csv(
+def _search_row(item: Product) -> list[Any]:
+    return [
+        str(item.id),
+        item.udi_di,
+        item.name,
+        item.model or '',
+        item.specification or '',
+        item.category or '',
+        item.company.name if item.company else '',
+        item.registration.registration_no if item.registration else '',
+    ]
+
+
+def _change_row(change, product: Product) -> list[Any]:
+    return [
+        int(change.id),
+        str(change.change_type or ''),
+        (change.change_date.isoformat() if change.change_date else ''),
+        str(product.id),
+        product.name,
+        product.reg_no or '',
+        product.udi_di,
+        product.ivd_category or '',
+        (product.company.name if product.company else ''),
+    ]
+
+
+def iter_csv_chunks(header: list[str], rows: Iterable[list[Any]], *, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+    tail = buf.getvalue()
+    if tail:
+        yield tail
+
+
+def search_csv_chunks(
     db: Session,
-    plan: str,
+    *,
     q: str | None,
     company: str | None,
     registration_no: str | None,
-) -> str:
-    enforce_export_quota(db, plan)
-    rows, _ = search_products(db, q, company, registration_no, page=1, page_size=5000)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['product_id', 'udi_di', 'name', 'model', 'specification', 'category', 'company', 'registration_no'])
-    for item in rows:
-        writer.writerow(
-            [
-                str(item.id),
-                item.udi_di,
-                item.name,
-                item.model or '',
-                item.specification or '',
-                item.category or '',
-                item.company.name if item.company else '',
-                item.registration.registration_no if item.registration else '',
-            ]
-        )
-    return output.getvalue()
-
-
-def export_changes_to_csv(
+    fetch_size: int = EXPORT_FETCH_SIZE,
+) -> Iterator[str]:
+    stmt = (
+        build_search_query(q, company, registration_no, None)
+        .options(joinedload(Product.registration))
+        .order_by(Product.id)
+        .execution_options(yield_per=max(1, int(fetch_size)))
+    )
+    rows = (_search_row(item) for item in db.scalars(stmt))
+    return iter_csv_chunks(SEARCH_CSV_HEADER, rows)
+
+
+def changes_csv_chunks(
     db: Session,
     *,
-    plan: str,
     days: int = 30,
     change_type: str | None = None,
     q: str | None = None,
     company: str | None = None,
     reg_no: str | None = None,
-) -> str:
-    enforce_export_quota(db, plan)
-    rows = list_changes_for_export(
-        db,
+    fetch_size: int = EXPORT_FETCH_SIZE,
+) -> Iterator[str]:
+    stmt = build_changes_export_query(
         days=int(days),
-        limit=5000,
         change_type=change_type,
         q=q,
         company=company,
         reg_no=reg_no,
+    ).execution_options(yield_per=max(1, int(fetch_size)))
+    rows = (_change_row(change, product) for change, product in db.execute(stmt))
+    return iter_csv_chunks(CHANGES_CSV_HEADER, rows)
+
+
+def encode_chunks(chunks: Iterable[str], *, gzip: bool = False) -> Iterator[bytes]:
+    if not gzip:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk.encode('utf-8'))
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_export(
+    make_chunks: Callable[[Session], Iterator[str]],
+    *,
+    gzip: bool = False,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[bytes]:
+    """Yield encoded CSV bytes from a dedicated session.
+
+    The request-scoped session is closed once the endpoint returns, before a StreamingResponse
+    body is consumed, so the server-side cursor must live on its own session.
+    """
+    db = session_factory()
+    try:
+        yield from encode_chunks(make_chunks(db), gzip=gzip)
+    finally:
+        db.close()
+
+
+def stream_search_export(
+    *,
+    q: str | None,
+    company: str | None,
+    registration_no: str | None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    return stream_export(
+        lambda db: search_csv_chunks(db, q=q, company=company, registration_no=registration_no),
+        gzip=gzip,
+    )
+
+
+def stream_changes_export(
+    *,
+    days: int = 30,
+    change_type: str | None = None,
+    q: str | None = None,
+    company: str | None = None,
+    reg_no: str | None = None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    return stream_export(
+        lambda db: changes_csv_chunks(db, days=days, change_type=change_type, q=q, company=company, reg_no=reg_no),
+        gzip=gzip,
     )
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['change_id', 'change_type', 'change_date', 'product_id', 'product_name', 'reg_no', 'udi_di', 'ivd_category', 'company'])
-    for change, product in rows:
-        writer.writerow(
-            [
-                int(change.id),
-                str(change.change_type or ''),
-                (change.change_date.isoformat() if change.change_date else ''),
-                str(product.id),
-                product.name,
-                product.reg_no or '',
-                product.udi_di,
-                product.ivd_category or '',
-                (product.company.name if product.company else ''),
-            ]
-        )
-    return output.getvalue()
+
+# Background export jobs: written under <raw_storage_dir>/exports/<owner_id>/. A job is "running"
+# while its .part file exists, "failed" if a .error file exists, and ready once renamed to final.
+
+def _export_jobs_root() -> Path:
+    return Path(get_settings().raw_storage_dir) / 'exports'
+
+
+def _export_job_dir(owner_id: int | str) -> Path:
+    return _export_jobs_root() / str(owner_id)
+
+
+def cleanup_export_jobs(*, ttl_seconds: float = EXPORT_JOB_TTL_SECONDS, now: float | None = None) -> int:
+    """Delete export job files (any owner, any state) last modified more than `ttl_seconds` ago."""
+    root = _export_jobs_root()
+    if not root.is_dir():
+        return 0
+    cutoff = (time.time() if now is None else now) - ttl_seconds
+    removed = 0
+    for path in root.glob('*/*'):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def _export_job_name(job_id: str, gzip: bool) -> str:
+    return f'{job_id}.csv.gz' if gzip else f'{job_id}.csv'
+
+
+def new_export_job(owner_id: int | str, *, gzip: bool = False) -> dict[str, Any]:
+    cleanup_export_jobs()
+    job_id = uuid.uuid4().hex
+    job_dir = _export_job_dir(owner_id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    part = job_dir / (_export_job_name(job_id, gzip) + '.part')
+    part.touch()
+    return {'job_id': job_id, 'status': 'running', 'path': str(job_dir / _export_job_name(job_id, gzip))}
+
+
+def run_export_job(path: str, chunks: Iterable[bytes]) -> None:
+    final = Path(path)
+    part = final.with_name(final.name + '.part')
+    try:
+        with part.open('wb') as fp:
+            for chunk in chunks:
+                fp.write(chunk)
+        os.replace(part, final)
+    except Exception:
+        # The .error file is shown to the client; keep details in the server log only.
+        logger.exception('export job failed: %s', final.name)
+        final.with_name(final.name + '.error').write_text('export failed', encoding='utf-8')
+        part.unlink(missing_ok=True)
+
+
+def export_job_status(owner_id: int | str, job_id: str) -> dict[str, Any]:
+    if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+        return {'job_id': job_id, 'status': 'not_found'}
+    job_dir = _export_job_dir(owner_id)
+    for gzip in (False, True):
+        final = job_dir / _export_job_name(job_id, gzip)
+        if final.exists():
+            return {'job_id': job_id, 'status': 'done', 'path': str(final), 'gzip': gzip, 'size_bytes': final.stat().st_size}
+        if final.with_name(final.name + '.error').exists():
+            return {'job_id': job_id, 'status': 'failed', 'error': final.with_name(final.name + '.error').read_text(encoding='utf-8')}
+        if final.with_name(final.name + '.part').exists():
+            return {'job_id': job_id, 'status': 'running'}
+    return {'job_id': job_id, 'status': 'not_found'}
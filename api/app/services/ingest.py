@@ -6,17 +6,26 @@ import json
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Session
 from bs4 import BeautifulSoup
 
 from app.common.errors import IngestErrorCode
-from app.models import ChangeLog, Company, ConflictQueue, PendingDocument, PendingRecord, Product, ProductRejected
+from app.models import (
+    ChangeLog,
+    Company,
+    ConflictQueue,
+    PendingDocument,
+    PendingRecord,
+    Product,
+    ProductRejected,
+    Registration,
+)
 from app.ivd.classifier import DEFAULT_VERSION as IVD_CLASSIFIER_VERSION, classify
 from app.services.mapping import ProductRecord, diff_fields, map_raw_record
 from app.services.nmpa_assets import record_shadow_diff_failure, shadow_write_nmpa_snapshot_and_diffs
@@ -52,89 +61,218 @@ def is_valid_product_name(name: str | None) -> bool:
     return True
 
 
-def load_staging_records(staging_dir: Path) -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-
-    def _load_xml_records(file_path: Path) -> list[dict[str, Any]]:
-        out: list[dict[str, Any]] = []
-        try:
-            # Stream parse large XML files and only keep <device> records.
-            for _event, elem in ET.iterparse(file_path, events=('end',)):
-                if elem.tag != 'device':
+def _xml_device_row(elem: ET.Element) -> dict[str, Any]:
+    row: dict[str, Any] = {}
+    for child in list(elem):
+        # Keep flat scalar fields; selectively retain nested lists we need for UDI contract.
+        if len(child) == 0:
+            row[child.tag] = (child.text or '').strip()
+            continue
+        if child.tag in {"packingList", "storageList"}:
+            items: list[dict[str, Any]] = []
+            for item in list(child):
+                if len(item) == 0:
                     continue
-                row: dict[str, Any] = {}
-                for child in list(elem):
-                    # Keep flat scalar fields; selectively retain nested lists we need for UDI contract.
-                    if len(child) == 0:
-                        row[child.tag] = (child.text or '').strip()
-                        continue
-                    if child.tag in {"packingList", "storageList"}:
-                        items: list[dict[str, Any]] = []
-                        for item in list(child):
-                            if len(item) == 0:
-                                continue
-                            d: dict[str, Any] = {}
-                            for leaf in list(item):
-                                if len(leaf) == 0:
-                                    d[leaf.tag] = (leaf.text or "").strip()
-                            if d:
-                                items.append(d)
-                        if items:
-                            row[child.tag] = items
-                # Canonical structured JSON for contract consumers (deterministic from XML).
-                row["packaging_json"] = parse_packing_list(elem)
-                row["storage_json"] = parse_storage_list(elem)
-                if row:
-                    out.append(row)
-                elem.clear()
-            return out
-        except ET.ParseError:
-            # Fallback for malformed XML tokens in upstream package.
-            text = file_path.read_text(encoding='utf-8', errors='ignore')
-            soup = BeautifulSoup(text, 'html.parser')
-            for dev in soup.find_all('device'):
-                row: dict[str, Any] = {}
-                for child in dev.find_all(recursive=False):
-                    if child.find(True, recursive=False) is None:
-                        row[child.name] = child.get_text(strip=True)
-                        continue
-                    if child.name in {"packingList", "storageList"}:
-                        items: list[dict[str, Any]] = []
-                        for item in child.find_all(recursive=False):
-                            d: dict[str, Any] = {}
-                            for leaf in item.find_all(recursive=False):
-                                if leaf.find(True, recursive=False) is not None:
-                                    continue
-                                d[str(leaf.name)] = leaf.get_text(strip=True)
-                            if d:
-                                items.append(d)
-                        if items:
-                            row[child.name] = items
-                if row:
-                    out.append(row)
-        return out
-
+                d: dict[str, Any] = {}
+                for leaf in list(item):
+                    if len(leaf) == 0:
+                        d[leaf.tag] = (leaf.text or "").strip()
+                if d:
+                    items.append(d)
+            if items:
+                row[child.tag] = items
+    # Canonical structured JSON for contract consumers (deterministic from XML).
+    row["packaging_json"] = parse_packing_list(elem)
+    row["storage_json"] = parse_storage_list(elem)
+    return row
+
+
+def _iter_xml_records(file_path: Path) -> Iterator[dict[str, Any]]:
+    try:
+        # Stream parse large XML files and only keep <device> records.
+        context = ET.iterparse(file_path, events=('start', 'end'))
+        _event, root = next(context)
+        # Open elements, so a finished <device> can be detached from its actual parent
+        # (it may sit under a wrapper such as <devices>, not directly under root).
+        stack = [root]
+        for event, elem in context:
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag != 'device':
+                continue
+            row = _xml_device_row(elem)
+            if row:
+                yield row
+            elem.clear()
+            # Drop finished <device> nodes from the tree so memory stays flat per file.
+            if stack:
+                stack[-1].remove(elem)
+        return
+    except (ET.ParseError, StopIteration):
+        pass
+    # Fallback for malformed XML tokens in upstream package.
+    # Rows already yielded before the parse error are kept, matching the list-based loader.
+    text = file_path.read_text(encoding='utf-8', errors='ignore')
+    soup = BeautifulSoup(text, 'html.parser')
+    for dev in soup.find_all('device'):
+        row: dict[str, Any] = {}
+        for child in dev.find_all(recursive=False):
+            if child.find(True, recursive=False) is None:
+                row[child.name] = child.get_text(strip=True)
+                continue
+            if child.name in {"packingList", "storageList"}:
+                items: list[dict[str, Any]] = []
+                for item in child.find_all(recursive=False):
+                    d: dict[str, Any] = {}
+                    for leaf in item.find_all(recursive=False):
+                        if leaf.find(True, recursive=False) is not None:
+                            continue
+                        d[str(leaf.name)] = leaf.get_text(strip=True)
+                    if d:
+                        items.append(d)
+                if items:
+                    row[child.name] = items
+        if row:
+            yield row
+
+
+def iter_staging_records(staging_dir: Path) -> Iterator[dict[str, Any]]:
+    """Yield staging records file by file (XML device by device) without materializing the package."""
     for file_path in staging_dir.rglob('*'):
         if file_path.suffix.lower() == '.json':
             with file_path.open('r', encoding='utf-8') as f:
                 content = json.load(f)
-                if isinstance(content, list):
-                    records.extend([x for x in content if isinstance(x, dict)])
-                elif isinstance(content, dict):
-                    records.append(content)
+            if isinstance(content, list):
+                yield from (x for x in content if isinstance(x, dict))
+            elif isinstance(content, dict):
+                yield content
         elif file_path.suffix.lower() == '.csv':
             with file_path.open('r', encoding='utf-8-sig', newline='') as f:
-                reader = csv.DictReader(f)
-                records.extend([dict(row) for row in reader])
+                for row in csv.DictReader(f):
+                    yield dict(row)
         elif file_path.suffix.lower() == '.xml':
-            records.extend(_load_xml_records(file_path))
-    return records
+            yield from _iter_xml_records(file_path)
 
 
-def get_or_create_company(db: Session, record: ProductRecord) -> Company | None:
+def load_staging_records(staging_dir: Path) -> list[dict[str, Any]]:
+    return list(iter_staging_records(staging_dir))
+
+
+def iter_record_chunks(records: Iterable[dict[str, Any]], chunk_size: int | None) -> Iterator[list[dict[str, Any]]]:
+    if not chunk_size or chunk_size <= 0:
+        chunk = list(records)
+        if chunk:
+            yield chunk
+        return
+    chunk = []
+    for raw in records:
+        chunk.append(raw)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class IngestLookupCache:
+    """Chunk-level identity map for ingest lookups.
+
+    `prefetch` loads the companies, registrations and products referenced by one chunk in a
+    few IN (...) queries; per-record lookups then resolve from these maps. Keys that were
+    not prefetched (or any key after `reset`) fall back to the regular per-record queries.
+    """
+
+    def __init__(self) -> None:
+        self.companies: dict[str, Company | None] = {}
+        # Shared with upsert_registration_with_contract / shadow writes (keyed by normalized reg no).
+        self.registrations: dict[str, Registration | None] = {}
+        self.products_by_di: dict[str, Product | None] = {}
+        # Products per registration, most recently touched first (mirrors ORDER BY updated_at DESC).
+        self.products_by_registration: dict[UUID, list[Product]] = {}
+        self._registration_of: dict[UUID, UUID | None] = {}
+
+    @classmethod
+    def prefetch(cls, db: Session, records: Iterable[ProductRecord]) -> 'IngestLookupCache':
+        cache = cls()
+        names: set[str] = set()
+        reg_nos: set[str] = set()
+        dis: set[str] = set()
+        for record in records:
+            if record.company_name:
+                names.add(record.company_name)
+            reg_no = normalize_registration_no(record.reg_no)
+            if reg_no:
+                reg_nos.add(reg_no)
+            di = str(getattr(record, 'udi_di', '') or '').strip()
+            if di:
+                dis.add(di)
+
+        if names:
+            cache.companies = dict.fromkeys(names)
+            for company in db.scalars(select(Company).where(Company.name.in_(names))).all():
+                if cache.companies.get(company.name) is None:
+                    cache.companies[company.name] = company
+        if reg_nos:
+            cache.registrations = dict.fromkeys(reg_nos)
+            for reg in db.scalars(select(Registration).where(Registration.registration_no.in_(reg_nos))).all():
+                cache.registrations[reg.registration_no] = reg
+
+        reg_ids = [reg.id for reg in cache.registrations.values() if reg is not None]
+        cache.products_by_di = dict.fromkeys(dis)
+        cache.products_by_registration = {rid: [] for rid in reg_ids}
+        conds = []
+        if dis:
+            conds.append(Product.udi_di.in_(dis))
+        if reg_ids:
+            conds.append(Product.registration_id.in_(reg_ids))
+        if conds:
+            for product in db.scalars(select(Product).where(or_(*conds)).order_by(Product.updated_at.desc())).all():
+                di = str(product.udi_di or '').strip()
+                if di in cache.products_by_di and cache.products_by_di[di] is None:
+                    cache.products_by_di[di] = product
+                if product.registration_id in cache.products_by_registration:
+                    cache.products_by_registration[product.registration_id].append(product)
+                cache._registration_of[product.id] = product.registration_id
+        return cache
+
+    def reset(self) -> None:
+        # After a rollback, objects created in this chunk are gone; fall back to queries.
+        self.companies.clear()
+        self.registrations.clear()
+        self.products_by_di.clear()
+        self.products_by_registration.clear()
+        self._registration_of.clear()
+
+    def track_registration(self, registration_id: UUID, *, created: bool) -> None:
+        if created:
+            self.products_by_registration.setdefault(registration_id, [])
+
+    def touch_product(self, product: Product) -> None:
+        di = str(product.udi_di or '').strip()
+        if di:
+            self.products_by_di[di] = product
+        prev = self._registration_of.get(product.id)
+        if prev is not None and prev != product.registration_id:
+            stale = self.products_by_registration.get(prev)
+            if stale is not None and product in stale:
+                stale.remove(product)
+        self._registration_of[product.id] = product.registration_id
+        if product.registration_id is not None and product.registration_id in self.products_by_registration:
+            items = self.products_by_registration[product.registration_id]
+            if product in items:
+                items.remove(product)
+            items.insert(0, product)
+
+
+def get_or_create_company(db: Session, record: ProductRecord, *, cache: IngestLookupCache | None = None) -> Company | None:
     if not record.company_name:
         return None
-    company = db.scalar(select(Company).where(Company.name == record.company_name))
+    if cache is not None and record.company_name in cache.companies:
+        company = cache.companies[record.company_name]
+    else:
+        company = db.scalar(select(Company).where(Company.name == record.company_name))
     if company:
         if record.company_country and not company.country:
             company.country = record.company_country
@@ -142,6 +280,8 @@ def get_or_create_company(db: Session, record: ProductRecord) -> Company | None:
     company = Company(name=record.company_name, country=record.company_country, raw={}, raw_json={})
     db.add(company)
     db.flush()
+    if cache is not None:
+        cache.companies[record.company_name] = company
     return company
 
 
@@ -150,10 +290,27 @@ def find_existing_product(
     record: ProductRecord,
     *,
     registration_id: UUID | None,
+    cache: IngestLookupCache | None = None,
 ) -> Product | None:
     di = str(getattr(record, 'udi_di', '') or '').strip()
     reg = str(getattr(record, 'reg_no', '') or '').strip()
 
+    if (
+        cache is not None
+        and registration_id is not None
+        and registration_id in cache.products_by_registration
+        and (not di or di in cache.products_by_di)
+    ):
+        # Same resolution order as the query path below, served from the chunk prefetch.
+        if di and cache.products_by_di[di] is not None:
+            return cache.products_by_di[di]
+        candidates = cache.products_by_registration[registration_id]
+        if reg:
+            for product in candidates:
+                if product.reg_no == reg:
+                    return product
+        return candidates[0] if candidates else None
+
     if registration_id is not None:
         # Registration anchor is canonical; DI is only the variant identifier.
         if di:
@@ -215,13 +372,14 @@ def upsert_product_record(
     source_run_id: int | None,
     *,
     source_key: str = 'UNKNOWN',
+    lookup_cache: IngestLookupCache | None = None,
 ) -> tuple[str, Product, dict[str, Any] | None, dict[str, Any] | None]:
     registration_id = getattr(record, 'registration_id', None)
     if registration_id is None:
         raise ValueError('registration_id is required for product upsert')
 
-    company = get_or_create_company(db, record)
-    existing = find_existing_product(db, record, registration_id=registration_id)
+    company = get_or_create_company(db, record, cache=lookup_cache)
+    existing = find_existing_product(db, record, registration_id=registration_id, cache=lookup_cache)
     rec_di = str(getattr(record, 'udi_di', '') or '').strip()
     if (
         existing is not None
@@ -423,15 +581,21 @@ def upsert_product_record(
 
 def ingest_staging_records(
     db: Session,
-    records: list[dict[str, Any]],
+    records: Iterable[dict[str, Any]],
     source_run_id: int | None,
     *,
     source: str = 'NMPA_UDI',
     raw_document_id: UUID | None = None,
     reject_audit: bool = True,
+    chunk_size: int | None = None,
 ) -> dict[str, int]:
+    """Ingest staging records; accepts a list or a streaming iterator.
+
+    With chunk_size set, records are consumed in bounded chunks and committed per chunk
+    so peak memory does not depend on package size. Stats keys are unchanged.
+    """
     stats = {
-        'total': len(records),
+        'total': 0,
         'success': 0,
         'failed': 0,
         'filtered': 0,
@@ -519,175 +683,215 @@ def ingest_staging_records(
             )
         )
 
-    for raw in records:
-        try:
-            record = map_raw_record(raw)
-            if not is_valid_product_name(record.name):
-                stats['filtered'] += 1
-                continue
-            decision = classify(
-                {
-                    'name': record.name,
-                    'classification_code': _extract_classification_code(raw, record),
-                },
-                version=IVD_CLASSIFIER_VERSION,
+    for chunk in iter_record_chunks(records, chunk_size):
+        stats['total'] += len(chunk)
+        prepared: list[tuple[dict[str, Any], ProductRecord | Exception]] = []
+        for raw in chunk:
+            try:
+                prepared.append((raw, map_raw_record(raw)))
+            except Exception as exc:
+                prepared.append((raw, exc))
+        lookup_cache: IngestLookupCache | None = None
+        if hasattr(db, 'scalars'):
+            # Resolve companies/registrations/products for the whole chunk up front.
+            lookup_cache = IngestLookupCache.prefetch(
+                db, [rec for _raw, rec in prepared if not isinstance(rec, Exception)]
             )
-            if not bool(decision.get('is_ivd')):
-                if reject_audit:
-                    src_key = _reject_source_key(record=record, raw=raw)
-                    _upsert_rejected(
-                        src=str(source or 'unknown'),
-                        src_key=src_key,
-                        raw_doc_id=raw_document_id,
-                        reason={'decision': decision},
-                        ivd_version=str(decision.get('version') or IVD_CLASSIFIER_VERSION),
-                    )
-                stats['filtered'] += 1
-                continue
+        for raw, mapped in prepared:
+            try:
+                if isinstance(mapped, Exception):
+                    raise mapped
+                record = mapped
+                if not is_valid_product_name(record.name):
+                    stats['filtered'] += 1
+                    continue
+                decision = classify(
+                    {
+                        'name': record.name,
+                        'classification_code': _extract_classification_code(raw, record),
+                    },
+                    version=IVD_CLASSIFIER_VERSION,
+                )
+                if not bool(decision.get('is_ivd')):
+                    if reject_audit:
+                        src_key = _reject_source_key(record=record, raw=raw)
+                        _upsert_rejected(
+                            src=str(source or 'unknown'),
+                            src_key=src_key,
+                            raw_doc_id=raw_document_id,
+                            reason={'decision': decision},
+                            ivd_version=str(decision.get('version') or IVD_CLASSIFIER_VERSION),
+                        )
+                    stats['filtered'] += 1
+                    continue
 
-            reg_no_norm = normalize_registration_no(record.reg_no)
-            if not reg_no_norm:
-                # Canonical key gate: missing registration_no must not write registrations/products.
-                # Keep evidence chain via raw_document_id, and enqueue a pending row for ops/manual resolution.
-                if raw_document_id and source_run_id is not None:
-                    try:
-                        payload = json.dumps(raw, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
-                    except Exception:
-                        payload = repr(raw).encode("utf-8", errors="ignore")
-                    payload_hash = hashlib.sha256(payload).hexdigest()
-                    try:
-                        if should_enqueue_pending_records():
-                            stmt = insert(PendingRecord).values(
-                                source_key=str(source or "UNKNOWN").strip().upper() or "UNKNOWN",
-                                source_run_id=int(source_run_id),
-                                raw_document_id=raw_document_id,
-                                payload_hash=payload_hash,
-                                registration_no_raw=(str(record.reg_no or "").strip() or None),
-                                reason_code="NO_REG_NO",
-                                candidate_registry_no=(str(record.reg_no or "").strip() or None),
-                                candidate_company=str(record.company_name or "").strip() or None,
-                                candidate_product_name=str(record.name or "").strip() or None,
-                                reason=json.dumps(
-                                    {
-                                        "error_code": IngestErrorCode.E_CANONICAL_KEY_MISSING.value,
-                                        "message": "registration_no is required before structured upsert",
+                reg_no_norm = normalize_registration_no(record.reg_no)
+                if not reg_no_norm:
+                    # Canonical key gate: missing registration_no must not write registrations/products.
+                    # Keep evidence chain via raw_document_id, and enqueue a pending row for ops/manual resolution.
+                    if raw_document_id and source_run_id is not None:
+                        try:
+                            payload = json.dumps(raw, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+                        except Exception:
+                            payload = repr(raw).encode("utf-8", errors="ignore")
+                        payload_hash = hashlib.sha256(payload).hexdigest()
+                        try:
+                            if should_enqueue_pending_records():
+                                stmt = insert(PendingRecord).values(
+                                    source_key=str(source or "UNKNOWN").strip().upper() or "UNKNOWN",
+                                    source_run_id=int(source_run_id),
+                                    raw_document_id=raw_document_id,
+                                    payload_hash=payload_hash,
+                                    registration_no_raw=(str(record.reg_no or "").strip() or None),
+                                    reason_code="NO_REG_NO",
+                                    candidate_registry_no=(str(record.reg_no or "").strip() or None),
+                                    candidate_company=str(record.company_name or "").strip() or None,
+                                    candidate_product_name=str(record.name or "").strip() or None,
+                                    reason=json.dumps(
+                                        {
+                                            "error_code": IngestErrorCode.E_CANONICAL_KEY_MISSING.value,
+                                            "message": "registration_no is required before structured upsert",
+                                        },
+                                        ensure_ascii=False,
+                                    ),
+                                    status="open",
+                                )
+                                stmt = stmt.on_conflict_do_update(
+                                    index_elements=[PendingRecord.source_run_id, PendingRecord.payload_hash],
+                                    set_={
+                                        "raw_document_id": stmt.excluded.raw_document_id,
+                                        "registration_no_raw": stmt.excluded.registration_no_raw,
+                                        "reason_code": stmt.excluded.reason_code,
+                                        "reason": stmt.excluded.reason,
+                                        "candidate_registry_no": stmt.excluded.candidate_registry_no,
+                                        "candidate_company": stmt.excluded.candidate_company,
+                                        "candidate_product_name": stmt.excluded.candidate_product_name,
+                                        "status": "open",
+                                        "updated_at": func.now(),
                                     },
-                                    ensure_ascii=False,
-                                ),
-                                status="open",
-                            )
-                            stmt = stmt.on_conflict_do_update(
-                                index_elements=[PendingRecord.source_run_id, PendingRecord.payload_hash],
-                                set_={
-                                    "raw_document_id": stmt.excluded.raw_document_id,
-                                    "registration_no_raw": stmt.excluded.registration_no_raw,
-                                    "reason_code": stmt.excluded.reason_code,
-                                    "reason": stmt.excluded.reason,
-                                    "candidate_registry_no": stmt.excluded.candidate_registry_no,
-                                    "candidate_company": stmt.excluded.candidate_company,
-                                    "candidate_product_name": stmt.excluded.candidate_product_name,
-                                    "status": "open",
-                                    "updated_at": func.now(),
-                                },
-                            )
-                            db.execute(stmt)
-
-                        if should_enqueue_pending_documents():
-                            # Document-level backlog: raw_document missing canonical key
-                            doc_stmt = insert(PendingDocument).values(
-                                raw_document_id=raw_document_id,
-                                source_run_id=int(source_run_id),
-                                reason_code="NO_REG_NO",
-                                status="pending",
-                            )
-                            doc_stmt = doc_stmt.on_conflict_do_update(
-                                index_elements=[PendingDocument.raw_document_id],
-                                set_={
-                                    "source_run_id": doc_stmt.excluded.source_run_id,
-                                    "reason_code": doc_stmt.excluded.reason_code,
-                                    "status": "pending",
-                                    "updated_at": func.now(),
-                                },
-                            )
-                            db.execute(doc_stmt)
-                    except Exception:
-                        # Do not block the main ingest path on pending enqueue failures.
-                        db.rollback()
-                if reject_audit:
-                    src_key = _reject_source_key(record=record, raw=raw)
-                    _upsert_rejected(
-                        src=str(source or 'unknown'),
-                        src_key=src_key,
-                        raw_doc_id=raw_document_id,
-                        reason={
-                            'error_code': IngestErrorCode.E_CANONICAL_KEY_MISSING.value,
-                            'message': 'registration_no is required before structured upsert',
-                        },
-                        ivd_version=str(decision.get('version') or IVD_CLASSIFIER_VERSION),
-                    )
-                stats['filtered'] += 1
-                continue
+                                )
+                                db.execute(stmt)
+
+                            if should_enqueue_pending_documents():
+                                # Document-level backlog: raw_document missing canonical key
+                                doc_stmt = insert(PendingDocument).values(
+                                    raw_document_id=raw_document_id,
+                                    source_run_id=int(source_run_id),
+                                    reason_code="NO_REG_NO",
+                                    status="pending",
+                                )
+                                doc_stmt = doc_stmt.on_conflict_do_update(
+                                    index_elements=[PendingDocument.raw_document_id],
+                                    set_={
+                                        "source_run_id": doc_stmt.excluded.source_run_id,
+                                        "reason_code": doc_stmt.excluded.reason_code,
+                                        "status": "pending",
+                                        "updated_at": func.now(),
+                                    },
+                                )
+                                db.execute(doc_stmt)
+                        except Exception:
+                            # Do not block the main ingest path on pending enqueue failures.
+                            db.rollback()
+                            # The rollback also discarded rows created earlier in this chunk.
+                            if lookup_cache is not None:
+                                lookup_cache.reset()
+                    if reject_audit:
+                        src_key = _reject_source_key(record=record, raw=raw)
+                        _upsert_rejected(
+                            src=str(source or 'unknown'),
+                            src_key=src_key,
+                            raw_doc_id=raw_document_id,
+                            reason={
+                                'error_code': IngestErrorCode.E_CANONICAL_KEY_MISSING.value,
+                                'message': 'registration_no is required before structured upsert',
+                            },
+                            ivd_version=str(decision.get('version') or IVD_CLASSIFIER_VERSION),
+                        )
+                    stats['filtered'] += 1
+                    continue
 
-            record.reg_no = reg_no_norm
-            reg_upsert = upsert_registration_with_contract(
-                db,
-                registration_no=reg_no_norm,
-                incoming_fields={
-                    'approval_date': record.approved_date,
-                    'expiry_date': record.expiry_date,
-                    'status': record.status,
-                },
-                source=str(source or 'UNKNOWN'),
-                source_run_id=source_run_id,
-                evidence_grade='A',
-                source_priority=100,
-                observed_at=None,
-                raw_source_record_id=None,
-                raw_payload=raw,
-                write_change_log=True,
-            )
-            record.reg_no = reg_upsert.registration_no
-            # Persist explainable IVD classification metadata with each accepted record.
-            record.raw['_ivd'] = {
-                'is_ivd': True,
-                'ivd_category': decision.get('ivd_category'),
-                'ivd_subtypes': decision.get('ivd_subtypes') or [],
-                'reason': decision.get('reason'),
-                # Back-compat: keep numeric `version` for DB mapping (products.ivd_version is INTEGER).
-                'version': int(decision.get('rule_version') or 1),
-                # Human-readable classifier version string for audit/debug.
-                'version_label': decision.get('version', IVD_CLASSIFIER_VERSION),
-                'source': decision.get('source') or 'RULE',
-                'confidence': decision.get('confidence', 0.5),
-            }
-            setattr(record, 'registration_id', reg_upsert.registration_id)
-            action, product, before_state, after_state = upsert_product_record(
-                db,
-                record,
-                source_run_id,
-                source_key=str(source or 'UNKNOWN'),
-            )
-            stats['success'] += 1
-            if action == 'added':
-                stats['added'] += 1
-            elif action == 'updated':
-                stats['updated'] += 1
-            elif action == 'removed':
-                stats['removed'] += 1
-
-            if str(source or '') == 'NMPA_UDI':
-                # Shadow write: NMPA snapshots + field diffs (registration-centric SSOT).
-                # Must not change main ingest semantics (IVD-only products) and must not block.
-                try:
-                    res = shadow_write_nmpa_snapshot_and_diffs(
-                        db,
-                        record=record,
-                        product_before=before_state,
-                        product_after=after_state,
-                        source_run_id=source_run_id,
-                        raw_document_id=raw_document_id,
-                    )
-                    if not res.ok:
+                record.reg_no = reg_no_norm
+                reg_upsert = upsert_registration_with_contract(
+                    db,
+                    registration_no=reg_no_norm,
+                    incoming_fields={
+                        'approval_date': record.approved_date,
+                        'expiry_date': record.expiry_date,
+                        'status': record.status,
+                    },
+                    source=str(source or 'UNKNOWN'),
+                    source_run_id=source_run_id,
+                    evidence_grade='A',
+                    source_priority=100,
+                    observed_at=None,
+                    raw_source_record_id=None,
+                    raw_payload=raw,
+                    write_change_log=True,
+                    registration_cache=(lookup_cache.registrations if lookup_cache is not None else None),
+                )
+                if lookup_cache is not None:
+                    lookup_cache.track_registration(reg_upsert.registration_id, created=bool(reg_upsert.created))
+                record.reg_no = reg_upsert.registration_no
+                # Persist explainable IVD classification metadata with each accepted record.
+                record.raw['_ivd'] = {
+                    'is_ivd': True,
+                    'ivd_category': decision.get('ivd_category'),
+                    'ivd_subtypes': decision.get('ivd_subtypes') or [],
+                    'reason': decision.get('reason'),
+                    # Back-compat: keep numeric `version` for DB mapping (products.ivd_version is INTEGER).
+                    'version': int(decision.get('rule_version') or 1),
+                    # Human-readable classifier version string for audit/debug.
+                    'version_label': decision.get('version', IVD_CLASSIFIER_VERSION),
+                    'source': decision.get('source') or 'RULE',
+                    'confidence': decision.get('confidence', 0.5),
+                }
+                setattr(record, 'registration_id', reg_upsert.registration_id)
+                action, product, before_state, after_state = upsert_product_record(
+                    db,
+                    record,
+                    source_run_id,
+                    source_key=str(source or 'UNKNOWN'),
+                    lookup_cache=lookup_cache,
+                )
+                if lookup_cache is not None and product is not None:
+                    lookup_cache.touch_product(product)
+                stats['success'] += 1
+                if action == 'added':
+                    stats['added'] += 1
+                elif action == 'updated':
+                    stats['updated'] += 1
+                elif action == 'removed':
+                    stats['removed'] += 1
+
+                if str(source or '') == 'NMPA_UDI':
+                    # Shadow write: NMPA snapshots + field diffs (registration-centric SSOT).
+                    # Must not change main ingest semantics (IVD-only products) and must not block.
+                    try:
+                        res = shadow_write_nmpa_snapshot_and_diffs(
+                            db,
+                            record=record,
+                            product_before=before_state,
+                            product_after=after_state,
+                            source_run_id=source_run_id,
+                            raw_document_id=raw_document_id,
+                            registration_cache=(lookup_cache.registrations if lookup_cache is not None else None),
+                        )
+                        if not res.ok:
+                            stats['diff_failed'] += 1
+                            try:
+                                record_shadow_diff_failure(
+                                    db,
+                                    raw_document_id=raw_document_id,
+                                    source_run_id=source_run_id,
+                                    registration_no=getattr(record, "reg_no", None),
+                                    error=str(res.error or "shadow diff returned ok=false"),
+                                )
+                            except Exception:
+                                pass
+                        else:
+                            stats['diff_written'] += int(res.diffs_written or 0)
+                    except Exception as exc:
                         stats['diff_failed'] += 1
                         try:
                             record_shadow_diff_failure(
@@ -695,28 +899,16 @@ def ingest_staging_records(
                                 raw_document_id=raw_document_id,
                                 source_run_id=source_run_id,
                                 registration_no=getattr(record, "reg_no", None),
-                                error=str(res.error or "shadow diff returned ok=false"),
+                                error=str(exc),
                             )
                         except Exception:
                             pass
-                    else:
-                        stats['diff_written'] += int(res.diffs_written or 0)
-                except Exception as exc:
-                    stats['diff_failed'] += 1
-                    try:
-                        record_shadow_diff_failure(
-                            db,
-                            raw_document_id=raw_document_id,
-                            source_run_id=source_run_id,
-                            registration_no=getattr(record, "reg_no", None),
-                            error=str(exc),
-                        )
-                    except Exception:
-                        pass
-        except Exception:
-            # A failed flush leaves the transaction in failed state; rollback and continue.
-            db.rollback()
-            stats['failed'] += 1
+            except Exception:
+                # A failed flush leaves the transaction in failed state; rollback and continue.
+                db.rollback()
+                if lookup_cache is not None:
+                    lookup_cache.reset()
+                stats['failed'] += 1
+        db.commit()
 
-    db.commit()
     return stats
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import hashlib
 import json
+import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterator
 
 from sqlalchemy import create_engine, func, select, text
 from sqlalchemy.dialects.postgresql import insert
@@ -24,7 +25,7 @@ from app.models import (
     SourceDefinition,
     SourceRun,
 )
-from app.pipeline.ingest import save_raw_document
+from app.pipeline.ingest import write_raw_content
 from app.repositories.source_runs import finish_source_run, start_source_run
 from app.services.normalize_keys import normalize_registration_no
 from app.services.pending_mode import should_enqueue_pending_documents, should_enqueue_pending_records
@@ -32,6 +33,8 @@ from app.services.source_contract import upsert_registration_with_contract
 
 
 SUPPORTED_PARSER_KEYS = {"nmpa_reg_parser", "udi_di_parser", "nhsa_parser", "procurement_gd_parser"}
+# Rows per streamed fetch page; each page is written with multi-row inserts and committed.
+DEFAULT_RUNNER_PAGE_SIZE = 500
 
 
 @dataclass(frozen=True)
@@ -243,7 +246,20 @@ def _resolve_runtime_fetch_controls(cfg: SourceConfig, conn_cfg: dict[str, Any])
     return batch_size, cutoff
 
 
-def _fetch_rows_from_runtime(cfg: SourceConfig) -> list[dict[str, Any]]:
+def _resolve_runtime_page_size(cfg: SourceConfig, conn_cfg: dict[str, Any]) -> int:
+    fp = cfg.fetch_params if isinstance(cfg.fetch_params, dict) else {}
+    raw = fp.get("page_size")
+    if raw in {None, ""}:
+        raw = conn_cfg.get("page_size")
+    try:
+        page_size = int(raw or DEFAULT_RUNNER_PAGE_SIZE)
+    except Exception:
+        page_size = DEFAULT_RUNNER_PAGE_SIZE
+    return max(1, min(5000, page_size))
+
+
+def _iter_row_pages_from_runtime(cfg: SourceConfig) -> Iterator[list[dict[str, Any]]]:
+    """Stream the source query through a server-side cursor, one page of rows at a time."""
     conn_type, conn_cfg = _source_runtime_connection(cfg)
     if conn_type != "postgres":
         raise RuntimeError(f"unsupported fetcher type: {conn_type}")
@@ -251,66 +267,94 @@ def _fetch_rows_from_runtime(cfg: SourceConfig) -> list[dict[str, Any]]:
     source_query = str(conn_cfg.get("source_query") or "").strip()
     source_table = str(conn_cfg.get("source_table") or "public.products").strip() or "public.products"
     limit, cutoff = _resolve_runtime_fetch_controls(cfg, conn_cfg)
+    page_size = _resolve_runtime_page_size(cfg, conn_cfg)
     sql = source_query or f"SELECT * FROM {source_table} LIMIT :batch_size"
 
     engine = create_engine(_dsn_from_runtime_cfg(conn_cfg), pool_pre_ping=True, poolclass=NullPool)
     try:
         with engine.connect() as conn:
-            rows = conn.execute(text(sql), {"batch_size": limit, "cutoff": cutoff}).mappings().all()
-            return [dict(r) for r in rows]
+            result = conn.execution_options(stream_results=True, max_row_buffer=page_size).execute(
+                text(sql), {"batch_size": limit, "cutoff": cutoff}
+            )
+            for part in result.mappings().partitions(page_size):
+                yield [dict(r) for r in part]
     finally:
         engine.dispose()
 
 
-def _write_raw_document_for_row(
-    db: Session,
+def _raw_parse_fields(
     *,
-    source: str,
-    source_run_id: int,
-    source_url: str | None,
-    row: dict[str, Any],
-) -> Any:
-    payload = _json_payload(row)
-    content = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
-    return save_raw_document(
-        db,
-        source=source,
-        url=source_url,
-        content=content,
-        doc_type="json",
-        run_id=f"source_run:{int(source_run_id)}",
-    )
-
-
-def _set_raw_parse_log(
-    db: Session,
-    *,
-    raw_document_id: Any,
     parse_status: str,
     parse_error: str | None,
     error_code: str | None,
     source_key: str,
     source_run_id: int,
     payload_hash: str,
-) -> None:
-    doc = db.get(RawDocument, raw_document_id)
-    if doc is None:
-        return
-    doc.parse_status = parse_status
-    doc.error = parse_error
-    doc.parse_log = {
-        "source_key": source_key,
-        "source_run_id": int(source_run_id),
-        "payload_hash": payload_hash,
-        "error_code": error_code,
-        "parse_error": parse_error,
-        "updated_at": _utcnow().isoformat(),
+) -> dict[str, Any]:
+    return {
+        "parse_status": parse_status,
+        "error": parse_error,
+        "parse_log": {
+            "source_key": source_key,
+            "source_run_id": int(source_run_id),
+            "payload_hash": payload_hash,
+            "error_code": error_code,
+            "parse_error": parse_error,
+            "updated_at": _utcnow().isoformat(),
+        },
     }
-    db.add(doc)
 
 
-def _enqueue_pending_record(
+def _write_raw_documents(
     db: Session,
+    *,
+    source: str,
+    source_run_id: int,
+    docs: list[dict[str, Any]],
+) -> list[Any]:
+    """Write one page of row payloads to raw storage and raw_documents with a single INSERT.
+
+    Each doc carries `row`, `source_url` and the `_raw_parse_fields` values. Re-seen payloads
+    (same source/run/sha256) keep their id and get the new parse fields, as the former
+    save_raw_document + parse-log update did. Returns raw_document ids aligned with `docs`.
+    """
+    if not docs:
+        return []
+    run_id = f"source_run:{int(source_run_id)}"
+    now = _utcnow()
+    shas: list[str] = []
+    values_by_sha: dict[str, dict[str, Any]] = {}
+    for d in docs:
+        content = json.dumps(_json_payload(d["row"]), ensure_ascii=False, sort_keys=True).encode("utf-8")
+        sha, path = write_raw_content(source=source, url=d.get("source_url"), content=content)
+        shas.append(sha)
+        values_by_sha[sha] = {
+            "id": uuid.uuid4(),
+            "source": source,
+            "source_url": d.get("source_url"),
+            "doc_type": "json",
+            "storage_uri": str(path),
+            "sha256": sha,
+            "run_id": run_id,
+            "fetched_at": now,
+            "parse_status": d["parse_status"],
+            "error": d["error"],
+            "parse_log": d["parse_log"],
+        }
+    stmt = insert(RawDocument).values(list(values_by_sha.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RawDocument.source, RawDocument.run_id, RawDocument.sha256],
+        set_={
+            "parse_status": stmt.excluded.parse_status,
+            "error": stmt.excluded.error,
+            "parse_log": stmt.excluded.parse_log,
+        },
+    ).returning(RawDocument.id, RawDocument.sha256)
+    id_by_sha = {str(sha): rid for rid, sha in db.execute(stmt).all()}
+    return [id_by_sha.get(sha) for sha in shas]
+
+
+def _pending_record_values(
     *,
     source_key: str,
     raw_document_id: Any,
@@ -320,20 +364,27 @@ def _enqueue_pending_record(
     source_run_id: int,
     reason_code: str = "NO_REG_NO",
     reason: str | None = None,
-) -> None:
-    stmt = insert(PendingRecord).values(
-        source_key=source_key,
-        source_run_id=int(source_run_id),
-        raw_document_id=raw_document_id,
-        payload_hash=payload_hash,
-        registration_no_raw=(registration_no_raw or None),
-        reason_code=reason_code,
-        candidate_registry_no=(registration_no_raw or None),
-        candidate_company=_pick_text(raw_row, "company_name", "manufacturer", "candidate_company"),
-        candidate_product_name=_pick_text(raw_row, "product_name", "name", "candidate_product_name"),
-        reason=json.dumps({"message": reason, "raw": _json_payload(raw_row)}, ensure_ascii=False),
-        status="open",
-    )
+) -> dict[str, Any]:
+    return {
+        "source_key": source_key,
+        "source_run_id": int(source_run_id),
+        "raw_document_id": raw_document_id,
+        "payload_hash": payload_hash,
+        "registration_no_raw": (registration_no_raw or None),
+        "reason_code": reason_code,
+        "candidate_registry_no": (registration_no_raw or None),
+        "candidate_company": _pick_text(raw_row, "company_name", "manufacturer", "candidate_company"),
+        "candidate_product_name": _pick_text(raw_row, "product_name", "name", "candidate_product_name"),
+        "reason": json.dumps({"message": reason, "raw": _json_payload(raw_row)}, ensure_ascii=False),
+        "status": "open",
+    }
+
+
+def _enqueue_pending_records(db: Session, values: list[dict[str, Any]]) -> None:
+    """Multi-row upsert of pending_records (one statement per page)."""
+    if not values:
+        return
+    stmt = insert(PendingRecord).values(values)
     stmt = stmt.on_conflict_do_update(
         index_elements=[PendingRecord.source_run_id, PendingRecord.payload_hash],
         set_={
@@ -351,19 +402,22 @@ def _enqueue_pending_record(
     db.execute(stmt)
 
 
-def _enqueue_pending_document(
-    db: Session,
-    *,
-    raw_document_id: Any,
-    source_run_id: int | None,
-    reason_code: str,
-) -> None:
+def _enqueue_pending_documents(db: Session, values: list[dict[str, Any]]) -> None:
     """Document-level pending queue for raw_documents that failed the registration anchor gate."""
+    # One row per raw document: ON CONFLICT cannot touch the same row twice in a statement.
+    by_doc = {v["raw_document_id"]: v for v in values if v.get("raw_document_id") is not None}
+    if not by_doc:
+        return
     stmt = insert(PendingDocument).values(
-        raw_document_id=raw_document_id,
-        source_run_id=(int(source_run_id) if source_run_id is not None else None),
-        reason_code=str(reason_code or "NO_REG_NO"),
-        status="pending",
+        [
+            {
+                "raw_document_id": v["raw_document_id"],
+                "source_run_id": (int(v["source_run_id"]) if v.get("source_run_id") is not None else None),
+                "reason_code": str(v.get("reason_code") or "NO_REG_NO"),
+                "status": "pending",
+            }
+            for v in by_doc.values()
+        ]
     )
     stmt = stmt.on_conflict_do_update(
         index_elements=[PendingDocument.raw_document_id],
@@ -582,6 +636,97 @@ def upsert_structured_record_via_runner(
     )
 
 
+def _process_page(
+    db: Session,
+    *,
+    staged: list[tuple[dict[str, Any], str, AnchorGateResult]],
+    defn: SourceDefinition,
+    cfg: SourceConfig,
+    parser_key: str,
+    source_run_id: int,
+    stats: IngestRunnerStats,
+    enqueue_documents: bool,
+    enqueue_records: bool,
+) -> None:
+    """Execute one page: batch raw_documents + pending writes, then structured upserts per anchored row."""
+    source_key = str(defn.source_key)
+    docs: list[dict[str, Any]] = []
+    for row, row_hash, gate in staged:
+        if gate.normalized_registration_no:
+            fields = _raw_parse_fields(
+                parse_status="PARSED",
+                parse_error=None,
+                error_code=None,
+                source_key=source_key,
+                source_run_id=source_run_id,
+                payload_hash=row_hash,
+            )
+        else:
+            fields = _raw_parse_fields(
+                parse_status="FAILED",
+                parse_error=(gate.reason or "registration_no parse failed"),
+                error_code=(gate.error_code or IngestErrorCode.E_PARSE_FAILED.value),
+                source_key=source_key,
+                source_run_id=source_run_id,
+                payload_hash=row_hash,
+            )
+        docs.append({"row": row, "source_url": _pick_text(row, "source_url", "url"), **fields})
+    raw_ids = _write_raw_documents(db, source=source_key, source_run_id=source_run_id, docs=docs)
+    stats.raw_written_count += len(raw_ids)
+
+    default_evidence_grade = str(defn.default_evidence_grade or "C").strip().upper() or "C"
+    default_source_priority = (
+        int((cfg.upsert_policy or {}).get("priority", 100)) if isinstance(cfg.upsert_policy, dict) else 100
+    )
+    pending_documents: list[dict[str, Any]] = []
+    pending_records: list[dict[str, Any]] = []
+    for (row, row_hash, gate), raw_document_id in zip(staged, raw_ids):
+        if not gate.normalized_registration_no:
+            if enqueue_documents:
+                pending_documents.append(
+                    {
+                        "raw_document_id": raw_document_id,
+                        "source_run_id": source_run_id,
+                        "reason_code": str(gate.reason_code or "NO_REG_NO"),
+                    }
+                )
+            if enqueue_records:
+                pending_records.append(
+                    _pending_record_values(
+                        source_key=source_key,
+                        raw_document_id=raw_document_id,
+                        registration_no_raw=_pick_text(row, "registration_no", "reg_no", "registry_no"),
+                        raw_row=row,
+                        payload_hash=row_hash,
+                        source_run_id=source_run_id,
+                        reason_code=(gate.reason_code or "PARSE_ERROR"),
+                        reason=(gate.reason or "registration anchor gate failed"),
+                    )
+                )
+            continue
+
+        result = upsert_structured_record_via_runner(
+            db,
+            source_key=source_key,
+            source_run_id=source_run_id,
+            row=row,
+            parser_key=parser_key,
+            raw_document_id=raw_document_id,
+            observed_at=_utcnow(),
+            default_evidence_grade=default_evidence_grade,
+            default_source_priority=default_source_priority,
+        )
+        if result.registration_created or bool(result.registration_changed_fields):
+            stats.registration_upserted_count += 1
+            stats.registrations_upserted_count += 1
+
+        if result.variant_upserted:
+            stats.variants_upserted_count += 1
+
+    _enqueue_pending_documents(db, pending_documents)
+    _enqueue_pending_records(db, pending_records)
+
+
 def _run_one_source(db: Session, *, defn: SourceDefinition, cfg: SourceConfig, execute: bool) -> IngestRunnerStats:
     dry_run = not bool(execute)
     parser_key = str(defn.parser_key or "").strip()
@@ -637,109 +782,53 @@ def _run_one_source(db: Session, *, defn: SourceDefinition, cfg: SourceConfig, e
     stats.source_run_id = int(run.id)
 
     try:
-        rows = _fetch_rows_from_runtime(cfg)
-        stats.fetched_count = len(rows)
+        enqueue_documents = should_enqueue_pending_documents()
+        enqueue_records = should_enqueue_pending_records()
         seen_hashes: set[str] = set()
-        for row in rows:
-            row_hash = _payload_hash(row)
-            if row_hash in seen_hashes:
-                stats.skipped_count += 1
-                continue
-            seen_hashes.add(row_hash)
-
-            di = _pick_text(row, "udi_di", "di")
-            gate = enforce_registration_anchor(row, str(defn.source_key))
-            reg_no = gate.normalized_registration_no
-            if gate.ok and reg_no:
-                stats.parsed_count += 1
-            else:
-                stats.missing_registration_no_count += 1
-                code = str(gate.error_code or IngestErrorCode.E_PARSE_FAILED.value)
-                counts = stats.error_code_counts if isinstance(stats.error_code_counts, dict) else {}
-                counts[code] = int(counts.get(code, 0) or 0) + 1
-                stats.error_code_counts = counts
-
-            if dry_run:
-                if not reg_no:
+        for page in _iter_row_pages_from_runtime(cfg):
+            stats.fetched_count += len(page)
+            staged: list[tuple[dict[str, Any], str, AnchorGateResult]] = []
+            for row in page:
+                row_hash = _payload_hash(row)
+                if row_hash in seen_hashes:
                     stats.skipped_count += 1
-                if parser_key == "udi_di_parser" and di:
-                    stats.variants_upserted_count += 1
-                continue
-
-            source_url = _pick_text(row, "source_url", "url")
-            raw_document_id = _write_raw_document_for_row(
-                db,
-                source=str(defn.source_key),
-                source_run_id=int(run.id),
-                source_url=source_url,
-                row=row,
-            )
-            stats.raw_written_count += 1
-
-            if not reg_no:
-                _set_raw_parse_log(
-                    db,
-                    raw_document_id=raw_document_id,
-                    parse_status="FAILED",
-                    parse_error=(gate.reason or "registration_no parse failed"),
-                    error_code=(gate.error_code or IngestErrorCode.E_PARSE_FAILED.value),
-                    source_key=str(defn.source_key),
-                    source_run_id=int(run.id),
-                    payload_hash=row_hash,
-                )
-                if should_enqueue_pending_documents():
-                    _enqueue_pending_document(
-                        db,
-                        raw_document_id=raw_document_id,
-                        source_run_id=int(run.id),
-                        reason_code=str(gate.reason_code or "NO_REG_NO"),
-                    )
-                if should_enqueue_pending_records():
-                    _enqueue_pending_record(
-                        db,
-                        source_key=str(defn.source_key),
-                        raw_document_id=raw_document_id,
-                        registration_no_raw=_pick_text(row, "registration_no", "reg_no", "registry_no"),
-                        raw_row=row,
-                        payload_hash=row_hash,
-                        source_run_id=int(run.id),
-                        reason_code=(gate.reason_code or "PARSE_ERROR"),
-                        reason=(gate.reason or "registration anchor gate failed"),
-                    )
+                    continue
+                seen_hashes.add(row_hash)
+
+                di = _pick_text(row, "udi_di", "di")
+                gate = enforce_registration_anchor(row, str(defn.source_key))
+                reg_no = gate.normalized_registration_no
+                if gate.ok and reg_no:
+                    stats.parsed_count += 1
+                else:
+                    stats.missing_registration_no_count += 1
+                    code = str(gate.error_code or IngestErrorCode.E_PARSE_FAILED.value)
+                    counts = stats.error_code_counts if isinstance(stats.error_code_counts, dict) else {}
+                    counts[code] = int(counts.get(code, 0) or 0) + 1
+                    stats.error_code_counts = counts
+
+                if dry_run:
+                    if not reg_no:
+                        stats.skipped_count += 1
+                    if parser_key == "udi_di_parser" and di:
+                        stats.variants_upserted_count += 1
+                    continue
+                staged.append((row, row_hash, gate))
+
+            if not staged:
                 continue
-
-            _set_raw_parse_log(
-                db,
-                raw_document_id=raw_document_id,
-                parse_status="PARSED",
-                parse_error=None,
-                error_code=None,
-                source_key=str(defn.source_key),
-                source_run_id=int(run.id),
-                payload_hash=row_hash,
-            )
-
-            result = upsert_structured_record_via_runner(
+            _process_page(
                 db,
-                source_key=str(defn.source_key),
-                source_run_id=int(run.id),
-                row=row,
+                staged=staged,
+                defn=defn,
+                cfg=cfg,
                 parser_key=parser_key,
-                raw_document_id=raw_document_id,
-                observed_at=_utcnow(),
-                default_evidence_grade=str(defn.default_evidence_grade or "C").strip().upper() or "C",
-                default_source_priority=(
-                    int((cfg.upsert_policy or {}).get("priority", 100))
-                    if isinstance(cfg.upsert_policy, dict)
-                    else 100
-                ),
+                source_run_id=int(run.id),
+                stats=stats,
+                enqueue_documents=enqueue_documents,
+                enqueue_records=enqueue_records,
             )
-            if result.registration_created or bool(result.registration_changed_fields):
-                stats.registration_upserted_count += 1
-                stats.registrations_upserted_count += 1
-
-            if result.variant_upserted:
-                stats.variants_upserted_count += 1
+            db.commit()
 
         if not dry_run:
             stats.conflicts_count = int(
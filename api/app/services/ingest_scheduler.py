@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models import SourceConfig, SourceDefinition, SourceRun
+from app.services.ingest_runner import IngestRunnerStats, _utcnow, run_source_by_key
+
+
+DEFAULT_RUN_ALL_WORKERS = 4
+# Grace period for a finished worker process to flush its result before it is treated as crashed.
+_RESULT_GRACE_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class SourceTask:
+    source_key: str
+    parser_key: str
+    depends_on: tuple[str, ...] = ()
+    timeout_seconds: float | None = None
+
+
+@dataclass
+class RunAllReport:
+    workers: int
+    wall_seconds: float = 0.0
+    items: list[IngestRunnerStats] = field(default_factory=list)
+    timings: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        busy = sum(float(t.get("wall_seconds") or 0.0) for t in self.timings.values())
+        return {
+            "count": len(self.items),
+            "failed": sum(1 for x in self.items if x.status == "failed"),
+            "skipped": sum(1 for x in self.items if x.status == "skipped"),
+            "workers": int(self.workers),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "busy_seconds": round(busy, 3),
+            # > 1 means sources overlapped; 1 == fully serial.
+            "overlap": (round(busy / self.wall_seconds, 2) if self.wall_seconds > 0 else None),
+            "max_concurrency": _max_concurrency(self.timings.values()),
+            "items": [{**x.to_dict(), **self.timings.get(x.source_key, {})} for x in self.items],
+        }
+
+
+def _max_concurrency(timings: Any) -> int:
+    edges: list[tuple[float, int]] = []
+    for t in timings:
+        if t.get("started_offset") is None or t.get("finished_offset") is None:
+            continue
+        edges.append((float(t["started_offset"]), 1))
+        edges.append((float(t["finished_offset"]), -1))
+    best = cur = 0
+    for _, delta in sorted(edges, key=lambda e: (e[0], e[1])):
+        cur += delta
+        best = max(best, cur)
+    return best
+
+
+def _parse_depends_on(raw: Any) -> tuple[str, ...]:
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, (list, tuple)):
+        return ()
+    out: list[str] = []
+    for x in raw:
+        key = str(x or "").strip().upper()
+        if key and key not in out:
+            out.append(key)
+    return tuple(out)
+
+
+def source_task_from_config(defn: SourceDefinition, cfg: SourceConfig) -> SourceTask:
+    """Scheduling knobs live in source_configs.fetch_params: `depends_on` and `run_timeout_seconds`."""
+    fp = cfg.fetch_params if isinstance(cfg.fetch_params, dict) else {}
+    try:
+        timeout = float(fp.get("run_timeout_seconds") or 0) or None
+    except Exception:
+        timeout = None
+    return SourceTask(
+        source_key=str(defn.source_key),
+        parser_key=str(defn.parser_key or "").strip(),
+        depends_on=_parse_depends_on(fp.get("depends_on")),
+        timeout_seconds=timeout,
+    )
+
+
+def load_enabled_source_tasks(db: Session) -> list[SourceTask]:
+    rows = db.execute(
+        select(SourceDefinition, SourceConfig)
+        .join(SourceConfig, SourceConfig.source_key == SourceDefinition.source_key)
+        .where(SourceConfig.enabled.is_(True))
+        .order_by(SourceDefinition.source_key.asc())
+    ).all()
+    return [source_task_from_config(defn, cfg) for defn, cfg in rows]
+
+
+def _stats(task: SourceTask, *, execute: bool, status: str, message: str) -> IngestRunnerStats:
+    return IngestRunnerStats(
+        source_key=task.source_key,
+        parser_key=task.parser_key,
+        dry_run=not bool(execute),
+        source_run_id=None,
+        error_count=(1 if status == "failed" else 0),
+        status=status,
+        message=message,
+        error_code_counts={},
+    )
+
+
+def _stats_from_dict(data: dict[str, Any], task: SourceTask, *, execute: bool) -> IngestRunnerStats:
+    base = _stats(task, execute=execute, status="failed", message="")
+    names = {f.name for f in fields(IngestRunnerStats)}
+    for k, v in data.items():
+        if k in names and v is not None:
+            setattr(base, k, v)
+    return base
+
+
+def _source_worker_main(source_key: str, execute: bool, out: Any) -> None:
+    # Runs in a spawned process: its own engine, its own Session.
+    db = SessionLocal()
+    try:
+        out.put(run_source_by_key(db, source_key=source_key, execute=execute).to_dict())
+    except Exception as exc:
+        out.put({"source_key": source_key, "status": "failed", "error_count": 1, "message": str(exc)})
+    finally:
+        db.close()
+
+
+def _mark_timed_out(source_key: str, message: str, *, started_at: Any) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(SourceRun)
+            .where(
+                SourceRun.source == f"source_runner:{source_key}",
+                SourceRun.status == "RUNNING",
+                SourceRun.started_at >= started_at,
+            )
+            .values(status="failed", message=message, finished_at=_utcnow())
+        )
+        db.execute(
+            update(SourceConfig)
+            .where(SourceConfig.source_key == source_key)
+            .values(last_run_at=_utcnow(), last_status="failed", last_error=message)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_source_isolated(task: SourceTask, *, execute: bool, timeout_seconds: float | None) -> IngestRunnerStats:
+    """Run one source in a spawned process so a timeout can actually stop it."""
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    started_at = _utcnow()
+    proc = ctx.Process(target=_source_worker_main, args=(task.source_key, bool(execute), out), daemon=True)
+    proc.start()
+    deadline = (time.monotonic() + float(timeout_seconds)) if timeout_seconds else None
+    payload: dict[str, Any] | None = None
+    try:
+        while payload is None:
+            wait_for = 1.0 if deadline is None else max(0.0, min(1.0, deadline - time.monotonic()))
+            try:
+                payload = out.get(timeout=wait_for)
+            except queue.Empty:
+                if not proc.is_alive():
+                    try:
+                        payload = out.get(timeout=_RESULT_GRACE_SECONDS)
+                    except queue.Empty:
+                        break
+                elif deadline is not None and time.monotonic() >= deadline:
+                    break
+    finally:
+        if proc.is_alive() and payload is None:
+            proc.terminate()
+        proc.join(timeout=_RESULT_GRACE_SECONDS)
+
+    if payload is not None:
+        return _stats_from_dict(payload, task, execute=execute)
+    if deadline is not None and time.monotonic() >= deadline:
+        message = f"timeout after {float(timeout_seconds):g}s"
+        _mark_timed_out(task.source_key, message, started_at=started_at)
+        return _stats(task, execute=execute, status="failed", message=message)
+    return _stats(task, execute=execute, status="failed", message=f"worker exited with code {proc.exitcode}")
+
+
+def run_sources_concurrently(
+    tasks: list[SourceTask],
+    *,
+    execute: bool,
+    workers: int = DEFAULT_RUN_ALL_WORKERS,
+    default_timeout_seconds: float | None = None,
+    run_source: Callable[..., IngestRunnerStats] | None = None,
+) -> RunAllReport:
+    """Run sources on a bounded pool, starting each once all of its dependencies have finished.
+
+    Dependencies on sources outside `tasks` (disabled or unknown) are ignored. A source whose
+    dependency failed is skipped, transitively; sources left in a dependency cycle fail.
+    """
+    run_source = run_source or run_source_isolated
+    workers = max(1, int(workers or 1))
+    by_key = {t.source_key: t for t in tasks}
+    deps = {k: tuple(d for d in t.depends_on if d in by_key and d != k) for k, t in by_key.items()}
+    report = RunAllReport(workers=workers)
+    results: dict[str, IngestRunnerStats] = {}
+    unusable: set[str] = set()
+    waiting = [t.source_key for t in tasks]
+    t0 = time.monotonic()
+
+    def _finish(key: str, stats: IngestRunnerStats, *, started: float | None) -> None:
+        now = time.monotonic() - t0
+        results[key] = stats
+        report.timings[key] = {
+            "depends_on": list(deps[key]),
+            "started_offset": (round(started, 3) if started is not None else None),
+            "finished_offset": (round(now, 3) if started is not None else None),
+            "wall_seconds": (round(now - started, 3) if started is not None else 0.0),
+        }
+        if stats.status == "failed" or key in unusable:
+            unusable.add(key)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running: dict[Future, tuple[str, float]] = {}
+        while waiting or running:
+            blocked = True
+            while blocked:
+                blocked = False
+                for key in list(waiting):
+                    bad = [d for d in deps[key] if d in unusable]
+                    if bad:
+                        waiting.remove(key)
+                        unusable.add(key)
+                        msg = f"blocked by failed dependency: {', '.join(bad)}"
+                        _finish(key, _stats(by_key[key], execute=execute, status="skipped", message=msg), started=None)
+                        blocked = True
+
+            for key in list(waiting):
+                if len(running) >= workers:
+                    break
+                if all(d in results for d in deps[key]):
+                    waiting.remove(key)
+                    task = by_key[key]
+                    timeout = task.timeout_seconds or default_timeout_seconds
+                    fut = pool.submit(run_source, task, execute=execute, timeout_seconds=timeout)
+                    running[fut] = (key, time.monotonic() - t0)
+
+            if not running:
+                for key in waiting:
+                    msg = f"dependency cycle: {key} -> {', '.join(d for d in deps[key] if d not in results)}"
+                    _finish(key, _stats(by_key[key], execute=execute, status="failed", message=msg), started=None)
+                waiting.clear()
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, started = running.pop(fut)
+                try:
+                    stats = fut.result()
+                except Exception as exc:
+                    stats = _stats(by_key[key], execute=execute, status="failed", message=str(exc))
+                _finish(key, stats, started=started)
+
+    report.wall_seconds = time.monotonic() - t0
+    report.items = [results[t.source_key] for t in tasks]
+    return report
+
+
+def run_all_enabled_sources_concurrently(
+    db: Session,
+    *,
+    execute: bool,
+    workers: int = DEFAULT_RUN_ALL_WORKERS,
+    default_timeout_seconds: float | None = None,
+) -> RunAllReport:
+    tasks = load_enabled_source_tasks(db)
+    db.commit()
+    return run_sources_concurrently(
+        tasks,
+        execute=execute,
+        workers=workers,
+        default_timeout_seconds=default_timeout_seconds,
+    )
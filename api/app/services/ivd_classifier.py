@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import re
+from collections import deque
+from functools import lru_cache
 from typing import Any, Mapping
 
 from app.services.ivd_dictionary import (
@@ -24,19 +26,112 @@ def _normalize_text(value: Any) -> str:
     return str(value or '').strip().lower()
 
 
+_ASCII_KEYWORD_RE = re.compile(r'[a-z0-9\\-]+')
+
+
+def _is_ascii_word_char(ch: str) -> bool:
+    return ('a' <= ch <= 'z') or ('0' <= ch <= '9')
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lower-cased keywords.
+
+    One left-to-right scan reports every keyword occurring in the text. ASCII keywords
+    (letters, digits, '-') only count when not flanked by [a-z0-9] so that e.g. "lis" does
+    not hit inside "elisa"; all other keywords are plain substring hits.
+    """
+
+    def __init__(self, keywords: tuple[str, ...]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        self._ascii: dict[str, bool] = {}
+        for kw in keywords:
+            kw_norm = kw.lower()
+            if not kw_norm or kw_norm in self._ascii:
+                continue
+            self._ascii[kw_norm] = _ASCII_KEYWORD_RE.fullmatch(kw_norm) is not None
+            node = 0
+            for ch in kw_norm:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(kw_norm)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> frozenset[str]:
+        """Return the set of normalized keywords that hit in (already lower-cased) text."""
+        goto, fail, out, ascii_kw = self._goto, self._fail, self._out, self._ascii
+        found: set[str] = set()
+        node = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for kw_norm in out[node]:
+                if kw_norm in found:
+                    continue
+                if ascii_kw[kw_norm]:
+                    start = i - len(kw_norm) + 1
+                    if start > 0 and _is_ascii_word_char(text[start - 1]):
+                        continue
+                    if i + 1 < n and _is_ascii_word_char(text[i + 1]):
+                        continue
+                found.add(kw_norm)
+        return frozenset(found)
+
+
+@lru_cache(maxsize=64)
+def _normalized(keywords: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+    return tuple((kw, kw.lower()) for kw in keywords)
+
+
+def _hits_in(found: frozenset[str], keywords: tuple[str, ...]) -> list[str]:
+    if not found:
+        return []
+    return [kw for kw, kw_norm in _normalized(keywords) if kw_norm in found]
+
+
+@lru_cache(maxsize=8)
+def _compiled_matcher(version: int = VERSION) -> KeywordMatcher:
+    # Keyed by rule VERSION so a dictionary change that bumps VERSION gets a fresh automaton.
+    return KeywordMatcher(
+        IVD_GLOBAL_EXCLUDE
+        + IVD_INSTRUMENT_INCLUDE
+        + IVD_INSTRUMENT_FALLBACK_INCLUDE
+        + INSTRUMENT_EXCLUDE
+        + IVD_SOFTWARE_INCLUDE
+        + IVD_SOFTWARE_FALLBACK_INCLUDE
+        + SOFTWARE_EXCLUDE
+        + IVD_REAGENT_INCLUDE
+        + NGS_INCLUDE
+        + PCR_INCLUDE
+        + POCT_INCLUDE
+    )
+
+
+@lru_cache(maxsize=64)
+def _keyword_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
 def _match_hits(text: str, keywords: tuple[str, ...]) -> list[str]:
-    hits: list[str] = []
-    for kw in keywords:
-        kw_norm = kw.lower()
-        # ASCII keywords use token boundary to avoid accidental substring hits
-        # like matching "lis" inside "elisa".
-        if re.fullmatch(r'[a-z0-9\\-]+', kw_norm):
-            if re.search(rf'(?<![a-z0-9]){re.escape(kw_norm)}(?![a-z0-9])', text):
-                hits.append(kw)
-            continue
-        if kw_norm in text:
-            hits.append(kw)
-    return hits
+    return _hits_in(_keyword_matcher(keywords).find(text), keywords)
 
 
 def _extract_class_code(payload: Mapping[str, Any]) -> str:
@@ -58,7 +153,8 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
     is_ivd = False
     ivd_category: str | None = None
 
-    global_exclude_hits = _match_hits(scope_text, IVD_GLOBAL_EXCLUDE)
+    matcher = _compiled_matcher()
+    global_exclude_hits = _hits_in(matcher.find(scope_text), IVD_GLOBAL_EXCLUDE)
     if global_exclude_hits:
         return {
             'is_ivd': False,
@@ -79,6 +175,7 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
             'version': VERSION,
         }
 
+    name_hits = matcher.find(name)
     if class_code.startswith('22'):
         is_ivd = True
         ivd_category = 'reagent'
@@ -88,8 +185,8 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
         ivd_category = 'reagent'
         ivd_block = {'by': 'class_code', 'code': '6840', 'category': ivd_category}
     elif class_code.startswith('07'):
-        include_hits = _match_hits(name, IVD_INSTRUMENT_INCLUDE)
-        exclude_hits = _match_hits(name, INSTRUMENT_EXCLUDE)
+        include_hits = _hits_in(name_hits, IVD_INSTRUMENT_INCLUDE)
+        exclude_hits = _hits_in(name_hits, INSTRUMENT_EXCLUDE)
         if include_hits and not exclude_hits:
             is_ivd = True
             ivd_category = 'instrument'
@@ -97,8 +194,8 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
         else:
             ivd_block = {'by': 'class_code+keyword', 'code': '07', 'category': None, 'exclude_hits': exclude_hits}
     elif class_code.startswith('21'):
-        include_hits = _match_hits(name, IVD_SOFTWARE_INCLUDE)
-        exclude_hits = _match_hits(name, SOFTWARE_EXCLUDE)
+        include_hits = _hits_in(name_hits, IVD_SOFTWARE_INCLUDE)
+        exclude_hits = _hits_in(name_hits, SOFTWARE_EXCLUDE)
         if include_hits and not exclude_hits:
             is_ivd = True
             ivd_category = 'software'
@@ -106,11 +203,11 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
         else:
             ivd_block = {'by': 'class_code+keyword', 'code': '21', 'category': None, 'exclude_hits': exclude_hits}
     elif not class_code:
-        reagent_hits = _match_hits(name, IVD_REAGENT_INCLUDE)
-        inst_hits = _match_hits(name, IVD_INSTRUMENT_FALLBACK_INCLUDE)
-        inst_exclude_hits = _match_hits(name, INSTRUMENT_EXCLUDE)
-        sw_hits = _match_hits(name, IVD_SOFTWARE_FALLBACK_INCLUDE)
-        sw_exclude_hits = _match_hits(name, SOFTWARE_EXCLUDE)
+        reagent_hits = _hits_in(name_hits, IVD_REAGENT_INCLUDE)
+        inst_hits = _hits_in(name_hits, IVD_INSTRUMENT_FALLBACK_INCLUDE)
+        inst_exclude_hits = _hits_in(name_hits, INSTRUMENT_EXCLUDE)
+        sw_hits = _hits_in(name_hits, IVD_SOFTWARE_FALLBACK_INCLUDE)
+        sw_exclude_hits = _hits_in(name_hits, SOFTWARE_EXCLUDE)
         if reagent_hits:
             is_ivd = True
             ivd_category = 'reagent'
@@ -132,7 +229,7 @@ def classify_ivd(payload: Mapping[str, Any]) -> dict[str, Any]:
     ivd_subtypes: list[str] = []
     if is_ivd:
         for stype, keywords in (('NGS', NGS_INCLUDE), ('PCR', PCR_INCLUDE), ('POCT', POCT_INCLUDE)):
-            hits = _match_hits(name, keywords)
+            hits = _hits_in(name_hits, keywords)
             if hits:
                 ivd_subtypes.append(stype)
                 subtype_items.append({'type': stype, 'hits': hits, 'field': 'name'})
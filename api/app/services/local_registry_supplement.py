@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 
 from app.models import ChangeLog, Company, Product
 from app.services.ingest import ingest_staging_records
+from app.services.normalize_keys import normalize_company_name
 
 NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
 REG_NO_KEYS = ('注册证编号',)
@@ -274,11 +275,13 @@ def run_local_registry_supplement(
     update_rows: list[dict[str, object]] = []
     change_rows: list[dict[str, object]] = []
     company_id_cache: dict[str, object] = {}
+    company_name_by_id: dict[object, str] = {}
 
     existing_company_rows = db.execute(select(Company.id, Company.name)).all()
     for c in existing_company_rows:
         if c.name and c.name.strip():
             company_id_cache[c.name.strip()] = c.id
+            company_name_by_id[c.id] = c.name
 
     def _company_id(name: str | None):
         key = (name or '').strip()
@@ -291,6 +294,7 @@ def run_local_registry_supplement(
         db.add(c)
         db.flush()
         company_id_cache[key] = c.id
+        company_name_by_id[c.id] = c.name
         return c.id
     for p in products:
         key = _normalize_reg_no(p.reg_no)
@@ -349,16 +353,19 @@ def run_local_registry_supplement(
         if changed:
             updated += 1
             if not dry_run:
-                update_rows.append(
-                    {
-                        'id': p.id,
-                        'name': new_name,
-                        'model': new_model,
-                        'approved_date': new_approved,
-                        'expiry_date': new_expiry,
-                        'company_id': new_company_id,
-                    }
-                )
+                update_row = {
+                    'id': p.id,
+                    'name': new_name,
+                    'model': new_model,
+                    'approved_date': new_approved,
+                    'expiry_date': new_expiry,
+                    'company_id': new_company_id,
+                }
+                if new_company_id != p.company_id:
+                    # Bulk mappings skip ORM events; keep the alias-rebind key in step by hand,
+                    # from the bound company's name exactly as _sync_product_company_name_norm does.
+                    update_row['company_name_norm'] = normalize_company_name(company_name_by_id.get(new_company_id))
+                update_rows.append(update_row)
                 before_state = {
                     'name': p.name,
                     'model': p.model,
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# lri_scores keeps every compute, so "latest score per registration" over it grows with history.
+# lri_scores_latest holds exactly one row per (model_version, registration_id) and is maintained
+# at the end of compute_lri_v1. lri_scores_latest_state.refreshed_at changes on every refresh and
+# keys the process-local result cache below, so each API process recomputes the aggregated map
+# at most once per LRI compute.
+
+_LATEST_COLUMNS = (
+    "registration_id, score_id, product_id, methodology_id, "
+    "tte_days, competitive_count, gp_new_12m, tte_score, rh_score, cd_score, gp_score, "
+    "lri_norm, risk_level, calculated_at"
+)
+_SOURCE_COLUMNS = (
+    "s.registration_id, s.id, s.product_id, s.methodology_id, "
+    "s.tte_days, s.competitive_count, s.gp_new_12m, s.tte_score, s.rh_score, s.cd_score, s.gp_score, "
+    "s.lri_norm, s.risk_level, s.calculated_at"
+)
+
+_lri_result_cache: dict[tuple[str, str], tuple[Any, Any]] = {}
+_lri_result_cache_lock = threading.Lock()
+
+
+def invalidate_lri_latest_cache() -> None:
+    with _lri_result_cache_lock:
+        _lri_result_cache.clear()
+
+
+def refresh_lri_latest(db: Session, *, model_version: str, calculated_at: datetime | None = None) -> int:
+    """Bring lri_scores_latest up to date for `model_version`; returns its row count.
+
+    With `calculated_at` only the rows written by that compute are merged (they are the newest
+    for their registrations), and registrations whose latest row was deleted (upsert-by-day) fall
+    back to their previous score. Without it the table is rebuilt from all of lri_scores.
+    Does not commit.
+    """
+    mv = str(model_version)
+    if calculated_at is None:
+        db.execute(text("DELETE FROM lri_scores_latest WHERE model_version = :mv"), {"mv": mv})
+        _merge_latest(db, mv, "")
+    else:
+        _merge_latest(db, mv, "AND s.calculated_at = :ts", {"ts": calculated_at})
+        orphaned = [
+            r
+            for (r,) in db.execute(
+                text(
+                    """
+                    DELETE FROM lri_scores_latest l
+                    WHERE l.model_version = :mv
+                      AND NOT EXISTS (SELECT 1 FROM lri_scores s WHERE s.id = l.score_id)
+                    RETURNING l.registration_id
+                    """
+                ),
+                {"mv": mv},
+            ).fetchall()
+        ]
+        if orphaned:
+            _merge_latest(db, mv, "AND s.registration_id = ANY(:rids)", {"rids": orphaned})
+    row_count = int(
+        db.execute(
+            text(
+                """
+                INSERT INTO lri_scores_latest_state (model_version, refreshed_at, row_count)
+                SELECT :mv, clock_timestamp(), COUNT(1) FROM lri_scores_latest WHERE model_version = :mv
+                ON CONFLICT (model_version) DO UPDATE SET
+                  refreshed_at = EXCLUDED.refreshed_at,
+                  row_count = EXCLUDED.row_count
+                RETURNING row_count
+                """
+            ),
+            {"mv": mv},
+        ).scalar()
+        or 0
+    )
+    invalidate_lri_latest_cache()
+    return row_count
+
+
+def _merge_latest(db: Session, mv: str, source_filter: str, params: dict[str, Any] | None = None) -> None:
+    db.execute(
+        text(
+            f"""
+            INSERT INTO lri_scores_latest (model_version, {_LATEST_COLUMNS})
+            SELECT DISTINCT ON (s.registration_id) s.model_version, {_SOURCE_COLUMNS}
+            FROM lri_scores s
+            WHERE s.model_version = :mv {source_filter}
+            ORDER BY s.registration_id, s.calculated_at DESC, s.id ASC
+            ON CONFLICT (model_version, registration_id) DO UPDATE SET
+              score_id = EXCLUDED.score_id,
+              product_id = EXCLUDED.product_id,
+              methodology_id = EXCLUDED.methodology_id,
+              tte_days = EXCLUDED.tte_days,
+              competitive_count = EXCLUDED.competitive_count,
+              gp_new_12m = EXCLUDED.gp_new_12m,
+              tte_score = EXCLUDED.tte_score,
+              rh_score = EXCLUDED.rh_score,
+              cd_score = EXCLUDED.cd_score,
+              gp_score = EXCLUDED.gp_score,
+              lri_norm = EXCLUDED.lri_norm,
+              risk_level = EXCLUDED.risk_level,
+              calculated_at = EXCLUDED.calculated_at
+            WHERE lri_scores_latest.calculated_at <= EXCLUDED.calculated_at
+            """
+        ),
+        {"mv": mv, **(params or {})},
+    )
+
+
+def _refresh_token(db: Session, model_version: str) -> Any:
+    return db.execute(
+        text("SELECT refreshed_at FROM lri_scores_latest_state WHERE model_version = :mv"),
+        {"mv": str(model_version)},
+    ).scalar()
+
+
+def _cached(db: Session, kind: str, model_version: str, build) -> Any:
+    token = _refresh_token(db, model_version)
+    key = (kind, str(model_version))
+    if token is not None:
+        with _lri_result_cache_lock:
+            hit = _lri_result_cache.get(key)
+            if hit is not None and hit[0] == token:
+                return hit[1]
+    value = build()
+    if token is not None:
+        with _lri_result_cache_lock:
+            _lri_result_cache[key] = (token, value)
+    return value
+
+
+def lri_top_total(db: Session, *, model_version: str) -> int:
+    def _build() -> int:
+        return int(
+            db.execute(
+                text(
+                    """
+                    SELECT COUNT(1)
+                    FROM lri_scores_latest l
+                    JOIN products p ON p.id = l.product_id
+                    WHERE l.model_version = :mv AND p.is_ivd IS TRUE
+                    """
+                ),
+                {"mv": str(model_version)},
+            ).scalar()
+            or 0
+        )
+
+    return _cached(db, "top_total", model_version, _build)
+
+
+def lri_top_rows(db: Session, *, model_version: str, limit: int, offset: int) -> list[dict[str, Any]]:
+    rows = db.execute(
+        text(
+            """
+            SELECT
+              p.id AS product_id,
+              p.name AS product_name,
+              l.risk_level,
+              l.lri_norm,
+              l.tte_days,
+              l.competitive_count,
+              l.gp_new_12m,
+              l.tte_score,
+              l.rh_score,
+              l.cd_score,
+              l.gp_score,
+              l.calculated_at
+            FROM lri_scores_latest l
+            JOIN products p ON p.id = l.product_id
+            WHERE l.model_version = :mv AND p.is_ivd IS TRUE
+            ORDER BY l.lri_norm DESC NULLS LAST, l.calculated_at DESC, p.id ASC
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        {"mv": str(model_version), "limit": int(limit), "offset": int(offset)},
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def lri_map_groups(db: Session, *, model_version: str) -> list[dict[str, Any]]:
+    """All (methodology, ivd_category) groups in display order; cached until the next refresh."""
+
+    def _build() -> list[dict[str, Any]]:
+        rows = db.execute(
+            text(
+                """
+                WITH dim AS (
+                  SELECT
+                    l.methodology_id,
+                    COALESCE(NULLIF(btrim(p.ivd_category), ''), NULLIF(btrim(p.category), ''), 'unknown') AS ivd_category,
+                    l.lri_norm,
+                    l.risk_level,
+                    l.gp_new_12m
+                  FROM lri_scores_latest l
+                  JOIN products p ON p.id = l.product_id
+                  WHERE l.model_version = :mv AND p.is_ivd IS TRUE
+                )
+                SELECT
+                  d.methodology_id,
+                  m.code AS methodology_code,
+                  m.name_cn AS methodology_name_cn,
+                  d.ivd_category,
+                  COUNT(1)::int AS total_count,
+                  COUNT(1) FILTER (WHERE d.risk_level IN ('HIGH', 'CRITICAL'))::int AS high_risk_count,
+                  COALESCE(AVG(d.lri_norm), 0)::float AS avg_lri_norm,
+                  COALESCE(MAX(d.gp_new_12m), 0)::int AS gp_new_12m
+                FROM dim d
+                LEFT JOIN methodology_master m ON m.id = d.methodology_id
+                GROUP BY 1, 2, 3, 4
+                ORDER BY high_risk_count DESC, avg_lri_norm DESC, total_count DESC, ivd_category ASC
+                """
+            ),
+            {"mv": str(model_version)},
+        ).mappings().all()
+        return [dict(r) for r in rows]
+
+    return _cached(db, "map", model_version, _build)
@@ -10,9 +10,13 @@ from sqlalchemy.orm import Session
 
 from app.models import AdminConfig, LriScore
 from app.repositories.radar import get_admin_config
+from app.services.lri_latest import refresh_lri_latest
 
 
 DEFAULT_MODEL_VERSION = "lri_v1"
+# Rows per multi-row INSERT. 17 bound columns per row keeps a chunk well under the
+# 65535-parameter limit of the Postgres wire protocol.
+DEFAULT_WRITE_BATCH_SIZE = 1000
 
 
 def _today_utc() -> date:
@@ -69,6 +73,48 @@ class LriComputeResult:
     error: str | None = None
 
 
+def _write_lri_scores(
+    db: Session,
+    rows: list[dict[str, Any]],
+    *,
+    model_version: str,
+    source_run_id: int | None,
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    calculated_at: datetime | None = None,
+) -> int:
+    """Insert scored rows with one multi-row INSERT per chunk; returns rows written."""
+    size = max(1, int(batch_size or DEFAULT_WRITE_BATCH_SIZE))
+    calculated_at = calculated_at or datetime.now(timezone.utc)
+    run_id = int(source_run_id) if source_run_id is not None else None
+    wrote = 0
+    for start in range(0, len(rows), size):
+        values = [
+            {
+                "registration_id": row["registration_id"],
+                "product_id": row.get("product_id"),
+                "methodology_id": row.get("methodology_id"),
+                "tte_days": row.get("tte_days"),
+                "renewal_count": int(row.get("renewal_count") or 0),
+                "competitive_count": int(row.get("competitive_count") or 0),
+                "gp_new_12m": int(row.get("gp_new_12m") or 0),
+                "tte_score": int(row.get("tte_score") or 0),
+                "rh_score": int(row.get("rh_score") or 0),
+                "cd_score": int(row.get("cd_score") or 0),
+                "gp_score": int(row.get("gp_score") or 0),
+                "lri_total": int(row.get("lri_total") or 0),
+                "lri_norm": float(row.get("lri_norm") or 0.0),
+                "risk_level": str(row.get("risk_level") or "LOW"),
+                "model_version": model_version,
+                "calculated_at": calculated_at,
+                "source_run_id": run_id,
+            }
+            for row in rows[start : start + size]
+        ]
+        db.execute(insert(LriScore).values(values))
+        wrote += len(values)
+    return wrote
+
+
 def compute_lri_v1(
     db: Session,
     *,
@@ -77,6 +123,7 @@ def compute_lri_v1(
     model_version: str = DEFAULT_MODEL_VERSION,
     upsert_mode: bool = False,
     source_run_id: int | None = None,
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
 ) -> LriComputeResult:
     target = asof or _today_utc()
     cfg = _load_config(db)
@@ -276,29 +323,17 @@ def compute_lri_v1(
             {"mv": str(model_version), "start_dt": start_dt, "end_dt": end_dt},
         )
 
-    wrote = 0
-    for row in out_rows:
-        stmt = insert(LriScore).values(
-            registration_id=row["registration_id"],
-            product_id=row.get("product_id"),
-            methodology_id=row.get("methodology_id"),
-            tte_days=row.get("tte_days"),
-            renewal_count=int(row.get("renewal_count") or 0),
-            competitive_count=int(row.get("competitive_count") or 0),
-            gp_new_12m=int(row.get("gp_new_12m") or 0),
-            tte_score=int(row.get("tte_score") or 0),
-            rh_score=int(row.get("rh_score") or 0),
-            cd_score=int(row.get("cd_score") or 0),
-            gp_score=int(row.get("gp_score") or 0),
-            lri_total=int(row.get("lri_total") or 0),
-            lri_norm=float(row.get("lri_norm") or 0.0),
-            risk_level=str(row.get("risk_level") or "LOW"),
-            model_version=str(model_version),
-            calculated_at=datetime.now(timezone.utc),
-            source_run_id=(int(source_run_id) if source_run_id is not None else None),
-        )
-        db.execute(stmt)
-        wrote += 1
+    calculated_at = datetime.now(timezone.utc)
+    wrote = _write_lri_scores(
+        db,
+        out_rows,
+        model_version=str(model_version),
+        source_run_id=source_run_id,
+        batch_size=batch_size,
+        calculated_at=calculated_at,
+    )
+    # Keep the dashboard's latest-score table in step with this compute.
+    refresh_lri_latest(db, model_version=str(model_version), calculated_at=calculated_at)
 
     # Update daily_metrics with run-quality indicators (ops stability).
     try:
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
+from typing import Any
 
-from sqlalchemy import func, select, text
+from sqlalchemy import Date, cast, func, select, text
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
@@ -13,39 +14,66 @@ from app.models import (
     PendingDocument,
     PendingUdiLink,
     Product,
-    ProductParam,
-    ProductVariant,
-    ProductUdiMap,
     SourceRun,
     Subscription,
-    UdiDiMaster,
 )
+from app.services.udi_coverage import load_udi_coverage_counts
 
 
-def _count_change_type(db: Session, metric_date: date, change_type: str) -> int:
+_CHANGE_TYPES = ('new', 'update', 'cancel', 'expire')
+_EXPIRING_WINDOW_DAYS = 90
+# Rows per multi-row upsert statement (keeps bind parameters well under the protocol limit).
+_UPSERT_CHUNK = 1000
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _change_type_counts_by_day(db: Session, start: date, end: date) -> dict[date, dict[str, int]]:
+    # One grouped scan over the whole range instead of one COUNT per (day, change_type).
+    day = cast(ChangeLog.change_date, Date)
     stmt = (
-        select(func.count(ChangeLog.id))
+        select(day, ChangeLog.change_type, func.count(ChangeLog.id))
         .join(Product, Product.id == ChangeLog.product_id)
         .where(
-            ChangeLog.change_date >= metric_date,
-            ChangeLog.change_date < metric_date + timedelta(days=1),
-            ChangeLog.change_type == change_type,
+            ChangeLog.change_date >= start,
+            ChangeLog.change_date < end + timedelta(days=1),
+            ChangeLog.change_type.in_(_CHANGE_TYPES),
             Product.is_ivd.is_(True),
         )
+        .group_by(day, ChangeLog.change_type)
     )
-    return int(db.scalar(stmt) or 0)
+    out: dict[date, dict[str, int]] = {}
+    for d, change_type, n in db.execute(stmt).all():
+        out.setdefault(d, {})[str(change_type)] = int(n or 0)
+    return out
 
 
-def _count_expiring_in_90d(db: Session, metric_date: date) -> int:
-    upper = metric_date + timedelta(days=90)
-    stmt = select(func.count(Product.id)).where(
-        Product.expiry_date.is_not(None),
-        Product.expiry_date >= metric_date,
-        Product.expiry_date <= upper,
-        Product.status != 'cancelled',
-        Product.is_ivd.is_(True),
+def _expiring_in_90d_by_day(db: Session, start: date, end: date) -> dict[date, int]:
+    # Histogram of expiry dates covering every window, then a prefix-sum sweep per day.
+    last = end + timedelta(days=_EXPIRING_WINDOW_DAYS)
+    stmt = (
+        select(Product.expiry_date, func.count(Product.id))
+        .where(
+            Product.expiry_date.is_not(None),
+            Product.expiry_date >= start,
+            Product.expiry_date <= last,
+            Product.status != 'cancelled',
+            Product.is_ivd.is_(True),
+        )
+        .group_by(Product.expiry_date)
     )
-    return int(db.scalar(stmt) or 0)
+    hist = [0] * ((last - start).days + 1)
+    for d, n in db.execute(stmt).all():
+        hist[(d - start).days] += int(n or 0)
+    prefix = [0]
+    for n in hist:
+        prefix.append(prefix[-1] + n)
+    out: dict[date, int] = {}
+    for i, d in enumerate(_days(start, end)):
+        out[d] = prefix[i + _EXPIRING_WINDOW_DAYS + 1] - prefix[i]
+    return out
 
 
 def _count_active_subscriptions(db: Session) -> int:
@@ -53,48 +81,15 @@ def _count_active_subscriptions(db: Session) -> int:
     return int(db.scalar(stmt) or 0)
 
 
-def _latest_source_run_id(db: Session, metric_date: date) -> int | None:
+def _latest_source_run_id_by_day(db: Session, start: date, end: date) -> dict[date, int]:
+    day = cast(SourceRun.started_at, Date)
     stmt = (
-        select(SourceRun.id)
-        .where(SourceRun.started_at >= metric_date, SourceRun.started_at < metric_date + timedelta(days=1))
-        .order_by(SourceRun.started_at.desc())
-        .limit(1)
+        select(day, SourceRun.id)
+        .where(SourceRun.started_at >= start, SourceRun.started_at < end + timedelta(days=1))
+        .order_by(day, SourceRun.started_at.desc())
+        .distinct(day)
     )
-    return db.scalar(stmt)
-
-
-def _count_total_di(db: Session) -> int:
-    # Preferred source is udi_di_master; fallback to indexed UDI DI coverage when master is not fully backfilled.
-    # This avoids impossible states where mapped_di_count >> total_di_count.
-    try:
-        master_total = int(db.scalar(select(func.count(UdiDiMaster.id))) or 0)
-    except Exception:
-        # Unit tests may pass a lightweight FakeDB without SQLAlchemy APIs.
-        master_total = 0
-    try:
-        index_total = int(
-            db.execute(
-                text(
-                    """
-                    SELECT COUNT(DISTINCT di_norm)
-                    FROM udi_device_index
-                    WHERE di_norm IS NOT NULL AND btrim(di_norm) <> ''
-                    """
-                )
-            ).scalar()
-            or 0
-        )
-    except Exception:
-        index_total = 0
-    return max(master_total, index_total)
-
-
-def _count_mapped_di(db: Session) -> int:
-    # product_udi_map can contain multiple rows for same DI historically; dedupe on DI for coverage.
-    try:
-        return int(db.scalar(select(func.count(func.distinct(ProductUdiMap.di)))) or 0)
-    except Exception:
-        return 0
+    return {d: int(run_id) for d, run_id in db.execute(stmt).all()}
 
 
 def _count_unmapped_di_pending(db: Session) -> int:
@@ -119,144 +114,161 @@ def _count_pending_documents(db: Session) -> int:
         return 0
 
 
-def _compute_udi_value_add_metrics(db: Session, metric_date: date) -> dict:
-    """Compute UDI 'coverage + value-add' metrics for daily_metrics.udi_metrics.
+def _udi_coverage_snapshot(db: Session) -> dict[str, Any]:
+    # Global DI counts are maintained incrementally by the UDI writers (see app.services.udi_coverage).
+    counts = load_udi_coverage_counts(db) or {}
+    # Preferred source is udi_di_master; fallback to indexed UDI DI coverage when master is not fully backfilled.
+    # This avoids impossible states where mapped_di_count >> total_di_count.
+    total_di_count = max(int(counts.get('master_di_count') or 0), int(counts.get('index_di_count') or 0))
+    mapped_di_count = int(counts.get('mapped_di_count') or 0)
+    ratio_raw = (float(mapped_di_count) / float(total_di_count)) if total_di_count > 0 else 0.0
+    return {
+        'total_di_count': total_di_count,
+        'mapped_di_count': mapped_di_count,
+        'unmapped_di_count': _count_unmapped_di_pending(db),
+        # Keep ratio within [0,1] to match contract and avoid numeric overflow on write.
+        'coverage_ratio': max(0.0, min(1.0, ratio_raw)),
+    }
+
+
+def _empty_udi_value_add_metrics() -> dict[str, Any]:
+    return {
+        "udi_devices_indexed": 0,
+        "udi_di_non_empty_rate": 0.0,
+        "udi_reg_non_empty_rate": 0.0,
+        "udi_has_cert_yes_rate": 0.0,
+        "udi_unique_reg": 0,
+        "udi_stub_created": 0,
+        "udi_variants_upserted": 0,
+        "udi_packings_present_rate": 0.0,
+        "udi_storages_present_rate": 0.0,
+        "udi_params_written": 0,
+        "udi_index_run_ids": [],
+    }
+
+
+def _count_by_day(db: Session, sql: str, start: date, end: date) -> dict[date, int]:
+    rows = db.execute(text(sql), {"start": start, "end_excl": end + timedelta(days=1)}).fetchall()
+    return {d: int(n or 0) for d, n in rows}
+
+
+def _compute_udi_value_add_metrics(db: Session, start: date, end: date) -> dict[date, dict[str, Any]]:
+    """Compute UDI 'coverage + value-add' metrics for daily_metrics.udi_metrics, per day in [start, end].
 
     Metrics are designed to answer two questions at a glance:
     - Coverage: how much of UDI is usable (DI/reg/cert/packing/storage)?
     - Value-add: how much enrichment was produced (stubs/variants/params)?
-    """
-    # Identify UDI indexing runs for the day (supports multiple run sources).
-    run_ids = [
-        int(x)
-        for (x,) in db.execute(
-            text(
-                """
-                SELECT id
-                FROM source_runs
-                WHERE started_at >= :d
-                  AND started_at < :d + INTERVAL '1 day'
-                  AND upper(source) LIKE 'UDI_INDEX%'
-                ORDER BY started_at ASC
-                """
-            ),
-            {"d": metric_date},
-        ).fetchall()
-    ]
-
-    if not run_ids:
-        return {
-            "udi_devices_indexed": 0,
-            "udi_di_non_empty_rate": 0.0,
-            "udi_reg_non_empty_rate": 0.0,
-            "udi_has_cert_yes_rate": 0.0,
-            "udi_unique_reg": 0,
-            "udi_stub_created": 0,
-            "udi_variants_upserted": 0,
-            "udi_packings_present_rate": 0.0,
-            "udi_storages_present_rate": 0.0,
-            "udi_params_written": 0,
-            "udi_index_run_ids": [],
-        }
-
-    row = (
-        db.execute(
-            text(
-                """
-                SELECT
-                  COUNT(1) AS total,
-                  SUM(CASE WHEN btrim(di_norm) <> '' THEN 1 ELSE 0 END) AS di_non_empty,
-                  SUM(CASE WHEN registration_no_norm IS NOT NULL AND btrim(registration_no_norm) <> '' THEN 1 ELSE 0 END) AS reg_non_empty,
-                  SUM(CASE WHEN has_cert IS TRUE THEN 1 ELSE 0 END) AS has_cert_yes,
-                  SUM(CASE WHEN packing_json IS NOT NULL AND packing_json::text <> '[]' THEN 1 ELSE 0 END) AS packings_present,
-                  SUM(CASE WHEN storage_json IS NOT NULL AND storage_json::text <> '[]' THEN 1 ELSE 0 END) AS storages_present,
-                  COUNT(DISTINCT CASE WHEN registration_no_norm IS NOT NULL AND btrim(registration_no_norm) <> '' THEN registration_no_norm END) AS unique_reg
-                FROM udi_device_index
-                WHERE source_run_id = ANY(:ids)
-                """
-            ),
-            {"ids": run_ids},
-        )
-        .mappings()
-        .first()
-        or {}
-    )
-
-    total = int(row.get("total") or 0)
-    di_non_empty = int(row.get("di_non_empty") or 0)
-    reg_non_empty = int(row.get("reg_non_empty") or 0)
-    has_cert_yes = int(row.get("has_cert_yes") or 0)
-    packings_present = int(row.get("packings_present") or 0)
-    storages_present = int(row.get("storages_present") or 0)
-    unique_reg = int(row.get("unique_reg") or 0)
 
-    def _rate(n: int, d: int) -> float:
-        return round(float(n) / float(d), 6) if d > 0 else 0.0
+    Days without a UDI indexing run report zeros.
+    """
+    out = {d: _empty_udi_value_add_metrics() for d in _days(start, end)}
+
+    # Identify UDI indexing runs per day (supports multiple run sources).
+    runs_by_day: dict[date, list[int]] = {}
+    for run_id, d in db.execute(
+        text(
+            """
+            SELECT id, started_at::date AS d
+            FROM source_runs
+            WHERE started_at >= :start
+              AND started_at < :end_excl
+              AND upper(source) LIKE 'UDI_INDEX%'
+            ORDER BY started_at ASC
+            """
+        ),
+        {"start": start, "end_excl": end + timedelta(days=1)},
+    ).fetchall():
+        runs_by_day.setdefault(d, []).append(int(run_id))
+    if not runs_by_day:
+        return out
+
+    # udi_device_index.source_run_id is re-stamped by the latest run, so each row belongs to one day.
+    stats_by_day: dict[date, Any] = {}
+    for row in db.execute(
+        text(
+            """
+            SELECT
+              r.started_at::date AS d,
+              COUNT(1) AS total,
+              SUM(CASE WHEN btrim(u.di_norm) <> '' THEN 1 ELSE 0 END) AS di_non_empty,
+              SUM(CASE WHEN u.registration_no_norm IS NOT NULL AND btrim(u.registration_no_norm) <> '' THEN 1 ELSE 0 END) AS reg_non_empty,
+              SUM(CASE WHEN u.has_cert IS TRUE THEN 1 ELSE 0 END) AS has_cert_yes,
+              SUM(CASE WHEN u.packing_json IS NOT NULL AND u.packing_json::text <> '[]' THEN 1 ELSE 0 END) AS packings_present,
+              SUM(CASE WHEN u.storage_json IS NOT NULL AND u.storage_json::text <> '[]' THEN 1 ELSE 0 END) AS storages_present,
+              COUNT(DISTINCT CASE WHEN u.registration_no_norm IS NOT NULL AND btrim(u.registration_no_norm) <> '' THEN u.registration_no_norm END) AS unique_reg
+            FROM udi_device_index u
+            JOIN source_runs r ON r.id = u.source_run_id
+            WHERE u.source_run_id = ANY(:ids)
+            GROUP BY 1
+            """
+        ),
+        {"ids": [i for ids in runs_by_day.values() for i in ids]},
+    ).mappings():
+        stats_by_day[row["d"]] = row
 
     # "Value-add" counters (independent of udi_device_index run IDs).
-    stub_created = int(
-        db.execute(
-            text(
-                """
-                SELECT COUNT(1)
-                FROM products
-                WHERE created_at >= :d
-                  AND created_at < :d + INTERVAL '1 day'
-                  AND (raw_json ? '_stub')
-                  AND COALESCE(raw_json->'_stub'->>'source_hint', '') = 'UDI'
-                """
-            ),
-            {"d": metric_date},
-        ).scalar()
-        or 0
+    stubs = _count_by_day(
+        db,
+        """
+        SELECT created_at::date AS d, COUNT(1)
+        FROM products
+        WHERE created_at >= :start
+          AND created_at < :end_excl
+          AND (raw_json ? '_stub')
+          AND COALESCE(raw_json->'_stub'->>'source_hint', '') = 'UDI'
+        GROUP BY 1
+        """,
+        start,
+        end,
     )
-
-    variants_upserted = int(
-        db.execute(
-            text(
-                """
-                SELECT COUNT(1)
-                FROM product_variants
-                WHERE updated_at >= :d
-                  AND updated_at < :d + INTERVAL '1 day'
-                  AND registration_id IS NOT NULL
-                  AND evidence_raw_document_id IS NOT NULL
-                """
-            ),
-            {"d": metric_date},
-        ).scalar()
-        or 0
+    variants = _count_by_day(
+        db,
+        """
+        SELECT updated_at::date AS d, COUNT(1)
+        FROM product_variants
+        WHERE updated_at >= :start
+          AND updated_at < :end_excl
+          AND registration_id IS NOT NULL
+          AND evidence_raw_document_id IS NOT NULL
+        GROUP BY 1
+        """,
+        start,
+        end,
     )
-
-    params_written = int(
-        db.execute(
-            text(
-                """
-                SELECT COUNT(1)
-                FROM product_params
-                WHERE created_at >= :d
-                  AND created_at < :d + INTERVAL '1 day'
-                  AND extract_version = 'udi_params_v1'
-                """
-            ),
-            {"d": metric_date},
-        ).scalar()
-        or 0
+    params = _count_by_day(
+        db,
+        """
+        SELECT created_at::date AS d, COUNT(1)
+        FROM product_params
+        WHERE created_at >= :start
+          AND created_at < :end_excl
+          AND extract_version = 'udi_params_v1'
+        GROUP BY 1
+        """,
+        start,
+        end,
     )
 
-    return {
-        "udi_devices_indexed": total,
-        "udi_di_non_empty_rate": _rate(di_non_empty, total),
-        "udi_reg_non_empty_rate": _rate(reg_non_empty, total),
-        "udi_has_cert_yes_rate": _rate(has_cert_yes, total),
-        "udi_unique_reg": unique_reg,
-        "udi_stub_created": stub_created,
-        "udi_variants_upserted": variants_upserted,
-        "udi_packings_present_rate": _rate(packings_present, total),
-        "udi_storages_present_rate": _rate(storages_present, total),
-        "udi_params_written": params_written,
-        "udi_index_run_ids": run_ids,
-    }
+    def _rate(n: int, d: int) -> float:
+        return round(float(n) / float(d), 6) if d > 0 else 0.0
+
+    for d, run_ids in runs_by_day.items():
+        row = stats_by_day.get(d) or {}
+        total = int(row.get("total") or 0)
+        out[d] = {
+            "udi_devices_indexed": total,
+            "udi_di_non_empty_rate": _rate(int(row.get("di_non_empty") or 0), total),
+            "udi_reg_non_empty_rate": _rate(int(row.get("reg_non_empty") or 0), total),
+            "udi_has_cert_yes_rate": _rate(int(row.get("has_cert_yes") or 0), total),
+            "udi_unique_reg": int(row.get("unique_reg") or 0),
+            "udi_stub_created": stubs.get(d, 0),
+            "udi_variants_upserted": variants.get(d, 0),
+            "udi_packings_present_rate": _rate(int(row.get("packings_present") or 0), total),
+            "udi_storages_present_rate": _rate(int(row.get("storages_present") or 0), total),
+            "udi_params_written": params.get(d, 0),
+            "udi_index_run_ids": run_ids,
+        }
+    return out
 
 
 def upsert_daily_lri_quality_metrics(
@@ -295,68 +307,61 @@ def upsert_daily_lri_quality_metrics(
     db.execute(stmt)
 
 
-def generate_daily_metrics(db: Session, metric_date: date | None = None) -> DailyMetric:
-    target_date = metric_date or date.today()
+def compute_daily_metrics_range(db: Session, start: date, end: date) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Build daily_metrics / daily_udi_metrics rows for every day in [start, end].
 
-    new_products = _count_change_type(db, target_date, 'new')
-    updated_products = _count_change_type(db, target_date, 'update')
-    cancelled_products = _count_change_type(db, target_date, 'cancel') + _count_change_type(db, target_date, 'expire')
-    expiring_in_90d = _count_expiring_in_90d(db, target_date)
+    Each metric family is one grouped query over the whole range, so the number of
+    statements does not depend on the number of days.
+    """
+    changes = _change_type_counts_by_day(db, start, end)
+    expiring = _expiring_in_90d_by_day(db, start, end)
+    run_ids = _latest_source_run_id_by_day(db, start, end)
+    udi_by_day = _compute_udi_value_add_metrics(db, start, end)
     active_subscriptions = _count_active_subscriptions(db)
-    source_run_id = _latest_source_run_id(db, target_date)
-    total_di_count = _count_total_di(db)
-    mapped_di_count = _count_mapped_di(db)
-    unmapped_di_count = _count_unmapped_di_pending(db)
-    ratio_raw = (float(mapped_di_count) / float(total_di_count)) if total_di_count > 0 else 0.0
-    # Keep ratio within [0,1] to match contract and avoid numeric overflow on write.
-    coverage_ratio = max(0.0, min(1.0, ratio_raw))
-    udi_metrics = _compute_udi_value_add_metrics(db, target_date)
+    coverage = _udi_coverage_snapshot(db)
+
+    daily_rows: list[dict[str, Any]] = []
+    udi_rows: list[dict[str, Any]] = []
+    for d in _days(start, end):
+        counts = changes.get(d, {})
+        daily_rows.append(
+            {
+                'metric_date': d,
+                'new_products': counts.get('new', 0),
+                'updated_products': counts.get('update', 0),
+                'cancelled_products': counts.get('cancel', 0) + counts.get('expire', 0),
+                'expiring_in_90d': expiring.get(d, 0),
+                'active_subscriptions': active_subscriptions,
+                'source_run_id': run_ids.get(d),
+                'udi_metrics': udi_by_day[d],
+            }
+        )
+        udi_rows.append({'metric_date': d, **coverage, 'source_run_id': run_ids.get(d)})
+    return daily_rows, udi_rows
 
-    stmt = insert(DailyMetric).values(
-        metric_date=target_date,
-        new_products=new_products,
-        updated_products=updated_products,
-        cancelled_products=cancelled_products,
-        expiring_in_90d=expiring_in_90d,
-        active_subscriptions=active_subscriptions,
-        source_run_id=source_run_id,
-        udi_metrics=udi_metrics,
-    )
-    stmt = stmt.on_conflict_do_update(
-        index_elements=[DailyMetric.metric_date],
-        set_={
-            'new_products': new_products,
-            'updated_products': updated_products,
-            'cancelled_products': cancelled_products,
-            'expiring_in_90d': expiring_in_90d,
-            'active_subscriptions': active_subscriptions,
-            'source_run_id': source_run_id,
-            'udi_metrics': udi_metrics,
-        },
-    )
-    db.execute(stmt)
 
-    udi_stmt = insert(DailyUdiMetric).values(
-        metric_date=target_date,
-        total_di_count=total_di_count,
-        mapped_di_count=mapped_di_count,
-        unmapped_di_count=unmapped_di_count,
-        coverage_ratio=coverage_ratio,
-        source_run_id=source_run_id,
-    )
-    udi_stmt = udi_stmt.on_conflict_do_update(
-        index_elements=[DailyUdiMetric.metric_date],
-        set_={
-            'total_di_count': total_di_count,
-            'mapped_di_count': mapped_di_count,
-            'unmapped_di_count': unmapped_di_count,
-            'coverage_ratio': coverage_ratio,
-            'source_run_id': source_run_id,
-        },
-    )
-    db.execute(udi_stmt)
+def _upsert_rows(db: Session, model: Any, rows: list[dict[str, Any]]) -> None:
+    for i in range(0, len(rows), _UPSERT_CHUNK):
+        chunk = rows[i : i + _UPSERT_CHUNK]
+        stmt = insert(model).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.metric_date],
+            set_={k: getattr(stmt.excluded, k) for k in chunk[0] if k != 'metric_date'},
+        )
+        db.execute(stmt)
+
+
+def _write_daily_metrics_range(db: Session, start: date, end: date) -> None:
+    daily_rows, udi_rows = compute_daily_metrics_range(db, start, end)
+    _upsert_rows(db, DailyMetric, daily_rows)
+    _upsert_rows(db, DailyUdiMetric, udi_rows)
     db.commit()
 
+
+def generate_daily_metrics(db: Session, metric_date: date | None = None) -> DailyMetric:
+    target_date = metric_date or date.today()
+    _write_daily_metrics_range(db, target_date, target_date)
+
     row = db.get(DailyMetric, target_date)
     if row is None:
         raise RuntimeError('failed to upsert daily_metrics')
@@ -368,10 +373,5 @@ def regenerate_daily_metrics(db: Session, *, days: int = 365, end_date: date | N
         return []
     end0 = end_date or date.today()
     start0 = end0 - timedelta(days=days - 1)
-    out: list[str] = []
-    cur = start0
-    while cur <= end0:
-        row = generate_daily_metrics(db, cur)
-        out.append(row.metric_date.isoformat())
-        cur = cur + timedelta(days=1)
-    return out
+    _write_daily_metrics_range(db, start0, end0)
+    return [d.isoformat() for d in _days(start0, end0)]
@@ -107,13 +107,17 @@ def shadow_write_nmpa_snapshot_and_diffs(
     product_after: dict[str, Any] | None,
     source_run_id: int | None,
     raw_document_id: UUID | None,
+    registration_cache: dict[str, Registration | None] | None = None,
 ) -> ShadowWriteResult:
     reg_no = str(record.reg_no or "").strip()
     if not reg_no:
         return ShadowWriteResult(ok=False, error="missing reg_no (registration_no)")
 
     # Upsert registrations with source-contract conflict resolver.
-    reg_before_obj = db.scalar(select(Registration).where(Registration.registration_no == reg_no))
+    if registration_cache is not None and reg_no in registration_cache:
+        reg_before_obj = registration_cache[reg_no]
+    else:
+        reg_before_obj = db.scalar(select(Registration).where(Registration.registration_no == reg_no))
     reg_before: dict[str, Any] = {}
     if reg_before_obj is not None:
         reg_before = {
@@ -141,6 +145,7 @@ def shadow_write_nmpa_snapshot_and_diffs(
         raw_source_record_id=None,
         raw_payload=dict(record.raw),
         write_change_log=False,  # keep existing nmpa_assets change_log behavior below
+        registration_cache=registration_cache,
     )
     reg = db.get(Registration, reg_upsert.registration_id)
     if reg is None:
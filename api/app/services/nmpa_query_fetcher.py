@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+BLOCK_STATUS_CODES = frozenset({412, 429})
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; IVDRadarBot/1.0)'}
+
+
+@dataclass
+class QueryResult:
+    keyword: str
+    status_code: int | None = None
+    text: str = ''
+    error: str | None = None
+    attempts: int = 0
+
+
+@dataclass
+class FetchStats:
+    keywords: int = 0
+    requests: int = 0
+    succeeded: int = 0
+    blocked_412: int = 0
+    throttled_429: int = 0
+    block_responses: int = 0
+    failed: int = 0
+    slowdowns: int = 0
+    elapsed_seconds: float = 0.0
+    final_rate_per_sec: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'keywords': self.keywords,
+            'requests': self.requests,
+            'succeeded': self.succeeded,
+            'blocked_412': self.blocked_412,
+            'throttled_429': self.throttled_429,
+            'block_responses': self.block_responses,
+            'failed': self.failed,
+            'slowdowns': self.slowdowns,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'throughput_per_sec': (round(self.requests / self.elapsed_seconds, 2) if self.elapsed_seconds > 0 else None),
+            'final_rate_per_sec': round(self.final_rate_per_sec, 3),
+        }
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose rate halves on every block (412/429) and creeps back after a run of successes."""
+
+    def __init__(
+        self,
+        rate_per_sec: float,
+        *,
+        burst: float | None = None,
+        min_rate_per_sec: float = 0.1,
+        recover_after: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_rate = max(float(rate_per_sec), min_rate_per_sec)
+        self.rate = self.max_rate
+        self.min_rate = float(min_rate_per_sec)
+        self.capacity = max(1.0, float(burst if burst is not None else self.max_rate))
+        self.tokens = self.capacity
+        self.recover_after = max(1, int(recover_after))
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._ok_streak = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                pause = self._paused_until - self._clock()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                self._refill()
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def slow_down(self, retry_after: float | None = None) -> None:
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2.0)
+        self.tokens = 0.0
+        self._ok_streak = 0
+        if retry_after and retry_after > 0:
+            self._paused_until = max(self._paused_until, self._clock() + float(retry_after))
+
+    def on_success(self) -> None:
+        self._ok_streak += 1
+        if self._ok_streak >= self.recover_after and self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate * 1.25)
+            self._ok_streak = 0
+
+
+def _retry_after_seconds(resp: httpx.Response, *, cap: float = 60.0) -> float | None:
+    raw = resp.headers.get('Retry-After')
+    if not raw:
+        return None
+    try:
+        return max(0.0, min(cap, float(raw)))
+    except ValueError:
+        return None
+
+
+async def fetch_queries(
+    keywords: Iterable[str],
+    *,
+    url: str,
+    timeout_seconds: float = 20,
+    concurrency: int = 4,
+    rate_per_sec: float = 2.0,
+    max_retries: int = 2,
+    headers: dict[str, str] | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> tuple[dict[str, QueryResult], FetchStats]:
+    """GET `url?keyword=<kw>` for each distinct keyword over one pooled AsyncClient.
+
+    At most `concurrency` requests are in flight and starts are paced by an adaptive token
+    bucket; a 412/429 halves the rate (honouring Retry-After) and is retried up to `max_retries`.
+    """
+    todo = list(dict.fromkeys(k for k in keywords if k))
+    concurrency = max(1, int(concurrency))
+    stats = FetchStats(keywords=len(todo))
+    results: dict[str, QueryResult] = {}
+    bucket = AdaptiveTokenBucket(rate_per_sec)
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    t0 = time.monotonic()
+
+    async with httpx.AsyncClient(
+        headers=(headers or DEFAULT_HEADERS),
+        timeout=float(timeout_seconds),
+        limits=limits,
+        transport=transport,
+    ) as client:
+
+        async def _one(keyword: str) -> None:
+            res = QueryResult(keyword=keyword)
+            async with sem:
+                for _ in range(max(0, int(max_retries)) + 1):
+                    await bucket.acquire()
+                    res.attempts += 1
+                    stats.requests += 1
+                    try:
+                        resp = await client.get(url, params={'keyword': keyword})
+                    except httpx.HTTPError as exc:
+                        res.status_code = None
+                        res.error = str(exc) or exc.__class__.__name__
+                        break
+                    res.status_code = resp.status_code
+                    if resp.status_code in BLOCK_STATUS_CODES:
+                        stats.block_responses += 1
+                        stats.slowdowns += 1
+                        bucket.slow_down(_retry_after_seconds(resp))
+                        continue
+                    res.text = resp.text
+                    bucket.on_success()
+                    break
+            if res.status_code == 412:
+                stats.blocked_412 += 1
+            elif res.status_code == 429:
+                stats.throttled_429 += 1
+            elif res.status_code is None or res.status_code >= 400:
+                stats.failed += 1
+            else:
+                stats.succeeded += 1
+            results[keyword] = res
+
+        await asyncio.gather(*(_one(k) for k in todo))
+
+    stats.elapsed_seconds = time.monotonic() - t0
+    stats.final_rate_per_sec = bucket.rate
+    return results, stats
+
+
+def fetch_queries_sync(keywords: Iterable[str], **kwargs: Any) -> tuple[dict[str, QueryResult], FetchStats]:
+    """Blocking entry point for the scheduler loop and admin endpoint (no running event loop there)."""
+    return asyncio.run(fetch_queries(keywords, **kwargs))
+
+
+# Response cache (nmpa_query_cache): parsed hints per keyword, so repeated registration numbers
+# are not re-queried across runs while the entry is younger than the TTL.
+
+def load_cached_hints(db: Session, keywords: Iterable[str], *, ttl_hours: int) -> dict[str, dict[str, Any]]:
+    arr = sorted({str(k) for k in keywords if k})
+    if not arr:
+        return {}
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max(1, int(ttl_hours)))
+    rows = db.execute(
+        text('SELECT keyword, hints FROM nmpa_query_cache WHERE keyword = ANY(:arr) AND fetched_at >= :cutoff'),
+        {'arr': arr, 'cutoff': cutoff},
+    ).fetchall()
+    return {str(kw): (hints if isinstance(hints, dict) else {}) for kw, hints in rows}
+
+
+def store_cached_hints(db: Session, entries: list[tuple[str, int, dict[str, Any]]]) -> None:
+    if not entries:
+        return
+    db.execute(
+        text(
+            """
+            INSERT INTO nmpa_query_cache (keyword, status_code, hints, fetched_at)
+            VALUES (:keyword, :status_code, CAST(:hints AS jsonb), NOW())
+            ON CONFLICT (keyword) DO UPDATE SET
+                status_code = EXCLUDED.status_code,
+                hints = EXCLUDED.hints,
+                fetched_at = EXCLUDED.fetched_at
+            """
+        ),
+        [
+            {'keyword': kw, 'status_code': int(code), 'hints': json.dumps(hints or {}, ensure_ascii=False)}
+            for kw, code, hints in entries
+        ],
+    )
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 import unicodedata
+from typing import Any
 
 
 # Only split on separators that are unlikely to be part of the canonical key itself.
@@ -81,3 +82,91 @@ def normalize_registration_no(text: str | None) -> str | None:
 
     # Give up: returning None is safer than truncating and creating a wrong anchor.
     return None
+
+
+_DEFAULT_COMPANY_SUFFIXES = [
+    "有限责任公司",
+    "股份有限公司",
+    "有限公司",
+    "集团有限公司",
+    "集团",
+    "股份",
+    "公司",
+    "科技有限公司",
+    "科技",
+    "医疗器械有限公司",
+    "医疗器械",
+    "医疗",
+    "器械",
+    "生物科技有限公司",
+    "生物科技",
+    "生物",
+]
+
+_COMPANY_RAW_KEYS = (
+    "company_name",
+    "manufacturer",
+    "注册人名称",
+    "生产企业名称",
+    "ylqxzcrbarmc",
+)
+
+
+def normalize_company_name(name: str | None, *, seed: Any = None) -> str | None:
+    if name is None:
+        return None
+    s = str(name).strip()
+    if not s:
+        return None
+
+    s = unicodedata.normalize("NFKC", s)
+    s = s.replace("（", "(").replace("）", ")")
+    s = re.sub(r"\s+", "", s)
+
+    # Strip surrounding brackets/punct.
+    s = s.strip("()[]{}<>，,。.;；:：/\\|·")
+
+    # Apply seed replacements early (after basic normalization).
+    if seed and seed.replacements:
+        s = seed.replacements.get(s, s)
+
+    # Iteratively strip known suffixes (seed + default) only when at the end.
+    suffixes = list(dict.fromkeys((seed.remove_suffixes if seed else []) + _DEFAULT_COMPANY_SUFFIXES))
+    suffixes = sorted(suffixes, key=len, reverse=True)
+    changed = True
+    while changed:
+        changed = False
+        for suf in suffixes:
+            if suf and s.endswith(suf) and len(s) > len(suf):
+                s = s[: -len(suf)]
+                changed = True
+                break
+        if changed:
+            s = s.strip("()[]{}<>，,。.;；:：/\\|·")
+
+    # Final cleanup: keep Chinese chars, digits, ASCII letters.
+    out = []
+    for ch in s:
+        o = ord(ch)
+        if "0" <= ch <= "9":
+            out.append(ch)
+        elif "A" <= ch.upper() <= "Z":
+            out.append(ch.upper())
+        elif 0x4E00 <= o <= 0x9FFF:
+            out.append(ch)
+        # else drop
+    result = "".join(out)
+    return result or None
+
+
+def company_raw_name(company_name: str | None, *payloads: Any) -> str | None:
+    """Company text for a product: linked company name first, else the first raw payload key present."""
+    if company_name is not None and str(company_name).strip():
+        return str(company_name)
+    for payload in payloads:
+        if isinstance(payload, dict):
+            for k in _COMPANY_RAW_KEYS:
+                v = payload.get(k)
+                if v is not None and str(v).strip():
+                    return str(v).strip()
+    return None
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from time import monotonic
+from typing import Any, Optional
 
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
@@ -153,7 +155,83 @@ def _get_active_paid_subscription_expiry(db: Session, *, user, now: datetime) ->
         return None
 
 
+# Process-local plan cache keyed by user id. Authenticated endpoints resolve the plan on every
+# request (often twice), and each miss costs the subscription + membership_grants lookups.
+# Entries are keyed on the users.* snapshot too, so a changed user row is never served stale;
+# admin membership endpoints call invalidate_plan_cache(), and the TTL bounds staleness for
+# other API processes that did not see the write.
+PLAN_CACHE_TTL_SECONDS = 30.0
+_PLAN_CACHE_MAX_ENTRIES = 4096
+_plan_cache: dict[int, tuple[float, tuple, PlanSnapshot]] = {}
+_plan_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_plan_cache_lock = threading.Lock()
+
+
+def invalidate_plan_cache(user_id: int | None = None) -> None:
+    with _plan_cache_lock:
+        if user_id is None:
+            _plan_cache.clear()
+        else:
+            _plan_cache.pop(int(user_id), None)
+        _plan_cache_stats["invalidations"] += 1
+
+
+def plan_cache_stats() -> dict[str, int]:
+    with _plan_cache_lock:
+        return {**_plan_cache_stats, "size": len(_plan_cache)}
+
+
+def _user_fingerprint(user: Any) -> tuple:
+    return (
+        getattr(user, 'role', None),
+        getattr(user, 'plan', None),
+        getattr(user, 'plan_status', None),
+        getattr(user, 'plan_expires_at', None),
+        getattr(user, 'email', None),
+    )
+
+
+def _cache_deadline(snap: PlanSnapshot, *, mono_now: float, now: datetime) -> float:
+    ttl = PLAN_CACHE_TTL_SECONDS
+    exp = snap.plan_expires_at
+    if snap.is_pro and isinstance(exp, datetime):
+        exp0 = exp if exp.tzinfo else exp.replace(tzinfo=timezone.utc)
+        # A pro snapshot must not outlive the membership it was derived from.
+        ttl = min(ttl, max(0.0, (exp0 - now).total_seconds()))
+    return mono_now + ttl
+
+
 def compute_plan(user, db: Session, *, now: datetime | None = None) -> PlanSnapshot:
+    """Plan snapshot for `user`, served from the short-lived per-user cache when possible.
+
+    Passing `now` evaluates at that instant and bypasses the cache.
+    """
+    try:
+        user_id = int(getattr(user, 'id', 0) or 0)
+    except Exception:
+        user_id = 0
+    if now is not None or not user_id:
+        return _compute_plan_uncached(user, db, now=now)
+
+    fingerprint = _user_fingerprint(user)
+    mono_now = monotonic()
+    with _plan_cache_lock:
+        cached = _plan_cache.get(user_id)
+        if cached is not None and cached[0] > mono_now and cached[1] == fingerprint:
+            _plan_cache_stats["hits"] += 1
+            return cached[2]
+        _plan_cache_stats["misses"] += 1
+
+    now0 = datetime.now(timezone.utc)
+    snap = _compute_plan_uncached(user, db, now=now0)
+    with _plan_cache_lock:
+        if len(_plan_cache) >= _PLAN_CACHE_MAX_ENTRIES and user_id not in _plan_cache:
+            _plan_cache.clear()
+        _plan_cache[user_id] = (_cache_deadline(snap, mono_now=mono_now, now=now0), fingerprint, snap)
+    return snap
+
+
+def _compute_plan_uncached(user, db: Session, *, now: datetime | None = None) -> PlanSnapshot:
     """
     Single source of truth for plan computation.
 
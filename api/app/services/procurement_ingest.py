@@ -5,7 +5,7 @@ import io
 import json
 import re
 import unicodedata
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -31,6 +31,12 @@ from app.pipeline.ingest import save_raw_document
 from app.pipeline.source_run_context import source_run
 from app.repositories.procurement import ProcurementRollbackResult, rollback_procurement_by_source_run
 from app.services.company_resolution import normalize_company_name
+from app.services.registration_match_index import refresh_registration_match_index
+
+# Candidate thresholds (pg_trgm similarity) for the product-name and search-text legs.
+NAME_SIM_THRESHOLD = 0.10
+TEXT_SIM_THRESHOLD = 0.05
+CANDIDATE_BATCH_SIZE = 200
 
 
 def _pick(row: dict[str, Any], keys: list[str]) -> str | None:
@@ -122,12 +128,49 @@ def _map_row(row: dict[str, Any], province: str) -> dict[str, Any]:
     }
 
 
-def _resolve_company_id(db: Session, company_text: str | None) -> UUID | None:
+@dataclass
+class _MatchCache:
+    """Per-ingest-run lookups shared by every lot of a snapshot."""
+
+    company_ids: dict[str, UUID | None] = field(default_factory=dict)
+    registration_methodologies: dict[UUID, set[UUID]] = field(default_factory=dict)
+    registration_companies: dict[UUID, set[UUID]] = field(default_factory=dict)
+
+    def prime(self, db: Session, registration_ids: set[UUID]) -> None:
+        missing = [rid for rid in registration_ids if rid not in self.registration_methodologies]
+        for i in range(0, len(missing), 1000):
+            part = missing[i : i + 1000]
+            for rid in part:
+                self.registration_methodologies[rid] = set()
+                self.registration_companies[rid] = set()
+            for rid, mid in db.execute(
+                select(RegistrationMethodology.registration_id, RegistrationMethodology.methodology_id).where(
+                    RegistrationMethodology.registration_id.in_(part)
+                )
+            ).all():
+                self.registration_methodologies[rid].add(mid)
+            for rid, cid in db.execute(
+                select(Product.registration_id, Product.company_id)
+                .where(Product.registration_id.in_(part), Product.company_id.is_not(None))
+                .distinct()
+            ).all():
+                self.registration_companies[rid].add(cid)
+
+
+def _resolve_company_id(db: Session, company_text: str | None, cache: _MatchCache | None = None) -> UUID | None:
     if not company_text:
         return None
     norm = normalize_company_name(company_text)
     if not norm:
         return None
+    if cache is None:
+        return _lookup_company_id(db, norm)
+    if norm not in cache.company_ids:
+        cache.company_ids[norm] = _lookup_company_id(db, norm)
+    return cache.company_ids[norm]
+
+
+def _lookup_company_id(db: Session, norm: str) -> UUID | None:
     alias = db.scalar(select(CompanyAlias).where(CompanyAlias.alias_name == norm))
     if alias is not None:
         return alias.company_id
@@ -162,42 +205,91 @@ def _infer_lot_methodologies(catalog_item_std: str | None, method_keys: list[tup
     return mids
 
 
-def _candidate_rows_for_lot(db: Session, catalog_item_std: str, limit: int = 30) -> list[dict[str, Any]]:
-    if not catalog_item_std.strip():
-        return []
+def _candidate_rows_for_items(
+    db: Session, catalog_items: list[str], limit: int = 30
+) -> dict[str, list[dict[str, Any]]]:
+    """Top `limit` registration candidates for each distinct catalog item, batched per query."""
+    items = list(dict.fromkeys(x.strip() for x in catalog_items if x and x.strip()))
+    out: dict[str, list[dict[str, Any]]] = {x: [] for x in items}
+    if not items:
+        return out
+    # `%` uses the session threshold; set it (transaction-local) so both trigram GIN indexes apply.
+    db.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :th, true)"),
+        {"th": str(min(NAME_SIM_THRESHOLD, TEXT_SIM_THRESHOLD))},
+    )
     query = text(
         """
-        SELECT
-          p.registration_id AS registration_id,
-          max(similarity(:q, p.name)) AS name_sim,
-          max(similarity(:q, COALESCE(r.raw_json::text, ''))) AS raw_sim,
-          bool_or(p.company_id IS NOT NULL) AS has_company
-        FROM products p
-        JOIN registrations r ON r.id = p.registration_id
-        WHERE p.registration_id IS NOT NULL
-          AND (
-            similarity(:q, p.name) > 0.10
-            OR similarity(:q, COALESCE(r.raw_json::text, '')) > 0.05
-          )
-        GROUP BY p.registration_id
-        ORDER BY GREATEST(max(similarity(:q, p.name)), max(similarity(:q, COALESCE(r.raw_json::text, '')))) DESC
-        LIMIT :lim
+        SELECT q.qi, c.registration_id, c.name_sim, c.text_sim, c.has_company
+        FROM unnest(CAST(:qs AS text[])) WITH ORDINALITY AS q(q, qi)
+        CROSS JOIN LATERAL (
+          SELECT
+            x.registration_id,
+            max(x.name_sim) AS name_sim,
+            max(x.text_sim) AS text_sim,
+            bool_or(x.has_company) AS has_company
+          FROM (
+            SELECT p.registration_id, similarity(q.q, p.name) AS name_sim, 0::real AS text_sim,
+                   p.company_id IS NOT NULL AS has_company
+            FROM products p
+            WHERE p.registration_id IS NOT NULL
+              AND p.name % q.q
+              AND similarity(q.q, p.name) > :name_th
+            UNION ALL
+            SELECT m.registration_id, 0::real, similarity(q.q, m.search_text), FALSE
+            FROM registration_match_index m
+            WHERE m.search_text % q.q
+              AND similarity(q.q, m.search_text) > :text_th
+          ) x
+          GROUP BY x.registration_id
+          ORDER BY GREATEST(max(x.name_sim), max(x.text_sim)) DESC, x.registration_id
+          LIMIT :lim
+        ) c
+        ORDER BY q.qi
         """
     )
-    rows = db.execute(query, {"q": catalog_item_std, "lim": int(limit)}).mappings().all()
-    return [dict(r) for r in rows]
+    for i in range(0, len(items), CANDIDATE_BATCH_SIZE):
+        part = items[i : i + CANDIDATE_BATCH_SIZE]
+        rows = db.execute(
+            query,
+            {
+                "qs": part,
+                "lim": int(limit),
+                "name_th": NAME_SIM_THRESHOLD,
+                "text_th": TEXT_SIM_THRESHOLD,
+            },
+        ).mappings().all()
+        for r in rows:
+            row = dict(r)
+            item = part[int(row.pop("qi")) - 1]
+            out[item].append(row)
+    return out
+
+
+def _candidate_rows_for_lot(db: Session, catalog_item_std: str, limit: int = 30) -> list[dict[str, Any]]:
+    if not catalog_item_std.strip():
+        return []
+    return _candidate_rows_for_items(db, [catalog_item_std], limit=limit).get(catalog_item_std.strip(), [])
 
 
-def _registration_methodologies(db: Session, registration_id: UUID) -> set[UUID]:
+def _registration_methodologies(db: Session, registration_id: UUID, cache: _MatchCache | None = None) -> set[UUID]:
+    if cache is not None:
+        cache.prime(db, {registration_id})
+        return cache.registration_methodologies[registration_id]
     mids = db.scalars(
         select(RegistrationMethodology.methodology_id).where(RegistrationMethodology.registration_id == registration_id)
     ).all()
     return set(mids)
 
 
-def _company_match_for_registration(db: Session, registration_id: UUID, win_company_id: UUID | None) -> bool:
+def _company_match_for_registration(
+    db: Session, registration_id: UUID, win_company_id: UUID | None, cache: _MatchCache | None = None
+) -> bool:
     if win_company_id is None:
         return False
+    if cache is not None:
+        cache.prime(db, {registration_id})
+        return win_company_id in cache.registration_companies[registration_id]
     q = select(func.count()).select_from(Product).where(
         Product.registration_id == registration_id,
         Product.company_id == win_company_id,
@@ -213,11 +305,14 @@ def _upsert_rule_maps_for_lot(
     win_company_id: UUID | None,
     method_keys: list[tuple[UUID, list[str]]],
     dry_run: bool,
+    candidates: list[dict[str, Any]] | None = None,
+    cache: _MatchCache | None = None,
 ) -> tuple[int, list[dict[str, Any]]]:
     if not catalog_item_std or not catalog_item_std.strip():
         return 0, []
 
-    candidates = _candidate_rows_for_lot(db, catalog_item_std.strip(), limit=30)
+    if candidates is None:
+        candidates = _candidate_rows_for_lot(db, catalog_item_std.strip(), limit=30)
     if not candidates:
         return 0, []
 
@@ -229,17 +324,17 @@ def _upsert_rule_maps_for_lot(
             continue
         registration_id = UUID(str(rid))
         name_sim = float(c.get("name_sim") or 0.0)
-        raw_sim = float(c.get("raw_sim") or 0.0)
-        base = max(name_sim, raw_sim * 0.8)
+        text_sim = float(c.get("text_sim") or 0.0)
+        base = max(name_sim, text_sim * 0.8)
         method_bonus = 0.0
         company_bonus = 0.0
 
         if lot_mids:
-            reg_mids = _registration_methodologies(db, registration_id)
+            reg_mids = _registration_methodologies(db, registration_id, cache)
             if reg_mids and (reg_mids & lot_mids):
                 method_bonus = 0.15
 
-        if _company_match_for_registration(db, registration_id, win_company_id):
+        if _company_match_for_registration(db, registration_id, win_company_id, cache):
             company_bonus = 0.12
 
         final_score = min(0.99, base + method_bonus + company_bonus)
@@ -251,7 +346,7 @@ def _upsert_rule_maps_for_lot(
                 "confidence": round(final_score, 2),
                 "explain": {
                     "name_similarity": round(name_sim, 4),
-                    "raw_similarity": round(raw_sim, 4),
+                    "text_similarity": round(text_sim, 4),
                     "methodology_bonus": method_bonus,
                     "company_bonus": company_bonus,
                 },
@@ -356,8 +451,12 @@ def ingest_procurement_snapshot(
         sample_mappings: list[dict[str, Any]] = []
         method_keys = _build_methodology_keyword_map(db)
         project_cache: dict[tuple[str, str, date | None], UUID] = {}
+        match_cache = _MatchCache()
 
         if not dry_run:
+            # Dry runs preview against the index as it stands; refreshing it (and its watermark) is a write.
+            refresh_registration_match_index(db)
+            pending_lots: list[tuple[UUID, dict[str, Any], UUID | None]] = []
             for r in mapped_rows:
                 pkey = (r["province"], r["project_title"], r["publish_date"])
                 project_id = project_cache.get(pkey)
@@ -386,7 +485,7 @@ def ingest_procurement_snapshot(
                 db.flush()
                 lots_cnt += 1
 
-                win_company_id = _resolve_company_id(db, r["win_company_text"])
+                win_company_id = _resolve_company_id(db, r["win_company_text"], match_cache)
                 result = ProcurementResult(
                     lot_id=lot.id,
                     win_company_id=win_company_id,
@@ -399,20 +498,31 @@ def ingest_procurement_snapshot(
                 db.add(result)
                 db.flush()
                 results_cnt += 1
-
+                pending_lots.append((lot.id, r, win_company_id))
+
+            candidates_by_item = _candidate_rows_for_items(
+                db, [r["catalog_item_std"] or "" for _, r, _ in pending_lots]
+            )
+            match_cache.prime(
+                db,
+                {UUID(str(c["registration_id"])) for cs in candidates_by_item.values() for c in cs},
+            )
+            for lot_id, r, win_company_id in pending_lots:
                 m_upserted, top = _upsert_rule_maps_for_lot(
                     db,
-                    lot_id=lot.id,
+                    lot_id=lot_id,
                     catalog_item_std=r["catalog_item_std"],
                     win_company_id=win_company_id,
                     method_keys=method_keys,
                     dry_run=False,
+                    candidates=candidates_by_item.get((r["catalog_item_std"] or "").strip(), []),
+                    cache=match_cache,
                 )
                 maps_cnt += int(m_upserted)
                 if top and len(sample_mappings) < 20:
                     sample_mappings.append(
                         {
-                            "lot_id": str(lot.id),
+                            "lot_id": str(lot_id),
                             "catalog_item_std": r["catalog_item_std"],
                             "matches": [
                                 {
@@ -427,8 +537,14 @@ def ingest_procurement_snapshot(
             db.commit()
         else:
             # dry-run: evaluate mapping explainability on synthetic lot ids.
-            for r in mapped_rows[:200]:
-                win_company_id = _resolve_company_id(db, r["win_company_text"])
+            preview_rows = mapped_rows[:200]
+            candidates_by_item = _candidate_rows_for_items(db, [r["catalog_item_std"] or "" for r in preview_rows])
+            match_cache.prime(
+                db,
+                {UUID(str(c["registration_id"])) for cs in candidates_by_item.values() for c in cs},
+            )
+            for r in preview_rows:
+                win_company_id = _resolve_company_id(db, r["win_company_text"], match_cache)
                 _, top = _upsert_rule_maps_for_lot(
                     db,
                     lot_id=UUID("00000000-0000-0000-0000-000000000000"),
@@ -436,6 +552,8 @@ def ingest_procurement_snapshot(
                     win_company_id=win_company_id,
                     method_keys=method_keys,
                     dry_run=True,
+                    candidates=candidates_by_item.get((r["catalog_item_std"] or "").strip(), []),
+                    cache=match_cache,
                 )
                 if top and len(sample_mappings) < 20:
                     sample_mappings.append(
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import itertools
+import multiprocessing
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from pathlib import Path
+from typing import Any
 from uuid import UUID
 
 from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
 
+from app.db.session import SessionLocal
 from app.ivd.param_extract import extract_from_text
 from app.models import ProductParam, RawDocument
-from app.pipeline.doc_reader import iter_text_pages, read_file_bytes
+from app.pipeline.doc_reader import open_text_pages, spool_text_pages
 from app.pipeline.normalize import bind_product_for_document, normalize_params_to_db
 
 
@@ -41,12 +46,12 @@ def extract_params_for_raw_document(
     if doc is None:
         raise RuntimeError('raw document not found')
 
-    content = read_file_bytes(doc.storage_uri)
-    filename = Path(str(doc.storage_uri)).name
-
-    pages = list(iter_text_pages(content=content, doc_type=doc.doc_type, filename=filename))
-    if not pages:
-        pages = []
+    # Pages are streamed (from the text cache when this sha256 was read before); pulling the first
+    # one up front keeps unreadable documents failing before execute mode deletes anything.
+    cache_hit, page_iter = open_text_pages(doc.storage_uri, sha256=doc.sha256, doc_type=doc.doc_type)
+    first = next(page_iter, None)
+    pages = itertools.chain([first], page_iter) if first is not None else iter(())
+    page_count = 0
 
     bound = bind_product_for_document(db, di=di, registry_no=registry_no)
 
@@ -54,6 +59,7 @@ def extract_params_for_raw_document(
     errors: list[str] = []
     if dry_run:
         for p in pages:
+            page_count += 1
             try:
                 extracted_total += len(extract_from_text(p.text))
             except Exception as exc:
@@ -62,7 +68,8 @@ def extract_params_for_raw_document(
             'kind': 'product_params_extract',
             'mode': 'dry_run',
             'extract_version': extract_version,
-            'pages': len(pages),
+            'pages': page_count,
+            'text_cache': ('hit' if cache_hit else 'miss'),
             'extracted': extracted_total,
             'di': di,
             'registry_no': registry_no,
@@ -76,14 +83,18 @@ def extract_params_for_raw_document(
             di=di,
             registry_no=registry_no,
             bound_product_id=(str(bound.id) if bound else None),
-            pages=len(pages),
+            pages=page_count,
             extracted=extracted_total,
             deleted_existing=0,
             extract_version=extract_version,
             parse_log=parse_log,
         )
 
-    # Execute mode: replace existing params for this document+version.
+    # Execute mode: replace existing params for this document+version. On a cache miss the pages are
+    # still coming from the reader, so read them all (publishing the cache) before deleting anything:
+    # a mid-document reader error must not leave this document's params half-replaced.
+    if not cache_hit:
+        pages = spool_text_pages(pages)
     deleted_existing = int(
         db.execute(
             delete(ProductParam).where(
@@ -96,6 +107,7 @@ def extract_params_for_raw_document(
     db.commit()
 
     for p in pages:
+        page_count += 1
         try:
             extracted_total += normalize_params_to_db(
                 db,
@@ -113,7 +125,8 @@ def extract_params_for_raw_document(
         'kind': 'product_params_extract',
         'mode': 'execute',
         'extract_version': extract_version,
-        'pages': len(pages),
+        'pages': page_count,
+        'text_cache': ('hit' if cache_hit else 'miss'),
         'deleted_existing': deleted_existing,
         'extracted': extracted_total,
         'di': di,
@@ -134,7 +147,7 @@ def extract_params_for_raw_document(
         di=di,
         registry_no=registry_no,
         bound_product_id=(str(bound.id) if bound else None),
-        pages=len(pages),
+        pages=page_count,
         extracted=extracted_total,
         deleted_existing=deleted_existing,
         extract_version=extract_version,
@@ -142,6 +155,50 @@ def extract_params_for_raw_document(
     )
 
 
+def _extract_params_job(raw_document_id: str, options: dict[str, Any]) -> dict[str, Any]:
+    """One document in its own session (process-pool entry point, so it must stay top-level)."""
+    db = SessionLocal()
+    try:
+        res = extract_params_for_raw_document(db, raw_document_id=UUID(raw_document_id), **options)
+        return {
+            'raw_document_id': raw_document_id,
+            'ok': True,
+            'pages': res.pages,
+            'extracted': res.extracted,
+            'deleted_existing': res.deleted_existing,
+            'bound_product_id': res.bound_product_id,
+            'errors': list(res.parse_log.get('errors') or []),
+        }
+    except Exception as exc:
+        db.rollback()
+        return {'raw_document_id': raw_document_id, 'ok': False, 'error': str(exc)}
+    finally:
+        db.close()
+
+
+def extract_params_for_raw_documents(
+    raw_document_ids: Iterable[UUID | str],
+    *,
+    workers: int = 0,
+    di: str | None = None,
+    registry_no: str | None = None,
+    extract_version: str = 'param_v1_20260213',
+    dry_run: bool = True,
+) -> list[dict[str, Any]]:
+    """Run extract_params_for_raw_document over many documents; one result dict per document, in order.
+
+    With workers > 1 documents are processed in a spawn-based process pool (PDF text extraction
+    and param matching are CPU-bound); a failing document does not stop the batch.
+    """
+    ids = list(dict.fromkeys(str(x) for x in raw_document_ids))
+    options = {'di': di, 'registry_no': registry_no, 'extract_version': extract_version, 'dry_run': bool(dry_run)}
+    workers = min(int(workers or 0), len(ids))
+    if workers <= 1:
+        return [_extract_params_job(rid, options) for rid in ids]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(_extract_params_job, ids, itertools.repeat(options)))
+
+
 @dataclass
 class RollbackParamsResult:
     raw_document_id: UUID
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Iterable, Iterator
+from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -9,6 +14,9 @@ from sqlalchemy.orm import Session
 from app.models import Product
 from app.ivd.classifier import DEFAULT_VERSION as IVD_CLASSIFIER_VERSION, classify
 from app.services.ivd_classifier import VERSION as INTERNAL_RULE_VERSION
+from app.services.udi_jobs_checkpoint import get_checkpoint, set_checkpoint
+
+RECLASSIFY_JOB_NAME = 'ivd:reclassify'
 
 
 @dataclass
@@ -20,6 +28,9 @@ class ReclassifyResult:
     ivd_true: int
     ivd_false: int
     ivd_version: int
+    skipped_unchanged: int = 0
+    resumed_from: str | None = None
+    final_cursor: str | None = None
 
 
 def _extract_class_code_from_values(raw_json: Any, class_name: Any) -> str:
@@ -40,16 +51,21 @@ def _normalize_result(decision: dict[str, Any]) -> tuple[bool, str | None, list[
     return is_ivd, ivd_category, ivd_subtypes, reason, version
 
 
-def run_reclassify_ivd(db: Session, *, dry_run: bool) -> ReclassifyResult:
-    scanned = 0
-    would_update = 0
-    updated = 0
-    ivd_true = 0
-    ivd_false = 0
-    update_batch: list[dict[str, Any]] = []
-    batch_size = 1000
-    last_id = None
+def input_fingerprint(name: str, class_code: str) -> str:
+    """sha256 over the classifier inputs; stored in products.ivd_input_sha for changed-only runs."""
+    return hashlib.sha256(f'{name}\x1f{class_code}'.encode('utf-8')).hexdigest()
 
+
+def _classify_inputs(inputs: list[tuple[str, str]]) -> list[tuple[bool, str | None, list[str], dict[str, Any] | None, int]]:
+    # Top-level so it can run in a spawn-context worker process.
+    return [
+        _normalize_result(classify({'name': name, 'classification_code': code}, version=IVD_CLASSIFIER_VERSION))
+        for name, code in inputs
+    ]
+
+
+def _iter_batches(db: Session, *, batch_size: int, start_after: Any | None) -> Iterator[list[Any]]:
+    last_id = start_after
     while True:
         stmt = select(
             Product.id,
@@ -61,23 +77,106 @@ def run_reclassify_ivd(db: Session, *, dry_run: bool) -> ReclassifyResult:
             Product.ivd_subtypes,
             Product.ivd_reason,
             Product.ivd_version,
+            Product.ivd_input_sha,
         ).order_by(Product.id.asc()).limit(batch_size)
         if last_id is not None:
             stmt = stmt.where(Product.id > last_id)
         rows = list(db.execute(stmt).all())
         if not rows:
-            break
-
-        for p in rows:
-            scanned += 1
-            decision = classify(
-                {
-                    'name': str(getattr(p, 'name', '') or ''),
-                    'classification_code': _extract_class_code_from_values(getattr(p, 'raw_json', None), getattr(p, 'class_name', None)),
-                },
-                version=IVD_CLASSIFIER_VERSION,
-            )
-            is_ivd, ivd_category, ivd_subtypes, reason, version = _normalize_result(decision)
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def _prepare(rows: list[Any], *, changed_only: bool) -> tuple[list[Any], list[tuple[str, str]], list[str], int]:
+    todo: list[Any] = []
+    inputs: list[tuple[str, str]] = []
+    shas: list[str] = []
+    skipped = 0
+    for p in rows:
+        name = str(getattr(p, 'name', '') or '')
+        code = _extract_class_code_from_values(getattr(p, 'raw_json', None), getattr(p, 'class_name', None))
+        sha = input_fingerprint(name, code)
+        if (
+            changed_only
+            and getattr(p, 'ivd_input_sha', None) == sha
+            and int(getattr(p, 'ivd_version', 0) or 0) == int(INTERNAL_RULE_VERSION)
+        ):
+            skipped += 1
+            continue
+        todo.append(p)
+        inputs.append((name, code))
+        shas.append(sha)
+    return todo, inputs, shas, skipped
+
+
+def _iter_classified(
+    prepared: Iterable[tuple[list[Any], list[Any], list[tuple[str, str]], list[str], int]],
+    *,
+    workers: int,
+) -> Iterator[tuple[list[Any], list[Any], list[str], int, list[tuple]]]:
+    """Yield (rows, todo, shas, skipped, decisions) per batch in keyset order.
+
+    With workers > 1 batches are classified in a process pool with at most 2*workers batches in
+    flight; results are still consumed in order so writes and checkpoints stay monotonic.
+    """
+    if workers <= 1:
+        for rows, todo, inputs, shas, skipped in prepared:
+            yield rows, todo, shas, skipped, _classify_inputs(inputs)
+        return
+    window = workers * 2
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending: deque[tuple[tuple, Future]] = deque()
+        for rows, todo, inputs, shas, skipped in prepared:
+            pending.append(((rows, todo, shas, skipped), pool.submit(_classify_inputs, inputs)))
+            if len(pending) >= window:
+                meta, fut = pending.popleft()
+                yield (*meta, fut.result())
+        while pending:
+            meta, fut = pending.popleft()
+            yield (*meta, fut.result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_reclassify_ivd(
+    db: Session,
+    *,
+    dry_run: bool,
+    batch_size: int = 1000,
+    workers: int = 0,
+    resume: bool = False,
+    changed_only: bool = False,
+    job_name: str = RECLASSIFY_JOB_NAME,
+) -> ReclassifyResult:
+    scanned = 0
+    would_update = 0
+    updated = 0
+    ivd_true = 0
+    ivd_false = 0
+    skipped_unchanged = 0
+    batch_size = max(1, int(batch_size or 1000))
+    # Checkpoints are per rule version: a version bump always starts a fresh full pass.
+    effective_job_name = f'{job_name}:v{int(INTERNAL_RULE_VERSION)}'
+
+    start_after = None
+    resumed_from = None
+    if resume and not dry_run:
+        resumed_from = get_checkpoint(db, effective_job_name)
+        start_after = UUID(resumed_from) if resumed_from else None
+
+    def _prepared():
+        for rows in _iter_batches(db, batch_size=batch_size, start_after=start_after):
+            todo, inputs, shas, skipped = _prepare(rows, changed_only=changed_only)
+            yield rows, todo, inputs, shas, skipped
+
+    cursor = resumed_from
+    for rows, todo, shas, skipped, decisions in _iter_classified(_prepared(), workers=int(workers or 0)):
+        scanned += len(rows)
+        skipped_unchanged += skipped
+        update_batch: list[dict[str, Any]] = []
+        for p, sha, (is_ivd, ivd_category, ivd_subtypes, reason, version) in zip(todo, shas, decisions):
             if is_ivd:
                 ivd_true += 1
             else:
@@ -90,31 +189,48 @@ def run_reclassify_ivd(db: Session, *, dry_run: bool) -> ReclassifyResult:
                 or getattr(p, 'ivd_reason', None) != reason
                 or int(getattr(p, 'ivd_version', 1) or 1) != version
             )
-            if not changed:
-                continue
-            would_update += 1
+            if changed:
+                would_update += 1
             if dry_run:
                 continue
-            update_batch.append(
-                {
-                    'id': p.id,
-                    'is_ivd': is_ivd,
-                    'ivd_category': ivd_category,
-                    'ivd_subtypes': ivd_subtypes,
-                    'ivd_reason': reason,
-                    'ivd_version': version,
-                }
-            )
-            updated += 1
-
-        if not dry_run and update_batch:
+            if changed:
+                update_batch.append(
+                    {
+                        'id': p.id,
+                        'is_ivd': is_ivd,
+                        'ivd_category': ivd_category,
+                        'ivd_subtypes': ivd_subtypes,
+                        'ivd_reason': reason,
+                        'ivd_version': version,
+                        'ivd_input_sha': sha,
+                    }
+                )
+                updated += 1
+            elif getattr(p, 'ivd_input_sha', None) != sha:
+                # Decision unchanged: only stamp the fingerprint so changed-only runs can skip it next time.
+                update_batch.append({'id': p.id, 'ivd_input_sha': sha})
+
+        cursor = str(rows[-1].id)
+        if dry_run:
+            continue
+        if update_batch:
             db.bulk_update_mappings(Product, update_batch)
-            db.commit()
-            update_batch = []
-        last_id = rows[-1].id
+        set_checkpoint(
+            db,
+            job_name=effective_job_name,
+            cursor=cursor,
+            meta={'scanned': scanned, 'updated': updated, 'changed_only': bool(changed_only)},
+        )
+        db.commit()
 
-    if not dry_run and update_batch:
-        db.bulk_update_mappings(Product, update_batch)
+    if not dry_run:
+        # Completed pass: clear the cursor so the next run starts from the beginning.
+        set_checkpoint(
+            db,
+            job_name=effective_job_name,
+            cursor='',
+            meta={'scanned': scanned, 'updated': updated, 'changed_only': bool(changed_only), 'completed': True},
+        )
         db.commit()
 
     return ReclassifyResult(
@@ -125,4 +241,7 @@ def run_reclassify_ivd(db: Session, *, dry_run: bool) -> ReclassifyResult:
         ivd_true=ivd_true,
         ivd_false=ivd_false,
         ivd_version=int(INTERNAL_RULE_VERSION),
+        skipped_unchanged=skipped_unchanged,
+        resumed_from=resumed_from,
+        final_cursor=cursor,
     )
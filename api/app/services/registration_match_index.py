@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# registration_match_index holds one lower-cased search text per registration (product names,
+# models, methodology names/synonyms) behind a trigram GIN index, so procurement lot matching
+# never casts or scans registrations.raw_json. There are no triggers: refresh_registration_match_index()
+# re-derives registrations whose products / methodology links / methodology nodes changed since
+# the watermark in registration_match_index_state, and rebuilds everything when it is missing.
+
+_UPSERT_SQL = """
+WITH target AS (
+  {target}
+),
+prod AS (
+  SELECT
+    p.registration_id,
+    string_agg(DISTINCT btrim(p.name), ' ') FILTER (WHERE btrim(COALESCE(p.name, '')) <> '') AS names,
+    string_agg(DISTINCT btrim(p.model), ' ') FILTER (WHERE btrim(COALESCE(p.model, '')) <> '') AS models
+  FROM products p
+  JOIN target t ON t.registration_id = p.registration_id
+  GROUP BY p.registration_id
+),
+meth AS (
+  SELECT
+    rm.registration_id,
+    string_agg(
+      DISTINCT concat_ws(
+        ' ',
+        n.name,
+        (SELECT string_agg(s, ' ') FROM jsonb_array_elements_text(COALESCE(n.synonyms, '[]'::jsonb)) AS s)
+      ),
+      ' '
+    ) AS terms
+  FROM registration_methodologies rm
+  JOIN target t ON t.registration_id = rm.registration_id
+  JOIN methodology_nodes n ON n.id = rm.methodology_id AND n.is_active IS TRUE
+  GROUP BY rm.registration_id
+)
+INSERT INTO registration_match_index (registration_id, search_text, updated_at)
+SELECT prod.registration_id, lower(concat_ws(' ', prod.names, prod.models, meth.terms)), NOW()
+FROM prod
+LEFT JOIN meth ON meth.registration_id = prod.registration_id
+ON CONFLICT (registration_id) DO UPDATE SET
+  search_text = EXCLUDED.search_text,
+  updated_at = EXCLUDED.updated_at
+"""
+
+_ALL_TARGETS = "SELECT DISTINCT p.registration_id FROM products p WHERE p.registration_id IS NOT NULL"
+
+_CHANGED_TARGETS = """
+  SELECT p.registration_id FROM products p
+  WHERE p.registration_id IS NOT NULL AND p.updated_at >= :since
+  UNION
+  SELECT rm.registration_id FROM registration_methodologies rm WHERE rm.updated_at >= :since
+  UNION
+  SELECT rm.registration_id
+  FROM registration_methodologies rm
+  JOIN methodology_nodes n ON n.id = rm.methodology_id
+  WHERE n.updated_at >= :since
+"""
+
+
+def refresh_registration_match_index(db: Session, *, full: bool = False) -> dict[str, Any]:
+    """Bring registration_match_index up to date; does not commit.
+
+    Incremental refreshes do not notice products moved away from a registration or deleted
+    methodology links; `full=True` (procurement:match-index-refresh --full) rebuilds every row.
+    """
+    since = None if full else db.execute(
+        text("SELECT refreshed_at FROM registration_match_index_state WHERE id = 1")
+    ).scalar()
+    # Watermark is taken before reading so rows changed mid-refresh are picked up next time.
+    started = db.execute(text("SELECT clock_timestamp()")).scalar()
+    if since is None:
+        db.execute(
+            text(
+                "DELETE FROM registration_match_index m "
+                "WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.registration_id = m.registration_id)"
+            )
+        )
+        result = db.execute(text(_UPSERT_SQL.format(target=_ALL_TARGETS)))
+    else:
+        result = db.execute(text(_UPSERT_SQL.format(target=_CHANGED_TARGETS)), {"since": since})
+    db.execute(
+        text(
+            """
+            INSERT INTO registration_match_index_state (id, refreshed_at) VALUES (1, :ts)
+            ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+            """
+        ),
+        {"ts": started},
+    )
+    return {"mode": ("full" if since is None else "incremental"), "rows": int(result.rowcount or 0)}
@@ -1,16 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta, timezone
 from typing import Any
 import logging
 
-from sqlalchemy import desc, func, select, text
+from sqlalchemy import bindparam, select, text
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models import Company, Product, Registration, RegistrationEvent, SignalScore
-from app.services.time_semantics import detect_time_columns, get_registration_start_date, get_registration_start_date_map
+from app.models import Company, SignalScore
+from app.services.time_semantics import detect_time_columns, get_registration_start_date_map
 
 DEFAULT_WINDOW = '12m'
 DEFAULT_BATCH_SIZE = 500
@@ -38,53 +38,118 @@ def _is_active_status(status: str | None) -> bool:
     return s not in blocked
 
 
-def _dominant_anchor_by_registration(db: Session) -> dict[str, dict[str, str | None]]:
+_RENEW_EVENT_TYPES = ('renew', 'renewal')
+_CANCEL_EVENT_TYPES = ('cancel', 'cancelled', 'canceled', '注销')
+
+
+@dataclass
+class RegistrationFrame:
+    """Per-registration signal inputs for one as_of, one list per column, ordered by registration_no."""
+
+    ids: list[str] = field(default_factory=list)
+    registration_nos: list[str] = field(default_factory=list)
+    active: list[bool] = field(default_factory=list)
+    expiry_dates: list[date | None] = field(default_factory=list)
+    track_ids: list[str | None] = field(default_factory=list)
+    company_ids: list[str | None] = field(default_factory=list)
+    domestic: list[bool] = field(default_factory=list)
+    renewals_12m: list[int] = field(default_factory=list)
+    cancelled_12m: list[bool] = field(default_factory=list)
+    start_dates: list[date | None] = field(default_factory=list)
+    start_sources: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def build_registration_frame(
+    db: Session,
+    *,
+    as_of: date,
+    start_date_map: dict[str, tuple[date | None, str]],
+    columns_map: dict[str, set[str]] | None = None,
+) -> RegistrationFrame:
+    """Load every registration once, with its dominant product anchor and 12m event counts.
+
+    The anchor (track / company / country) is the most recently updated product of the
+    registration. Registrations missing from `start_date_map` are resolved in one extra query.
+    """
+    since_12m = as_of - timedelta(days=365)
     rows = db.execute(
         text(
             """
-            SELECT DISTINCT ON (p.registration_id)
-              p.registration_id::text AS registration_id,
-              btrim(p.ivd_category) AS track_id,
-              p.company_id::text AS company_id,
-              c.country AS country
-            FROM products p
-            LEFT JOIN companies c ON c.id = p.company_id
-            WHERE p.registration_id IS NOT NULL
-            ORDER BY p.registration_id, p.updated_at DESC NULLS LAST, p.created_at DESC, p.id
+            WITH anchor AS (
+              SELECT DISTINCT ON (p.registration_id)
+                p.registration_id,
+                btrim(p.ivd_category) AS track_id,
+                p.company_id::text AS company_id,
+                c.country AS country
+              FROM products p
+              LEFT JOIN companies c ON c.id = p.company_id
+              WHERE p.registration_id IS NOT NULL
+              ORDER BY p.registration_id, p.updated_at DESC NULLS LAST, p.created_at DESC, p.id
+            ),
+            evt AS (
+              SELECT
+                e.registration_id,
+                COUNT(1) FILTER (WHERE lower(e.event_type) IN :renew_types) AS renewals,
+                BOOL_OR(lower(e.event_type) IN :cancel_types) AS cancelled
+              FROM registration_events e
+              WHERE e.event_date >= :since AND e.event_date <= :as_of
+              GROUP BY e.registration_id
+            )
+            SELECT
+              r.id::text AS id,
+              r.registration_no::text AS registration_no,
+              r.status,
+              r.expiry_date,
+              a.track_id,
+              a.company_id,
+              a.country,
+              COALESCE(evt.renewals, 0) AS renewals,
+              COALESCE(evt.cancelled, FALSE) AS cancelled
+            FROM registrations r
+            LEFT JOIN anchor a ON a.registration_id = r.id
+            LEFT JOIN evt ON evt.registration_id = r.id
+            ORDER BY r.registration_no ASC
             """
-        )
-    ).mappings().all()
-    out: dict[str, dict[str, str | None]] = {}
-    for r in rows:
-        rid = str(r.get('registration_id') or '').strip()
-        if not rid:
-            continue
-        track_id = str(r.get('track_id') or '').strip() or None
-        company_id = str(r.get('company_id') or '').strip() or None
-        country = str(r.get('country') or '').strip() or None
-        out[rid] = {'track_id': track_id, 'company_id': company_id, 'country': country}
-    return out
-
+        ).bindparams(
+            bindparam('renew_types', expanding=True),
+            bindparam('cancel_types', expanding=True),
+        ),
+        {
+            'since': since_12m,
+            'as_of': as_of,
+            'renew_types': list(_RENEW_EVENT_TYPES),
+            'cancel_types': list(_CANCEL_EVENT_TYPES),
+        },
+    ).all()
 
-def _active_track_counts(db: Session, reg_track_map: dict[str, str]) -> dict[str, int]:
-    if not reg_track_map:
-        return {}
-    reg_ids = list(reg_track_map.keys())
-    out: dict[str, int] = {}
-    chunk = 1000
-    for i in range(0, len(reg_ids), chunk):
-        part = reg_ids[i : i + chunk]
-        rows = db.execute(
-            select(Registration.id, Registration.status).where(Registration.id.in_(part))
-        ).all()
-        for reg_id, status in rows:
-            rid = str(reg_id)
-            track = reg_track_map.get(rid)
-            if not track:
-                continue
-            if _is_active_status(status):
-                out[track] = int(out.get(track, 0) or 0) + 1
-    return out
+    missing = [str(r[1]) for r in rows if str(r[1]) not in start_date_map]
+    if missing:
+        extra, _stats = get_registration_start_date_map(
+            db,
+            as_of_date=as_of,
+            registration_nos=missing,
+            columns_map=columns_map,
+        )
+        start_date_map = {**start_date_map, **extra}
+
+    frame = RegistrationFrame()
+    for rid, reg_no, status, expiry_date, track_id, company_id, country, renewals, cancelled in rows:
+        start_date, source_key = start_date_map.get(str(reg_no), (None, 'missing'))
+        frame.ids.append(str(rid))
+        frame.registration_nos.append(str(reg_no))
+        frame.active.append(_is_active_status(status))
+        frame.expiry_dates.append(expiry_date)
+        frame.track_ids.append(str(track_id or '').strip() or None)
+        frame.company_ids.append(str(company_id or '').strip() or None)
+        frame.domestic.append(_is_domestic_country(country))
+        frame.renewals_12m.append(int(renewals or 0))
+        frame.cancelled_12m.append(bool(cancelled))
+        frame.start_dates.append(start_date)
+        frame.start_sources.append(source_key)
+    return frame
 
 
 def _level_score_registration(days_to_expiry: int | None, has_renewal: bool, competition_density: int) -> tuple[str, float]:
@@ -166,100 +231,81 @@ def _upsert_signals_bulk(
     db.execute(stmt)
 
 
+def _active_track_counts(frame: RegistrationFrame) -> dict[str, int]:
+    out: dict[str, int] = {}
+    for track_id, active in zip(frame.track_ids, frame.active):
+        if track_id and active:
+            out[track_id] = int(out.get(track_id, 0) or 0) + 1
+    return out
+
+
 def _compute_registration_signals(
     db: Session,
     *,
     as_of: date,
     window: str,
     batch_size: int,
-    reg_track_map: dict[str, str],
+    frame: RegistrationFrame,
     track_counts: dict[str, int],
+    only: set[str] | None = None,
 ) -> int:
     wrote = 0
-    cursor: str | None = None
-    since_12m = as_of - timedelta(days=365)
-
-    while True:
-        stmt = (
-            select(
-                Registration.id,
-                Registration.registration_no,
-                Registration.expiry_date,
-                Registration.status,
-            )
-            .order_by(Registration.registration_no.asc())
-            .limit(batch_size)
-        )
-        if cursor:
-            stmt = stmt.where(Registration.registration_no > cursor)
-        rows = db.execute(stmt).all()
-        if not rows:
-            break
-
-        reg_ids = [r[0] for r in rows]
-        renew_rows = db.execute(
-            select(RegistrationEvent.registration_id, func.count(RegistrationEvent.id))
-            .where(
-                RegistrationEvent.registration_id.in_(reg_ids),
-                func.lower(RegistrationEvent.event_type).in_(['renew', 'renewal']),
-                RegistrationEvent.event_date >= since_12m,
-                RegistrationEvent.event_date <= as_of,
-            )
-            .group_by(RegistrationEvent.registration_id)
-        ).all()
-        renew_map = {str(rid): int(cnt or 0) for rid, cnt in renew_rows}
-        upsert_rows: list[dict[str, Any]] = []
-        computed_at = datetime.now(timezone.utc)
-
-        for reg_id, reg_no, expiry_date, _status in rows:
-            rid = str(reg_id)
-            days_to_expiry = None
-            if expiry_date is not None:
-                days_to_expiry = int((expiry_date - as_of).days)
-            has_renewal = renew_map.get(rid, 0) > 0
-            track_id = reg_track_map.get(rid)
-            competition_density = int(track_counts.get(track_id, 0) or 0) if track_id else 0
-            level, score = _level_score_registration(days_to_expiry, has_renewal, competition_density)
-
-            factors: list[dict[str, Any]] = [
-                {
-                    'name': 'days_to_expiry',
-                    'value': (days_to_expiry if days_to_expiry is not None else 'unknown'),
-                    'unit': 'days',
-                    'explanation': '基于 registrations.expiry_date 与 as_of_date 计算。',
-                },
-                {
-                    'name': 'has_renewal_history',
-                    'value': bool(has_renewal),
-                    'explanation': '基于 registration_events(event_type in renew/renewal) 的近12个月记录。',
-                },
-                {
-                    'name': 'competition_density',
-                    'value': competition_density,
-                    'explanation': (
-                        f'同赛道有效注册证数，赛道来源于 products.ivd_category={track_id}.'
-                        if track_id
-                        else '缺少赛道锚点（products.ivd_category），按 0 处理。'
-                    ),
-                },
-            ]
+    upsert_rows: list[dict[str, Any]] = []
+    computed_at = datetime.now(timezone.utc)
 
-            upsert_rows.append(
-                {
-                    'entity_type': 'registration',
-                    'entity_id': str(reg_no),
-                    'window': window,
-                    'as_of_date': as_of,
-                    'level': level,
-                    'score': score,
-                    'factors': factors,
-                    'computed_at': computed_at,
-                }
-            )
-            wrote += 1
+    for i, reg_no in enumerate(frame.registration_nos):
+        if only is not None and reg_no not in only:
+            continue
+        expiry_date = frame.expiry_dates[i]
+        days_to_expiry = None
+        if expiry_date is not None:
+            days_to_expiry = int((expiry_date - as_of).days)
+        has_renewal = frame.renewals_12m[i] > 0
+        track_id = frame.track_ids[i]
+        competition_density = int(track_counts.get(track_id, 0) or 0) if track_id else 0
+        level, score = _level_score_registration(days_to_expiry, has_renewal, competition_density)
+
+        factors: list[dict[str, Any]] = [
+            {
+                'name': 'days_to_expiry',
+                'value': (days_to_expiry if days_to_expiry is not None else 'unknown'),
+                'unit': 'days',
+                'explanation': '基于 registrations.expiry_date 与 as_of_date 计算。',
+            },
+            {
+                'name': 'has_renewal_history',
+                'value': bool(has_renewal),
+                'explanation': '基于 registration_events(event_type in renew/renewal) 的近12个月记录。',
+            },
+            {
+                'name': 'competition_density',
+                'value': competition_density,
+                'explanation': (
+                    f'同赛道有效注册证数，赛道来源于 products.ivd_category={track_id}.'
+                    if track_id
+                    else '缺少赛道锚点（products.ivd_category），按 0 处理。'
+                ),
+            },
+        ]
 
-        _upsert_signals_bulk(db, upsert_rows)
-        cursor = str(rows[-1][1])
+        upsert_rows.append(
+            {
+                'entity_type': 'registration',
+                'entity_id': str(reg_no),
+                'window': window,
+                'as_of_date': as_of,
+                'level': level,
+                'score': score,
+                'factors': factors,
+                'computed_at': computed_at,
+            }
+        )
+        wrote += 1
+        if len(upsert_rows) >= batch_size:
+            _upsert_signals_bulk(db, upsert_rows)
+            upsert_rows = []
+            computed_at = datetime.now(timezone.utc)
+    _upsert_signals_bulk(db, upsert_rows)
 
     return wrote
 
@@ -270,60 +316,33 @@ def _compute_track_signals(
     as_of: date,
     window: str,
     batch_size: int,
-    anchor_map: dict[str, dict[str, str | None]],
-    start_date_map: dict[str, tuple[date | None, str]],
+    frame: RegistrationFrame,
 ) -> int:
     wrote = 0
     since_12m = as_of - timedelta(days=365)
-    cursor: str | None = None
     track_total: dict[str, int] = {}
     track_new: dict[str, int] = {}
     track_domestic: dict[str, int] = {}
     track_source_stats: dict[str, dict[str, int]] = {}
     track_missing_start: dict[str, int] = {}
 
-    while True:
-        stmt = (
-            select(
-                Registration.id,
-                Registration.registration_no,
-                Registration.status,
-            )
-            .order_by(Registration.registration_no.asc())
-            .limit(batch_size)
-        )
-        if cursor:
-            stmt = stmt.where(Registration.registration_no > cursor)
-        rows = db.execute(stmt).all()
-        if not rows:
-            break
-
-        for reg_id, reg_no, status in rows:
-            rid = str(reg_id)
-            meta = anchor_map.get(rid) or {}
-            track_id = str(meta.get('track_id') or '').strip()
-            if not track_id:
-                continue
-            if not _is_active_status(status):
-                continue
-            track_total[track_id] = int(track_total.get(track_id, 0) or 0) + 1
-            if _is_domestic_country(meta.get('country')):  # type: ignore[arg-type]
-                track_domestic[track_id] = int(track_domestic.get(track_id, 0) or 0) + 1
-
-            reg_no_key = str(reg_no)
-            if reg_no_key in start_date_map:
-                start_date, source_key = start_date_map.get(reg_no_key, (None, 'missing'))
-            else:
-                start_date, source_key = get_registration_start_date(db, reg_no_key, as_of)
-            source_bucket = track_source_stats.setdefault(track_id, {})
-            source_bucket[source_key] = int(source_bucket.get(source_key, 0) or 0) + 1
-
-            if start_date is None:
-                track_missing_start[track_id] = int(track_missing_start.get(track_id, 0) or 0) + 1
-            elif since_12m <= start_date <= as_of:
-                track_new[track_id] = int(track_new.get(track_id, 0) or 0) + 1
-
-        cursor = str(rows[-1][1])
+    for i, track_id in enumerate(frame.track_ids):
+        if not track_id:
+            continue
+        if not frame.active[i]:
+            continue
+        track_total[track_id] = int(track_total.get(track_id, 0) or 0) + 1
+        if frame.domestic[i]:
+            track_domestic[track_id] = int(track_domestic.get(track_id, 0) or 0) + 1
+
+        start_date, source_key = frame.start_dates[i], frame.start_sources[i]
+        source_bucket = track_source_stats.setdefault(track_id, {})
+        source_bucket[source_key] = int(source_bucket.get(source_key, 0) or 0) + 1
+
+        if start_date is None:
+            track_missing_start[track_id] = int(track_missing_start.get(track_id, 0) or 0) + 1
+        elif since_12m <= start_date <= as_of:
+            track_new[track_id] = int(track_new.get(track_id, 0) or 0) + 1
 
     track_ids = sorted(track_total.keys())
     upsert_rows: list[dict[str, Any]] = []
@@ -387,8 +406,8 @@ def _compute_company_signals(
     as_of: date,
     window: str,
     batch_size: int,
-    anchor_map: dict[str, dict[str, str | None]],
-    start_date_map: dict[str, tuple[date | None, str]],
+    frame: RegistrationFrame,
+    only: set[str] | None = None,
 ) -> int:
     wrote = 0
     since_12m = as_of - timedelta(days=365)
@@ -396,73 +415,40 @@ def _compute_company_signals(
     company_new_tracks: dict[str, set[str]] = {}
     company_source_stats: dict[str, dict[str, int]] = {}
     company_missing_start: dict[str, int] = {}
-
-    reg_cursor: str | None = None
-    while True:
-        stmt = (
-            select(
-                Registration.id,
-                Registration.registration_no,
-            )
-            .order_by(Registration.registration_no.asc())
-            .limit(batch_size)
-        )
-        if reg_cursor:
-            stmt = stmt.where(Registration.registration_no > reg_cursor)
-        rows = db.execute(stmt).all()
-        if not rows:
-            break
-
-        for reg_id, reg_no in rows:
-            rid = str(reg_id)
-            meta = anchor_map.get(rid) or {}
-            company_id = str(meta.get('company_id') or '').strip()
-            if not company_id:
-                continue
-            source_bucket = company_source_stats.setdefault(company_id, {})
-            reg_no_key = str(reg_no)
-            if reg_no_key in start_date_map:
-                start_date, source_key = start_date_map.get(reg_no_key, (None, 'missing'))
-            else:
-                start_date, source_key = get_registration_start_date(db, reg_no_key, as_of)
-            source_bucket[source_key] = int(source_bucket.get(source_key, 0) or 0) + 1
-            if start_date is None:
-                company_missing_start[company_id] = int(company_missing_start.get(company_id, 0) or 0) + 1
-                continue
-            if since_12m <= start_date <= as_of:
-                company_new_regs[company_id] = int(company_new_regs.get(company_id, 0) or 0) + 1
-                track_id = str(meta.get('track_id') or '').strip()
-                if track_id:
-                    company_new_tracks.setdefault(company_id, set()).add(track_id)
-        reg_cursor = str(rows[-1][1])
-
-    cancel_rows = db.execute(
-        select(RegistrationEvent.registration_id)
-        .where(
-            func.lower(RegistrationEvent.event_type).in_(['cancel', 'cancelled', 'canceled', '注销']),
-            RegistrationEvent.event_date >= since_12m,
-            RegistrationEvent.event_date <= as_of,
-        )
-        .distinct()
-    ).all()
     company_cancel_count: dict[str, int] = {}
-    for (reg_id,) in cancel_rows:
-        rid = str(reg_id)
-        meta = anchor_map.get(rid) or {}
-        company_id = str(meta.get('company_id') or '').strip()
+
+    for i, company_id in enumerate(frame.company_ids):
         if not company_id:
             continue
-        company_cancel_count[company_id] = int(company_cancel_count.get(company_id, 0) or 0) + 1
+        if frame.cancelled_12m[i]:
+            company_cancel_count[company_id] = int(company_cancel_count.get(company_id, 0) or 0) + 1
+        start_date, source_key = frame.start_dates[i], frame.start_sources[i]
+        source_bucket = company_source_stats.setdefault(company_id, {})
+        source_bucket[source_key] = int(source_bucket.get(source_key, 0) or 0) + 1
+        if start_date is None:
+            company_missing_start[company_id] = int(company_missing_start.get(company_id, 0) or 0) + 1
+            continue
+        if since_12m <= start_date <= as_of:
+            company_new_regs[company_id] = int(company_new_regs.get(company_id, 0) or 0) + 1
+            track_id = frame.track_ids[i]
+            if track_id:
+                company_new_tracks.setdefault(company_id, set()).add(track_id)
 
     company_cursor: str | None = None
+    pending = sorted(only) if only is not None else None
     while True:
-        stmt = select(Company.id).order_by(Company.id.asc()).limit(batch_size)
-        if company_cursor:
-            stmt = stmt.where(Company.id > company_cursor)
-        rows = db.execute(stmt).all()
-        if not rows:
-            break
-        company_ids = [str(r[0]) for r in rows]
+        if pending is not None:
+            company_ids, pending = pending[:batch_size], pending[batch_size:]
+            if not company_ids:
+                break
+        else:
+            stmt = select(Company.id).order_by(Company.id.asc()).limit(batch_size)
+            if company_cursor:
+                stmt = stmt.where(Company.id > company_cursor)
+            rows = db.execute(stmt).all()
+            if not rows:
+                break
+            company_ids = [str(r[0]) for r in rows]
 
         upsert_rows: list[dict[str, Any]] = []
         computed_at = datetime.now(timezone.utc)
@@ -517,6 +503,173 @@ def _compute_company_signals(
     return wrote
 
 
+def _carry_forward_signals(db: Session, *, window: str, prev_as_of: date, as_of: date) -> int:
+    """Copy registration/company signals of `prev_as_of` to `as_of`; days_to_expiry factors are aged by the gap.
+
+    Rows already present for `as_of` are kept, and recomputed entities are upserted over the copies.
+    Tracks are not carried: every run recomputes them, and a track with no active registrations left
+    must drop out as it would in a full run.
+    """
+    result = db.execute(
+        text(
+            """
+            INSERT INTO signal_scores (entity_type, entity_id, "window", as_of_date, level, score, factors, computed_at)
+            SELECT
+              s.entity_type,
+              s.entity_id,
+              s."window",
+              :as_of,
+              s.level,
+              s.score,
+              CASE
+                WHEN s.entity_type = 'registration' AND jsonb_typeof(s.factors) = 'array' THEN (
+                  SELECT COALESCE(
+                    jsonb_agg(
+                      CASE
+                        WHEN x.f->>'name' = 'days_to_expiry' AND jsonb_typeof(x.f->'value') = 'number'
+                          THEN jsonb_set(x.f, '{value}', to_jsonb((x.f->>'value')::int - :shift))
+                        ELSE x.f
+                      END
+                      ORDER BY x.ord
+                    ),
+                    '[]'::jsonb
+                  )
+                  FROM jsonb_array_elements(s.factors) WITH ORDINALITY AS x(f, ord)
+                )
+                ELSE s.factors
+              END,
+              s.computed_at
+            FROM signal_scores s
+            WHERE s."window" = :window AND s.as_of_date = :prev
+              AND s.entity_type IN ('registration', 'company')
+            ON CONFLICT ON CONSTRAINT uq_signal_scores_entity_window_date DO NOTHING
+            """
+        ),
+        {'window': window, 'prev': prev_as_of, 'as_of': as_of, 'shift': int((as_of - prev_as_of).days)},
+    )
+    return int(result.rowcount or 0)
+
+
+def _touched_registration_ids(db: Session, *, since: date, as_of: date) -> set[str]:
+    """Registrations changed since the start of `since` (UTC), or whose 12m event window moved."""
+    since_ts = datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+    rows = db.execute(
+        text(
+            """
+            SELECT r.id FROM registrations r WHERE r.updated_at >= :since_ts
+            UNION
+            SELECT c.entity_id FROM change_log c
+            WHERE c.entity_type = 'registration' AND c.change_date >= :since_ts
+            UNION
+            SELECT p.registration_id FROM change_log c JOIN products p ON p.id = c.product_id
+            WHERE c.change_date >= :since_ts AND p.registration_id IS NOT NULL
+            UNION
+            SELECT f.registration_id FROM field_diffs f WHERE f.created_at >= :since_ts
+            UNION
+            SELECT e.registration_id FROM registration_events e
+            WHERE e.created_at >= :since_ts
+               OR e.observed_at >= :since_ts
+               OR (e.event_date > :since AND e.event_date <= :as_of)
+               OR (e.event_date >= :drop_from AND e.event_date < :drop_to)
+            """
+        ),
+        {
+            'since_ts': since_ts,
+            'since': since,
+            'as_of': as_of,
+            'drop_from': since - timedelta(days=365),
+            'drop_to': as_of - timedelta(days=365),
+        },
+    ).all()
+    return {str(r[0]) for r in rows if r[0] is not None}
+
+
+def _previous_track_totals(db: Session, *, window: str, as_of: date) -> dict[str, int | None]:
+    rows = db.execute(
+        select(SignalScore.entity_id, SignalScore.factors).where(
+            SignalScore.entity_type == 'track',
+            SignalScore.window == window,
+            SignalScore.as_of_date == as_of,
+        )
+    ).all()
+    out: dict[str, int | None] = {}
+    for entity_id, factors in rows:
+        total = None
+        for item in factors if isinstance(factors, list) else []:
+            if isinstance(item, dict) and item.get('name') == 'total_count':
+                total = item.get('value')
+        out[str(entity_id)] = total
+    return out
+
+
+def _entities_missing_signal(db: Session, *, entity_type: str, window: str, as_of: date) -> set[str]:
+    source = (
+        'SELECT r.registration_no::text AS entity_id FROM registrations r'
+        if entity_type == 'registration'
+        else 'SELECT c.id::text AS entity_id FROM companies c'
+    )
+    rows = db.execute(
+        text(
+            f"""
+            SELECT src.entity_id
+            FROM ({source}) src
+            WHERE NOT EXISTS (
+              SELECT 1 FROM signal_scores s
+              WHERE s.entity_type = :entity_type
+                AND s.entity_id = src.entity_id
+                AND s."window" = :window
+                AND s.as_of_date = :as_of
+            )
+            """
+        ),
+        {'entity_type': entity_type, 'window': window, 'as_of': as_of},
+    ).all()
+    return {str(r[0]) for r in rows}
+
+
+def _incremental_targets(
+    db: Session,
+    *,
+    frame: RegistrationFrame,
+    track_counts: dict[str, int],
+    window: str,
+    since: date,
+    as_of: date,
+) -> tuple[set[str], set[str]]:
+    """Registration numbers and company ids whose signals may differ from the carried-forward copy."""
+    shift = (as_of - since).days
+    since_12m = as_of - timedelta(days=365)
+    touched_ids = _touched_registration_ids(db, since=since, as_of=as_of)
+    prev_totals = _previous_track_totals(db, window=window, as_of=since)
+    changed_tracks = {t for t, n in track_counts.items() if prev_totals.get(t) != n}
+    changed_tracks |= {t for t in prev_totals if t not in track_counts}
+
+    reg_nos: set[str] = set()
+    company_ids: set[str] = set()
+    for i, rid in enumerate(frame.ids):
+        expiry_date = frame.expiry_dates[i]
+        days = (expiry_date - as_of).days if expiry_date is not None else None
+        start_date = frame.start_dates[i]
+        dirty = (
+            rid in touched_ids
+            or frame.track_ids[i] in changed_tracks
+            # Registration level bands flip at 90 / 180 days to expiry.
+            or (days is not None and any(edge - shift < days <= edge for edge in (90, 180)))
+        )
+        if dirty:
+            reg_nos.add(frame.registration_nos[i])
+        # Company growth counts move as start dates enter or leave the 12m window.
+        start_moved = start_date is not None and (
+            since < start_date <= as_of or since_12m - timedelta(days=shift) <= start_date < since_12m
+        )
+        if (dirty or start_moved) and frame.company_ids[i]:
+            company_ids.add(str(frame.company_ids[i]))
+
+    reg_nos |= _entities_missing_signal(db, entity_type='registration', window=window, as_of=as_of)
+    company_ids |= _entities_missing_signal(db, entity_type='company', window=window, as_of=as_of)
+    return reg_nos, company_ids
+
+
 @dataclass
 class SignalsComputeResult:
     ok: bool
@@ -529,6 +682,8 @@ class SignalsComputeResult:
     company_count: int
     wrote_total: int
     error: str | None = None
+    mode: str = 'full'
+    carried_forward: int = 0
 
 
 def compute_signals_v1(
@@ -538,10 +693,20 @@ def compute_signals_v1(
     window: str = DEFAULT_WINDOW,
     dry_run: bool = False,
     batch_size: int = DEFAULT_BATCH_SIZE,
+    incremental_since: date | None = None,
 ) -> SignalsComputeResult:
+    """Compute signal_scores for `as_of`.
+
+    With `incremental_since` (the last successfully computed as_of) the signals of that date are
+    carried forward and only registrations touched since then, the tracks, and the companies they
+    roll up to are recomputed. Anchor moves between companies are only picked up by a full run,
+    so callers should still run a full compute periodically.
+    """
     target = as_of or _today_utc()
     if window != DEFAULT_WINDOW:
         raise ValueError(f'Unsupported window: {window}. only {DEFAULT_WINDOW} is implemented in MVP.')
+    if incremental_since is not None and incremental_since >= target:
+        incremental_since = None
 
     time_columns = detect_time_columns(db.get_bind())
     logger.warning('Time semantics columns: %s', {k: sorted(list(v)) for k, v in time_columns.items()})
@@ -553,37 +718,58 @@ def compute_signals_v1(
     )
     logger.warning('Time semantics source distribution: %s', start_source_stats)
 
-    anchor_map = _dominant_anchor_by_registration(db)
-    reg_track_map = {
-        rid: str(meta.get('track_id'))
-        for rid, meta in anchor_map.items()
-        if meta.get('track_id') is not None and str(meta.get('track_id')).strip()
-    }
-    track_counts = _active_track_counts(db, reg_track_map)
+    frame = build_registration_frame(
+        db,
+        as_of=target,
+        start_date_map=start_date_map,
+        columns_map=time_columns,
+    )
+    track_counts = _active_track_counts(frame)
+
+    carried = 0
+    only_regs: set[str] | None = None
+    only_companies: set[str] | None = None
+    if incremental_since is not None:
+        carried = _carry_forward_signals(db, window=window, prev_as_of=incremental_since, as_of=target)
+        only_regs, only_companies = _incremental_targets(
+            db,
+            frame=frame,
+            track_counts=track_counts,
+            window=window,
+            since=incremental_since,
+            as_of=target,
+        )
+        logger.warning(
+            'Signals incremental since=%s carried=%s registrations=%s companies=%s',
+            incremental_since.isoformat(),
+            carried,
+            len(only_regs),
+            len(only_companies),
+        )
 
     reg_count = _compute_registration_signals(
         db,
         as_of=target,
         window=window,
         batch_size=batch_size,
-        reg_track_map=reg_track_map,
+        frame=frame,
         track_counts=track_counts,
+        only=only_regs,
     )
     track_count = _compute_track_signals(
         db,
         as_of=target,
         window=window,
         batch_size=batch_size,
-        anchor_map=anchor_map,
-        start_date_map=start_date_map,
+        frame=frame,
     )
     company_count = _compute_company_signals(
         db,
         as_of=target,
         window=window,
         batch_size=batch_size,
-        anchor_map=anchor_map,
-        start_date_map=start_date_map,
+        frame=frame,
+        only=only_companies,
     )
 
     wrote_total = int(reg_count + track_count + company_count)
@@ -603,4 +789,6 @@ def compute_signals_v1(
         track_count=int(track_count),
         company_count=int(company_count),
         wrote_total=int(wrote_total),
+        mode=('incremental' if incremental_since is not None else 'full'),
+        carried_forward=(0 if dry_run else int(carried)),
     )
@@ -3,8 +3,10 @@ from __future__ import annotations
 import hashlib
 import json
 import copy
+import threading
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta, timezone
+from time import monotonic
 from typing import Any
 from uuid import UUID
 
@@ -25,6 +27,7 @@ from app.models import (
     UdiDiMaster,
 )
 from app.services.normalize_keys import normalize_registration_no
+from app.services.udi_coverage import INSERTED_FLAG, bump_udi_coverage_counts, mapped_di_delta
 
 
 def _utcnow() -> datetime:
@@ -359,10 +362,41 @@ class FieldPolicyDecision:
     incoming_meta: dict[str, Any]
 
 
+# Process-local cache of (evidence_grade, priority) per source_key. Field policy is evaluated for
+# every field of every record, so the hot loop must not hit SourceDefinition/SourceConfig each time.
+# Admin writes to /api/admin/sources call invalidate_source_policy_cache(); the TTL bounds staleness
+# for other processes (workers) that did not see the write.
+SOURCE_POLICY_CACHE_TTL_SECONDS = 300.0
+_source_policy_cache: dict[str, tuple[float, tuple[str, int]]] = {}
+_source_policy_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_source_policy_cache_lock = threading.Lock()
+
+
+def invalidate_source_policy_cache(source_key: str | None = None) -> None:
+    with _source_policy_cache_lock:
+        if source_key is None:
+            _source_policy_cache.clear()
+        else:
+            _source_policy_cache.pop(str(source_key or "").strip().upper(), None)
+        _source_policy_cache_stats["invalidations"] += 1
+
+
+def source_policy_cache_stats() -> dict[str, int]:
+    with _source_policy_cache_lock:
+        return {**_source_policy_cache_stats, "size": len(_source_policy_cache)}
+
+
 def _load_source_policy(db: Session, source_key: str) -> tuple[str, int]:
     key = str(source_key or "").strip().upper()
     if not key:
         return ("C", 10_000)
+    now = monotonic()
+    with _source_policy_cache_lock:
+        cached = _source_policy_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _source_policy_cache_stats["hits"] += 1
+            return cached[1]
+        _source_policy_cache_stats["misses"] += 1
     # Unit tests may pass a lightweight FakeDB without SQLAlchemy APIs.
     # Fallback to safe defaults in that case; contract validation happens in ingest_runner.
     try:
@@ -377,6 +411,8 @@ def _load_source_policy(db: Session, source_key: str) -> tuple[str, int]:
             priority = int(cfg.upsert_policy.get("priority", 10_000))
         except Exception:
             priority = 10_000
+    with _source_policy_cache_lock:
+        _source_policy_cache[key] = (now + SOURCE_POLICY_CACHE_TTL_SECONDS, (grade, priority))
     return (grade, priority)
 
 
@@ -620,6 +656,7 @@ def upsert_registration_with_contract(
     raw_source_record_id: UUID | None = None,
     raw_payload: dict[str, Any] | None = None,
     write_change_log: bool = True,
+    registration_cache: dict[str, Registration | None] | None = None,
 ) -> RegistrationUpsertResult:
     """Upsert registration with deterministic conflict resolution.
 
@@ -627,6 +664,9 @@ def upsert_registration_with_contract(
     1) evidence_grade (A > B > C > D)
     2) source_priority (smaller number wins)
     3) observed_at (newer wins)
+
+    `registration_cache` (normalized registration_no -> Registration or None) lets batch
+    callers resolve prefetched registrations without a per-record select.
     """
     reg_no = normalize_registration_no(registration_no)
     if not reg_no:
@@ -645,13 +685,18 @@ def upsert_registration_with_contract(
         "raw_source_record_id": (str(raw_source_record_id) if raw_source_record_id else None),
     }
 
-    reg = db.scalar(select(Registration).where(Registration.registration_no == reg_no))
+    if registration_cache is not None and reg_no in registration_cache:
+        reg = registration_cache[reg_no]
+    else:
+        reg = db.scalar(select(Registration).where(Registration.registration_no == reg_no))
     created = False
     if reg is None:
         reg = Registration(registration_no=reg_no, raw_json={})
         db.add(reg)
         db.flush()
         created = True
+    if registration_cache is not None:
+        registration_cache[reg_no] = reg
 
     before = {
         "registration_no": reg.registration_no,
@@ -917,7 +962,8 @@ def write_udi_contract_record(
                 "updated_at": text("NOW()"),
             },
         )
-        db.execute(master_stmt)
+        if db.execute(master_stmt.returning(INSERTED_FLAG)).scalar():
+            bump_udi_coverage_counts(db, master=1)
 
     if reg_norm:
         reg_res = upsert_registration_with_contract(
@@ -935,10 +981,10 @@ def write_udi_contract_record(
         )
         reg_norm = reg_res.registration_no
         # Keep DI linked to a single canonical registration_no in map.
-        db.execute(
+        deleted = db.execute(
             text("DELETE FROM product_udi_map WHERE di = :di AND registration_no <> :registration_no"),
             {"di": di, "registration_no": reg_norm},
-        )
+        ).rowcount
         map_stmt = insert(ProductUdiMap).values(
             registration_no=reg_norm,
             di=di,
@@ -957,7 +1003,8 @@ def write_udi_contract_record(
                 "updated_at": text("NOW()"),
             },
         )
-        db.execute(map_stmt)
+        inserted = db.execute(map_stmt.returning(INSERTED_FLAG)).scalar()
+        bump_udi_coverage_counts(db, mapped=mapped_di_delta(deleted=deleted, inserted=bool(inserted)))
         # Resolve existing pending item if direct mapping succeeded.
         db.execute(
             text(
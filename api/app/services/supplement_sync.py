@@ -4,7 +4,6 @@ import re
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-import requests
 from sqlalchemy import create_engine, select, text
 from sqlalchemy.engine import URL
 from sqlalchemy.orm import Session
@@ -15,6 +14,7 @@ from app.repositories.radar import get_admin_config, upsert_admin_config
 from app.repositories.source_runs import finish_source_run, start_source_run
 from app.services.crypto import decrypt_json
 from app.services.local_registry_supplement import run_local_registry_supplement
+from app.services.nmpa_query_fetcher import fetch_queries_sync, load_cached_hints, store_cached_hints
 from app.services.normalize_keys import normalize_registration_no
 from app.services.source_contract import upsert_registration_with_contract, write_udi_contract_record
 
@@ -125,6 +125,9 @@ def _plan_config(db: Session) -> dict[str, Any]:
         'nmpa_query_batch_size': max(10, min(2000, int(raw.get('nmpa_query_batch_size', 200) or 200))),
         'nmpa_query_url': str(raw.get('nmpa_query_url') or '').strip() or DEFAULT_NMPA_QUERY_URL,
         'nmpa_query_timeout_seconds': max(5, min(60, int(raw.get('nmpa_query_timeout_seconds', 20) or 20))),
+        'nmpa_query_concurrency': max(1, min(32, int(raw.get('nmpa_query_concurrency', 4) or 4))),
+        'nmpa_query_rate_per_sec': max(0.1, min(50.0, float(raw.get('nmpa_query_rate_per_sec', 2) or 2))),
+        'nmpa_query_cache_ttl_hours': max(1, int(raw.get('nmpa_query_cache_ttl_hours', 168) or 168)),
     }
 
 
@@ -207,7 +210,10 @@ def run_nmpa_query_supplement_now(db: Session, *, reason: str = 'manual') -> dic
         'matched': 0,
         'updated': 0,
         'blocked_412': 0,
+        'throttled_429': 0,
         'failed': 0,
+        'cache_hits': 0,
+        'fetch': {},
         'contract_raw_written': 0,
         'contract_map_written': 0,
         'contract_pending_written': 0,
@@ -236,30 +242,46 @@ def run_nmpa_query_supplement_now(db: Session, *, reason: str = 'manual') -> dic
         ).all()
     )
 
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; IVDRadarBot/1.0)'}
     try:
+        keyword_by_product = {
+            p.id: (getattr(p, 'reg_no', None) or getattr(p, 'name', None) or '').strip() for p in candidates
+        }
+        keywords = sorted({kw for kw in keyword_by_product.values() if kw})
+        hints_by_keyword = load_cached_hints(db, keywords, ttl_hours=int(conf['nmpa_query_cache_ttl_hours']))
+        report['cache_hits'] = len(hints_by_keyword)
+        fetched, fetch_stats = fetch_queries_sync(
+            [kw for kw in keywords if kw not in hints_by_keyword],
+            url=str(conf.get('nmpa_query_url')),
+            timeout_seconds=timeout_s,
+            concurrency=int(conf['nmpa_query_concurrency']),
+            rate_per_sec=float(conf['nmpa_query_rate_per_sec']),
+        )
+        report['fetch'] = fetch_stats.to_dict()
+        fresh: list[tuple[str, int, dict[str, Any]]] = []
+        failed_keywords: dict[str, int | None] = {}
+        for kw, res in fetched.items():
+            if res.status_code is None or res.status_code >= 400:
+                failed_keywords[kw] = res.status_code
+                continue
+            hints_by_keyword[kw] = _extract_nmpa_hints(res.text)
+            fresh.append((kw, int(res.status_code), hints_by_keyword[kw]))
+        store_cached_hints(db, fresh)
+
         for p in candidates:
             report['scanned'] += 1
-            keyword = (getattr(p, 'reg_no', None) or getattr(p, 'name', None) or '').strip()
+            keyword = keyword_by_product.get(p.id) or ''
             if not keyword:
                 continue
-            try:
-                resp = requests.get(
-                    str(conf.get('nmpa_query_url')),
-                    params={'keyword': keyword},
-                    headers=headers,
-                    timeout=timeout_s,
-                )
-            except Exception:
-                report['failed'] += 1
-                continue
-            if resp.status_code == 412:
-                report['blocked_412'] += 1
-                continue
-            if resp.status_code >= 400:
-                report['failed'] += 1
+            if keyword in failed_keywords:
+                code = failed_keywords[keyword]
+                if code == 412:
+                    report['blocked_412'] += 1
+                elif code == 429:
+                    report['throttled_429'] += 1
+                else:
+                    report['failed'] += 1
                 continue
-            hints = _extract_nmpa_hints(resp.text)
+            hints = hints_by_keyword.get(keyword) or {}
             if not hints:
                 continue
             report['matched'] += 1
@@ -288,7 +310,9 @@ def run_nmpa_query_supplement_now(db: Session, *, reason: str = 'manual') -> dic
         report['finished_at'] = _to_iso(_utcnow())
         report['message'] = (
             f"nmpa-query supplement: scanned={report['scanned']} matched={report['matched']} "
-            f"updated={report['updated']} blocked_412={report['blocked_412']}"
+            f"updated={report['updated']} blocked_412={report['blocked_412']} "
+            f"throttled_429={report['throttled_429']} cache_hits={report['cache_hits']} "
+            f"throughput_per_sec={fetch_stats.to_dict()['throughput_per_sec']}"
         )
         finish_source_run(
             db,
@@ -297,7 +321,7 @@ def run_nmpa_query_supplement_now(db: Session, *, reason: str = 'manual') -> dic
             message=report['message'],
             records_total=int(report['scanned']),
             records_success=int(report['updated']),
-            records_failed=int(report['failed'] + report['blocked_412']),
+            records_failed=int(report['failed'] + report['blocked_412'] + report['throttled_429']),
             updated_count=int(report['updated']),
         )
         upsert_admin_config(db, NMPA_QUERY_LAST_KEY, report)
@@ -314,7 +338,7 @@ def run_nmpa_query_supplement_now(db: Session, *, reason: str = 'manual') -> dic
             message=report['message'],
             records_total=int(report['scanned']),
             records_success=int(report['updated']),
-            records_failed=max(1, int(report['failed'] + report['blocked_412'])),
+            records_failed=max(1, int(report['failed'] + report['blocked_412'] + report['throttled_429'])),
             updated_count=int(report['updated']),
         )
         upsert_admin_config(db, NMPA_QUERY_LAST_KEY, report)
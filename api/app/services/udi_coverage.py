@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import event, literal_column, text
+from sqlalchemy.orm import Session
+
+
+# Global UDI coverage counts live in the single-row udi_coverage_counters table.
+# Writers that add DIs (index / promote / contract / admin binds) report deltas through
+# bump_udi_coverage_counts(); the deltas are summed on the session and written with one UPDATE
+# right before that session commits, so the counter row is locked only for the commit itself
+# (concurrent UDI writers do not serialize on it, and it is always the last lock a transaction
+# takes). Daily metrics read three integers instead of rescanning the DI tables.
+# refresh_udi_coverage_counts() recounts from scratch (seed + drift reconciliation).
+
+# RETURNING expression for INSERT ... ON CONFLICT: true for freshly inserted rows, false for updates.
+INSERTED_FLAG = literal_column("(xmax = 0)").label("inserted")
+
+_PENDING_KEY = "udi_coverage_pending"
+
+
+def mapped_di_delta(*, deleted: int, inserted: bool) -> int:
+    """Distinct-DI delta of the "delete other registrations for this DI, then upsert" pattern.
+
+    The DI only becomes newly mapped when nothing was deleted and the upsert inserted a row.
+    """
+    return 1 if inserted and not int(deleted or 0) else 0
+
+
+def bump_udi_coverage_counts(db: Session, *, master: int = 0, index: int = 0, mapped: int = 0) -> None:
+    """Add coverage deltas for the current transaction; applied when `db` commits, dropped on rollback."""
+    if not (master or index or mapped):
+        return
+    pending = db.info.setdefault(_PENDING_KEY, {"master": 0, "index": 0, "mapped": 0})
+    pending["master"] += int(master)
+    pending["index"] += int(index)
+    pending["mapped"] += int(mapped)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_pending_udi_coverage(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+    # Flush pending ORM writes first so the counter row really is the last lock taken.
+    session.flush()
+    # No row yet means counters were never seeded; the first read recounts anyway.
+    session.execute(
+        text(
+            """
+            UPDATE udi_coverage_counters
+            SET master_di_count = GREATEST(0, master_di_count + :master),
+                index_di_count = GREATEST(0, index_di_count + :index),
+                mapped_di_count = GREATEST(0, mapped_di_count + :mapped),
+                updated_at = NOW()
+            WHERE id = 1
+            """
+        ),
+        pending,
+    )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_udi_coverage(session: Session, transaction) -> None:
+    # Rollback / close of the outermost transaction discards deltas of writes that never committed.
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def refresh_udi_coverage_counts(db: Session) -> dict[str, int]:
+    row = (
+        db.execute(
+            text(
+                """
+                INSERT INTO udi_coverage_counters (id, master_di_count, index_di_count, mapped_di_count, refreshed_at, updated_at)
+                SELECT
+                  1,
+                  (SELECT COUNT(1) FROM udi_di_master),
+                  (SELECT COUNT(DISTINCT di_norm) FROM udi_device_index WHERE di_norm IS NOT NULL AND btrim(di_norm) <> ''),
+                  (SELECT COUNT(DISTINCT di) FROM product_udi_map),
+                  NOW(),
+                  NOW()
+                ON CONFLICT (id) DO UPDATE SET
+                  master_di_count = EXCLUDED.master_di_count,
+                  index_di_count = EXCLUDED.index_di_count,
+                  mapped_di_count = EXCLUDED.mapped_di_count,
+                  refreshed_at = EXCLUDED.refreshed_at,
+                  updated_at = EXCLUDED.updated_at
+                RETURNING master_di_count, index_di_count, mapped_di_count
+                """
+            )
+        )
+        .mappings()
+        .one()
+    )
+    return {k: int(row[k] or 0) for k in ("master_di_count", "index_di_count", "mapped_di_count")}
+
+
+def load_udi_coverage_counts(db: Session, *, seed: bool = True) -> dict[str, int] | None:
+    row: Any = (
+        db.execute(
+            text("SELECT master_di_count, index_di_count, mapped_di_count FROM udi_coverage_counters WHERE id = 1")
+        )
+        .mappings()
+        .first()
+    )
+    if row is None:
+        return refresh_udi_coverage_counts(db) if seed else None
+    return {k: int(row[k] or 0) for k in ("master_di_count", "index_di_count", "mapped_di_count")}
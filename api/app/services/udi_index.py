@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
@@ -13,6 +16,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.services.normalize_keys import normalize_registration_no
+from app.services.udi_coverage import bump_udi_coverage_counts
 from app.services.udi_parse import parse_packing_list, parse_storage_list
 
 
@@ -104,6 +108,38 @@ class UdiIndexReport:
     def storage_rate(self) -> float:
         return (self.storage_present / self.total_devices) if self.total_devices else 0.0
 
+    def merge(self, other: "UdiIndexReport") -> None:
+        """Fold a per-file report (parallel mode) into this run-level report."""
+        self.files_failed += other.files_failed
+        self.file_errors.extend(other.file_errors[: max(0, 10 - len(self.file_errors))])
+        self.total_devices += other.total_devices
+        self.di_present += other.di_present
+        self.reg_present += other.reg_present
+        self.has_cert_yes += other.has_cert_yes
+        self.packing_present += other.packing_present
+        self.storage_present += other.storage_present
+        self.sample_packing_json.extend(other.sample_packing_json[: max(0, 2 - len(self.sample_packing_json))])
+        self.sample_storage_json.extend(other.sample_storage_json[: max(0, 2 - len(self.sample_storage_json))])
+        self.upserted += other.upserted
+
+
+def _empty_report(*, files_total: int, files_seen: int) -> UdiIndexReport:
+    return UdiIndexReport(
+        files_total=files_total,
+        files_seen=files_seen,
+        files_failed=0,
+        file_errors=[],
+        total_devices=0,
+        di_present=0,
+        reg_present=0,
+        has_cert_yes=0,
+        packing_present=0,
+        storage_present=0,
+        sample_packing_json=[],
+        sample_storage_json=[],
+        upserted=0,
+    )
+
 
 def iter_devices_from_xml_file(path: Path, *, max_devices: int | None) -> Iterable[ET.Element]:
     if not path.is_file() or path.suffix.lower() != ".xml":
@@ -192,85 +228,23 @@ def _extract_device_row(
     return row
 
 
-def run_udi_device_index(
-    db: Session,
-    *,
-    staging_dir: Path,
-    raw_document_id: UUID | None,
-    source_run_id: int | None,
-    dry_run: bool,
-    limit: int | None = None,
-    limit_files: int | None = None,
-    max_devices_per_file: int | None = None,
-    part_from: int | None = None,
-    part_to: int | None = None,
-) -> UdiIndexReport:
-    xml_files = sorted([p for p in staging_dir.rglob("*.xml") if p.is_file()])
-    files_total = len(xml_files)
-
-    # Part-range filter (by file name). Intended for standardized full-release imports.
-    if part_from is not None or part_to is not None:
-        lo = int(part_from) if part_from is not None else 1
-        hi = int(part_to) if part_to is not None else 10**9
-        filtered: list[Path] = []
-        for p in xml_files:
-            n = _extract_part_no(p)
-            if n is None:
-                continue
-            if lo <= n <= hi:
-                filtered.append(p)
-        xml_files = sorted(filtered)
-    elif limit_files is not None and limit_files >= 0:
-        xml_files = xml_files[:limit_files]
-    files_seen = len(xml_files)
-
-    report = UdiIndexReport(
-        files_total=files_total,
-        files_seen=files_seen,
-        files_failed=0,
-        file_errors=[],
-        total_devices=0,
-        di_present=0,
-        reg_present=0,
-        has_cert_yes=0,
-        packing_present=0,
-        storage_present=0,
-        sample_packing_json=[],
-        sample_storage_json=[],
-        upserted=0,
-    )
-
-    upsert_sql = text(
-        """
-        INSERT INTO udi_device_index (
-            di_norm, registration_no_norm, has_cert,
-            model_spec, sku_code, product_name, brand, description,
-            category_big, class_code, product_type,
-            issuer_standard, publish_date, barcode_carrier,
-            manufacturer_cn, manufacturer_en, uscc,
-            packing_json, storage_json,
-            mjfs, tscchcztj, tsccsm,
-            version_number, version_time, version_status,
-            correction_number, correction_remark, correction_time,
-            device_record_key,
-            scbssfbhxlh, scbssfbhscrq, scbssfbhsxrq, scbssfbhph,
-            raw_document_id, source_run_id,
-            updated_at
-        ) VALUES (
-            :di_norm, :registration_no_norm, :has_cert,
-            :model_spec, :sku_code, :product_name, :brand, :description,
-            :category_big, :class_code, :product_type,
-            :issuer_standard, :publish_date, :barcode_carrier,
-            :manufacturer_cn, :manufacturer_en, :uscc,
-            CAST(:packing_json AS jsonb), CAST(:storage_json AS jsonb),
-            :mjfs, :tscchcztj, :tsccsm,
-            :version_number, :version_time, :version_status,
-            :correction_number, :correction_remark, :correction_time,
-            :device_record_key,
-            :scbssfbhxlh, :scbssfbhscrq, :scbssfbhsxrq, :scbssfbhph,
-            CAST(:raw_document_id AS uuid), :source_run_id,
-            NOW()
-        )
+# Column order shared by the row-by-row upsert and the bulk (COPY + merge) writer.
+_INDEX_COLUMNS: tuple[str, ...] = (
+    "di_norm", "registration_no_norm", "has_cert",
+    "model_spec", "sku_code", "product_name", "brand", "description",
+    "category_big", "class_code", "product_type",
+    "issuer_standard", "publish_date", "barcode_carrier",
+    "manufacturer_cn", "manufacturer_en", "uscc",
+    "packing_json", "storage_json",
+    "mjfs", "tscchcztj", "tsccsm",
+    "version_number", "version_time", "version_status",
+    "correction_number", "correction_remark", "correction_time",
+    "device_record_key",
+    "scbssfbhxlh", "scbssfbhscrq", "scbssfbhsxrq", "scbssfbhph",
+    "raw_document_id", "source_run_id",
+)
+
+_ON_CONFLICT_SQL = """
         ON CONFLICT (di_norm) DO UPDATE SET
             registration_no_norm = EXCLUDED.registration_no_norm,
             has_cert = EXCLUDED.has_cert,
@@ -308,57 +282,356 @@ def run_udi_device_index(
             -- Always stamp the latest run id so we can batch-aggregate touched registrations.
             source_run_id = EXCLUDED.source_run_id,
             updated_at = NOW()
-        """
-    )
+"""
 
-    for xml_path in xml_files:
-        try:
-            for dev in iter_devices_from_xml_file(xml_path, max_devices=max_devices_per_file):
-                if limit is not None and report.total_devices >= limit:
-                    break
-                report.total_devices += 1
-                row = _extract_device_row(dev, raw_document_id=raw_document_id, source_run_id=source_run_id)
-                if row is None:
-                    continue
-                report.di_present += 1
-                if row.get("registration_no_norm"):
-                    report.reg_present += 1
-                if bool(row.get("has_cert")):
-                    report.has_cert_yes += 1
-
-                try:
-                    packings = json.loads(str(row.get("packing_json") or "[]"))
-                except Exception:
-                    packings = []
-                try:
-                    storages = json.loads(str(row.get("storage_json") or "[]"))
-                except Exception:
-                    storages = []
-
-                if isinstance(packings, list) and len(packings) > 0:
-                    report.packing_present += 1
-                    if len(report.sample_packing_json) < 2:
-                        report.sample_packing_json.append(
-                            {"di_norm": str(row.get("di_norm")), "packaging_json": packings}
-                        )
-                if isinstance(storages, list) and len(storages) > 0:
-                    report.storage_present += 1
-                    if len(report.sample_storage_json) < 2:
-                        report.sample_storage_json.append({"di_norm": str(row.get("di_norm")), "storage_json": storages})
-
-                if dry_run:
-                    continue
-                db.execute(upsert_sql, row)
-                report.upserted += 1
-        except UdiXmlParseError as e:
-            report.files_failed += 1
-            if len(report.file_errors) < 10:
-                report.file_errors.append({"file": e.path.name, "error": str(e.err)})
+_UPSERT_SQL = text(
+    """
+        INSERT INTO udi_device_index (
+            di_norm, registration_no_norm, has_cert,
+            model_spec, sku_code, product_name, brand, description,
+            category_big, class_code, product_type,
+            issuer_standard, publish_date, barcode_carrier,
+            manufacturer_cn, manufacturer_en, uscc,
+            packing_json, storage_json,
+            mjfs, tscchcztj, tsccsm,
+            version_number, version_time, version_status,
+            correction_number, correction_remark, correction_time,
+            device_record_key,
+            scbssfbhxlh, scbssfbhscrq, scbssfbhsxrq, scbssfbhph,
+            raw_document_id, source_run_id,
+            updated_at
+        ) VALUES (
+            :di_norm, :registration_no_norm, :has_cert,
+            :model_spec, :sku_code, :product_name, :brand, :description,
+            :category_big, :class_code, :product_type,
+            :issuer_standard, :publish_date, :barcode_carrier,
+            :manufacturer_cn, :manufacturer_en, :uscc,
+            CAST(:packing_json AS jsonb), CAST(:storage_json AS jsonb),
+            :mjfs, :tscchcztj, :tsccsm,
+            :version_number, :version_time, :version_status,
+            :correction_number, :correction_remark, :correction_time,
+            :device_record_key,
+            :scbssfbhxlh, :scbssfbhscrq, :scbssfbhsxrq, :scbssfbhph,
+            CAST(:raw_document_id AS uuid), :source_run_id,
+            NOW()
+        )
+    """
+    + _ON_CONFLICT_SQL
+    + """
+        RETURNING (xmax = 0) AS inserted
+    """
+)
+
+_STAGE_TABLE = "udi_device_index_stage"
 
-        if limit is not None and report.total_devices >= limit:
-            break
 
-    if not dry_run:
+class _BulkIndexWriter:
+    """Buffer extracted rows and merge them into udi_device_index per batch.
+
+    Each batch is COPY'd into a session-local temp table and merged with a single
+    INSERT ... SELECT ... ON CONFLICT. Within a batch the last row per DI wins,
+    which matches the row-by-row upsert semantics.
+    """
+
+    def __init__(self, db: Session, *, batch_size: int, commit_every: int) -> None:
+        self.db = db
+        self.batch_size = max(1, int(batch_size))
+        self.commit_every = max(1, int(commit_every))
+        self.buffer: list[dict[str, Any]] = []
+        self.batches = 0
+        self._seq = 0
+
+    def _ensure_stage(self) -> None:
+        # Re-checked per batch: after a commit the session may be handed a different pooled connection.
+        cols = ", ".join(_INDEX_COLUMNS)
+        self.db.execute(
+            text(
+                f"""
+                CREATE TEMP TABLE IF NOT EXISTS {_STAGE_TABLE} AS
+                SELECT 0::bigint AS seq, {cols}
+                FROM udi_device_index
+                WITH NO DATA
+                """
+            )
+        )
+
+    def _copy_to_stage(self, rows: list[dict[str, Any]]) -> None:
+        cols = ("seq",) + _INDEX_COLUMNS
+        records = []
+        for row in rows:
+            self._seq += 1
+            records.append((self._seq,) + tuple(row.get(c) for c in _INDEX_COLUMNS))
+
+        dbapi_conn = self.db.connection().connection.driver_connection
+        cur = dbapi_conn.cursor()
+        if hasattr(cur, "copy"):
+            # psycopg3: stream rows through COPY (text protocol, adapted per column type).
+            with cur:
+                with cur.copy(f"COPY {_STAGE_TABLE} ({', '.join(cols)}) FROM STDIN") as cp:
+                    for rec in records:
+                        cp.write_row(rec)
+            return
+
+        # Other drivers: multi-row executemany into the stage table.
+        cur.close()
+        placeholders = ", ".join(f":{c}" for c in cols)
+        self.db.execute(
+            text(f"INSERT INTO {_STAGE_TABLE} ({', '.join(cols)}) VALUES ({placeholders})"),
+            [dict(zip(cols, rec)) for rec in records],
+        )
+
+    def add(self, row: dict[str, Any]) -> None:
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        self._ensure_stage()
+        self._copy_to_stage(rows)
+        cols = ", ".join(_INDEX_COLUMNS)
+        new_di = self.db.execute(
+            text(
+                f"""
+                WITH merged AS (
+                INSERT INTO udi_device_index ({cols}, updated_at)
+                SELECT DISTINCT ON (di_norm) {cols}, NOW()
+                FROM {_STAGE_TABLE}
+                ORDER BY di_norm, seq DESC
+                """
+                + _ON_CONFLICT_SQL
+                + """
+                RETURNING (xmax = 0) AS inserted
+                )
+                SELECT COUNT(1) FILTER (WHERE inserted) FROM merged
+                """
+            )
+        ).scalar()
+        bump_udi_coverage_counts(self.db, index=int(new_di or 0))
+        self.db.execute(text(f"TRUNCATE {_STAGE_TABLE}"))
+        self.batches += 1
+        if self.batches % self.commit_every == 0:
+            self.db.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self.db.commit()
+
+
+def _tally_row(report: UdiIndexReport, row: dict[str, Any]) -> None:
+    report.di_present += 1
+    if row.get("registration_no_norm"):
+        report.reg_present += 1
+    if bool(row.get("has_cert")):
+        report.has_cert_yes += 1
+
+    try:
+        packings = json.loads(str(row.get("packing_json") or "[]"))
+    except Exception:
+        packings = []
+    try:
+        storages = json.loads(str(row.get("storage_json") or "[]"))
+    except Exception:
+        storages = []
+
+    if isinstance(packings, list) and len(packings) > 0:
+        report.packing_present += 1
+        if len(report.sample_packing_json) < 2:
+            report.sample_packing_json.append({"di_norm": str(row.get("di_norm")), "packaging_json": packings})
+    if isinstance(storages, list) and len(storages) > 0:
+        report.storage_present += 1
+        if len(report.sample_storage_json) < 2:
+            report.sample_storage_json.append({"di_norm": str(row.get("di_norm")), "storage_json": storages})
+
+
+def _select_xml_files(
+    staging_dir: Path,
+    *,
+    limit_files: int | None,
+    part_from: int | None,
+    part_to: int | None,
+) -> tuple[list[Path], int]:
+    xml_files = sorted([p for p in staging_dir.rglob("*.xml") if p.is_file()])
+    files_total = len(xml_files)
+
+    # Part-range filter (by file name). Intended for standardized full-release imports.
+    if part_from is not None or part_to is not None:
+        lo = int(part_from) if part_from is not None else 1
+        hi = int(part_to) if part_to is not None else 10**9
+        filtered: list[Path] = []
+        for p in xml_files:
+            n = _extract_part_no(p)
+            if n is None:
+                continue
+            if lo <= n <= hi:
+                filtered.append(p)
+        xml_files = sorted(filtered)
+    elif limit_files is not None and limit_files >= 0:
+        xml_files = xml_files[:limit_files]
+    return xml_files, files_total
+
+
+def _parse_xml_file_worker(
+    path_str: str,
+    raw_document_id: str | None,
+    source_run_id: int | None,
+    max_devices_per_file: int | None,
+) -> tuple[UdiIndexReport, list[dict[str, Any] | None]]:
+    """Process-pool task: parse one XML file into extracted rows plus its own report.
+
+    Devices without a DI are kept as None so the writer can apply a global `limit`
+    at exact device granularity.
+    """
+    path = Path(path_str)
+    rep = _empty_report(files_total=0, files_seen=0)
+    rows: list[dict[str, Any] | None] = []
+    raw_id = UUID(raw_document_id) if raw_document_id else None
+    try:
+        for dev in iter_devices_from_xml_file(path, max_devices=max_devices_per_file):
+            rep.total_devices += 1
+            row = _extract_device_row(dev, raw_document_id=raw_id, source_run_id=source_run_id)
+            rows.append(row)
+            if row is not None:
+                _tally_row(rep, row)
+    except UdiXmlParseError as e:
+        rep.files_failed += 1
+        rep.file_errors.append({"file": e.path.name, "error": str(e.err)})
+    return rep, rows
+
+
+def _iter_parsed_files_parallel(
+    xml_files: list[Path],
+    *,
+    workers: int,
+    raw_document_id: UUID | None,
+    source_run_id: int | None,
+    max_devices_per_file: int | None,
+) -> Iterable[tuple[UdiIndexReport, list[dict[str, Any] | None]]]:
+    """Yield per-file parse results in file order with at most `workers` files in flight.
+
+    Each task returns a whole file's rows, so the next file is only submitted once the
+    previous result has been consumed: parent memory stays bounded by `workers` files.
+    """
+    raw_id = str(raw_document_id) if raw_document_id else None
+    paths = iter(xml_files)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit_next(pending: deque[Future]) -> None:
+        path = next(paths, None)
+        if path is not None:
+            pending.append(pool.submit(_parse_xml_file_worker, str(path), raw_id, source_run_id, max_devices_per_file))
+
+    try:
+        pending: deque[Future] = deque()
+        for _ in range(max(1, workers)):
+            _submit_next(pending)
+        while pending:
+            yield pending.popleft().result()
+            _submit_next(pending)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_udi_device_index(
+    db: Session,
+    *,
+    staging_dir: Path,
+    raw_document_id: UUID | None,
+    source_run_id: int | None,
+    dry_run: bool,
+    limit: int | None = None,
+    limit_files: int | None = None,
+    max_devices_per_file: int | None = None,
+    part_from: int | None = None,
+    part_to: int | None = None,
+    bulk: bool = False,
+    batch_size: int = 5000,
+    commit_every: int = 1,
+    workers: int = 0,
+) -> UdiIndexReport:
+    """Scan extracted UDI XML into udi_device_index.
+
+    Default mode upserts one row per <device>. With bulk=True rows are buffered into
+    batches of `batch_size`, COPY'd into a temp stage table and merged set-based;
+    the session commits every `commit_every` batches. Report counters are identical.
+
+    With workers > 1, XML files are parsed in a process pool (one file per task) and
+    this process stays the single writer, applying files in sorted order.
+    """
+    xml_files, files_total = _select_xml_files(
+        staging_dir, limit_files=limit_files, part_from=part_from, part_to=part_to
+    )
+    report = _empty_report(files_total=files_total, files_seen=len(xml_files))
+
+    writer: _BulkIndexWriter | None = None
+    if bulk and not dry_run:
+        writer = _BulkIndexWriter(db, batch_size=batch_size, commit_every=commit_every)
+
+    new_di = 0
+
+    def _write(row: dict[str, Any]) -> None:
+        nonlocal new_di
+        if writer is not None:
+            writer.add(row)
+        elif db.execute(_UPSERT_SQL, row).scalar():
+            new_di += 1
+        report.upserted += 1
+
+    if workers and workers > 1 and len(xml_files) > 1:
+        # Workers parse + extract; this process is the single writer and applies files in order.
+        for file_rep, rows in _iter_parsed_files_parallel(
+            xml_files,
+            workers=int(workers),
+            raw_document_id=raw_document_id,
+            source_run_id=source_run_id,
+            max_devices_per_file=max_devices_per_file,
+        ):
+            if limit is not None and report.total_devices + len(rows) > limit:
+                # Truncate the last file at exact device granularity and re-tally that slice.
+                rows = rows[: max(0, limit - report.total_devices)]
+                # A parse error always sits after the last yielded device, so a truncated file never reaches it.
+                partial = _empty_report(files_total=0, files_seen=0)
+                partial.total_devices = len(rows)
+                for row in rows:
+                    if row is not None:
+                        _tally_row(partial, row)
+                file_rep = partial
+            report.merge(file_rep)
+            if not dry_run:
+                for row in rows:
+                    if row is not None:
+                        _write(row)
+            if limit is not None and report.total_devices >= limit:
+                break
+    else:
+        for xml_path in xml_files:
+            try:
+                for dev in iter_devices_from_xml_file(xml_path, max_devices=max_devices_per_file):
+                    if limit is not None and report.total_devices >= limit:
+                        break
+                    report.total_devices += 1
+                    row = _extract_device_row(dev, raw_document_id=raw_document_id, source_run_id=source_run_id)
+                    if row is None:
+                        continue
+                    _tally_row(report, row)
+
+                    if dry_run:
+                        continue
+                    _write(row)
+            except UdiXmlParseError as e:
+                report.files_failed += 1
+                if len(report.file_errors) < 10:
+                    report.file_errors.append({"file": e.path.name, "error": str(e.err)})
+
+            if limit is not None and report.total_devices >= limit:
+                break
+
+    if writer is not None:
+        writer.close()
+    elif not dry_run:
+        bump_udi_coverage_counts(db, index=new_di)
         db.commit()
     return report
 
@@ -400,3 +673,55 @@ def refresh_udi_registration_index(db: Session, *, source_run_id: int) -> int:
     res = db.execute(sql, {"run_id": int(source_run_id)})
     db.commit()
     return int(getattr(res, "rowcount", 0) or 0)
+
+
+def iter_device_index_chunks(
+    db: Session,
+    *,
+    select_sql: str,
+    params: dict[str, Any] | None = None,
+    batch_size: int = 5000,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Iterable[list[dict[str, Any]]]:
+    """Keyset-walk udi_device_index by di_norm in fixed-size chunks.
+
+    `select_sql` must select from `udi_device_index udi` and end with a WHERE clause; the
+    cursor predicate, ORDER BY di_norm and LIMIT are appended here. Each chunk is a fresh
+    query, so callers may commit between chunks.
+    """
+    size = max(1, int(batch_size or 5000))
+    remaining = int(limit) if isinstance(limit, int) and limit > 0 else None
+    while remaining is None or remaining > 0:
+        lim = size if remaining is None else min(size, remaining)
+        q_params = dict(params or {})
+        q_params["lim"] = lim
+        sql = select_sql
+        if cursor:
+            sql += " AND udi.di_norm > :cursor"
+            q_params["cursor"] = cursor
+        sql += " ORDER BY udi.di_norm LIMIT :lim"
+        rows = [dict(r) for r in db.execute(text(sql), q_params).mappings().all()]
+        if not rows:
+            return
+        yield rows
+        cursor = str(rows[-1].get("di_norm") or "")
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def load_registration_ids(db: Session, reg_nos: Iterable[str]) -> dict[str, UUID]:
+    """registration_no -> registrations.id for one chunk of canonical registration numbers."""
+    arr = sorted({str(x).strip() for x in reg_nos if str(x or "").strip()})
+    out: dict[str, UUID] = {}
+    if not arr:
+        return out
+    for rid, rno in db.execute(
+        text("SELECT id, registration_no FROM registrations WHERE registration_no = ANY(:arr)"),
+        {"arr": arr},
+    ).fetchall():
+        try:
+            out[str(rno)] = UUID(str(rid))
+        except Exception:
+            continue
+    return out
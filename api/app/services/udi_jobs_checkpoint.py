@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import UdiJobCheckpoint
+
+
+# Resumable batch jobs (udi:params, udi:variants, udi:products-enrich, reclassify_ivd) keep their
+# last processed key in udi_jobs_checkpoint under a job name. Neither helper commits: callers
+# write the checkpoint in the same transaction as the chunk it describes.
+
+
+def get_checkpoint(db: Session, job_name: str) -> str | None:
+    row = db.get(UdiJobCheckpoint, job_name)
+    if row is None:
+        return None
+    cur = str(row.cursor or "").strip()
+    return cur or None
+
+
+def set_checkpoint(db: Session, *, job_name: str, cursor: str, meta: dict[str, Any] | None = None) -> None:
+    stmt = insert(UdiJobCheckpoint).values(
+        job_name=job_name, cursor=cursor, meta=(meta or {}), updated_at=datetime.now(timezone.utc)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UdiJobCheckpoint.job_name],
+        set_={
+            "cursor": stmt.excluded.cursor,
+            "meta": stmt.excluded.meta,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
@@ -13,7 +13,8 @@ from sqlalchemy import select, text
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models import AdminConfig, ParamDictionaryCandidate, ProductParam, UdiJobCheckpoint
+from app.models import AdminConfig, ParamDictionaryCandidate, ProductParam
+from app.services.udi_jobs_checkpoint import get_checkpoint, set_checkpoint
 
 
 def _utcnow() -> datetime:
@@ -146,27 +147,6 @@ def _normalize_storages(v: Any) -> list[dict[str, Any]]:
     return out
 
 
-def _checkpoint_get(db: Session, job_name: str) -> str | None:
-    row = db.get(UdiJobCheckpoint, job_name)
-    if row is None:
-        return None
-    cur = str(row.cursor or "").strip()
-    return cur or None
-
-
-def _checkpoint_set(db: Session, *, job_name: str, cursor: str, meta: dict[str, Any] | None = None) -> None:
-    stmt = insert(UdiJobCheckpoint).values(job_name=job_name, cursor=cursor, meta=(meta or {}), updated_at=_utcnow())
-    stmt = stmt.on_conflict_do_update(
-        index_elements=[UdiJobCheckpoint.job_name],
-        set_={
-            "cursor": stmt.excluded.cursor,
-            "meta": stmt.excluded.meta,
-            "updated_at": stmt.excluded.updated_at,
-        },
-    )
-    db.execute(stmt)
-
-
 def _ensure_raw_document_for_run(db: Session, source_run_id: int) -> UUID:
     run_id = str(int(source_run_id))
     sha = hashlib.sha256(f"udi_params_allowlist_v1:{run_id}".encode("utf-8")).hexdigest()
@@ -572,7 +552,7 @@ def write_allowlisted_params(
 
     cursor = (str(start_cursor).strip() if start_cursor else None)
     if cursor is None and resume:
-        cursor = _checkpoint_get(db, effective_job_name)
+        cursor = get_checkpoint(db, effective_job_name)
 
     total_limit = int(limit) if isinstance(limit, int) and limit > 0 else None
     scanned_total = 0
@@ -801,7 +781,7 @@ def write_allowlisted_params(
 
             cursor = str(rows[-1].get("di_norm") or cursor or "")
             rep.final_cursor = cursor
-            _checkpoint_set(
+            set_checkpoint(
                 db,
                 job_name=effective_job_name,
                 cursor=(cursor or ""),
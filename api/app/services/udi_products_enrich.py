@@ -5,10 +5,12 @@ from datetime import datetime, timezone
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select, text
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import ChangeLog, Product, Registration
+from app.services.udi_index import iter_device_index_chunks, load_registration_ids
+from app.services.udi_jobs_checkpoint import get_checkpoint, set_checkpoint
 
 
 def _utcnow() -> datetime:
@@ -61,6 +63,9 @@ class UdiProductsEnrichReport:
     skipped_no_product: int = 0
     skipped_no_change: int = 0
     failed: int = 0
+    batches: int = 0
+    resumed_from: str | None = None
+    final_cursor: str | None = None
     errors: list[dict[str, Any]] | None = None
 
     @property
@@ -73,6 +78,9 @@ class UdiProductsEnrichReport:
             "skipped_no_product": self.skipped_no_product,
             "skipped_no_change": self.skipped_no_change,
             "failed": self.failed,
+            "batches": self.batches,
+            "resumed_from": self.resumed_from,
+            "final_cursor": self.final_cursor,
             "errors": self.errors or [],
         }
 
@@ -84,6 +92,10 @@ def enrich_products_from_udi_device_index(
     limit: int | None = None,
     dry_run: bool,
     description_max_len: int = 2000,
+    batch_size: int = 5000,
+    resume: bool = False,
+    start_cursor: str | None = None,
+    job_name: str = "udi:products-enrich",
 ) -> UdiProductsEnrichReport:
     """
     Enrich products using UDI device index, without overriding existing (NMPA) facts.
@@ -92,6 +104,9 @@ def enrich_products_from_udi_device_index(
     - Only process rows that can bind registration_no_norm -> registrations.id.
     - Only update product columns when target field is empty/placeholder.
     - Never override existing values: if different, store under products.raw_json.udi_snapshot / aliases.
+
+    The index is walked in di_norm order, `batch_size` rows at a time, with registrations and
+    display products prefetched per chunk; execute mode commits and checkpoints after each chunk.
     """
     rep = UdiProductsEnrichReport(errors=[])
 
@@ -114,45 +129,85 @@ def enrich_products_from_udi_device_index(
       AND udi.registration_no_norm IS NOT NULL AND btrim(udi.registration_no_norm) <> ''
     """
     params: dict[str, Any] = {}
+    effective_job_name = job_name
     if source_run_id is not None:
         sql += " AND udi.source_run_id = :source_run_id"
         params["source_run_id"] = int(source_run_id)
-    sql += " ORDER BY udi.updated_at DESC NULLS LAST"
-    if isinstance(limit, int) and limit > 0:
-        sql += " LIMIT :lim"
-        params["lim"] = int(limit)
-
-    rows = db.execute(text(sql), params).mappings().all()
-    rep.scanned = len(rows)
-
-    reg_nos = sorted({str(r.get("registration_no_norm") or "").strip() for r in rows if str(r.get("registration_no_norm") or "").strip()})
-    reg_by_no: dict[str, UUID] = {}
-    if reg_nos:
-        for rid, rno in db.execute(
-            text("SELECT id, registration_no FROM registrations WHERE registration_no = ANY(:arr)"),
-            {"arr": reg_nos},
-        ).fetchall():
-            try:
-                reg_by_no[str(rno)] = UUID(str(rid))
-            except Exception:
-                continue
+        effective_job_name = f"{job_name}:srid:{int(source_run_id)}"
+
+    cursor = (str(start_cursor).strip() if start_cursor else None)
+    if cursor is None and resume and not dry_run:
+        cursor = get_checkpoint(db, effective_job_name)
+    rep.resumed_from = cursor
+
+    row_limit = int(limit) if isinstance(limit, int) and limit > 0 else None
+    walked = 0
+    for rows in iter_device_index_chunks(
+        db,
+        select_sql=sql,
+        params=params,
+        batch_size=batch_size,
+        limit=row_limit,
+        cursor=cursor,
+    ):
+        rep.batches += 1
+        walked += len(rows)
+        rep.scanned += len(rows)
+        _enrich_chunk(db, rows, rep=rep, dry_run=dry_run, description_max_len=description_max_len)
+        cursor = str(rows[-1].get("di_norm") or "")
+        rep.final_cursor = cursor
+        if not dry_run:
+            set_checkpoint(
+                db,
+                job_name=effective_job_name,
+                cursor=cursor,
+                meta={"source_run_id": source_run_id, "batch_no": rep.batches, "scanned": rep.scanned, "updated": rep.updated},
+            )
+            db.commit()
+
+    if not dry_run and (row_limit is None or walked < row_limit):
+        # Index exhausted: clear the cursor so the next run walks the whole index again.
+        # A run stopped by `limit` keeps its last chunk's cursor for --resume.
+        set_checkpoint(
+            db,
+            job_name=effective_job_name,
+            cursor="",
+            meta={"source_run_id": source_run_id, "batch_no": rep.batches, "scanned": rep.scanned, "completed": True},
+        )
+        db.commit()
+    return rep
+
 
+def _display_products_by_registration(db: Session, reg_ids: list[UUID]) -> dict[UUID, Product]:
     # Pick one "display product" per registration_id: latest updated IVD product.
-    reg_ids = list({str(x) for x in reg_by_no.values()})
     prod_by_reg_id: dict[UUID, Product] = {}
-    if reg_ids:
-        products = (
-            db.scalars(
-                select(Product)
-                .where(Product.registration_id.in_([UUID(x) for x in reg_ids]), Product.is_ivd.is_(True))
-                .order_by(Product.updated_at.desc(), Product.created_at.desc())
-            )
-            .all()
+    if not reg_ids:
+        return prod_by_reg_id
+    products = (
+        db.scalars(
+            select(Product)
+            .where(Product.registration_id.in_(reg_ids), Product.is_ivd.is_(True))
+            .order_by(Product.updated_at.desc(), Product.created_at.desc())
         )
-        for p in products:
-            rid = getattr(p, "registration_id", None)
-            if rid and rid not in prod_by_reg_id:
-                prod_by_reg_id[rid] = p
+        .all()
+    )
+    for p in products:
+        rid = getattr(p, "registration_id", None)
+        if rid and rid not in prod_by_reg_id:
+            prod_by_reg_id[rid] = p
+    return prod_by_reg_id
+
+
+def _enrich_chunk(
+    db: Session,
+    rows: list[dict[str, Any]],
+    *,
+    rep: UdiProductsEnrichReport,
+    dry_run: bool,
+    description_max_len: int,
+) -> None:
+    reg_by_no = load_registration_ids(db, (str(r.get("registration_no_norm") or "") for r in rows))
+    prod_by_reg_id = _display_products_by_registration(db, list(set(reg_by_no.values())))
 
     for r in rows:
         di = _as_text(r.get("di_norm")) or ""
@@ -301,8 +356,3 @@ def enrich_products_from_udi_device_index(
         except Exception as exc:
             rep.failed += 1
             rep.errors.append({"di": di, "error": str(exc)})
-
-    if not dry_run:
-        db.commit()
-    return rep
-
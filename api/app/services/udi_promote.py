@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from app.models import ChangeLog, Product, ProductUdiMap, ProductVariant, Registration, RawDocument, PendingRecord
 from app.services.normalize_keys import normalize_registration_no
 from app.services.source_contract import upsert_registration_with_contract
+from app.services.udi_coverage import INSERTED_FLAG, bump_udi_coverage_counts, mapped_di_delta
 
 
 def _utcnow() -> datetime:
@@ -387,11 +388,12 @@ def _upsert_mapping(
     raw_source_record_id: UUID | None,
     source: str,
     confidence: float = 0.95,
-) -> None:
-    db.execute(
+) -> int:
+    """Upsert the DI -> registration mapping; returns the distinct mapped-DI delta (0 or 1)."""
+    deleted = db.execute(
         text("DELETE FROM product_udi_map WHERE di = :di AND registration_no <> :registration_no"),
         {"di": di, "registration_no": registration_no},
-    )
+    ).rowcount
     map_stmt = insert(ProductUdiMap).values(
         registration_no=registration_no,
         di=di,
@@ -410,7 +412,8 @@ def _upsert_mapping(
             "updated_at": text("NOW()"),
         },
     )
-    db.execute(map_stmt)
+    inserted = db.execute(map_stmt.returning(INSERTED_FLAG)).scalar()
+    return mapped_di_delta(deleted=deleted, inserted=bool(inserted))
 
 
 @dataclass
@@ -463,6 +466,7 @@ def promote_udi_from_device_index(
     report = UdiPromoteReport(errors=[])
     commit_every = 5000
     pending_ops = 0
+    mapped_new = 0
 
     sql = "SELECT * FROM udi_device_index"
     cond: list[str] = []
@@ -542,6 +546,8 @@ def promote_udi_from_device_index(
             finally:
                 pending_ops += 1
                 if not dry_run and pending_ops >= commit_every:
+                    bump_udi_coverage_counts(db, mapped=mapped_new)
+                    mapped_new = 0
                     db.commit()
                     pending_ops = 0
             continue
@@ -612,7 +618,7 @@ def promote_udi_from_device_index(
                 product=product,
                 row=row,
             )
-            _upsert_mapping(
+            mapped_new += _upsert_mapping(
                 db,
                 registration_no=reg.registration_no,
                 di=di,
@@ -629,9 +635,12 @@ def promote_udi_from_device_index(
         finally:
             pending_ops += 1
             if not dry_run and pending_ops >= commit_every:
+                bump_udi_coverage_counts(db, mapped=mapped_new)
+                mapped_new = 0
                 db.commit()
                 pending_ops = 0
 
     if not dry_run:
+        bump_udi_coverage_counts(db, mapped=mapped_new)
         db.commit()
     return report
@@ -14,6 +14,8 @@ from app.ivd.classifier import DEFAULT_VERSION as IVD_CLASSIFIER_VERSION, classi
 from app.sources.nmpa_udi.mapper import map_to_variant
 from app.services.normalize_keys import normalize_registration_no
 from app.services.source_contract import write_udi_contract_record
+from app.services.udi_index import iter_device_index_chunks, load_registration_ids
+from app.services.udi_jobs_checkpoint import get_checkpoint, set_checkpoint
 
 
 @dataclass
@@ -267,6 +269,9 @@ class UdiVariantsFromIndexReport:
     upserted: int = 0
     marked_unbound: int = 0
     failed: int = 0
+    batches: int = 0
+    resumed_from: str | None = None
+    final_cursor: str | None = None
     errors: list[dict[str, Any]] | None = None
 
     @property
@@ -278,6 +283,9 @@ class UdiVariantsFromIndexReport:
             "upserted": self.upserted,
             "marked_unbound": self.marked_unbound,
             "failed": self.failed,
+            "batches": self.batches,
+            "resumed_from": self.resumed_from,
+            "final_cursor": self.final_cursor,
             "errors": self.errors or [],
         }
 
@@ -300,6 +308,10 @@ def upsert_udi_variants_from_device_index(
     source_run_id: int | None = None,
     limit: int | None = None,
     dry_run: bool,
+    batch_size: int = 5000,
+    resume: bool = False,
+    start_cursor: str | None = None,
+    job_name: str = "udi:variants",
 ) -> UdiVariantsFromIndexReport:
     """
     Promotion path for UDI device index -> product_variants (registration anchored).
@@ -314,6 +326,9 @@ def upsert_udi_variants_from_device_index(
       - manufacturer (ylqxzcrbarmc -> manufacturer_cn)
       - packaging_json (udi_device_index.packing_json, schema: packings[] array)
       - evidence_raw_document_id (raw_document_id)
+
+    The index is walked by di_norm in `batch_size` chunks; execute commits and checkpoints
+    (udi_jobs_checkpoint) per chunk, and `resume` continues an interrupted run.
     """
     rep = UdiVariantsFromIndexReport(errors=[])
 
@@ -331,29 +346,64 @@ def upsert_udi_variants_from_device_index(
     WHERE udi.di_norm IS NOT NULL AND btrim(udi.di_norm) <> ''
     """
     params: dict[str, Any] = {}
+    effective_job_name = job_name
     if source_run_id is not None:
         sql += " AND udi.source_run_id = :source_run_id"
         params["source_run_id"] = int(source_run_id)
-    sql += " ORDER BY udi.updated_at DESC NULLS LAST"
-    if isinstance(limit, int) and limit > 0:
-        sql += " LIMIT :lim"
-        params["lim"] = int(limit)
-
-    rows = db.execute(text(sql), params).mappings().all()
-
-    # Cache registrations by canonical registration_no.
-    reg_nos = sorted({str(r.get("registration_no_norm") or "").strip() for r in rows if str(r.get("registration_no_norm") or "").strip()})
-    reg_by_no: dict[str, UUID] = {}
-    if reg_nos:
-        for rid, rno in db.execute(
-            text("SELECT id, registration_no FROM registrations WHERE registration_no = ANY(:arr)"),
-            {"arr": reg_nos},
-        ).fetchall():
-            try:
-                reg_by_no[str(rno)] = UUID(str(rid))
-            except Exception:
-                continue
+        effective_job_name = f"{job_name}:srid:{int(source_run_id)}"
+
+    cursor = (str(start_cursor).strip() if start_cursor else None)
+    if cursor is None and resume and not dry_run:
+        cursor = get_checkpoint(db, effective_job_name)
+    rep.resumed_from = cursor
+
+    row_limit = int(limit) if isinstance(limit, int) and limit > 0 else None
+    walked = 0
+    for rows in iter_device_index_chunks(
+        db,
+        select_sql=sql,
+        params=params,
+        batch_size=batch_size,
+        limit=row_limit,
+        cursor=cursor,
+    ):
+        rep.batches += 1
+        walked += len(rows)
+        # Registrations are resolved per chunk so the ANY(:arr) parameter stays bounded.
+        reg_by_no = load_registration_ids(db, (str(r.get("registration_no_norm") or "") for r in rows))
+        _upsert_variant_chunk(db, rows, reg_by_no=reg_by_no, rep=rep, dry_run=dry_run)
+        cursor = str(rows[-1].get("di_norm") or "")
+        rep.final_cursor = cursor
+        if not dry_run:
+            set_checkpoint(
+                db,
+                job_name=effective_job_name,
+                cursor=cursor,
+                meta={"source_run_id": source_run_id, "batch_no": rep.batches, "scanned": rep.scanned, "upserted": rep.upserted},
+            )
+            db.commit()
+
+    if not dry_run and (row_limit is None or walked < row_limit):
+        # Index exhausted: clear the cursor so the next run walks the whole index again.
+        # A run stopped by `limit` keeps its last chunk's cursor for --resume.
+        set_checkpoint(
+            db,
+            job_name=effective_job_name,
+            cursor="",
+            meta={"source_run_id": source_run_id, "batch_no": rep.batches, "scanned": rep.scanned, "completed": True},
+        )
+        db.commit()
+    return rep
 
+
+def _upsert_variant_chunk(
+    db: Session,
+    rows: list[dict[str, Any]],
+    *,
+    reg_by_no: dict[str, UUID],
+    rep: UdiVariantsFromIndexReport,
+    dry_run: bool,
+) -> None:
     for r in rows:
         rep.scanned += 1
         di = str(r.get("di_norm") or "").strip()
@@ -414,7 +464,3 @@ def upsert_udi_variants_from_device_index(
         except Exception as exc:
             rep.failed += 1
             rep.errors.append({"di": di, "error": str(exc)})
-
-    if not dry_run:
-        db.commit()
-    return rep
@@ -3,7 +3,17 @@ from __future__ import annotations
 import csv
 import io
 import zipfile
-from typing import Any
+from typing import Any, BinaryIO, Iterator
+
+
+def iter_udi_csv_rows(fp: BinaryIO) -> Iterator[dict[str, Any]]:
+    """Stream CSV rows from a binary file object without decoding the whole member up front."""
+    text = io.TextIOWrapper(fp, encoding='utf-8', errors='ignore', newline='')
+    try:
+        for r in csv.DictReader(text):
+            yield dict(r)
+    finally:
+        text.detach()
 
 
 def parse_udi_zip_bytes(content: bytes) -> list[dict[str, Any]]:
@@ -13,7 +23,5 @@ def parse_udi_zip_bytes(content: bytes) -> list[dict[str, Any]]:
             if not name.lower().endswith('.csv'):
                 continue
             with z.open(name) as fp:
-                text = fp.read().decode('utf-8', errors='ignore')
-                reader = csv.DictReader(io.StringIO(text))
-                out.extend([dict(r) for r in reader])
+                out.extend(iter_udi_csv_rows(fp))
     return out
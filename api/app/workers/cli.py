@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from datetime import date
 from typing import Any
 
@@ -47,6 +48,20 @@ def build_parser() -> argparse.ArgumentParser:
     reclassify_mode.add_argument('--dry-run', action='store_true', help='Preview only, no writes')
     reclassify_mode.add_argument('--execute', action='store_true', help='Persist reclassification results')
 
+    def _add_reclassify_tuning(p: argparse.ArgumentParser) -> None:
+        p.add_argument('--workers', type=int, default=0, help='Classify batches in N worker processes (0 = in-process)')
+        p.add_argument('--resume', dest='resume', action='store_true', help='Execute: continue from checkpoint (default)')
+        p.add_argument('--no-resume', dest='resume', action='store_false', help='Execute: ignore checkpoint and start fresh')
+        p.add_argument(
+            '--changed-only',
+            action='store_true',
+            help='Skip rows whose name/class code fingerprint is unchanged at the current rule version',
+        )
+        p.set_defaults(resume=True)
+
+    reclassify_parser.add_argument('--batch-size', type=int, default=1000)
+    _add_reclassify_tuning(reclassify_parser)
+
     def _add_cleanup_parser(name: str) -> None:
         cleanup_parser = sub.add_parser(name, help='Archive then delete non-IVD products')
         cleanup_mode = cleanup_parser.add_mutually_exclusive_group()
@@ -72,6 +87,7 @@ def build_parser() -> argparse.ArgumentParser:
     ivd_classify_mode.add_argument('--dry-run', action='store_true', help='Preview only')
     ivd_classify_mode.add_argument('--execute', action='store_true', help='Execute write-back')
     ivd_classify_parser.add_argument('--batch-size', type=int, default=1000)
+    _add_reclassify_tuning(ivd_classify_parser)
 
     ivd_cleanup_parser = sub.add_parser('ivd:cleanup', help='Non-IVD cleanup alias')
     ivd_cleanup_mode = ivd_cleanup_parser.add_mutually_exclusive_group()
@@ -90,6 +106,9 @@ def build_parser() -> argparse.ArgumentParser:
     metrics_recompute_parser = sub.add_parser('metrics:recompute', help='Recompute metrics alias')
     metrics_recompute_parser.add_argument('--scope', default='ivd', choices=['ivd'])
     metrics_recompute_parser.add_argument('--since', default=None, help='YYYY-MM-DD')
+    sub.add_parser(
+        'metrics:udi-coverage-refresh', help='Recount udi_coverage_counters (seed / reconcile incremental UDI coverage)'
+    )
 
     local_supp_parser = sub.add_parser('local_registry_supplement', help='Supplement local products from local registry xlsx/zip files')
     local_supp_parser.add_argument('--folder', required=True, help='Folder containing xlsx/zip files')
@@ -106,6 +125,15 @@ def build_parser() -> argparse.ArgumentParser:
     params_extract_mode.add_argument('--dry-run', action='store_true', help='Preview only')
     params_extract_mode.add_argument('--execute', action='store_true', help='Write extracted params to DB')
     params_extract_parser.add_argument('--raw-document-id', default=None, help='Existing raw_documents.id UUID')
+    params_extract_parser.add_argument(
+        '--raw-document-ids', default=None, help='Batch mode: comma-separated raw_documents.id UUIDs'
+    )
+    params_extract_parser.add_argument(
+        '--raw-document-ids-file', default=None, help='Batch mode: file with one raw_documents.id UUID per line'
+    )
+    params_extract_parser.add_argument(
+        '--workers', type=int, default=0, help='Batch mode: process pool size (0/1 = sequential)'
+    )
     params_extract_parser.add_argument('--file', default=None, help='Local file path to upload as raw document')
     params_extract_parser.add_argument('--source-url', default=None, help='Optional original source URL')
     params_extract_parser.add_argument('--doc-type', default=None, help='Optional doc type hint: pdf/text/html')
@@ -149,6 +177,12 @@ def build_parser() -> argparse.ArgumentParser:
     proc_rb_mode.add_argument('--execute', action='store_true', help='Delete procurement_* by source_run_id')
     proc_rb.add_argument('--source-run-id', type=int, required=True, help='source_runs.id of the procurement ingest run')
 
+    proc_idx = sub.add_parser(
+        'procurement:match-index-refresh',
+        help='Refresh registration_match_index (lot matching search text); procurement:ingest does this incrementally',
+    )
+    proc_idx.add_argument('--full', action='store_true', help='Rebuild every row instead of changed registrations')
+
     nmpa_snap_parser = sub.add_parser('nmpa:snapshots', help='Inspect NMPA snapshots since a date (ops/debug)')
     nmpa_snap_parser.add_argument('--since', required=True, help='YYYY-MM-DD')
 
@@ -192,6 +226,13 @@ def build_parser() -> argparse.ArgumentParser:
     source_run_all_mode = source_run_all.add_mutually_exclusive_group()
     source_run_all_mode.add_argument('--dry-run', action='store_true', help='Preview parse/upsert counts only')
     source_run_all_mode.add_argument('--execute', action='store_true', help='Persist raw_source_records + upserts')
+    source_run_all.add_argument('--workers', type=int, default=4, help='Sources run concurrently, one process/session each (default 4)')
+    source_run_all.add_argument(
+        '--timeout-seconds',
+        type=float,
+        default=0,
+        help='Per-source timeout unless fetch_params.run_timeout_seconds is set (0 = none)',
+    )
 
     udi_audit = sub.add_parser('udi:audit', help='Audit DI binding distribution against registration anchors')
     udi_audit_mode = udi_audit.add_mutually_exclusive_group()
@@ -231,6 +272,17 @@ def build_parser() -> argparse.ArgumentParser:
     udi_index.add_argument('--max-devices-per-file', type=int, default=None, help='Optional max number of <device> nodes per file')
     udi_index.add_argument('--part-from', type=int, default=None, help='Only scan PART N..M files (inclusive), based on file name')
     udi_index.add_argument('--part-to', type=int, default=None, help='Only scan PART N..M files (inclusive), based on file name')
+    udi_index.add_argument('--bulk', action='store_true', help='Execute: buffer rows and merge via COPY into a stage table (set-based)')
+    udi_index.add_argument('--batch-size', type=int, default=5000, help='Bulk: rows per COPY+merge batch (default 5000)')
+    udi_index.add_argument('--commit-every', type=int, default=1, help='Bulk: commit after every N batches (default 1)')
+    udi_index.add_argument('--workers', type=int, default=0, help='Parse XML files in a process pool of N workers (single writer; default 0 = serial)')
+
+    def _add_udi_chunk_args(p: argparse.ArgumentParser) -> None:
+        p.add_argument('--batch-size', type=int, default=5000, help='Index rows per keyset chunk (default 5000)')
+        p.add_argument('--resume', dest='resume', action='store_true', help='Execute: continue from udi_jobs_checkpoint (default)')
+        p.add_argument('--no-resume', dest='resume', action='store_false', help='Execute: ignore checkpoint and start fresh')
+        p.add_argument('--start-cursor', default=None, help='Start after this di_norm (overrides checkpoint)')
+        p.set_defaults(resume=True)
 
     udi_variants = sub.add_parser('udi:variants', help='Promote udi_device_index into registration-anchored product_variants')
     udi_variants_mode = udi_variants.add_mutually_exclusive_group()
@@ -238,6 +290,7 @@ def build_parser() -> argparse.ArgumentParser:
     udi_variants_mode.add_argument('--execute', action='store_true', help='Write product_variants + mark udi_device_index unbound')
     udi_variants.add_argument('--source-run-id', type=int, default=None, help='Filter by source_runs.id')
     udi_variants.add_argument('--limit', type=int, default=None, help='Optional max number of rows to process')
+    _add_udi_chunk_args(udi_variants)
 
     udi_products_enrich = sub.add_parser('udi:products-enrich', help='Enrich products (fill-empty only) from udi_device_index')
     udi_products_enrich_mode = udi_products_enrich.add_mutually_exclusive_group()
@@ -246,6 +299,7 @@ def build_parser() -> argparse.ArgumentParser:
     udi_products_enrich.add_argument('--source-run-id', type=int, default=None, help='Filter by source_runs.id')
     udi_products_enrich.add_argument('--limit', type=int, default=None, help='Optional max number of rows to process')
     udi_products_enrich.add_argument('--description-max-len', type=int, default=2000, help='Max chars for cpms description snapshot')
+    _add_udi_chunk_args(udi_products_enrich)
 
     udi_params = sub.add_parser('udi:params', help='Scan UDI device index param candidates; optionally write allowlisted product_params')
     udi_params_mode = udi_params.add_mutually_exclusive_group()
@@ -271,6 +325,12 @@ def build_parser() -> argparse.ArgumentParser:
     prod_meth_mode.add_argument('--execute', action='store_true', help='Write to DB')
     prod_meth.add_argument('--limit', type=int, default=None, help='Optional limit of products to scan')
 
+    company_norm = sub.add_parser(
+        'company:norm-backfill', help='Recompute products.company_name_norm (company alias rebind lookup key)'
+    )
+    company_norm.add_argument('--batch-size', type=int, default=2000, help='Products per keyset batch (default 2000)')
+    company_norm.add_argument('--only-missing', action='store_true', help='Only rows whose key is still NULL')
+
     lri = sub.add_parser('lri-compute', help='Compute LRI V1 scores into lri_scores')
     lri_mode = lri.add_mutually_exclusive_group()
     lri_mode.add_argument('--dry-run', action='store_true', help='Preview only')
@@ -278,12 +338,24 @@ def build_parser() -> argparse.ArgumentParser:
     lri.add_argument('--date', default=None, help='YYYY-MM-DD (default: today UTC)')
     lri.add_argument('--model-version', default='lri_v1')
     lri.add_argument('--upsert', action='store_true', help='Delete existing scores for the same day+model before insert')
+    lri.add_argument('--batch-size', type=int, default=1000, help='Rows per multi-row INSERT (default: 1000)')
+
+    lri_latest = sub.add_parser(
+        'lri:latest-refresh', help='Rebuild lri_scores_latest (latest score per registration) from lri_scores'
+    )
+    lri_latest.add_argument('--model-version', default='lri_v1')
 
     signals = sub.add_parser('signals-compute', help='Compute Signal Engine V1 scores into signal_scores')
     signals.add_argument('--window', default='12m', help='Time window (MVP supports 12m)')
     signals.add_argument('--as-of', dest='as_of', default=None, help='YYYY-MM-DD (default: today UTC)')
     signals.add_argument('--batch-size', type=int, default=500, help='Batch size per entity scan')
     signals.add_argument('--dry-run', action='store_true', help='Preview only, rollback writes')
+    signals.add_argument(
+        '--incremental-since',
+        dest='incremental_since',
+        default=None,
+        help='YYYY-MM-DD of the last computed as_of: carry its scores forward and recompute only changed entities',
+    )
 
     ts_audit = sub.add_parser('time-semantics-audit', help='Audit registration start_date time semantics coverage')
     ts_audit.add_argument('--limit', type=int, default=200, help='Sample size (default 200)')
@@ -511,6 +583,19 @@ def _run_metrics_recompute(*, scope: str, since: str | None) -> int:
         db.close()
 
 
+def _run_udi_coverage_refresh() -> int:
+    db = SessionLocal()
+    try:
+        from app.services.udi_coverage import refresh_udi_coverage_counts
+
+        counts = refresh_udi_coverage_counts(db)
+        db.commit()
+        print(json.dumps({'ok': True, **counts}, ensure_ascii=True))
+        return 0
+    finally:
+        db.close()
+
+
 def _run_nmpa_snapshots(*, since: str) -> int:
     target = date.fromisoformat(since)
     db = SessionLocal()
@@ -655,12 +740,26 @@ def _run_source_udi(*, execute: bool, date_label: str | None) -> int:
     return 0 if result.status == 'success' else 1
 
 
-def _run_reclassify_ivd(*, dry_run: bool) -> int:
+def _run_reclassify_ivd(
+    *,
+    dry_run: bool,
+    batch_size: int = 1000,
+    workers: int = 0,
+    resume: bool = True,
+    changed_only: bool = False,
+) -> int:
     db = SessionLocal()
     try:
         from app.services.reclassify_ivd import run_reclassify_ivd
 
-        result = run_reclassify_ivd(db, dry_run=dry_run)
+        result = run_reclassify_ivd(
+            db,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            workers=workers,
+            resume=resume,
+            changed_only=changed_only,
+        )
         print(
             json.dumps(
                 {
@@ -672,6 +771,9 @@ def _run_reclassify_ivd(*, dry_run: bool) -> int:
                     'ivd_true': result.ivd_true,
                     'ivd_false': result.ivd_false,
                     'ivd_version': result.ivd_version,
+                    'skipped_unchanged': result.skipped_unchanged,
+                    'resumed_from': result.resumed_from,
+                    'final_cursor': result.final_cursor,
                 },
                 ensure_ascii=True,
             )
@@ -859,6 +961,44 @@ def _run_params_extract(
         db.close()
 
 
+def _run_params_extract_batch(
+    *,
+    dry_run: bool,
+    raw_document_ids: list[str],
+    workers: int,
+    di: str | None,
+    registry_no: str | None,
+    extract_version: str,
+) -> int:
+    from app.services.product_params_extract import extract_params_for_raw_documents
+
+    ids = [str(UUID(x)) for x in raw_document_ids]
+    results = extract_params_for_raw_documents(
+        ids,
+        workers=int(workers or 0),
+        di=(str(di).strip() or None) if di else None,
+        registry_no=(str(registry_no).strip() or None) if registry_no else None,
+        extract_version=str(extract_version),
+        dry_run=bool(dry_run),
+    )
+    failed = sum(1 for r in results if not r.get('ok'))
+    print(
+        json.dumps(
+            {
+                'ok': failed == 0,
+                'dry_run': bool(dry_run),
+                'documents': len(results),
+                'failed': failed,
+                'extracted': sum(int(r.get('extracted') or 0) for r in results),
+                'extract_version': str(extract_version),
+                'results': results,
+            },
+            ensure_ascii=True,
+        )
+    )
+    return 0 if failed == 0 else 1
+
+
 def _run_params_rollback(*, dry_run: bool, raw_document_id: str) -> int:
     db = SessionLocal()
     try:
@@ -966,6 +1106,19 @@ def _run_procurement_ingest(args: argparse.Namespace) -> int:
         db.close()
 
 
+def _run_procurement_match_index_refresh(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        from app.services.registration_match_index import refresh_registration_match_index
+
+        out = refresh_registration_match_index(db, full=bool(getattr(args, 'full', False)))
+        db.commit()
+        print(json.dumps({"ok": True, **out}, ensure_ascii=True))
+        return 0
+    finally:
+        db.close()
+
+
 def _run_procurement_rollback(args: argparse.Namespace) -> int:
     dry_run = bool(args.dry_run) or not bool(args.execute)
     db = SessionLocal()
@@ -1011,15 +1164,15 @@ def _run_source_runner_all(args: argparse.Namespace) -> int:
     dry_run = bool(args.dry_run) or not bool(args.execute)
     db = SessionLocal()
     try:
-        from app.services.ingest_runner import run_all_enabled_sources
-
-        rows = run_all_enabled_sources(db, execute=(not dry_run))
-        body = {
-            "count": len(rows),
-            "failed": sum(1 for x in rows if x.status == "failed"),
-            "skipped": sum(1 for x in rows if x.status == "skipped"),
-            "items": [x.to_dict() for x in rows],
-        }
+        from app.services.ingest_scheduler import run_all_enabled_sources_concurrently
+
+        report = run_all_enabled_sources_concurrently(
+            db,
+            execute=(not dry_run),
+            workers=int(getattr(args, "workers", 4) or 1),
+            default_timeout_seconds=(float(getattr(args, "timeout_seconds", 0) or 0) or None),
+        )
+        body = report.to_dict()
         print(json.dumps(body, ensure_ascii=True, default=str))
         return 0 if int(body["failed"]) == 0 else 1
     finally:
@@ -1217,6 +1370,7 @@ def _run_udi_index(args: argparse.Namespace) -> int:
             run = start_source_run(db, "UDI_INDEX", package_name=pkg, package_md5=None, download_url=str(staging))
             source_run_id = int(run.id)
 
+        t0 = time.perf_counter()
         try:
             rep = run_udi_device_index(
                 db,
@@ -1231,6 +1385,10 @@ def _run_udi_index(args: argparse.Namespace) -> int:
                 ),
                 part_from=(int(args.part_from) if getattr(args, "part_from", None) is not None else None),
                 part_to=(int(args.part_to) if getattr(args, "part_to", None) is not None else None),
+                bulk=bool(getattr(args, "bulk", False)),
+                batch_size=int(getattr(args, "batch_size", 5000) or 5000),
+                commit_every=int(getattr(args, "commit_every", 1) or 1),
+                workers=int(getattr(args, "workers", 0) or 0),
             )
         except Exception as e:
             db.rollback()
@@ -1246,6 +1404,7 @@ def _run_udi_index(args: argparse.Namespace) -> int:
                     source_notes={"error": str(e), "staging_dir": str(staging), "source_run_id": source_run_id},
                 )
             raise
+        elapsed_s = time.perf_counter() - t0
 
         out = {
             # Required counters/rates for runbook validation.
@@ -1269,6 +1428,10 @@ def _run_udi_index(args: argparse.Namespace) -> int:
             "storage_present": int(rep.storage_present),
             "upserted": int(rep.upserted),
             "source_run_id": source_run_id,
+            "write_mode": ("bulk" if bool(getattr(args, "bulk", False)) else "row"),
+            "workers": int(getattr(args, "workers", 0) or 0),
+            "elapsed_s": round(elapsed_s, 3),
+            "rows_per_sec": (round(float(rep.total_devices) / elapsed_s, 1) if elapsed_s > 0 else 0.0),
         }
 
         print(json.dumps(out, ensure_ascii=False, default=str))
@@ -1351,6 +1514,9 @@ def _run_udi_variants(args: argparse.Namespace) -> int:
             source_run_id=source_run_id,
             limit=(int(args.limit) if getattr(args, "limit", None) else None),
             dry_run=(not bool(getattr(args, "execute", False))),
+            batch_size=int(getattr(args, "batch_size", 5000) or 5000),
+            resume=bool(getattr(args, "resume", True)),
+            start_cursor=(getattr(args, "start_cursor", None) or None),
         )
         print(json.dumps(rep.to_dict, ensure_ascii=True, default=str))
         return 0 if int(rep.failed or 0) == 0 else 1
@@ -1369,12 +1535,30 @@ def _run_udi_products_enrich(args: argparse.Namespace) -> int:
             limit=(int(args.limit) if getattr(args, "limit", None) else None),
             dry_run=(not bool(getattr(args, "execute", False))),
             description_max_len=int(getattr(args, "description_max_len", 2000) or 2000),
+            batch_size=int(getattr(args, "batch_size", 5000) or 5000),
+            resume=bool(getattr(args, "resume", True)),
+            start_cursor=(getattr(args, "start_cursor", None) or None),
         )
         print(json.dumps(rep.to_dict, ensure_ascii=True, default=str))
         return 0 if int(rep.failed or 0) == 0 else 1
     finally:
         db.close()
 
+def _run_company_norm_backfill(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        from app.services.company_resolution import backfill_company_name_norm
+
+        out = backfill_company_name_norm(
+            db,
+            batch_size=int(getattr(args, "batch_size", 2000) or 2000),
+            only_missing=bool(getattr(args, "only_missing", False)),
+        )
+        print(json.dumps(out, ensure_ascii=True, default=str))
+        return 0
+    finally:
+        db.close()
+
 def _run_udi_params(args: argparse.Namespace) -> int:
     db = SessionLocal()
     try:
@@ -1495,10 +1679,16 @@ def main() -> None:
         raise SystemExit(_run_daily_digest(args.digest_date, args.force))
     if args.cmd == 'grant':
         raise SystemExit(_run_grant(args.email, args.months, args.reason, args.note, args.actor_email))
-    if args.cmd == 'reclassify_ivd':
-        raise SystemExit(_run_reclassify_ivd(dry_run=(not bool(args.execute))))
-    if args.cmd == 'ivd:classify':
-        raise SystemExit(_run_reclassify_ivd(dry_run=(not bool(args.execute))))
+    if args.cmd in {'reclassify_ivd', 'ivd:classify'}:
+        raise SystemExit(
+            _run_reclassify_ivd(
+                dry_run=(not bool(args.execute)),
+                batch_size=int(getattr(args, 'batch_size', 1000) or 1000),
+                workers=int(getattr(args, 'workers', 0) or 0),
+                resume=bool(getattr(args, 'resume', True)),
+                changed_only=bool(getattr(args, 'changed_only', False)),
+            )
+        )
     if args.cmd in {'cleanup_non_ivd', 'cleanup-non-ivd'}:
         if bool(args.execute) and not (getattr(args, 'archive_batch_id', None) or '').strip():
             raise SystemExit('--archive-batch-id is required when using --execute (for rollback traceability)')
@@ -1531,6 +1721,8 @@ def main() -> None:
         )
     if args.cmd == 'metrics:recompute':
         raise SystemExit(_run_metrics_recompute(scope=str(args.scope), since=args.since))
+    if args.cmd == 'metrics:udi-coverage-refresh':
+        raise SystemExit(_run_udi_coverage_refresh())
     if args.cmd == 'source:udi':
         raise SystemExit(_run_source_udi(execute=bool(args.execute), date_label=args.date))
     if args.cmd == 'local_registry_supplement':
@@ -1543,6 +1735,22 @@ def main() -> None:
             )
         )
     if args.cmd == 'params:extract':
+        batch_ids = [x.strip() for x in str(getattr(args, 'raw_document_ids', None) or '').split(',') if x.strip()]
+        if getattr(args, 'raw_document_ids_file', None):
+            batch_ids += [
+                x.strip() for x in Path(str(args.raw_document_ids_file)).read_text(encoding='utf-8').splitlines() if x.strip()
+            ]
+        if batch_ids:
+            raise SystemExit(
+                _run_params_extract_batch(
+                    dry_run=(not bool(args.execute)),
+                    raw_document_ids=batch_ids,
+                    workers=int(getattr(args, 'workers', 0) or 0),
+                    di=getattr(args, 'di', None),
+                    registry_no=getattr(args, 'registry_no', None),
+                    extract_version=str(getattr(args, 'extract_version', 'param_v1_20260213')),
+                )
+            )
         raise SystemExit(
             _run_params_extract(
                 dry_run=(not bool(args.execute)),
@@ -1566,6 +1774,8 @@ def main() -> None:
         raise SystemExit(_run_procurement_ingest(args))
     if args.cmd == 'procurement:rollback':
         raise SystemExit(_run_procurement_rollback(args))
+    if args.cmd == 'procurement:match-index-refresh':
+        raise SystemExit(_run_procurement_match_index_refresh(args))
     if args.cmd == 'nmpa:snapshots':
         raise SystemExit(_run_nmpa_snapshots(since=str(args.since)))
     if args.cmd == 'nmpa:diffs':
@@ -1623,6 +1833,8 @@ def main() -> None:
             raise SystemExit(0 if res.ok else 1)
         finally:
             db.close()
+    if args.cmd == 'company:norm-backfill':
+        raise SystemExit(_run_company_norm_backfill(args))
     if args.cmd == 'lri-compute':
         from datetime import date as dt_date
 
@@ -1637,11 +1849,24 @@ def main() -> None:
                 dry_run=(not bool(args.execute)),
                 model_version=str(getattr(args, 'model_version', 'lri_v1')),
                 upsert_mode=bool(getattr(args, 'upsert', False)),
+                batch_size=int(getattr(args, 'batch_size', 1000) or 1000),
             )
             print(json.dumps(res.__dict__, ensure_ascii=True, default=str))
             raise SystemExit(0 if res.ok else 1)
         finally:
             db.close()
+    if args.cmd == 'lri:latest-refresh':
+        db = SessionLocal()
+        try:
+            from app.services.lri_latest import refresh_lri_latest
+
+            mv = str(getattr(args, 'model_version', 'lri_v1'))
+            rows = refresh_lri_latest(db, model_version=mv)
+            db.commit()
+            print(json.dumps({'ok': True, 'model_version': mv, 'rows': rows}, ensure_ascii=True))
+            raise SystemExit(0)
+        finally:
+            db.close()
     if args.cmd == 'signals-compute':
         from datetime import date as dt_date
 
@@ -1656,6 +1881,11 @@ def main() -> None:
                 window=str(getattr(args, 'window', '12m')),
                 dry_run=bool(getattr(args, 'dry_run', False)),
                 batch_size=int(getattr(args, 'batch_size', 500)),
+                incremental_since=(
+                    dt_date.fromisoformat(str(args.incremental_since))
+                    if getattr(args, 'incremental_since', None)
+                    else None
+                ),
             )
             print(json.dumps(res.__dict__, ensure_ascii=True, default=str))
             raise SystemExit(0 if res.ok else 1)
@@ -23,6 +23,9 @@ logger = logging.getLogger(__name__)
 
 
 SIGNALS_DAILY_KEY = 'signals_compute_daily_last_run'
+# Daily runs are incremental on top of the last successful as_of; a full recompute runs at
+# least this often (and whenever there is no previous run) to pick up anything incremental missed.
+SIGNALS_FULL_REBUILD_DAYS = 7
 
 
 def _today_utc() -> date:
@@ -33,11 +36,11 @@ def _to_iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
 
 
-def _signals_last_success_as_of(db) -> date | None:
+def _signals_last_success_as_of(db, field: str = 'as_of_date') -> date | None:
     cfg = get_admin_config(db, SIGNALS_DAILY_KEY)
     if not cfg or not isinstance(cfg.config_value, dict):
         return None
-    raw = cfg.config_value.get('as_of_date')
+    raw = cfg.config_value.get(field)
     if not raw:
         return None
     try:
@@ -55,13 +58,29 @@ def _run_signals_compute_daily_job() -> None:
             logger.info('Job signals_compute_daily skipped: already_successful_as_of=%s', today.isoformat())
             return
 
+        last_full = _signals_last_success_as_of(db, 'last_full_as_of')
+        incremental_since = last_success
+        if (
+            last_success is None
+            or last_success > today
+            or last_full is None
+            or (today - last_full).days >= SIGNALS_FULL_REBUILD_DAYS
+        ):
+            incremental_since = None
+
         started = datetime.now(timezone.utc)
-        logger.info('Job signals_compute_daily started: as_of_date=%s window=%s', today.isoformat(), DEFAULT_WINDOW)
+        logger.info(
+            'Job signals_compute_daily started: as_of_date=%s window=%s incremental_since=%s',
+            today.isoformat(),
+            DEFAULT_WINDOW,
+            (incremental_since.isoformat() if incremental_since else None),
+        )
         result = compute_signals_v1(
             db,
             as_of=today,
             window=DEFAULT_WINDOW,
             dry_run=False,
+            incremental_since=incremental_since,
         )
         elapsed_s = (datetime.now(timezone.utc) - started).total_seconds()
         report: dict[str, Any] = {
@@ -76,12 +95,18 @@ def _run_signals_compute_daily_job() -> None:
             'track_count': int(result.track_count),
             'company_count': int(result.company_count),
             'wrote_total': int(result.wrote_total),
+            'mode': result.mode,
+            'carried_forward': int(result.carried_forward),
+            'last_full_as_of': (
+                today.isoformat() if result.mode == 'full' else (last_full.isoformat() if last_full else None)
+            ),
             'error': result.error,
         }
         upsert_admin_config(db, SIGNALS_DAILY_KEY, report)
         logger.info(
-            'Job signals_compute_daily finished: as_of_date=%s wrote_total=%s registration=%s track=%s company=%s duration_s=%.3f',
+            'Job signals_compute_daily finished: as_of_date=%s mode=%s wrote_total=%s registration=%s track=%s company=%s duration_s=%.3f',
             today.isoformat(),
+            result.mode,
             result.wrote_total,
             result.registration_count,
             result.track_count,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import inspect
 import logging
 import shutil
 import time
@@ -27,12 +28,11 @@ from app.repositories.source_runs import (
 from app.services.crypto import decrypt_json
 from app.services.crawler import (
     DailyPackage,
-    download_file,
-    extract_to_staging,
+    download_file_with_hashes,
+    extract_package_to_staging,
     fetch_latest_package_meta,
-    verify_checksum,
 )
-from app.services.ingest import ingest_staging_records, load_staging_records
+from app.services.ingest import ingest_staging_records, iter_staging_records
 from app.services.ivd_classifier import VERSION as IVD_CLASSIFIER_VERSION
 from app.services.ivd_dictionary import IVD_SCOPE_ALLOWLIST
 from app.services.metrics import generate_daily_metrics
@@ -40,7 +40,6 @@ from app.services.lri_v1 import compute_lri_v1_if_due
 from app.services.subscriptions import dispatch_daily_subscription_digest
 from app.pipeline.ingest import save_raw_document_from_path
 from app.models import RawDocument
-from app.sources.nmpa_udi.parser import parse_udi_zip_bytes
 from app.services.udi_variants import upsert_product_variants
 
 logger = logging.getLogger(__name__)
@@ -190,6 +189,14 @@ def _package_from_url(url: str, checksum: str | None = None) -> DailyPackage:
     return DailyPackage(filename=filename, md5=checksum, download_url=url)
 
 
+def _accepts_keyword(func, name: str) -> bool:
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return True
+    return any(p.name == name or p.kind is inspect.Parameter.VAR_KEYWORD for p in params)
+
+
 def _run_with_retries(func, *, attempts: int, base_backoff: int, multiplier: float, operation: str):
     last_exc: Exception | None = None
     for attempt in range(1, attempts + 1):
@@ -312,14 +319,20 @@ def sync_nmpa_ivd(
         db.add(run)
         db.commit()
 
-        archive_path = _run_with_retries(
-            lambda: download_file(package.download_url, download_dir / package.filename),
+        # The checksum and the raw-document sha256 are computed while the package is downloaded.
+        expected_checksum = checksum or package.md5
+        archive_path, digests = _run_with_retries(
+            lambda: download_file_with_hashes(
+                package.download_url,
+                download_dir / package.filename,
+                ('sha256', checksum_algorithm) if expected_checksum else ('sha256',),
+            ),
             attempts=retry_attempts,
             base_backoff=retry_backoff,
             multiplier=retry_multiplier,
             operation='download_file',
         )
-        if not verify_checksum(archive_path, checksum or package.md5, algorithm=checksum_algorithm):
+        if expected_checksum and digests[checksum_algorithm.lower()].lower() != expected_checksum.lower():
             raise ValueError(f'{checksum_algorithm.upper()} mismatch for {archive_path.name}')
 
         raw_doc_id = save_raw_document_from_path(
@@ -329,6 +342,8 @@ def sync_nmpa_ivd(
             file_path=archive_path,
             doc_type='archive',
             run_id=f'source_run:{int(run.id)}',
+            sha256=digests['sha256'],
+            prefer_hardlink=True,
         )
         # Parse/extract should read from raw storage to ensure the evidence chain is authoritative.
         raw_archive_path = archive_path
@@ -339,13 +354,18 @@ def sync_nmpa_ivd(
         except Exception:
             raw_archive_path = archive_path
 
-        # Best-effort: parse DI-level variants for packaging/manufacturer enrichment.
+        # Single pass over the archive: extract XML/CSV members to staging, parsing CSV variant rows as they are written.
+        # CSV parse failures are collected per member so they never block XML ingest.
+        package_extract = extract_package_to_staging(raw_archive_path, extract_dir)
+
+        # Best-effort: upsert DI-level variants for packaging/manufacturer enrichment.
         variant_report = None
         try:
-            variant_rows = parse_udi_zip_bytes(raw_archive_path.read_bytes())
+            if package_extract is None:
+                raise ValueError(f'not a zip archive: {raw_archive_path.name}')
             variant_result = upsert_product_variants(
                 db,
-                rows=variant_rows,
+                rows=package_extract.variant_rows,
                 raw_document_id=raw_doc_id,
                 source_run_id=int(run.id),
                 dry_run=False,
@@ -364,16 +384,29 @@ def sync_nmpa_ivd(
                 'contract_pending_written': variant_result.contract_pending_written,
                 'contract_failed': variant_result.contract_failed,
             }
+            if package_extract.csv_errors:
+                variant_report['csv_errors'] = package_extract.csv_errors
         except Exception as exc:
             variant_report = {'error': str(exc)}
-
-        extract_to_staging(raw_archive_path, extract_dir)
-        records = load_staging_records(extract_dir)
-        try:
-            stats = ingest_staging_records(db, records, run.id, source='NMPA_UDI', raw_document_id=raw_doc_id)
-        except TypeError:
+        # Release CSV variant rows before streaming XML records into ingest.
+        package_extract = None
+
+        # Stream records file by file and commit per chunk so memory stays flat for full packages.
+        ingest_chunk_size = max(1, int(getattr(settings, 'sync_ingest_chunk_size', 5000) or 5000))
+        # Chunks are committed as they stream, so the call shape is decided up front: retrying after
+        # a mid-stream error would re-ingest chunks that were already committed.
+        if _accepts_keyword(ingest_staging_records, 'raw_document_id'):
+            stats = ingest_staging_records(
+                db,
+                iter_staging_records(extract_dir),
+                run.id,
+                source='NMPA_UDI',
+                raw_document_id=raw_doc_id,
+                chunk_size=ingest_chunk_size,
+            )
+        else:
             # Backward-compat for older stubs/mocks that don't accept raw_document_id.
-            stats = ingest_staging_records(db, records, run.id)
+            stats = ingest_staging_records(db, iter_staging_records(extract_dir), run.id)
 
         # Update evidence chain parse status for this package.
         try:
@@ -48,3 +48,38 @@ def test_apply_field_policy_marks_unresolved_tie_as_conflict() -> None:
     assert decision.action == "conflict"
     assert decision.value_to_store == "ACTIVE"
 
+
+
+def test_source_policy_is_cached_until_invalidated() -> None:
+    from types import SimpleNamespace
+
+    from app.services import source_contract
+
+    class _PolicyDB:
+        def __init__(self) -> None:
+            self.gets = 0
+            self.priority = 5
+
+        def get(self, _model, _key):
+            self.gets += 1
+            return SimpleNamespace(default_evidence_grade="A")
+
+        def scalar(self, _stmt):
+            return SimpleNamespace(upsert_policy={"priority": self.priority})
+
+    source_contract.invalidate_source_policy_cache()
+    db = _PolicyDB()
+    before = source_contract.source_policy_cache_stats()
+
+    assert source_contract._load_source_policy(db, "nmpa_reg") == ("A", 5)  # type: ignore[arg-type]
+    db.priority = 50
+    assert source_contract._load_source_policy(db, "NMPA_REG") == ("A", 5)  # type: ignore[arg-type]
+    assert db.gets == 1
+
+    source_contract.invalidate_source_policy_cache("NMPA_REG")
+    assert source_contract._load_source_policy(db, "NMPA_REG") == ("A", 50)  # type: ignore[arg-type]
+    assert db.gets == 2
+
+    stats = source_contract.source_policy_cache_stats()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
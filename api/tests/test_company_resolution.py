@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models import Company, Product
+from app.models.entities import _sync_product_company_name_norm
+from app.services import company_resolution
+from app.services.company_resolution import normalize_company_name
+
+
+class _Rows:
+    def __init__(self, rows=None, scalar=None) -> None:
+        self._rows = rows or []
+        self._scalar = scalar
+
+    def all(self):
+        return self._rows
+
+    def scalar(self):
+        return self._scalar
+
+
+class _Row:
+    def __init__(self, id, company_id) -> None:
+        self.id = id
+        self.company_id = company_id
+
+
+class _FakeDB:
+    def __init__(self, matches: list[_Row]) -> None:
+        self.matches = matches
+        self.statements: list[tuple[str, object]] = []
+        self.commits = 0
+
+    def scalar(self, _stmt):
+        return '上海某某生物科技有限公司'
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append((sql, params))
+        if sql.lstrip().startswith('SELECT'):
+            return _Rows(self.matches)
+        return _Rows()
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def close(self) -> None:
+        return None
+
+
+def test_alias_rebind_is_indexed_lookup_plus_bulk_writes(monkeypatch) -> None:
+    target = uuid.uuid4()
+    matches = [_Row(uuid.uuid4(), None), _Row(uuid.uuid4(), uuid.uuid4()), _Row(uuid.uuid4(), None)]
+    db = _FakeDB(matches)
+    monkeypatch.setattr(company_resolution, 'SessionLocal', lambda: db)
+
+    out = company_resolution.backfill_products_for_alias(alias_name='上海某某', company_id=target, batch_size=2)
+
+    assert out == {'ok': True, 'alias_name': '上海某某', 'company_id': str(target), 'scanned': 3, 'updated': 3}
+    select_sql = db.statements[0][0]
+    assert 'products.company_name_norm = ' in select_sql
+    assert 'products.company_id IS DISTINCT FROM' in select_sql
+    kinds = [sql.split()[0] for sql, _ in db.statements[1:]]
+    assert kinds == ['UPDATE', 'INSERT', 'UPDATE', 'INSERT']
+    assert [len(params) for sql, params in db.statements[1:] if sql.startswith('INSERT')] == [2, 1]
+    assert db.commits == 2
+
+
+class _Conn:
+    def __init__(self, name: str | None) -> None:
+        self.name = name
+        self.calls = 0
+
+    def execute(self, _stmt):
+        self.calls += 1
+        return _Rows(scalar=self.name)
+
+
+def test_product_write_maintains_company_name_norm() -> None:
+    p = Product(udi_di='DI-1', name='x', raw_json={'manufacturer': '深圳某某医疗器械有限公司'}, raw={})
+    conn = _Conn(None)
+    _sync_product_company_name_norm(None, conn, p)
+    assert p.company_name_norm == normalize_company_name('深圳某某医疗器械有限公司') == '深圳某某'
+    assert conn.calls == 0
+
+    p2 = Product(udi_di='DI-2', name='y', company_id=uuid.uuid4(), raw_json={'manufacturer': 'ignored'}, raw={})
+    conn2 = _Conn('北京某某科技有限公司')
+    _sync_product_company_name_norm(None, conn2, p2)
+    assert p2.company_name_norm == '北京某某'
+    assert conn2.calls == 1
+
+
+def test_product_write_reads_company_name_from_session_identity_map() -> None:
+    company = Company(id=uuid.uuid4(), name='上海某某生物科技有限公司', raw={}, raw_json={})
+    make_transient_to_detached(company)
+    session = Session()
+    session.add(company)
+    p = Product(udi_di='DI-3', name='z', company_id=company.id, raw_json={}, raw={})
+    session.add(p)
+
+    conn = _Conn('should-not-be-queried')
+    _sync_product_company_name_norm(None, conn, p)
+
+    assert p.company_name_norm == '上海某某'
+    assert conn.calls == 0
+
+
+def test_norm_backfill_can_be_scoped_to_restored_products() -> None:
+    pid = uuid.uuid4()
+
+    class _BackfillDB(_FakeDB):
+        def __init__(self) -> None:
+            super().__init__([])
+            self.mappings: list[dict] = []
+            self.selects = 0
+
+        def execute(self, stmt, params=None):
+            sql = str(stmt.compile(dialect=postgresql.dialect()))
+            self.statements.append((sql, params))
+            self.selects += 1
+            return _Rows([(pid, None, None, {'manufacturer': '深圳某某医疗器械有限公司'}, {})] if self.selects == 1 else [])
+
+        def bulk_update_mappings(self, _mapper, mappings) -> None:
+            self.mappings.extend(mappings)
+
+    db = _BackfillDB()
+    out = company_resolution.backfill_company_name_norm(db, product_ids=[pid])  # type: ignore[arg-type]
+
+    assert out == {'scanned': 1, 'updated': 1, 'only_missing': False}
+    assert 'products.id IN' in db.statements[0][0]
+    assert db.mappings == [{'id': pid, 'company_name_norm': '深圳某某'}]
+
+    empty = _BackfillDB()
+    assert company_resolution.backfill_company_name_norm(empty, product_ids=[])['scanned'] == 0  # type: ignore[arg-type]
+    assert empty.statements == []
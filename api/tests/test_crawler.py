@@ -1,6 +1,19 @@
 from pathlib import Path
 
-from app.services.crawler import parse_daily_packages, pick_latest_package, verify_checksum, verify_md5
+import hashlib
+import zipfile
+from types import SimpleNamespace
+
+from app.services import crawler
+from app.services.crawler import (
+    download_file_with_hashes,
+    extract_package_to_staging,
+    parse_daily_packages,
+    pick_latest_package,
+    verify_checksum,
+    verify_md5,
+)
+from app.sources.nmpa_udi.parser import parse_udi_zip_bytes
 
 
 def test_parse_daily_packages_extracts_md5_and_url() -> None:
@@ -40,3 +53,70 @@ def test_verify_checksum_sha256(tmp_path: Path) -> None:
         'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855',
         algorithm='sha256',
     )
+
+
+def test_download_file_with_hashes_digests_streamed_bytes(tmp_path: Path, monkeypatch) -> None:
+    class _Resp:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+        def raise_for_status(self) -> None:
+            return None
+
+        def iter_content(self, chunk_size: int):
+            yield from (b'abc' * 1000, b'', b'def')
+
+    monkeypatch.setattr(crawler, 'requests', SimpleNamespace(get=lambda *_a, **_kw: _Resp()))
+    dest = tmp_path / 'dl' / 'pkg.bin'
+
+    path, digests = download_file_with_hashes('https://example.com/pkg.bin', dest, ('sha256', 'MD5', 'sha256'))
+
+    payload = b'abc' * 1000 + b'def'
+    assert path == dest and dest.read_bytes() == payload
+    assert digests == {'sha256': hashlib.sha256(payload).hexdigest(), 'md5': hashlib.md5(payload).hexdigest()}
+
+
+def test_extract_package_to_staging_collects_csv_rows_and_extracts_members(tmp_path: Path) -> None:
+    archive = tmp_path / 'pkg.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('variants.csv', 'udi_di,registry_no\nD1,国械注准1\nD2,国械注准2\n')
+        zf.writestr('xml/PART1_Of_1.xml', '<udid><devices><device/></devices></udid>')
+    staging = tmp_path / 'extracted'
+
+    result = extract_package_to_staging(archive, staging)
+    rows = result.variant_rows
+
+    assert result.csv_errors == []
+    assert rows == parse_udi_zip_bytes(archive.read_bytes())
+    assert [r['udi_di'] for r in rows] == ['D1', 'D2']
+    assert (staging / 'variants.csv').exists()
+    assert (staging / 'xml' / 'PART1_Of_1.xml').exists()
+
+
+def test_extract_package_to_staging_non_zip_returns_none(tmp_path: Path) -> None:
+    src = tmp_path / 'records.json'
+    src.write_text('[]', encoding='utf-8')
+    staging = tmp_path / 'extracted'
+    assert extract_package_to_staging(src, staging) is None
+    assert (staging / 'records.json').exists()
+
+
+def test_extract_package_to_staging_keeps_going_on_bad_csv_member(tmp_path: Path) -> None:
+    archive = tmp_path / 'pkg.zip'
+    oversized = 'udi_di,note\nD9,"' + 'x' * 200_000 + '"\n'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('a_bad.csv', oversized)
+        zf.writestr('b_ok.csv', 'udi_di,registry_no\nD1,国械注准1\n')
+        zf.writestr('xml/PART1_Of_1.xml', '<udid><devices><device/></devices></udid>')
+    staging = tmp_path / 'extracted'
+
+    result = extract_package_to_staging(archive, staging)
+
+    assert [r['udi_di'] for r in result.variant_rows] == ['D1']
+    assert [e['file'] for e in result.csv_errors] == ['a_bad.csv']
+    assert 'field larger than field limit' in result.csv_errors[0]['error']
+    assert (staging / 'a_bad.csv').read_text(encoding='utf-8') == oversized
+    assert (staging / 'xml' / 'PART1_Of_1.xml').exists()
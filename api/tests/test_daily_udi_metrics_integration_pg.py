@@ -8,6 +8,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session
 
 from app.services.metrics import generate_daily_metrics
+from app.services.udi_coverage import refresh_udi_coverage_counts
 from it_pg_utils import apply_sql_migrations, require_it_db_url
 
 
@@ -103,6 +104,8 @@ def test_generate_daily_metrics_updates_daily_udi_metrics() -> None:
         db.commit()
 
     with Session(engine) as db:
+        # Fixtures bypass the UDI writers that maintain the coverage counters; recount once.
+        refresh_udi_coverage_counts(db)
         generate_daily_metrics(db, target_date)
         row = db.execute(
             text(
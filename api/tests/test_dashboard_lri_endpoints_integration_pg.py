@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 import app.main as main_mod
 from app.db.session import get_db
 from app.main import app
+from app.services.lri_latest import refresh_lri_latest
 from it_pg_utils import apply_sql_migrations, require_it_db_url
 
 
@@ -96,6 +97,8 @@ def test_dashboard_lri_endpoints_limit_and_free_pro_redaction(monkeypatch) -> No
                     'ts': now,
                 },
             )
+        # Scores inserted by hand bypass compute_lri_v1; rebuild the latest-score table once.
+        refresh_lri_latest(db, model_version='lri_v1')
         db.commit()
 
     def _override_get_db():
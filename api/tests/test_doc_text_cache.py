@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from app.pipeline import doc_reader
+
+
+def test_text_cache_roundtrip_and_skips_parsing_on_hit(tmp_path, monkeypatch) -> None:
+    src = tmp_path / 'label.pdf'
+    src.write_bytes(b'%PDF-1.4 fake')
+    parsed: list[str] = []
+
+    def _fake_pdf_pages(stream):
+        parsed.append(stream.name)
+        yield doc_reader.PageText(page=1, text='检测范围: 0.1-100 ng/mL')
+        yield doc_reader.PageText(page=3, text='储存条件 2-8℃')
+
+    monkeypatch.setattr(doc_reader, '_iter_pdf_pages', _fake_pdf_pages)
+    cache_dir = tmp_path / 'cache'
+    sha = 'ab' + '0' * 62
+
+    hit, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type='pdf', cache_dir=cache_dir)
+    first = [(p.page, p.text) for p in pages]
+    assert hit is False and len(parsed) == 1
+
+    hit, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type='pdf', cache_dir=cache_dir)
+    assert hit is True
+    assert [(p.page, p.text) for p in pages] == first
+    assert len(parsed) == 1
+    assert doc_reader.text_cache_path(sha, doc_type='pdf', filename=None, cache_dir=cache_dir).is_file()
+
+
+def test_partially_consumed_stream_is_not_cached(tmp_path) -> None:
+    src = tmp_path / 'notice.txt'
+    src.write_text('hello', encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+    sha = 'cd' + '1' * 62
+
+    hit, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    assert hit is False
+    assert next(pages).text == 'hello'
+    pages.close()
+    assert not doc_reader.text_cache_path(sha, doc_type=None, filename='notice.txt', cache_dir=cache_dir).exists()
+    assert list(cache_dir.rglob('*.tmp')) == []
+
+    _, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    assert [p.text for p in pages] == ['hello']
+    hit, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    assert hit is True and [p.text for p in pages] == ['hello']
+
+
+def test_concurrent_writers_for_the_same_sha_use_separate_temp_files(tmp_path) -> None:
+    src = tmp_path / 'notice.txt'
+    src.write_text('hello', encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+    sha = 'ef' + '2' * 62
+
+    _, first = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    _, second = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    assert next(first).text == 'hello' and next(second).text == 'hello'
+    assert len(list(cache_dir.rglob('*.tmp'))) == 2
+
+    assert list(first) == [] and list(second) == []
+    assert list(cache_dir.rglob('*.tmp')) == []
+    hit, pages = doc_reader.open_text_pages(str(src), sha256=sha, doc_type=None, cache_dir=cache_dir)
+    assert hit is True and [p.text for p in pages] == ['hello']
+
+
+def test_write_through_falls_back_to_streaming_when_cache_dir_is_unusable(tmp_path, monkeypatch) -> None:
+    src = tmp_path / 'notice.txt'
+    src.write_text('hello', encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+
+    def _no_tmp(*_args, **_kwargs):
+        raise PermissionError('read-only cache dir')
+
+    monkeypatch.setattr(doc_reader.tempfile, 'mkstemp', _no_tmp)
+    hit, pages = doc_reader.open_text_pages(str(src), sha256='aa' + '3' * 62, doc_type=None, cache_dir=cache_dir)
+    assert hit is False
+    assert [p.text for p in pages] == ['hello']
+
+
+def test_spool_surfaces_reader_errors_before_returning(tmp_path) -> None:
+    def _pages():
+        yield doc_reader.PageText(page=1, text='第一页')
+        raise OSError('truncated pdf')
+
+    import pytest
+
+    with pytest.raises(OSError):
+        doc_reader.spool_text_pages(_pages())
+
+    spooled = doc_reader.spool_text_pages(iter([doc_reader.PageText(page=2, text='b'), doc_reader.PageText(page=None, text='c')]))
+    assert [(p.page, p.text) for p in spooled] == [(2, 'b'), (None, 'c')]
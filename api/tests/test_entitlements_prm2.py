@@ -67,7 +67,8 @@ def test_export_denied_for_free_allowed_for_pro(monkeypatch) -> None:
 
     monkeypatch.setattr('app.main.get_user_by_id', _get_user)
     monkeypatch.setattr('app.main.get_settings', lambda: _cfg())
-    monkeypatch.setattr('app.main.export_search_to_csv', lambda _db, **kwargs: 'a,b\n1,2\n')
+    monkeypatch.setattr('app.main.enforce_export_quota', lambda _db, _plan: None)
+    monkeypatch.setattr('app.main.stream_search_export', lambda **kwargs: iter([b'a,b\n', b'1,2\n']))
 
     client = TestClient(main.app)
 
@@ -37,3 +37,71 @@ def test_enforce_export_quota_exceeded(monkeypatch) -> None:
     with pytest.raises(HTTPException) as ex:
         exports.enforce_export_quota(db, 'basic')
     assert ex.value.status_code == 429
+
+
+def test_iter_csv_chunks_flushes_every_chunk_rows() -> None:
+    rows = ([i, f'name-{i}'] for i in range(5))
+    chunks = list(exports.iter_csv_chunks(['id', 'name'], rows, chunk_rows=2))
+    assert len(chunks) == 3
+    assert ''.join(chunks).splitlines() == ['id,name'] + [f'{i},name-{i}' for i in range(5)]
+
+
+def test_encode_chunks_gzip_round_trip() -> None:
+    import gzip
+
+    body = b''.join(exports.encode_chunks(['a,b\r\n', '1,2\r\n'], gzip=True))
+    assert gzip.decompress(body) == b'a,b\r\n1,2\r\n'
+
+
+def test_stream_export_closes_its_own_session() -> None:
+    closed = {'n': 0}
+
+    class _Session:
+        def close(self) -> None:
+            closed['n'] += 1
+
+    body = exports.stream_export(lambda _db: iter(['x\n']), session_factory=_Session)
+    assert closed['n'] == 0
+    assert list(body) == [b'x\n']
+    assert closed['n'] == 1
+
+
+def test_export_job_lifecycle(monkeypatch, tmp_path) -> None:
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(exports, 'get_settings', lambda: SimpleNamespace(raw_storage_dir=str(tmp_path)))
+    job = exports.new_export_job(7, gzip=False)
+    assert exports.export_job_status(7, job['job_id'])['status'] == 'running'
+    assert exports.export_job_status(8, job['job_id'])['status'] == 'not_found'
+
+    exports.run_export_job(job['path'], iter([b'a,b\n', b'1,2\n']))
+    done = exports.export_job_status(7, job['job_id'])
+    assert done['status'] == 'done'
+    assert done['size_bytes'] == 8
+
+
+def test_export_job_failure_hides_details_and_old_jobs_expire(monkeypatch, tmp_path) -> None:
+    import os
+    import time
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(exports, 'get_settings', lambda: SimpleNamespace(raw_storage_dir=str(tmp_path)))
+    job = exports.new_export_job(7, gzip=True)
+
+    def _boom():
+        yield b'a'
+        raise RuntimeError('connection to db-internal:5432 refused')
+
+    exports.run_export_job(job['path'], _boom())
+    failed = exports.export_job_status(7, job['job_id'])
+    assert failed == {'job_id': job['job_id'], 'status': 'failed', 'error': 'export failed'}
+
+    stale = exports.new_export_job(8)
+    old = time.time() - exports.EXPORT_JOB_TTL_SECONDS - 60
+    for p in (tmp_path / 'exports').glob('*/*'):
+        os.utime(p, (old, old))
+    fresh = exports.new_export_job(9)
+
+    assert exports.export_job_status(7, job['job_id'])['status'] == 'not_found'
+    assert exports.export_job_status(8, stale['job_id'])['status'] == 'not_found'
+    assert exports.export_job_status(9, fresh['job_id'])['status'] == 'running'
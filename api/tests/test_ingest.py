@@ -34,7 +34,7 @@ def test_first_import_generates_new_change_log(monkeypatch) -> None:
     record = map_raw_record(raw)
     setattr(record, 'registration_id', uuid.uuid4())
 
-    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record: None)
+    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record, cache=None: None)
     monkeypatch.setattr('app.services.ingest.find_existing_product', lambda _db, _record, **_kwargs: None)
 
     action, _product, *_ = upsert_product_record(db, record, source_run_id=1)
@@ -65,7 +65,7 @@ def test_second_import_generates_update_change_log(monkeypatch) -> None:
     record = map_raw_record(raw)
     setattr(record, 'registration_id', uuid.uuid4())
 
-    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record: None)
+    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record, cache=None: None)
     monkeypatch.setattr('app.services.ingest.find_existing_product', lambda _db, _record, **_kwargs: existing)
 
     action, _, *_ = upsert_product_record(db, record, source_run_id=2)
@@ -97,7 +97,7 @@ def test_upsert_does_not_overwrite_existing_product_di(monkeypatch) -> None:
     record = map_raw_record(raw)
     setattr(record, 'registration_id', uuid.uuid4())
 
-    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record: None)
+    monkeypatch.setattr('app.services.ingest.get_or_create_company', lambda _db, _record, cache=None: None)
     # Simulate a mistaken reg_no hit from legacy behavior; guard should still force add-path.
     monkeypatch.setattr('app.services.ingest.find_existing_product', lambda _db, _record, **_kwargs: existing)
 
@@ -339,3 +339,178 @@ def test_ingest_filters_invalid_product_name(monkeypatch) -> None:
     assert stats['filtered'] == 1
     assert stats['success'] == 1
     assert called['upsert'] == 1
+
+
+def test_iter_staging_records_streams_json_csv_xml(tmp_path) -> None:
+    from app.services.ingest import iter_staging_records, load_staging_records
+
+    (tmp_path / 'a.json').write_text('[{"name": "J1"}, 3, {"name": "J2"}]', encoding='utf-8')
+    (tmp_path / 'b.csv').write_text('﻿name,udi_di\nC1,D1\nC2,D2\n', encoding='utf-8')
+    (tmp_path / 'c.xml').write_text(
+        '<udid><devices>'
+        '<device><zxxsdycpbs>X1</zxxsdycpbs><storageList><storage><cchcztj>冷藏</cchcztj></storage></storageList></device>'
+        '<device><zxxsdycpbs>X2</zxxsdycpbs></device>'
+        '</devices></udid>',
+        encoding='utf-8',
+    )
+
+    it = iter_staging_records(tmp_path)
+    assert not isinstance(it, list)
+    streamed = list(it)
+    assert streamed == load_staging_records(tmp_path)
+    assert sorted(str(r.get('name') or r.get('zxxsdycpbs')) for r in streamed) == ['C1', 'C2', 'J1', 'J2', 'X1', 'X2']
+    x1 = next(r for r in streamed if r.get('zxxsdycpbs') == 'X1')
+    assert x1['storageList'] == [{'cchcztj': '冷藏'}]
+
+
+def test_iter_xml_records_detaches_devices_from_nested_wrapper(tmp_path, monkeypatch) -> None:
+    import xml.etree.ElementTree as ET
+
+    from app.services import ingest
+
+    path = tmp_path / 'nested.xml'
+    path.write_text(
+        '<udid><header><v>1</v></header><devices>'
+        + ''.join(f'<device><zxxsdycpbs>X{i}</zxxsdycpbs></device>' for i in range(5))
+        + '</devices></udid>',
+        encoding='utf-8',
+    )
+    wrappers: list[ET.Element] = []
+    real_iterparse = ET.iterparse
+
+    def _spy_iterparse(source, events=None):
+        for event, elem in real_iterparse(source, events=events):
+            if event == 'start' and elem.tag == 'devices':
+                wrappers.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(ingest.ET, 'iterparse', _spy_iterparse)
+
+    rows = [r['zxxsdycpbs'] for r in ingest._iter_xml_records(path)]
+    assert rows == ['X0', 'X1', 'X2', 'X3', 'X4']
+    # Finished <device> nodes were removed from <devices> itself, not just from root.
+    assert len(wrappers) == 1 and len(wrappers[0]) == 0
+
+
+def test_ingest_consumes_iterator_in_committed_chunks(monkeypatch) -> None:
+    from app.services.ingest import ingest_staging_records
+
+    class CountingDB(FakeDB):
+        def __init__(self) -> None:
+            super().__init__()
+            self.commits = 0
+
+        def commit(self) -> None:
+            self.commits += 1
+
+    db = CountingDB()
+    monkeypatch.setattr(
+        'app.services.ingest.classify',
+        lambda raw, version=None: {'is_ivd': True, 'version': 'ivd_v1', 'rule_version': 1},
+    )
+    monkeypatch.setattr(
+        'app.services.ingest.upsert_registration_with_contract',
+        lambda *_args, **kwargs: SimpleNamespace(registration_id=uuid.uuid4(), registration_no=kwargs.get('registration_no')),
+    )
+    monkeypatch.setattr('app.services.ingest.upsert_product_record', lambda *_a, **_k: ('added', None, None, None))
+
+    records = ({'name': f'检测试剂{i}', 'udi_di': f'U{i}', 'reg_no': f'国械注准2026000{i}'} for i in range(5))
+    stats = ingest_staging_records(db, records, source_run_id=1, source='TEST', chunk_size=2)
+
+    assert stats['total'] == 5
+    assert stats['success'] == 5
+    assert stats['added'] == 5
+    assert db.commits == 3
+
+
+def test_lookup_cache_prefetch_resolves_chunk_without_per_record_queries() -> None:
+    from app.models import Company, Registration
+    from app.services.ingest import IngestLookupCache, find_existing_product, get_or_create_company
+    from app.services.normalize_keys import normalize_registration_no
+
+    reg_no = normalize_registration_no('国械注准20260001')
+    reg = Registration(id=uuid.uuid4(), registration_no=reg_no, raw_json={})
+    company = Company(id=uuid.uuid4(), name='甲公司', raw={}, raw_json={})
+    p_new = Product(id=uuid.uuid4(), name='A', reg_no=reg_no, udi_di='D1', registration_id=reg.id, raw={}, raw_json={})
+    p_old = Product(id=uuid.uuid4(), name='B', reg_no='OTHER', udi_di='D2', registration_id=reg.id, raw={}, raw_json={})
+
+    class QueryDB(FakeDB):
+        def __init__(self) -> None:
+            super().__init__()
+            self.queries = []
+
+        def scalars(self, stmt):
+            entity = stmt.column_descriptions[0]['entity']
+            self.queries.append(entity.__name__)
+            rows = {Company: [company], Registration: [reg], Product: [p_new, p_old]}[entity]
+            return SimpleNamespace(all=lambda: rows)
+
+        def scalar(self, _stmt):
+            raise AssertionError('per-record query should be served from the prefetch')
+
+    db = QueryDB()
+    records = [
+        SimpleNamespace(company_name='甲公司', company_country=None, reg_no='国械注准20260001', udi_di='D1'),
+        SimpleNamespace(company_name='乙公司', company_country=None, reg_no='国械注准20260001', udi_di='D9'),
+    ]
+    cache = IngestLookupCache.prefetch(db, records)
+
+    assert db.queries == ['Company', 'Registration', 'Product']
+    assert cache.registrations[reg_no] is reg
+    assert get_or_create_company(db, records[0], cache=cache) is company
+    created = get_or_create_company(db, records[1], cache=cache)
+    assert created.name == '乙公司' and cache.companies['乙公司'] is created
+
+    by_di = SimpleNamespace(udi_di='D1', reg_no=reg_no)
+    assert find_existing_product(db, by_di, registration_id=reg.id, cache=cache) is p_new
+    by_anchor = SimpleNamespace(udi_di='D9', reg_no='OTHER')
+    assert find_existing_product(db, by_anchor, registration_id=reg.id, cache=cache) is p_old
+
+    cache.touch_product(p_old)
+    latest = SimpleNamespace(udi_di='D9', reg_no='NOPE')
+    assert find_existing_product(db, latest, registration_id=reg.id, cache=cache) is p_old
+
+
+def test_failed_pending_enqueue_resets_lookup_cache_mid_chunk(monkeypatch) -> None:
+    from app.services.ingest import IngestLookupCache, ingest_staging_records
+
+    cache = IngestLookupCache()
+    seen_at_upsert: list[dict] = []
+
+    class EnqueueFailDB(FakeDB):
+        def scalars(self, _stmt):
+            raise AssertionError('prefetch is patched')
+
+        def execute(self, _stmt):
+            raise RuntimeError('pending_records insert failed')
+
+    def _upsert(_db, record, *_a, lookup_cache=None, **_k):
+        seen_at_upsert.append(dict(lookup_cache.companies))
+        # Stands in for a company created (and only flushed) earlier in the chunk.
+        lookup_cache.companies[record.company_name] = SimpleNamespace(id=uuid.uuid4(), name=record.company_name)
+        return ('added', None, None, None)
+
+    monkeypatch.setattr(IngestLookupCache, 'prefetch', classmethod(lambda _cls, _db, _records: cache))
+    monkeypatch.setattr(
+        'app.services.ingest.classify',
+        lambda raw, version=None: {'is_ivd': True, 'version': 'ivd_v1', 'rule_version': 1},
+    )
+    monkeypatch.setattr('app.services.ingest.should_enqueue_pending_records', lambda: True)
+    monkeypatch.setattr(
+        'app.services.ingest.upsert_registration_with_contract',
+        lambda *_args, **kwargs: SimpleNamespace(registration_id=uuid.uuid4(), registration_no=kwargs.get('registration_no'), created=True),
+    )
+    monkeypatch.setattr('app.services.ingest.upsert_product_record', _upsert)
+
+    records = [
+        {'name': '检测试剂A', 'udi_di': 'U1', 'reg_no': '国械注准20260001', 'company_name': '甲公司'},
+        {'name': '检测试剂B', 'udi_di': 'U2', 'reg_no': '', 'company_name': '甲公司'},
+        {'name': '检测试剂C', 'udi_di': 'U3', 'reg_no': '国械注准20260003', 'company_name': '甲公司'},
+    ]
+    stats = ingest_staging_records(
+        EnqueueFailDB(), records, source_run_id=1, source='TEST', raw_document_id=uuid.uuid4(), reject_audit=False, chunk_size=10
+    )
+
+    assert stats['success'] == 2 and stats['filtered'] == 1
+    # The third record must not see the company cached before the rollback.
+    assert seen_at_upsert[1] == {}
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.pipeline import ingest as pipeline_ingest
+from app.services import ingest_runner
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeDB:
+    def __init__(self) -> None:
+        self.statements: list = []
+        self.commits = 0
+
+    def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        shas = sorted({v for k, v in params.items() if k.startswith('sha256')})
+        return _FakeResult([(uuid4(), sha) for sha in shas])
+
+    def add(self, _obj) -> None:
+        return None
+
+    def scalar(self, _stmt):
+        return 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        return None
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_write_raw_documents_is_one_multi_row_upsert(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(pipeline_ingest, 'get_settings', lambda: SimpleNamespace(raw_storage_dir=str(tmp_path)))
+    db = _FakeDB()
+    fields = dict(parse_status='PARSED', error=None, parse_log={})
+    docs = [{'row': {'n': 1}, **fields}, {'row': {'n': 2}, **fields}, {'row': {'n': 1}, **fields}]
+
+    ids = ingest_runner._write_raw_documents(db, source='SRC', source_run_id=7, docs=docs)
+
+    assert len(db.statements) == 1
+    sql = _sql(db.statements[0])
+    assert sql.startswith('INSERT INTO raw_documents')
+    assert 'ON CONFLICT (source, run_id, sha256) DO UPDATE' in sql
+    assert len(ids) == 3 and ids[0] == ids[2] and ids[0] != ids[1]
+    assert len(list((tmp_path / 'SRC').rglob('*.bin'))) == 2
+
+
+def test_run_one_source_streams_pages_and_batches_writes(monkeypatch) -> None:
+    db = _FakeDB()
+    pages = [
+        [{'registration_no': '国械注准20240001', 'di': 'A'}, {'di': 'NO-REG'}],
+        [{'registration_no': '国械注准20240001', 'di': 'A'}, {'registration_no': '国械注准20240002', 'di': 'B'}],
+    ]
+    raw_calls: list[int] = []
+    pending: dict[str, list[int]] = {'docs': [], 'recs': []}
+    upserts: list[str] = []
+
+    monkeypatch.setattr(ingest_runner, '_iter_row_pages_from_runtime', lambda _cfg: iter(pages))
+    monkeypatch.setattr(ingest_runner, 'start_source_run', lambda *a, **k: SimpleNamespace(id=11))
+    monkeypatch.setattr(ingest_runner, 'finish_source_run', lambda *a, **k: None)
+    monkeypatch.setattr(ingest_runner, 'should_enqueue_pending_documents', lambda: True)
+    monkeypatch.setattr(ingest_runner, 'should_enqueue_pending_records', lambda: True)
+    monkeypatch.setattr(
+        ingest_runner,
+        '_write_raw_documents',
+        lambda _db, *, source, source_run_id, docs: raw_calls.append(len(docs)) or [uuid4() for _ in docs],
+    )
+    monkeypatch.setattr(ingest_runner, '_enqueue_pending_documents', lambda _db, v: pending['docs'].append(len(v)))
+    monkeypatch.setattr(ingest_runner, '_enqueue_pending_records', lambda _db, v: pending['recs'].append(len(v)))
+
+    def _fake_upsert(_db, *, row, **_kw):
+        upserts.append(row['di'])
+        return SimpleNamespace(registration_created=True, registration_changed_fields={}, variant_upserted=True)
+
+    monkeypatch.setattr(ingest_runner, 'upsert_structured_record_via_runner', _fake_upsert)
+
+    defn = SimpleNamespace(source_key='SRC', parser_key='udi_di_parser', default_evidence_grade='B')
+    cfg = SimpleNamespace(upsert_policy={'priority': 10}, last_run_at=None, last_status=None, last_error=None)
+    stats = ingest_runner._run_one_source(db, defn=defn, cfg=cfg, execute=True)
+
+    assert stats.status == 'success'
+    assert raw_calls == [2, 1]
+    assert pending == {'docs': [1, 0], 'recs': [1, 0]}
+    assert upserts == ['A', 'B']
+    assert (stats.fetched_count, stats.raw_written_count, stats.skipped_count) == (4, 3, 1)
+    assert (stats.parsed_count, stats.missing_registration_no_count) == (2, 1)
+    assert stats.variants_upserted_count == 2
+    assert db.commits >= 2
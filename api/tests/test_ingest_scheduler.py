@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+from app.services.ingest_runner import IngestRunnerStats
+from app.services.ingest_scheduler import SourceTask, run_sources_concurrently, source_task_from_config
+
+
+def _fake_runner(delays: dict[str, float], failing: set[str] = frozenset()):
+    calls: list[str] = []
+
+    def _run(task: SourceTask, *, execute: bool, timeout_seconds):
+        calls.append(task.source_key)
+        time.sleep(delays.get(task.source_key, 0.0))
+        return IngestRunnerStats(
+            source_key=task.source_key,
+            parser_key=task.parser_key,
+            dry_run=not execute,
+            source_run_id=None,
+            status=("failed" if task.source_key in failing else "success"),
+        )
+
+    return _run, calls
+
+
+def test_independent_sources_overlap_and_dependents_wait() -> None:
+    tasks = [
+        SourceTask('A_UDI_INDEX', 'udi_di_parser'),
+        SourceTask('B_NHSA', 'nhsa_parser'),
+        SourceTask('C_PROMOTE', 'udi_di_parser', depends_on=('A_UDI_INDEX',)),
+    ]
+    run, calls = _fake_runner({'A_UDI_INDEX': 0.2, 'B_NHSA': 0.2, 'C_PROMOTE': 0.05})
+
+    report = run_sources_concurrently(tasks, execute=False, workers=2, run_source=run)
+    body = report.to_dict()
+
+    assert [x['source_key'] for x in body['items']] == ['A_UDI_INDEX', 'B_NHSA', 'C_PROMOTE']
+    assert calls.index('C_PROMOTE') == 2
+    timings = report.timings
+    assert timings['C_PROMOTE']['started_offset'] >= timings['A_UDI_INDEX']['finished_offset']
+    # Overlap is proven by the interval bookkeeping, not by absolute wall time (flaky on loaded runners).
+    assert body['max_concurrency'] == 2
+    assert body['overlap'] > 1.0
+    assert body['failed'] == 0
+
+
+def test_failed_dependency_skips_dependents_transitively() -> None:
+    tasks = [
+        SourceTask('A', 'nmpa_reg_parser'),
+        SourceTask('B', 'nmpa_reg_parser', depends_on=('A',)),
+        SourceTask('C', 'nmpa_reg_parser', depends_on=('B', 'DISABLED_SOURCE')),
+        SourceTask('D', 'nmpa_reg_parser'),
+    ]
+    run, calls = _fake_runner({}, failing={'A'})
+
+    report = run_sources_concurrently(tasks, execute=True, workers=4, run_source=run)
+    status = {x.source_key: (x.status, x.message) for x in report.items}
+
+    assert sorted(calls) == ['A', 'D']
+    assert status['B'] == ('skipped', 'blocked by failed dependency: A')
+    assert status['C'] == ('skipped', 'blocked by failed dependency: B')
+    assert status['D'][0] == 'success'
+    assert report.timings['C']['depends_on'] == ['B']
+
+
+def test_dependency_cycle_is_reported_as_failed() -> None:
+    tasks = [SourceTask('X', 'p', depends_on=('Y',)), SourceTask('Y', 'p', depends_on=('X',)), SourceTask('Z', 'p')]
+    run, calls = _fake_runner({})
+
+    report = run_sources_concurrently(tasks, execute=False, workers=1, run_source=run)
+    status = {x.source_key: x.status for x in report.items}
+
+    assert calls == ['Z']
+    assert status == {'X': 'failed', 'Y': 'failed', 'Z': 'success'}
+    assert report.items[0].message.startswith('dependency cycle')
+
+
+def test_source_task_reads_depends_on_and_timeout_from_fetch_params() -> None:
+    defn = SimpleNamespace(source_key='UDI_PROMOTE', parser_key='udi_di_parser')
+    cfg = SimpleNamespace(fetch_params={'depends_on': 'udi_index, NMPA_REG,udi_index', 'run_timeout_seconds': '900'})
+
+    task = source_task_from_config(defn, cfg)
+
+    assert task.depends_on == ('UDI_INDEX', 'NMPA_REG')
+    assert task.timeout_seconds == 900.0
+    assert source_task_from_config(defn, SimpleNamespace(fetch_params=None)).depends_on == ()
@@ -130,3 +130,34 @@ def test_global_exclude_keywords_force_non_ivd(name: str, expected_hit: str) ->
     assert result['ivd_category'] is None
     assert result['reason']['ivd']['by'] == 'global_exclude'
     assert expected_hit in result['reason']['ivd']['exclude_hits']
+
+
+def _legacy_match_hits(text: str, keywords: tuple[str, ...]) -> list[str]:
+    import re
+
+    hits: list[str] = []
+    for kw in keywords:
+        kw_norm = kw.lower()
+        if re.fullmatch(r'[a-z0-9\\-]+', kw_norm):
+            if re.search(rf'(?<![a-z0-9]){re.escape(kw_norm)}(?![a-z0-9])', text):
+                hits.append(kw)
+            continue
+        if kw_norm in text:
+            hits.append(kw)
+    return hits
+
+
+def test_compiled_matcher_matches_legacy_scan() -> None:
+    import random
+
+    from app.services import ivd_dictionary
+    from app.services.ivd_classifier import _match_hits
+
+    groups = [v for k, v in vars(ivd_dictionary).items() if k.isupper() and isinstance(v, tuple)]
+    vocab = sorted({kw.lower() for g in groups for kw in g}) + ['elisa', 'x', '1', '-', ' ', '(', ')', '检', '试']
+    rng = random.Random(20260217)
+    texts = ['', 'lis', 'elisa', 'lis系统', 'rt-pcr', 'qpcr仪', 'point-of-care检测', 'ngs2', 'poct-1']
+    texts += [''.join(rng.choice(vocab) for _ in range(rng.randint(1, 6))) for _ in range(3000)]
+    for text in texts:
+        for group in groups:
+            assert _match_hits(text, group) == _legacy_match_hits(text, group), (text, group)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+from app.services import lri_latest
+
+
+class _Result:
+    def __init__(self, *, scalar=None, rows=None) -> None:
+        self._scalar = scalar
+        self._rows = rows or []
+
+    def scalar(self):
+        return self._scalar
+
+    def fetchall(self):
+        return self._rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class _FakeDB:
+    def __init__(self, *, token=None, orphaned=None) -> None:
+        self.token = token
+        self.orphaned = orphaned or []
+        self.sql: list[tuple[str, dict]] = []
+
+    def execute(self, stmt, params=None):
+        sql = ' '.join(str(stmt).split())
+        self.sql.append((sql, dict(params or {})))
+        if sql.startswith('SELECT refreshed_at FROM lri_scores_latest_state'):
+            return _Result(scalar=self.token)
+        if sql.startswith('DELETE FROM lri_scores_latest l'):
+            return _Result(rows=[(r,) for r in self.orphaned])
+        if 'RETURNING row_count' in sql:
+            return _Result(scalar=3)
+        if 'GROUP BY 1, 2, 3, 4' in sql:
+            return _Result(rows=[{'ivd_category': 'reagent', 'total_count': 3}])
+        return _Result()
+
+    def map_queries(self) -> int:
+        return sum(1 for sql, _ in self.sql if 'GROUP BY 1, 2, 3, 4' in sql)
+
+
+def test_map_groups_are_cached_until_the_next_refresh() -> None:
+    lri_latest.invalidate_lri_latest_cache()
+    db = _FakeDB(token=datetime(2026, 3, 1, tzinfo=timezone.utc))
+
+    first = lri_latest.lri_map_groups(db, model_version='lri_v1')
+    second = lri_latest.lri_map_groups(db, model_version='lri_v1')
+    assert first == second == [{'ivd_category': 'reagent', 'total_count': 3}]
+    assert db.map_queries() == 1
+    assert all('FROM lri_scores s' not in sql for sql, _ in db.sql)
+
+    db.token = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    lri_latest.lri_map_groups(db, model_version='lri_v1')
+    assert db.map_queries() == 2
+
+    # Never-refreshed model versions are not cached.
+    db.token = None
+    lri_latest.lri_map_groups(db, model_version='lri_v2')
+    lri_latest.lri_map_groups(db, model_version='lri_v2')
+    assert db.map_queries() == 4
+
+
+def test_refresh_merges_only_the_new_compute_and_repairs_deleted_latest_rows() -> None:
+    ts = datetime(2026, 3, 1, 2, 0, tzinfo=timezone.utc)
+    rid = uuid.uuid4()
+    db = _FakeDB(orphaned=[rid])
+
+    rows = lri_latest.refresh_lri_latest(db, model_version='lri_v1', calculated_at=ts)
+
+    assert rows == 3
+    merge, orphans, repair, state = db.sql
+    assert 'AND s.calculated_at = :ts' in merge[0] and merge[1]['ts'] == ts
+    assert orphans[0].startswith('DELETE FROM lri_scores_latest l')
+    assert 'AND s.registration_id = ANY(:rids)' in repair[0] and repair[1]['rids'] == [rid]
+    assert state[0].startswith('INSERT INTO lri_scores_latest_state')
+
+
+def test_full_refresh_rebuilds_model_version() -> None:
+    db = _FakeDB()
+
+    lri_latest.refresh_lri_latest(db, model_version='lri_v1')
+
+    assert [sql.split(' (')[0] for sql, _ in db.sql[:2]] == [
+        'DELETE FROM lri_scores_latest WHERE model_version = :mv',
+        'INSERT INTO lri_scores_latest',
+    ]
+    assert ':ts' not in db.sql[1][0]
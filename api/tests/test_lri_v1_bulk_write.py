@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import uuid
+
+from app.services.lri_v1 import _write_lri_scores
+
+
+class _RecordingDB:
+    def __init__(self) -> None:
+        self.statements = []
+
+    def execute(self, stmt, *_args, **_kwargs):
+        self.statements.append(stmt)
+        return None
+
+
+def test_write_lri_scores_issues_one_insert_per_chunk() -> None:
+    db = _RecordingDB()
+    rows = [{"registration_id": uuid.uuid4(), "lri_total": i, "risk_level": "LOW"} for i in range(2500)]
+
+    wrote = _write_lri_scores(db, rows, model_version="lri_v1", source_run_id=7, batch_size=1000)  # type: ignore[arg-type]
+
+    assert wrote == 2500
+    assert len(db.statements) == 3
+    compiled = db.statements[-1].compile()
+    assert compiled.params["source_run_id_m0"] == 7
+    assert "source_run_id_m499" in compiled.params
+    assert "source_run_id_m500" not in compiled.params
+
+
+def test_write_lri_scores_noop_for_empty_batch() -> None:
+    db = _RecordingDB()
+    assert _write_lri_scores(db, [], model_version="lri_v1", source_run_id=None) == 0  # type: ignore[arg-type]
+    assert db.statements == []
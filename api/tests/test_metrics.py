@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
 from types import SimpleNamespace
 
+from sqlalchemy.dialects import postgresql
+
 from app.services import metrics
 
 
-@dataclass
 class FakeInsert:
-    values_data: dict
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.excluded = SimpleNamespace(**{k: ('excluded', k) for k in rows[0]})
 
     def on_conflict_do_update(self, index_elements, set_):
         self.set_data = set_
@@ -17,44 +19,70 @@ class FakeInsert:
 
 
 class FakeInsertBuilder:
-    def values(self, **kwargs):
-        return FakeInsert(values_data=kwargs)
+    def __init__(self, model) -> None:
+        self.model = model
+
+    def values(self, rows):
+        stmt = FakeInsert(rows)
+        stmt.model = self.model
+        return stmt
 
 
 class FakeDB:
     def __init__(self):
         self.rows = {}
+        self.statements = 0
 
     def execute(self, stmt):
-        key = stmt.values_data['metric_date']
-        existing = self.rows.get(key)
-        if existing:
-            for k, v in stmt.set_data.items():
-                setattr(existing, k, v)
-        else:
-            self.rows[key] = SimpleNamespace(**stmt.values_data)
+        self.statements += 1
+        table = self.rows.setdefault(stmt.model, {})
+        for values in stmt.rows:
+            existing = table.get(values['metric_date'])
+            if existing:
+                for k, (_excluded, col) in stmt.set_data.items():
+                    setattr(existing, k, values[col])
+            else:
+                table[values['metric_date']] = SimpleNamespace(**values)
 
     def commit(self):
         return None
 
-    def get(self, _model, key):
-        return self.rows.get(key)
+    def get(self, model, key):
+        return self.rows.get(model, {}).get(key)
+
+
+def _patch_sources(monkeypatch, calls: dict[str, int]) -> None:
+    def _counted(name, fn):
+        def _inner(*args):
+            calls[name] = calls.get(name, 0) + 1
+            return fn(*args)
+
+        return _inner
+
+    monkeypatch.setattr(metrics, 'insert', FakeInsertBuilder)
+    monkeypatch.setattr(
+        metrics,
+        '_change_type_counts_by_day',
+        _counted('changes', lambda _db, s, _e: {s: {'new': 2, 'update': 1, 'cancel': 1, 'expire': 3}}),
+    )
+    monkeypatch.setattr(metrics, '_expiring_in_90d_by_day', _counted('expiring', lambda *_: {}))
+    monkeypatch.setattr(metrics, '_latest_source_run_id_by_day', _counted('runs', lambda _db, s, _e: {s: 99}))
+    monkeypatch.setattr(
+        metrics,
+        '_compute_udi_value_add_metrics',
+        _counted('udi', lambda _db, s, e: {s + timedelta(days=i): {} for i in range((e - s).days + 1)}),
+    )
+    monkeypatch.setattr(metrics, '_count_active_subscriptions', _counted('subs', lambda *_: 3))
+    monkeypatch.setattr(
+        metrics,
+        '_udi_coverage_snapshot',
+        _counted('coverage', lambda *_: {'total_di_count': 4, 'mapped_di_count': 2, 'unmapped_di_count': 1, 'coverage_ratio': 0.5}),
+    )
 
 
 def test_generate_daily_metrics_is_rerunnable_one_row_per_day(monkeypatch):
     db = FakeDB()
-    monkeypatch.setattr(metrics, 'insert', lambda _model: FakeInsertBuilder())
-
-    seq = {'n': 0}
-
-    def _count_change_type(_db, _day, _type):
-        seq['n'] += 1
-        return seq['n']
-
-    monkeypatch.setattr(metrics, '_count_change_type', _count_change_type)
-    monkeypatch.setattr(metrics, '_count_expiring_in_90d', lambda *_: 7)
-    monkeypatch.setattr(metrics, '_count_active_subscriptions', lambda *_: 3)
-    monkeypatch.setattr(metrics, '_latest_source_run_id', lambda *_: 99)
+    _patch_sources(monkeypatch, {})
 
     target_day = date(2026, 2, 8)
     row1 = metrics.generate_daily_metrics(db, target_day)
@@ -62,4 +90,114 @@ def test_generate_daily_metrics_is_rerunnable_one_row_per_day(monkeypatch):
 
     assert row1.metric_date == target_day
     assert row2.metric_date == target_day
-    assert len(db.rows) == 1
+    assert len(db.rows[metrics.DailyMetric]) == 1
+    assert (row2.new_products, row2.updated_products, row2.cancelled_products) == (2, 1, 4)
+    assert row2.source_run_id == 99
+    assert db.get(metrics.DailyUdiMetric, target_day).coverage_ratio == 0.5
+
+
+def test_regenerate_year_runs_each_aggregate_once(monkeypatch):
+    db = FakeDB()
+    calls: dict[str, int] = {}
+    _patch_sources(monkeypatch, calls)
+
+    out = metrics.regenerate_daily_metrics(db, days=365, end_date=date(2026, 2, 8))
+
+    assert len(out) == 365 and out[0] == '2025-02-09' and out[-1] == '2026-02-08'
+    assert calls == {'changes': 1, 'expiring': 1, 'runs': 1, 'udi': 1, 'subs': 1, 'coverage': 1}
+    # One multi-row upsert per table.
+    assert db.statements == 2
+    assert len(db.rows[metrics.DailyMetric]) == len(db.rows[metrics.DailyUdiMetric]) == 365
+    assert db.get(metrics.DailyMetric, date(2025, 6, 1)).cancelled_products == 0
+
+
+class _Result:
+    def __init__(self, rows) -> None:
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _SqlDB:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.sql: list[str] = []
+
+    def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return _Result(self.rows)
+
+
+def test_change_type_counts_are_one_grouped_query():
+    d = date(2026, 2, 8)
+    db = _SqlDB([(d, 'new', 5), (d, 'expire', 2)])
+
+    out = metrics._change_type_counts_by_day(db, d - timedelta(days=364), d)
+
+    assert out == {d: {'new': 5, 'expire': 2}}
+    assert len(db.sql) == 1
+    assert 'GROUP BY CAST(change_log.change_date AS DATE), change_log.change_type' in db.sql[0]
+
+
+def test_expiring_window_sweeps_one_histogram():
+    start = date(2026, 1, 1)
+    end = date(2026, 1, 3)
+    db = _SqlDB([(date(2026, 1, 1), 1), (date(2026, 1, 2), 2), (date(2026, 4, 1), 4), (date(2026, 4, 3), 8)])
+
+    out = metrics._expiring_in_90d_by_day(db, start, end)
+
+    # Window is [d, d + 90]: 2026-04-01 is day +90 from 2026-01-01.
+    assert out == {date(2026, 1, 1): 7, date(2026, 1, 2): 6, date(2026, 1, 3): 12}
+    assert len(db.sql) == 1
+
+
+class _CoverageDB:
+    def __init__(self, row) -> None:
+        self.row = row
+        self.sql: list[str] = []
+
+    def execute(self, stmt, params=None):
+        self.sql.append(str(stmt))
+        row = self.row if stmt.text.lstrip().startswith('SELECT') else {'master_di_count': 3, 'index_di_count': 5, 'mapped_di_count': 2}
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(first=lambda: row, one=lambda: row))
+
+
+def test_udi_coverage_reads_counters_and_seeds_once_when_missing():
+    from app.services.udi_coverage import bump_udi_coverage_counts, load_udi_coverage_counts, mapped_di_delta
+
+    db = _CoverageDB({'master_di_count': 7, 'index_di_count': 9, 'mapped_di_count': 4})
+    assert load_udi_coverage_counts(db) == {'master_di_count': 7, 'index_di_count': 9, 'mapped_di_count': 4}
+    assert len(db.sql) == 1
+
+    empty = _CoverageDB(None)
+    assert load_udi_coverage_counts(empty) == {'master_di_count': 3, 'index_di_count': 5, 'mapped_di_count': 2}
+    assert 'INSERT INTO udi_coverage_counters' in empty.sql[1]
+
+    bump_udi_coverage_counts(empty)
+    assert len(empty.sql) == 2
+    assert [mapped_di_delta(deleted=d, inserted=i) for d, i in ((0, True), (1, True), (0, False))] == [1, 0, 0]
+
+
+def test_udi_coverage_bumps_are_applied_once_at_commit_and_dropped_on_rollback():
+    from sqlalchemy.orm import Session
+
+    from app.services.udi_coverage import bump_udi_coverage_counts
+
+    session = Session()
+    applied: list[dict] = []
+    session.execute = lambda stmt, params=None: applied.append(dict(params))  # type: ignore[method-assign]
+
+    session.begin()
+    bump_udi_coverage_counts(session, master=1)
+    bump_udi_coverage_counts(session, mapped=1)
+    bump_udi_coverage_counts(session, master=1, index=3)
+    assert applied == []
+    session.commit()
+    assert applied == [{'master': 2, 'index': 3, 'mapped': 1}]
+
+    session.begin()
+    bump_udi_coverage_counts(session, index=5)
+    session.rollback()
+    session.commit()
+    assert len(applied) == 1
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.services.nmpa_query_fetcher import AdaptiveTokenBucket, fetch_queries_sync
+from app.services.supplement_sync import _extract_nmpa_hints
+
+
+class _StubState:
+    def __init__(self, *, block_first: int, block_status: int = 412) -> None:
+        self.lock = threading.Lock()
+        self.block_first = block_first
+        self.block_status = block_status
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client_ports: set[int] = set()
+        self.keywords: list[str] = []
+
+
+@contextmanager
+def _stub_server(state: _StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *_args) -> None:
+            return None
+
+        def do_GET(self) -> None:  # noqa: N802
+            keyword = parse_qs(urlparse(self.path).query).get('keyword', [''])[0]
+            with state.lock:
+                state.requests += 1
+                n = state.requests
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                state.client_ports.add(self.client_address[1])
+                state.keywords.append(keyword)
+            time.sleep(0.02)
+            if n <= state.block_first:
+                status, body = state.block_status, b'blocked'
+            elif keyword == 'BROKEN':
+                status, body = 500, b'error'
+            else:
+                status, body = 200, f'<td>{keyword}</td><td>2024-01-02</td><td>2029-01-01</td>'.encode('utf-8')
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with state.lock:
+                state.in_flight -= 1
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}/datasearch'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_queries_bounds_concurrency_reuses_connections_and_recovers_from_412() -> None:
+    state = _StubState(block_first=2)
+    keywords = [f'国械注准2024340{i:04d}' for i in range(12)] + ['BROKEN', '国械注准20243400000']
+
+    with _stub_server(state) as url:
+        results, stats = fetch_queries_sync(keywords, url=url, concurrency=3, rate_per_sec=200, max_retries=2)
+
+    assert stats.keywords == 13
+    assert stats.block_responses == 2 and stats.slowdowns == 2
+    assert stats.blocked_412 == 0
+    assert stats.failed == 1 and results['BROKEN'].status_code == 500
+    assert stats.succeeded == 12
+    assert stats.requests == state.requests == 15
+    assert state.max_in_flight <= 3
+    assert len(state.client_ports) <= 3
+    assert stats.final_rate_per_sec < 200
+    assert stats.to_dict()['throughput_per_sec'] > 0
+    hints = _extract_nmpa_hints(results['国械注准20243400001'].text)
+    assert (hints['approved_date'], hints['expiry_date']) == ('2024-01-02', '2029-01-01')
+
+
+def test_fetch_queries_reports_persistent_blocks_after_retries() -> None:
+    state = _StubState(block_first=100, block_status=429)
+
+    with _stub_server(state) as url:
+        results, stats = fetch_queries_sync(['A', 'B'], url=url, concurrency=2, rate_per_sec=200, max_retries=1)
+
+    assert stats.throttled_429 == 2
+    assert stats.requests == 4
+    assert all(r.attempts == 2 for r in results.values())
+
+
+def test_token_bucket_paces_and_slows_down() -> None:
+    async def _run() -> tuple[float, float]:
+        bucket = AdaptiveTokenBucket(20, burst=1)
+        t0 = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        paced = time.monotonic() - t0
+        bucket.slow_down()
+        return paced, bucket.rate
+
+    paced, rate = asyncio.run(_run())
+
+    assert paced >= 0.18
+    assert rate == 10
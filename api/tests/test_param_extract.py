@@ -10,3 +10,34 @@ def test_extract_lod_from_text() -> None:
     lod = [x for x in items if x['param_code'] == 'LOD']
     assert lod
     assert lod[0]['value_num'] == 0.12
+
+
+def _reference_extract(text: str, ontology: dict) -> list[dict]:
+    # The pre-compilation extractor: per-line, per-code alias substring scan.
+    from app.ivd.param_extract import _extract_value, conflict_detect
+
+    out = []
+    for line in [x.strip() for x in str(text or '').splitlines() if x.strip()]:
+        lower = line.lower()
+        for code, meta in ontology.items():
+            aliases = [str(x).lower() for x in (meta.get('aliases') or [])]
+            if not any(a and a in lower for a in aliases):
+                continue
+            v = _extract_value(line)
+            out.append({'param_code': str(code), **v, 'conditions': {}, 'evidence_text': line[:500], 'confidence': 0.70})
+    return conflict_detect(out)
+
+
+def test_compiled_extractor_matches_reference_scan() -> None:
+    import random
+
+    from app.ivd.ontology import PARAM_ONTOLOGY
+
+    custom = {'A': {'aliases': ['批内', '批内精密度', '']}, 'B': {'aliases': ['精密', 'LOD']}, 'C': {'aliases': []}}
+    rng = random.Random(7)
+    for ontology in (PARAM_ONTOLOGY, custom):
+        words = [str(a) for m in ontology.values() for a in (m.get('aliases') or []) if a]
+        words += ['LoD', 'CV ', '2-8℃', '95 %', '0.5 ng/mL', '1-5 IU/mL', '  ', '\n', '说明', 'x']
+        for _ in range(500):
+            text = ''.join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+            assert extract_from_text(text, ontology) == _reference_extract(text, ontology)
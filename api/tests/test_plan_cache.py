@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.services import plan as plan_service
+from app.services.plan import compute_plan, invalidate_plan_cache
+
+
+class _GrantDB:
+    def __init__(self, grant: tuple[str, datetime] | None) -> None:
+        self.grant = grant
+        self.queries = 0
+
+    def scalar(self, _stmt):
+        self.queries += 1
+        return None
+
+    def execute(self, _stmt):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: self.grant)
+
+
+def _user(**kw) -> SimpleNamespace:
+    base = dict(id=41, email='u@example.com', role='user', plan='free', plan_status='inactive', plan_expires_at=None)
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def test_plan_is_cached_per_user_until_invalidated() -> None:
+    invalidate_plan_cache()
+    db = _GrantDB(('pro_annual', datetime.now(timezone.utc) + timedelta(days=30)))
+    user = _user()
+
+    first = compute_plan(user, db)
+    assert first.is_pro is True and db.queries == 1
+    assert compute_plan(user, db) is first
+    assert db.queries == 1
+
+    db.grant = None
+    invalidate_plan_cache(user.id)
+    assert compute_plan(user, db).is_pro is False
+    assert db.queries == 2
+    assert plan_service.plan_cache_stats()['hits'] >= 1
+
+
+def test_plan_cache_misses_on_user_row_change_explicit_now_and_expiry() -> None:
+    invalidate_plan_cache()
+    db = _GrantDB(None)
+    user = _user()
+
+    compute_plan(user, db)
+    user.plan, user.plan_status = 'pro_annual', 'active'
+    assert compute_plan(user, db).is_pro is True
+    assert db.queries == 2
+
+    compute_plan(user, db, now=datetime.now(timezone.utc))
+    assert db.queries == 3
+
+    # A pro snapshot is never cached past the membership end.
+    db.grant = ('pro', datetime.now(timezone.utc))
+    other = _user(id=42)
+    compute_plan(other, db)
+    compute_plan(other, db)
+    assert db.queries == 5
+
+
+def test_admin_membership_endpoints_invalidate_plan_cache(monkeypatch) -> None:
+    now = datetime.now(timezone.utc)
+    admin = SimpleNamespace(id=2, email='admin@example.com', password_hash='x', role='admin', created_at=now)
+    target = SimpleNamespace(
+        id=1, email='user@example.com', password_hash='x', role='user',
+        plan='free', plan_status='inactive', plan_expires_at=None, created_at=now,
+    )
+    cfg = SimpleNamespace(
+        auth_secret='test-secret', auth_cookie_name='ivd_session', auth_session_ttl_hours=1, auth_cookie_secure=False,
+    )
+    monkeypatch.setattr('app.main.get_user_by_id', lambda _db, user_id: admin if int(user_id) == 2 else target)
+    monkeypatch.setattr('app.main.get_settings', lambda: cfg)
+    monkeypatch.setattr('app.main.admin_suspend_membership', lambda _db, **_kw: target)
+
+    invalidated: list[int | None] = []
+    monkeypatch.setattr('app.main.invalidate_plan_cache', lambda user_id=None: invalidated.append(user_id))
+
+    client = TestClient(main.app)
+    client.cookies.set('ivd_session', main.create_session_token(user_id=2, secret='test-secret', ttl_seconds=3600))
+    r = client.post('/api/admin/membership/suspend', json={'user_id': 1})
+
+    assert r.status_code == 200
+    assert invalidated == [1]
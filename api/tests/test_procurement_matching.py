@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services import procurement_ingest
+
+
+class _FakeDB:
+    def __init__(self, candidate_rows=None, methodology_rows=None, company_rows=None) -> None:
+        self.candidate_rows = candidate_rows or []
+        self.methodology_rows = methodology_rows or []
+        self.company_rows = company_rows or []
+        self.calls: list[tuple[str, dict]] = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.calls.append((sql, dict(params or {})))
+        if 'WITH ORDINALITY' in sql:
+            rows = self.candidate_rows
+        elif 'registration_methodologies' in sql:
+            rows = self.methodology_rows
+        elif 'products.company_id' in sql:
+            rows = self.company_rows
+        else:
+            rows = []
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: rows), all=lambda: rows)
+
+
+def test_candidates_are_fetched_once_per_distinct_catalog_item() -> None:
+    rid = uuid4()
+    db = _FakeDB(candidate_rows=[{'qi': 2, 'registration_id': rid, 'name_sim': 0.4, 'text_sim': 0.1, 'has_company': True}])
+
+    out = procurement_ingest._candidate_rows_for_items(db, ['肌钙蛋白 ', '', 'D-二聚体', '肌钙蛋白'])
+
+    assert list(out) == ['肌钙蛋白', 'D-二聚体']
+    assert out['D-二聚体'][0]['registration_id'] == rid and out['肌钙蛋白'] == []
+    queries = [(sql, p) for sql, p in db.calls if 'WITH ORDINALITY' in sql]
+    assert len(queries) == 1 and queries[0][1]['qs'] == ['肌钙蛋白', 'D-二聚体']
+    assert 'raw_json' not in queries[0][0]
+
+
+def test_rule_maps_use_run_cache_for_methodology_and_company_bonuses() -> None:
+    rid, mid, cid = uuid4(), uuid4(), uuid4()
+    db = _FakeDB(methodology_rows=[(rid, mid)], company_rows=[(rid, cid)])
+    cache = procurement_ingest._MatchCache()
+    cache.prime(db, {rid})
+    primed = len(db.calls)
+
+    candidates = [{'registration_id': rid, 'name_sim': 0.5, 'text_sim': 0.0}]
+    for _ in range(3):
+        _, top = procurement_ingest._upsert_rule_maps_for_lot(
+            db,
+            lot_id=uuid4(),
+            catalog_item_std='化学发光',
+            win_company_id=cid,
+            method_keys=[(mid, ['化学发光'])],
+            dry_run=True,
+            candidates=candidates,
+            cache=cache,
+        )
+        assert top[0]['explain']['methodology_bonus'] == 0.15
+        assert top[0]['explain']['company_bonus'] == 0.12
+        assert top[0]['confidence'] == 0.77
+
+    assert len(db.calls) == primed == 2
+
+
+def test_dry_run_does_not_refresh_the_match_index(monkeypatch) -> None:
+    from contextlib import contextmanager
+
+    refreshed: list[bool] = []
+
+    @contextmanager
+    def _source_run(_db, **_kwargs):
+        yield SimpleNamespace(id=1), 'raw-run', {}
+
+    class _IngestDB(_FakeDB):
+        def get(self, _model, _id):
+            return None
+
+    row = {'province': '广东', 'project_title': 'P', 'publish_date': None, 'catalog_item_std': '肌钙蛋白', 'win_company_text': ''}
+    monkeypatch.setattr(procurement_ingest, 'source_run', _source_run)
+    monkeypatch.setattr(procurement_ingest, 'save_raw_document', lambda *_a, **_k: uuid4())
+    monkeypatch.setattr(procurement_ingest, '_extract_rows', lambda *_a, **_k: [row])
+    monkeypatch.setattr(procurement_ingest, '_map_row', lambda r, _province: r)
+    monkeypatch.setattr(procurement_ingest, '_build_methodology_keyword_map', lambda _db: [])
+    monkeypatch.setattr(procurement_ingest, 'refresh_registration_match_index', lambda _db, **_k: refreshed.append(True))
+
+    out = procurement_ingest.ingest_procurement_snapshot(
+        _IngestDB(), province='广东', content=b'', source_url=None, doc_type='csv', dry_run=True
+    )
+
+    assert out.parsed_count == 1
+    assert refreshed == []
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from uuid import uuid4
+
+from app.services import product_params_extract
+
+
+def test_batch_extract_runs_each_document_once_in_order_and_isolates_failures(monkeypatch) -> None:
+    a, b = str(uuid4()), str(uuid4())
+    seen: list[tuple[str, dict]] = []
+
+    def _job(raw_document_id: str, options: dict) -> dict:
+        seen.append((raw_document_id, options))
+        if raw_document_id == b:
+            return {'raw_document_id': raw_document_id, 'ok': False, 'error': 'raw document not found'}
+        return {'raw_document_id': raw_document_id, 'ok': True, 'extracted': 3}
+
+    monkeypatch.setattr(product_params_extract, '_extract_params_job', _job)
+
+    out = product_params_extract.extract_params_for_raw_documents([a, b, a], workers=0, dry_run=False)
+
+    assert [r['raw_document_id'] for r in out] == [a, b]
+    assert [r['ok'] for r in out] == [True, False]
+    assert [rid for rid, _ in seen] == [a, b]
+    assert seen[0][1] == {'di': None, 'registry_no': None, 'extract_version': 'param_v1_20260213', 'dry_run': False}
+
+    # One distinct document never starts a pool.
+    seen.clear()
+    product_params_extract.extract_params_for_raw_documents([a], workers=8)
+    assert [rid for rid, _ in seen] == [a]
+
+
+def test_execute_keeps_existing_params_when_a_later_page_fails_on_cache_miss(monkeypatch) -> None:
+    from types import SimpleNamespace
+
+    import pytest
+
+    from app.pipeline.doc_reader import PageText
+
+    doc = SimpleNamespace(storage_uri='/tmp/label.pdf', sha256='ab' * 32, doc_type='pdf')
+
+    class _DB:
+        def __init__(self) -> None:
+            self.executed = 0
+            self.commits = 0
+
+        def get(self, _model, _id):
+            return doc
+
+        def execute(self, _stmt):
+            self.executed += 1
+            return SimpleNamespace(rowcount=0)
+
+        def commit(self) -> None:
+            self.commits += 1
+
+    def _pages():
+        yield PageText(page=1, text='检测范围: 0.1-100 ng/mL')
+        raise OSError('truncated pdf')
+
+    monkeypatch.setattr(product_params_extract, 'open_text_pages', lambda *_a, **_k: (False, _pages()))
+    monkeypatch.setattr(product_params_extract, 'bind_product_for_document', lambda *_a, **_k: None)
+    db = _DB()
+
+    with pytest.raises(OSError):
+        product_params_extract.extract_params_for_raw_document(db, raw_document_id=uuid4(), dry_run=False)  # type: ignore[arg-type]
+    assert db.executed == 0 and db.commits == 0
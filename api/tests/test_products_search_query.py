@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from sqlalchemy.dialects import postgresql
+
+from app.repositories.products import _order_by, build_search_query
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).lower()
+
+
+def test_search_query_uses_per_column_union_instead_of_cross_table_or() -> None:
+    sql = _sql(build_search_query('试剂盒', None, None, None))
+    assert 'union' in sql
+    assert sql.count('ilike') == 4
+    assert 'products.id in' in sql
+
+
+def test_relevance_sort_ranks_by_similarity_and_falls_back_without_query() -> None:
+    stmt = build_search_query('国械注准', None, None, None).order_by(*_order_by('relevance', 'desc', '国械注准'))
+    sql = _sql(stmt)
+    assert 'similarity(' in sql
+    assert 'greatest(' in sql
+
+    no_query = _sql(build_search_query(None, None, None, None).order_by(*_order_by('relevance', 'desc', None)))
+    assert 'similarity(' not in no_query
+    assert 'order by products.updated_at desc' in no_query
+
+
+def test_cursor_round_trip_and_keyset_filter() -> None:
+    import uuid
+    from datetime import datetime, timezone
+    from types import SimpleNamespace
+
+    import pytest
+
+    from app.repositories.products import _keyset_filter, decode_cursor, encode_cursor
+
+    pid = uuid.uuid4()
+    ts = datetime(2026, 3, 1, 8, 30, 0, 123456, tzinfo=timezone.utc)
+    item = SimpleNamespace(id=pid, updated_at=ts)
+    cursor = encode_cursor(item, 'updated_at', 'desc')  # type: ignore[arg-type]
+    assert decode_cursor(cursor, 'updated_at', 'desc') == (ts, pid)
+
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'updated_at', 'asc')
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor', 'updated_at', 'desc')
+
+    sql = _sql(_keyset_filter('updated_at', 'desc', ts, pid))
+    assert '(products.updated_at, products.id) <' in sql
+    assert 'offset' not in sql
+
+
+def test_asc_keyset_filter_carries_index_range_bound() -> None:
+    import uuid
+    from datetime import date
+
+    from app.repositories.products import _keyset_filter
+
+    pid = uuid.uuid4()
+    sql = _sql(_keyset_filter('approved_date', 'asc', date(2025, 1, 1), pid))
+    # Redundant lower bound lets Postgres start the (approved_date ASC, id DESC) scan at the cursor.
+    assert 'products.approved_date >=' in sql
+    assert 'products.id <' in sql
+    assert 'products.approved_date is null' in sql
+
+    null_tail = _sql(_keyset_filter('approved_date', 'asc', None, pid))
+    assert 'products.approved_date is null and products.id <' in null_tail
+
+
+def test_cached_total_mode_reuses_count_within_ttl() -> None:
+    from app.repositories import products as repo
+
+    class _CountDB:
+        def __init__(self) -> None:
+            self.counts = 0
+
+        def scalar(self, _stmt):
+            self.counts += 1
+            return 42
+
+    repo._search_count_cache.clear()
+    db = _CountDB()
+    stmt = build_search_query('试剂', None, None, None)
+    filters = {'q': '试剂', 'company': None}
+    assert repo._count_total(db, stmt, scope='search', filters=filters, total_mode='cached') == 42  # type: ignore[arg-type]
+    assert repo._count_total(db, stmt, scope='search', filters=filters, total_mode='cached') == 42  # type: ignore[arg-type]
+    assert db.counts == 1
+    repo._count_total(db, stmt, scope='search', filters=filters, total_mode='exact')  # type: ignore[arg-type]
+    assert db.counts == 2
+
+
+def test_cursor_pages_default_to_cached_total() -> None:
+    from app.repositories.products import _resolve_total_mode
+
+    assert _resolve_total_mode(None, None) == 'exact'
+    assert _resolve_total_mode(None, 'abc') == 'cached'
+    assert _resolve_total_mode('exact', 'abc') == 'exact'
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import uuid
+from types import SimpleNamespace
+
+from app.services import reclassify_ivd as rc
+from app.services.ivd_classifier import VERSION
+
+
+class _FakeDB:
+    def __init__(self) -> None:
+        self.updates: list[dict] = []
+        self.commits = 0
+
+    def bulk_update_mappings(self, _model, rows) -> None:
+        self.updates.extend(rows)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def _row(name: str, code: str, **kw) -> SimpleNamespace:
+    base = dict(
+        id=uuid.uuid4(),
+        name=name,
+        class_name=code,
+        raw_json={},
+        is_ivd=None,
+        ivd_category=None,
+        ivd_subtypes=None,
+        ivd_reason=None,
+        ivd_version=1,
+        ivd_input_sha=None,
+    )
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def _patch(monkeypatch, rows: list[SimpleNamespace], checkpoint: dict) -> None:
+    rows = sorted(rows, key=lambda r: r.id)
+
+    def _iter_batches(_db, *, batch_size, start_after):
+        todo = [r for r in rows if start_after is None or r.id > start_after]
+        for i in range(0, len(todo), batch_size):
+            yield todo[i : i + batch_size]
+
+    monkeypatch.setattr(rc, '_iter_batches', _iter_batches)
+    monkeypatch.setattr(rc, 'get_checkpoint', lambda _db, name: checkpoint.get(name))
+    monkeypatch.setattr(rc, 'set_checkpoint', lambda _db, *, job_name, cursor, meta=None: checkpoint.update({job_name: cursor}))
+
+
+def test_reclassify_writes_fingerprint_and_changed_only_skips(monkeypatch) -> None:
+    rows = [_row('乙肝检测试剂盒', '2201'), _row('医用离心机', '07'), _row('血球分析仪', '0701')]
+    checkpoint: dict = {}
+    _patch(monkeypatch, rows, checkpoint)
+    db = _FakeDB()
+
+    res = rc.run_reclassify_ivd(db, dry_run=False, batch_size=2)  # type: ignore[arg-type]
+    assert res.scanned == 3 and res.updated == 3
+    assert {u['id'] for u in db.updates if u.get('ivd_input_sha')} == {r.id for r in rows}
+    assert checkpoint[f'ivd:reclassify:v{VERSION}'] == ''
+
+    # Simulate persisted state, then change one input.
+    for r in rows:
+        r.ivd_input_sha = rc.input_fingerprint(r.name, r.class_name)
+        r.ivd_version = VERSION
+    rows[1].name = '血凝分析仪'
+    res2 = rc.run_reclassify_ivd(_FakeDB(), dry_run=True, batch_size=2, changed_only=True)  # type: ignore[arg-type]
+    assert res2.scanned == 3
+    assert res2.skipped_unchanged == 2
+    assert res2.ivd_true + res2.ivd_false == 1
+
+
+def test_reclassify_resumes_after_checkpoint(monkeypatch) -> None:
+    rows = sorted([_row(f'检测试剂盒{i}', '22') for i in range(5)], key=lambda r: r.id)
+    checkpoint = {f'ivd:reclassify:v{VERSION}': str(rows[2].id)}
+    _patch(monkeypatch, rows, checkpoint)
+
+    res = rc.run_reclassify_ivd(_FakeDB(), dry_run=False, batch_size=10, resume=True)  # type: ignore[arg-type]
+    assert res.resumed_from == str(rows[2].id)
+    assert res.scanned == 2
+    assert res.final_cursor == str(rows[-1].id)
+
+
+def test_reclassify_parallel_matches_serial(monkeypatch) -> None:
+    names = ['乙肝检测试剂盒', '医用离心机', 'LIS系统', '全自动生化分析仪', 'PCR 试剂', '普通手术器械']
+    rows = [_row(n, c) for n in names for c in ('', '22', '07', '21')]
+    _patch(monkeypatch, rows, {})
+
+    serial = rc.run_reclassify_ivd(_FakeDB(), dry_run=True, batch_size=5)  # type: ignore[arg-type]
+    parallel = rc.run_reclassify_ivd(_FakeDB(), dry_run=True, batch_size=5, workers=2)  # type: ignore[arg-type]
+    assert parallel == serial
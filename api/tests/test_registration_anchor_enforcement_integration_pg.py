@@ -89,8 +89,8 @@ def test_missing_registration_no_goes_raw_plus_pending_only(monkeypatch) -> None
         _seed_source(db, source_key)
         try:
             monkeypatch.setattr(
-                "app.services.ingest_runner._fetch_rows_from_runtime",
-                lambda _cfg: [{"di": missing_di, "status": "ACTIVE", "product_name": "missing reg sample"}],
+                "app.services.ingest_runner._iter_row_pages_from_runtime",
+                lambda _cfg: iter([[{"di": missing_di, "status": "ACTIVE", "product_name": "missing reg sample"}]]),
             )
             stats = run_source_by_key(db, source_key=source_key, execute=True)
             run_id = int(stats.source_run_id or 0)
@@ -166,8 +166,8 @@ def test_missing_registration_no_document_only_mode_writes_pending_documents_not
         _seed_source(db, source_key)
         try:
             monkeypatch.setattr(
-                "app.services.ingest_runner._fetch_rows_from_runtime",
-                lambda _cfg: [{"di": missing_di, "status": "ACTIVE", "product_name": "missing reg sample"}],
+                "app.services.ingest_runner._iter_row_pages_from_runtime",
+                lambda _cfg: iter([[{"di": missing_di, "status": "ACTIVE", "product_name": "missing reg sample"}]]),
             )
             stats = run_source_by_key(db, source_key=source_key, execute=True)
             run_id = int(stats.source_run_id or 0)
@@ -212,8 +212,8 @@ def test_with_registration_no_upserts_registration_before_variant(monkeypatch) -
         _seed_source(db, source_key)
         try:
             monkeypatch.setattr(
-                "app.services.ingest_runner._fetch_rows_from_runtime",
-                lambda _cfg: [{"registration_no": reg_no, "di": di, "status": "ACTIVE", "product_name": "anchored sample"}],
+                "app.services.ingest_runner._iter_row_pages_from_runtime",
+                lambda _cfg: iter([[{"registration_no": reg_no, "di": di, "status": "ACTIVE", "product_name": "anchored sample"}]]),
             )
             stats = run_source_by_key(db, source_key=source_key, execute=True)
 
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+from app.services import signals_v1
+
+
+class _Result:
+    def __init__(self, rows) -> None:
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _FakeDB:
+    def __init__(self, reg_rows, company_ids) -> None:
+        self.reg_rows = reg_rows
+        self.company_ids = company_ids
+        self.sql: list[str] = []
+
+    def get_bind(self):
+        return None
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.sql.append(sql)
+        if 'FROM registrations r' in sql:
+            return _Result(self.reg_rows)
+        if 'FROM companies' in sql and 'WITH anchor' not in sql:
+            if 'companies.id >' in sql:
+                return _Result([])
+            return _Result([(cid,) for cid in self.company_ids])
+        raise AssertionError(sql)
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+
+def test_compute_signals_scans_registrations_once_and_batches_missing_start_dates(monkeypatch) -> None:
+    as_of = date(2026, 3, 1)
+    reg_rows = [
+        # id, registration_no, status, expiry_date, track_id, company_id, country, renewals, cancelled
+        ('r1', 'A1', 'active', date(2026, 4, 1), 'pcr', 'c1', 'CN', 0, False),
+        ('r2', 'A2', 'active', date(2027, 4, 1), 'pcr', 'c1', 'China', 1, False),
+        ('r3', 'A3', '注销', None, 'pcr', 'c2', 'US', 0, True),
+        ('r4', 'A4', 'active', None, None, None, None, 0, False),
+    ]
+    db = _FakeDB(reg_rows, ['c1', 'c2'])
+    start_map_calls: list[list[str] | None] = []
+
+    def _start_dates(_db, *, as_of_date, registration_nos=None, columns_map=None):
+        start_map_calls.append(registration_nos)
+        if registration_nos is None:
+            return {'A1': (date(2025, 6, 1), 'registrations.approval_date')}, {}
+        return {'A2': (date(2020, 1, 1), 'registrations.created_at')}, {}
+
+    written: list[dict] = []
+    monkeypatch.setattr(signals_v1, 'detect_time_columns', lambda _bind: {})
+    monkeypatch.setattr(signals_v1, 'get_registration_start_date_map', _start_dates)
+    monkeypatch.setattr(signals_v1, '_upsert_signals_bulk', lambda _db, rows: written.extend(rows))
+
+    res = signals_v1.compute_signals_v1(db, as_of=as_of, batch_size=2)
+
+    assert (res.registration_count, res.track_count, res.company_count) == (4, 1, 2)
+    assert sum('FROM registrations r' in sql for sql in db.sql) == 1
+    # The full map plus one batched lookup for the registrations it missed.
+    assert start_map_calls == [None, ['A2', 'A3', 'A4']]
+
+    by_key = {(r['entity_type'], r['entity_id']): r for r in written}
+    reg_factors = {f['name']: f['value'] for f in by_key[('registration', 'A1')]['factors']}
+    assert reg_factors == {'days_to_expiry': 31, 'has_renewal_history': False, 'competition_density': 2}
+    assert by_key[('registration', 'A2')]['factors'][1]['value'] is True
+
+    track_factors = {f['name']: f['value'] for f in by_key[('track', 'pcr')]['factors']}
+    assert track_factors == {'total_count': 2, 'new_rate_12m': 0.5, 'domestic_ratio': 1.0}
+
+    c1 = {f['name']: f['value'] for f in by_key[('company', 'c1')]['factors']}
+    c2 = {f['name']: f['value'] for f in by_key[('company', 'c2')]['factors']}
+    assert (c1['new_registrations_12m'], c1['new_tracks_12m']) == (1, 1)
+    assert c2['growth_slope'] == round(-1 / 12.0, 4)
+
+
+def test_incremental_compute_carries_forward_and_recomputes_touched_entities(monkeypatch) -> None:
+    as_of = date(2026, 3, 2)
+    reg_rows = [
+        ('r1', 'A1', 'active', date(2026, 5, 31), 'pcr', 'c1', 'CN', 0, False),  # 90 days out: crossed a band
+        ('r2', 'A2', 'active', date(2028, 1, 1), 'pcr', 'c1', 'CN', 0, False),
+        ('r3', 'A3', 'active', date(2028, 1, 1), 'elisa', 'c2', 'CN', 0, False),  # touched
+        ('r4', 'A4', 'active', date(2028, 1, 1), 'elisa', 'c3', 'CN', 0, False),
+    ]
+    db = _FakeDB(reg_rows, [])
+    carried: list[tuple[date, date]] = []
+    written: list[dict] = []
+    monkeypatch.setattr(signals_v1, 'detect_time_columns', lambda _bind: {})
+    monkeypatch.setattr(
+        signals_v1,
+        'get_registration_start_date_map',
+        lambda _db, **_kw: ({n: (date(2020, 1, 1), 'registrations.approval_date') for n in ('A1', 'A2', 'A3', 'A4')}, {}),
+    )
+    monkeypatch.setattr(signals_v1, '_upsert_signals_bulk', lambda _db, rows: written.extend(rows))
+    monkeypatch.setattr(
+        signals_v1,
+        '_carry_forward_signals',
+        lambda _db, *, window, prev_as_of, as_of: carried.append((prev_as_of, as_of)) or 10,
+    )
+    monkeypatch.setattr(signals_v1, '_touched_registration_ids', lambda _db, *, since, as_of: {'r3'})
+    monkeypatch.setattr(signals_v1, '_previous_track_totals', lambda _db, *, window, as_of: {'pcr': 2, 'elisa': 2})
+    monkeypatch.setattr(
+        signals_v1,
+        '_entities_missing_signal',
+        lambda _db, *, entity_type, window, as_of: ({'c9'} if entity_type == 'company' else set()),
+    )
+
+    res = signals_v1.compute_signals_v1(db, as_of=as_of, incremental_since=date(2026, 3, 1))
+
+    assert (res.mode, res.carried_forward) == ('incremental', 10)
+    assert carried == [(date(2026, 3, 1), as_of)]
+    assert sorted(r['entity_id'] for r in written if r['entity_type'] == 'registration') == ['A1', 'A3']
+    assert sorted(r['entity_id'] for r in written if r['entity_type'] == 'track') == ['elisa', 'pcr']
+    assert sorted(r['entity_id'] for r in written if r['entity_type'] == 'company') == ['c1', 'c2', 'c9']
+    # Company ids come from the target set, not a keyset scan of companies.
+    assert not any('FROM companies' in sql and 'WITH anchor' not in sql for sql in db.sql)
+
+    # A track whose active count moved recomputes every registration in it.
+    written.clear()
+    monkeypatch.setattr(signals_v1, '_previous_track_totals', lambda _db, *, window, as_of: {'pcr': 2, 'elisa': 3})
+    signals_v1.compute_signals_v1(db, as_of=as_of, incremental_since=date(2026, 3, 1))
+    assert sorted(r['entity_id'] for r in written if r['entity_type'] == 'registration') == ['A1', 'A3', 'A4']
+
+
+def test_carry_forward_skips_tracks() -> None:
+    captured: list[tuple[str, dict]] = []
+
+    class _CaptureDB:
+        def execute(self, stmt, params=None):
+            captured.append((str(stmt), params))
+            return SimpleNamespace(rowcount=4)
+
+    n = signals_v1._carry_forward_signals(_CaptureDB(), window='12m', prev_as_of=date(2026, 3, 1), as_of=date(2026, 3, 3))  # type: ignore[arg-type]
+
+    assert n == 4
+    sql, params = captured[0]
+    assert "s.entity_type IN ('registration', 'company')" in sql
+    assert params['shift'] == 2
@@ -99,3 +99,60 @@ def test_udi_device_index_upsert_from_xml() -> None:
             assert pack[0]["contains_qty"] == 10
             assert stor[0]["range"] == "2-8℃"
 
+
+
+@pytest.mark.integration
+def test_udi_device_index_bulk_mode_matches_row_mode_counters() -> None:
+    url = require_it_db_url()
+    engine = create_engine(url, pool_pre_ping=True)
+    with engine.begin() as conn:
+        apply_sql_migrations(conn)
+
+    tag = uuid4().hex[:8]
+    di_a = f"0694222170A{tag}"
+    di_b = f"0694222170B{tag}"
+
+    def _device(di: str, name: str) -> str:
+        return f"""
+        <device>
+          <zxxsdycpbs>{di}</zxxsdycpbs>
+          <zczbhhzbapzbh>国械注准20240001{tag}</zczbhhzbapzbh>
+          <sfyzcbayz>是</sfyzcbayz>
+          <cpmctymc>{name}</cpmctymc>
+          <storageList><storage><cchcztj>冷藏</cchcztj><zdz>2</zdz><zgz>8</zgz><jldw>℃</jldw></storage></storageList>
+        </device>
+        """
+
+    with tempfile.TemporaryDirectory() as td:
+        # Duplicate DI across files: the later device must win, like the row-by-row upsert.
+        (Path(td) / "a.xml").write_text(
+            f"<udid><devices>{_device(di_a, 'old')}{_device(di_b, 'b')}</devices></udid>", encoding="utf-8"
+        )
+        (Path(td) / "b.xml").write_text(f"<udid><devices>{_device(di_a, 'new')}</devices></udid>", encoding="utf-8")
+
+        with Session(engine) as db:
+            row_rep = run_udi_device_index(
+                db, staging_dir=Path(td), raw_document_id=None, source_run_id=None, dry_run=True
+            )
+            bulk_rep = run_udi_device_index(
+                db,
+                staging_dir=Path(td),
+                raw_document_id=None,
+                source_run_id=None,
+                dry_run=False,
+                bulk=True,
+                batch_size=2,
+                commit_every=1,
+            )
+            assert bulk_rep.total_devices == row_rep.total_devices == 3
+            assert bulk_rep.di_present == row_rep.di_present == 3
+            assert bulk_rep.storage_present == row_rep.storage_present == 3
+            assert bulk_rep.upserted == 3
+
+            names = dict(
+                db.execute(
+                    text("SELECT di_norm, product_name FROM udi_device_index WHERE di_norm IN (:a, :b)"),
+                    {"a": di_a, "b": di_b},
+                ).all()
+            )
+            assert names == {di_a: "new", di_b: "b"}
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.services import udi_index, udi_products_enrich
+from app.services.udi_index import iter_device_index_chunks, run_udi_device_index
+
+
+def _write_parts(root: Path) -> None:
+    for part in range(1, 5):
+        devices = []
+        for i in range(3):
+            di = f"0697{part:02d}{i:04d}" if i != 2 else ""
+            devices.append(
+                f"""
+                <device>
+                  <zxxsdycpbs>{di}</zxxsdycpbs>
+                  <zczbhhzbapzbh>国械注准2024{part}{i}</zczbhhzbapzbh>
+                  <sfyzcbayz>{'是' if i == 0 else '否'}</sfyzcbayz>
+                  <storageList><storage><cchcztj>冷藏</cchcztj><zdz>2</zdz><zgz>8</zgz><jldw>℃</jldw></storage></storageList>
+                </device>
+                """
+            )
+        (root / f"UDID_FULL_PART{part}_Of_4.xml").write_text(
+            "<udid><devices>" + "".join(devices) + "</devices></udid>", encoding="utf-8"
+        )
+    (root / "UDID_FULL_PART5_Of_5.xml").write_text("<udid><devices><device>", encoding="utf-8")
+
+
+def _counters(rep) -> tuple:
+    return (
+        rep.files_total,
+        rep.files_seen,
+        rep.files_failed,
+        rep.total_devices,
+        rep.di_present,
+        rep.reg_present,
+        rep.has_cert_yes,
+        rep.storage_present,
+        len(rep.sample_storage_json),
+    )
+
+
+def test_parallel_dry_run_report_matches_serial(tmp_path: Path) -> None:
+    _write_parts(tmp_path)
+    kwargs = dict(staging_dir=tmp_path, raw_document_id=None, source_run_id=None, dry_run=True, part_from=2, part_to=5)
+
+    serial = run_udi_device_index(None, **kwargs)
+    parallel = run_udi_device_index(None, workers=2, **kwargs)
+
+    assert _counters(parallel) == _counters(serial)
+    assert serial.files_seen == 4
+    assert serial.files_failed == 1
+    assert serial.total_devices == 9
+    assert serial.di_present == 6
+    assert [e["file"] for e in parallel.file_errors] == [e["file"] for e in serial.file_errors]
+
+
+def test_parallel_dry_run_honours_global_device_limit(tmp_path: Path) -> None:
+    _write_parts(tmp_path)
+    kwargs = dict(staging_dir=tmp_path, raw_document_id=None, source_run_id=None, dry_run=True, limit=5)
+
+    serial = run_udi_device_index(None, **kwargs)
+    parallel = run_udi_device_index(None, workers=3, **kwargs)
+
+    assert serial.total_devices == 5
+    assert _counters(parallel) == _counters(serial)
+
+
+def test_parallel_parse_keeps_at_most_workers_files_in_flight(tmp_path: Path, monkeypatch) -> None:
+    _write_parts(tmp_path)
+    in_flight: list[int] = []
+
+    class _Future:
+        def __init__(self, value) -> None:
+            self.value = value
+
+        def result(self):
+            in_flight.append(pool.submitted - pool.consumed)
+            pool.consumed += 1
+            return self.value
+
+    class _Pool:
+        def __init__(self, **_kw) -> None:
+            self.submitted = self.consumed = 0
+
+        def submit(self, fn, *args):
+            self.submitted += 1
+            return _Future(fn(*args))
+
+        def shutdown(self, **_kw) -> None:
+            return None
+
+    pool = _Pool()
+    monkeypatch.setattr(udi_index, "ProcessPoolExecutor", lambda **kw: pool)
+    files = sorted(tmp_path.glob("*.xml"))
+
+    out = list(
+        udi_index._iter_parsed_files_parallel(
+            files, workers=2, raw_document_id=None, source_run_id=None, max_devices_per_file=None
+        )
+    )
+
+    assert len(out) == 5 and pool.submitted == 5
+    assert max(in_flight) == 2
+
+
+class _Result:
+    def __init__(self, rows: list[dict]) -> None:
+        self._rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self) -> list[dict]:
+        return self._rows
+
+
+class _IndexDB:
+    """Serves a sorted in-memory udi_device_index for the keyset SQL built by iter_device_index_chunks."""
+
+    def __init__(self, dis: list[str]) -> None:
+        self.dis = sorted(dis)
+        self.calls: list[tuple[str, dict]] = []
+        self.commits = 0
+
+    def execute(self, stmt, params=None):
+        params = dict(params or {})
+        self.calls.append((str(stmt), params))
+        dis = [d for d in self.dis if not params.get("cursor") or d > params["cursor"]]
+        return _Result([{"di_norm": d, "registration_no_norm": f"REG-{d}"} for d in dis[: params["lim"]]])
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def test_iter_device_index_chunks_walks_keyset_and_honours_limit() -> None:
+    db = _IndexDB([f"DI{i:03d}" for i in range(7)])
+    base = "SELECT udi.di_norm FROM udi_device_index udi WHERE udi.di_norm IS NOT NULL"
+
+    chunks = list(iter_device_index_chunks(db, select_sql=base, batch_size=3))
+    assert [[r["di_norm"] for r in c] for c in chunks] == [
+        ["DI000", "DI001", "DI002"],
+        ["DI003", "DI004", "DI005"],
+        ["DI006"],
+    ]
+    assert "cursor" not in db.calls[0][1]
+    assert db.calls[1][1]["cursor"] == "DI002"
+    assert all(sql.endswith("ORDER BY udi.di_norm LIMIT :lim") for sql, _ in db.calls)
+
+    db.calls.clear()
+    limited = list(iter_device_index_chunks(db, select_sql=base, batch_size=3, limit=4, cursor="DI001"))
+    assert [r["di_norm"] for c in limited for r in c] == ["DI002", "DI003", "DI004", "DI005"]
+    assert [p["lim"] for _, p in db.calls] == [3, 1]
+
+
+def test_products_enrich_checkpoints_each_chunk_and_resumes(monkeypatch) -> None:
+    db = _IndexDB([f"DI{i:03d}" for i in range(5)])
+    saved: list[str] = []
+    seen: list[list[str]] = []
+    monkeypatch.setattr(udi_products_enrich, "get_checkpoint", lambda _db, job: "DI001")
+    monkeypatch.setattr(
+        udi_products_enrich, "set_checkpoint", lambda _db, *, job_name, cursor, meta: saved.append(cursor)
+    )
+    monkeypatch.setattr(
+        udi_products_enrich,
+        "_enrich_chunk",
+        lambda _db, rows, **kw: seen.append([r["di_norm"] for r in rows]),
+    )
+
+    rep = udi_products_enrich.enrich_products_from_udi_device_index(db, dry_run=False, batch_size=2, resume=True)
+
+    assert rep.resumed_from == "DI001"
+    assert seen == [["DI002", "DI003"], ["DI004"]]
+    assert (rep.scanned, rep.batches, rep.final_cursor) == (3, 2, "DI004")
+    assert saved == ["DI003", "DI004", ""]
+    assert db.commits == 3
+
+    # A run cut short by --limit keeps its cursor so --resume continues after it.
+    saved.clear()
+    seen.clear()
+    rep = udi_products_enrich.enrich_products_from_udi_device_index(db, dry_run=False, batch_size=2, limit=2, resume=True)
+    assert seen == [["DI002", "DI003"]]
+    assert saved == ["DI003"]
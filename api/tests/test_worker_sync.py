@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import zipfile
 from pathlib import Path
 from types import SimpleNamespace
@@ -87,13 +88,13 @@ def test_sync_nmpa_ivd_success_with_mock(monkeypatch, tmp_path: Path) -> None:
     archive = tmp_path / 'mock.zip'
     _make_zip(archive)
 
-    def _download(_url, destination: Path):
+    def _download(_url, destination: Path, algorithms):
         destination.parent.mkdir(parents=True, exist_ok=True)
         destination.write_bytes(archive.read_bytes())
-        return destination
+        return destination, {a: hashlib.new(a, archive.read_bytes()).hexdigest() for a in algorithms}
 
-    monkeypatch.setattr(sync, 'download_file', _download)
-    monkeypatch.setattr(sync, 'load_staging_records', lambda _p: [{'name': 'A', 'udi_di': 'U1'}])
+    monkeypatch.setattr(sync, 'download_file_with_hashes', _download)
+    monkeypatch.setattr(sync, 'iter_staging_records', lambda _p: iter([{'name': 'A', 'udi_di': 'U1'}]))
     monkeypatch.setattr(
         sync,
         'ingest_staging_records',
@@ -120,6 +121,44 @@ def test_sync_nmpa_ivd_success_with_mock(monkeypatch, tmp_path: Path) -> None:
     assert (tmp_path / 'staging' / 'run_1' / 'extracted' / 'mock.txt').exists()
 
 
+def test_sync_nmpa_ivd_does_not_rerun_ingest_after_mid_stream_type_error(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(sync, 'get_settings', lambda: SimpleNamespace(staging_dir=str(tmp_path / 'staging')))
+    monkeypatch.setattr(sync, 'SessionLocal', lambda: FakeDB())
+    monkeypatch.setattr(
+        sync,
+        'start_source_run',
+        lambda db, source, package_name, package_md5, download_url: SimpleNamespace(
+            id=3, package_name=package_name, package_md5=package_md5, download_url=download_url
+        ),
+    )
+    finished = []
+    monkeypatch.setattr(sync, 'finish_source_run', lambda db, run, status, *_a, **_k: finished.append(status) or run)
+
+    archive = tmp_path / 'mock.zip'
+    _make_zip(archive)
+
+    def _download(_url, destination: Path, algorithms):
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_bytes(archive.read_bytes())
+        return destination, {a: hashlib.new(a, archive.read_bytes()).hexdigest() for a in algorithms}
+
+    monkeypatch.setattr(sync, 'download_file_with_hashes', _download)
+    monkeypatch.setattr(sync, 'iter_staging_records', lambda _p: iter([{'name': 'A', 'udi_di': 'U1'}]))
+    calls = []
+
+    def _ingest(_db, _records, _run_id, **kwargs):
+        calls.append(kwargs)
+        raise TypeError('bad record after the first committed chunk')
+
+    monkeypatch.setattr(sync, 'ingest_staging_records', _ingest)
+
+    result = sync.sync_nmpa_ivd(package_url='https://example.com/mock.zip')
+
+    assert result.status == 'failed'
+    assert finished == ['failed']
+    assert len(calls) == 1 and 'raw_document_id' in calls[0]
+
+
 def test_sync_nmpa_ivd_failed_records_source_run(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.setattr(sync, 'get_settings', lambda: SimpleNamespace(staging_dir=str(tmp_path / 'staging')))
     monkeypatch.setattr(sync, 'SessionLocal', lambda: FakeDB())
@@ -154,10 +193,10 @@ def test_sync_nmpa_ivd_failed_records_source_run(monkeypatch, tmp_path: Path) ->
 
     monkeypatch.setattr(sync, 'finish_source_run', _finish)
 
-    def _download(_url, _destination):
+    def _download(_url, _destination, _algorithms):
         raise RuntimeError('download error')
 
-    monkeypatch.setattr(sync, 'download_file', _download)
+    monkeypatch.setattr(sync, 'download_file_with_hashes', _download)
 
     result = sync.sync_nmpa_ivd(package_url='https://example.com/mock.zip')
 
@@ -0,0 +1,5 @@
+-- 0050: fingerprint of IVD classifier inputs for changed-only reclassify_ivd runs
+-- Idempotent
+
+ALTER TABLE products
+    ADD COLUMN IF NOT EXISTS ivd_input_sha VARCHAR(64) NULL;
@@ -0,0 +1,12 @@
+-- 0051: keyword -> parsed hints cache for the NMPA query supplement (avoid re-querying across runs)
+-- Idempotent
+
+CREATE TABLE IF NOT EXISTS nmpa_query_cache (
+    keyword TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    hints JSONB NOT NULL DEFAULT '{}'::jsonb,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_nmpa_query_cache_fetched_at
+    ON nmpa_query_cache (fetched_at DESC);
@@ -0,0 +1,8 @@
+-- 0052: maintained normalized company name on products (indexed key for company alias rebinds)
+-- Idempotent. Populate existing rows once with: python -m app.workers.cli company:norm-backfill
+
+ALTER TABLE products
+    ADD COLUMN IF NOT EXISTS company_name_norm VARCHAR(255) NULL;
+
+CREATE INDEX IF NOT EXISTS idx_products_company_name_norm
+    ON products (company_name_norm);
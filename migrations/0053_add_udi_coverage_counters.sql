@@ -0,0 +1,11 @@
+-- 0053: global UDI coverage counters (single row), maintained by the index/promote/contract writers
+-- Idempotent. Seeded on first use; reconcile with: python -m app.workers.cli metrics:udi-coverage-refresh
+
+CREATE TABLE IF NOT EXISTS udi_coverage_counters (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    master_di_count BIGINT NOT NULL DEFAULT 0,
+    index_di_count BIGINT NOT NULL DEFAULT 0,
+    mapped_di_count BIGINT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,50 @@
+-- 0054: latest LRI score per (model_version, registration) for the dashboard map/top endpoints
+-- Idempotent. Maintained at the end of compute_lri_v1; rebuild with: python -m app.workers.cli lri:latest-refresh
+
+CREATE TABLE IF NOT EXISTS lri_scores_latest (
+    model_version VARCHAR(40) NOT NULL,
+    registration_id UUID NOT NULL REFERENCES registrations(id),
+    score_id UUID NOT NULL,
+    product_id UUID NULL REFERENCES products(id),
+    methodology_id UUID NULL REFERENCES methodology_master(id),
+    tte_days INTEGER NULL,
+    competitive_count INTEGER NOT NULL DEFAULT 0,
+    gp_new_12m INTEGER NOT NULL DEFAULT 0,
+    tte_score INTEGER NOT NULL DEFAULT 0,
+    rh_score INTEGER NOT NULL DEFAULT 0,
+    cd_score INTEGER NOT NULL DEFAULT 0,
+    gp_score INTEGER NOT NULL DEFAULT 0,
+    lri_norm NUMERIC(8, 4) NOT NULL DEFAULT 0,
+    risk_level VARCHAR(20) NOT NULL,
+    calculated_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (model_version, registration_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_lri_scores_latest_rank
+    ON lri_scores_latest (model_version, lri_norm DESC NULLS LAST, calculated_at DESC);
+
+-- One row per model_version; refreshed_at changes on every refresh and keys the API result cache.
+CREATE TABLE IF NOT EXISTS lri_scores_latest_state (
+    model_version VARCHAR(40) PRIMARY KEY,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    row_count INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO lri_scores_latest (
+    model_version, registration_id, score_id, product_id, methodology_id,
+    tte_days, competitive_count, gp_new_12m, tte_score, rh_score, cd_score, gp_score,
+    lri_norm, risk_level, calculated_at
+)
+SELECT DISTINCT ON (s.model_version, s.registration_id)
+    s.model_version, s.registration_id, s.id, s.product_id, s.methodology_id,
+    s.tte_days, s.competitive_count, s.gp_new_12m, s.tte_score, s.rh_score, s.cd_score, s.gp_score,
+    s.lri_norm, s.risk_level, s.calculated_at
+FROM lri_scores s
+ORDER BY s.model_version, s.registration_id, s.calculated_at DESC, s.id ASC
+ON CONFLICT (model_version, registration_id) DO NOTHING;
+
+INSERT INTO lri_scores_latest_state (model_version, refreshed_at, row_count)
+SELECT model_version, NOW(), COUNT(1)
+FROM lri_scores_latest
+GROUP BY model_version
+ON CONFLICT (model_version) DO NOTHING;
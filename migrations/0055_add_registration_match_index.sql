@@ -0,0 +1,21 @@
+-- 0055: per-registration search text for procurement lot matching (trigram GIN indexed)
+-- Idempotent. Refreshed incrementally at the start of every procurement:ingest;
+-- rebuild with: python -m app.workers.cli procurement:match-index-refresh --full
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- search_text: lower-cased product names + models + methodology names/synonyms of the registration.
+CREATE TABLE IF NOT EXISTS registration_match_index (
+    registration_id UUID PRIMARY KEY REFERENCES registrations(id) ON DELETE CASCADE,
+    search_text TEXT NOT NULL DEFAULT '',
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_registration_match_index_search_trgm
+    ON registration_match_index USING GIN (search_text gin_trgm_ops);
+
+-- Single row: watermark of the last refresh (rows changed after it are re-derived on the next refresh).
+CREATE TABLE IF NOT EXISTS registration_match_index_state (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,14 @@
+-- 0056: btree indexes matching product search keyset paging (repositories/products.py _order_by).
+-- Pages are ordered by (sort_col ASC|DESC, id DESC), so each direction needs its own index: a
+-- backward scan of (col DESC, id DESC) yields id ASC within ties. Postgres' default NULL placement
+-- (NULLS FIRST for DESC, NULLS LAST for ASC) matches the ORDER BY and _keyset_filter.
+-- Idempotent.
+
+CREATE INDEX IF NOT EXISTS idx_products_updated_at_desc_id ON products (updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_updated_at_asc_id ON products (updated_at ASC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_approved_date_desc_id ON products (approved_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_approved_date_asc_id ON products (approved_date ASC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_expiry_date_desc_id ON products (expiry_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_expiry_date_asc_id ON products (expiry_date ASC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_name_desc_id ON products (name DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_products_name_asc_id ON products (name ASC, id DESC);
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Records/sec of classify_ivd: compiled keyword automaton vs the legacy per-keyword regex scan.
+
+The legacy path is reproduced by swapping the automaton for a lazy per-keyword checker, so the
+same classify_ivd control flow is timed. Outputs are asserted identical before timing.
+
+    ./venv/bin/python scripts/bench_ivd_classifier.py --records 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+API_DIR = REPO_ROOT / "api"
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from app.services import ivd_classifier, ivd_dictionary  # noqa: E402
+
+
+class _LegacyHits:
+    """Answers `kw in hits` with the pre-automaton regex check, one keyword at a time."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __contains__(self, kw_norm: str) -> bool:
+        if re.fullmatch(r"[a-z0-9\\-]+", kw_norm):
+            return re.search(rf"(?<![a-z0-9]){re.escape(kw_norm)}(?![a-z0-9])", self.text) is not None
+        return kw_norm in self.text
+
+
+class _LegacyMatcher:
+    def find(self, text: str) -> _LegacyHits:
+        return _LegacyHits(text)
+
+
+def _corpus(n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    vocab = sorted(
+        {kw for k, v in vars(ivd_dictionary).items() if k.isupper() and isinstance(v, tuple) for kw in v}
+    ) + ["全自动", "测定", "系统", "一次性", "医用", "ELISA", "型", "(", ")", "-", " "]
+    codes = ["2201", "6840", "0701", "2101", "", "", "0901", "1101"]
+    return [
+        {
+            "classification_code": rng.choice(codes),
+            "name": "".join(rng.choice(vocab) for _ in range(rng.randint(2, 7))),
+            "model": rng.choice(["", "A-100", "XS-1000i", "qPCR-96"]),
+            "specification": rng.choice(["", "96人份/盒", "50T"]),
+            "category": rng.choice(["", "体外诊断试剂", "医疗器械"]),
+        }
+        for _ in range(n)
+    ]
+
+
+def _rate(records: list[dict]) -> float:
+    t0 = time.perf_counter()
+    for rec in records:
+        ivd_classifier.classify_ivd(rec)
+    return len(records) / max(time.perf_counter() - t0, 1e-9)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Benchmark IVD keyword classifier (legacy scan vs compiled automaton).")
+    p.add_argument("--records", type=int, default=20000, help="Synthetic records to classify.")
+    p.add_argument("--seed", type=int, default=20260217)
+    return p
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    records = _corpus(int(args.records), int(args.seed))
+
+    compiled = ivd_classifier._compiled_matcher
+    new_out = [ivd_classifier.classify_ivd(r) for r in records]
+    ivd_classifier._compiled_matcher = lambda *a, **k: _LegacyMatcher()  # type: ignore[assignment]
+    try:
+        legacy_out = [ivd_classifier.classify_ivd(r) for r in records]
+        legacy_rate = _rate(records)
+    finally:
+        ivd_classifier._compiled_matcher = compiled  # type: ignore[assignment]
+    if new_out != legacy_out:
+        raise SystemExit("classify_ivd output differs between legacy and compiled matcher")
+    compiled_rate = _rate(records)
+
+    print(
+        json.dumps(
+            {
+                "records": len(records),
+                "identical_output": True,
+                "legacy_records_per_sec": round(legacy_rate, 1),
+                "compiled_records_per_sec": round(compiled_rate, 1),
+                "speedup": round(compiled_rate / legacy_rate, 2) if legacy_rate else None,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Compare legacy OR/ILIKE product search against the indexed UNION query.
+
+Also EXPLAINs a deep keyset (cursor) page for every sort_by/sort_order and checks that it is
+served by the matching (sort_col, id DESC) index from migration 0056 without a Sort node.
+
+Seeds synthetic companies/products inside a transaction that is always rolled back,
+so it is safe to point at a dev database. Example:
+
+    ./venv/bin/python scripts/bench_product_search.py --rows 200000 --repeat 20
+    ./venv/bin/python scripts/bench_product_search.py --check-keyset-plans   # exit 1 on a bad plan
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import func, or_, select, text
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+API_DIR = REPO_ROOT / "api"
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.models import Company, Product  # noqa: E402
+from app.repositories.products import _keyset_filter, _order_by, build_search_query  # noqa: E402
+
+
+DEFAULT_QUERIES = ["试剂盒", "检测", "国械注准2024", "BENCH-DI-0001", "生物科技"]
+KEYSET_SORTS = [(col, order) for col in ("updated_at", "approved_date", "expiry_date", "name") for order in ("desc", "asc")]
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = int(math.ceil((p / 100.0) * len(sorted_values))) - 1
+    return sorted_values[max(0, min(idx, len(sorted_values) - 1))]
+
+
+def _legacy_query(q: str):
+    like = f"%{q}%"
+    return (
+        select(Product)
+        .outerjoin(Company, Product.company_id == Company.id)
+        .where(Product.is_ivd.is_(True))
+        .where(or_(Product.name.ilike(like), Product.udi_di.ilike(like), Product.reg_no.ilike(like), Company.name.ilike(like)))
+        .order_by(Product.updated_at.desc(), Product.id.desc())
+        .limit(20)
+    )
+
+
+def _new_query(q: str):
+    return build_search_query(q, None, None, None, include_unverified=True).order_by(*_order_by("relevance", "desc", q)).limit(20)
+
+
+def _seed(db, rows: int) -> None:
+    n_companies = max(1, rows // 50)
+    db.execute(
+        text(
+            """
+            INSERT INTO companies (id, name, raw_json, raw)
+            SELECT gen_random_uuid(), 'BENCH生物科技有限公司' || g, '{}'::jsonb, '{}'::jsonb
+            FROM generate_series(1, :n) g
+            """
+        ),
+        {"n": n_companies},
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO products (
+                id, udi_di, reg_no, name, status, is_ivd, ivd_category, ivd_version, company_id,
+                approved_date, expiry_date, raw_json, raw
+            )
+            SELECT gen_random_uuid(),
+                   'BENCH-DI-' || lpad(g::text, 8, '0'),
+                   '国械注准' || (2015 + g % 10) || lpad((g % 100000)::text, 7, '0'),
+                   (ARRAY['检测试剂盒', '测定试剂', '质控品', '校准品', '分析仪'])[1 + g % 5] || ' BENCH-' || g,
+                   'ACTIVE', TRUE, 'reagent', 1,
+                   (SELECT id FROM companies WHERE name = 'BENCH生物科技有限公司' || (1 + g % :c)),
+                   DATE '2015-01-01' + (g % 3650),
+                   CASE WHEN g % 7 = 0 THEN NULL ELSE DATE '2020-01-01' + (g % 3650) END,
+                   '{}'::jsonb, '{}'::jsonb
+            FROM generate_series(1, :n) g
+            """
+        ),
+        {"n": rows, "c": n_companies},
+    )
+    db.execute(text("ANALYZE companies"))
+    db.execute(text("ANALYZE products"))
+
+
+def _time(db, build, q: str, repeat: int) -> dict:
+    samples: list[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        db.execute(build(q)).all()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return {"p50_ms": round(_percentile(samples, 50), 2), "p95_ms": round(_percentile(samples, 95), 2)}
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []) or []:
+        yield from _plan_nodes(child)
+
+
+def _keyset_query(db, sort_by: str, sort_order: str):
+    """A cursor page from the middle of the (sort_col, id DESC) walk, i.e. page ~N/2."""
+    base = build_search_query(None, None, None, None, include_unverified=True)
+    total = int(db.scalar(select(func.count()).select_from(base.subquery())) or 0)
+    anchor = db.scalars(base.order_by(*_order_by(sort_by, sort_order, None)).offset(total // 2).limit(1)).first()
+    if anchor is None:
+        return None
+    stmt = base.where(_keyset_filter(sort_by, sort_order, getattr(anchor, sort_by), anchor.id))
+    return stmt.order_by(*_order_by(sort_by, sort_order, None)).limit(20)
+
+
+def _keyset_plan(db, sort_by: str, sort_order: str, repeat: int) -> dict:
+    expected_index = f"idx_products_{sort_by}_{sort_order}_id"
+    stmt = _keyset_query(db, sort_by, sort_order)
+    if stmt is None:
+        return {"sort_by": sort_by, "sort_order": sort_order, "ok": False, "error": "no rows"}
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_plan_nodes(plan[0]["Plan"]))
+    indexes = sorted({n["Index Name"] for n in nodes if n.get("Index Name")})
+    has_sort = any(n.get("Node Type") in {"Sort", "Incremental Sort"} for n in nodes)
+    out = {
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+        "expected_index": expected_index,
+        "indexes": indexes,
+        "has_sort": has_sort,
+        "ok": (expected_index in indexes and not has_sort),
+    }
+    out.update(_time(db, lambda _q: stmt, "", repeat))
+    return out
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Benchmark legacy vs indexed product search (rolled back).")
+    p.add_argument("--rows", type=int, default=100_000, help="Synthetic products to seed (0 = use existing data only).")
+    p.add_argument("--repeat", type=int, default=10, help="Executions per query per variant.")
+    p.add_argument("--query", action="append", default=None, help="Search term (repeatable).")
+    p.add_argument(
+        "--check-keyset-plans",
+        action="store_true",
+        help="Exit 1 unless every deep cursor page uses its (sort_col, id DESC) index without a Sort node.",
+    )
+    return p
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    queries = args.query or DEFAULT_QUERIES
+    db = SessionLocal()
+    report: dict = {"rows": int(args.rows), "repeat": int(args.repeat), "queries": []}
+    try:
+        if args.rows > 0:
+            _seed(db, int(args.rows))
+        report["products_total"] = int(db.scalar(select(func.count()).select_from(Product)) or 0)
+        for q in queries:
+            report["queries"].append(
+                {
+                    "q": q,
+                    "legacy": _time(db, _legacy_query, q, int(args.repeat)),
+                    "indexed": _time(db, _new_query, q, int(args.repeat)),
+                }
+            )
+        report["keyset"] = [_keyset_plan(db, col, order, int(args.repeat)) for col, order in KEYSET_SORTS]
+    finally:
+        db.rollback()
+        db.close()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.check_keyset_plans and not all(k["ok"] for k in report["keyset"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+-- Rollback for 0050_add_products_ivd_input_sha.sql
+
+ALTER TABLE products
+    DROP COLUMN IF EXISTS ivd_input_sha;
@@ -0,0 +1,3 @@
+-- Rollback for 0051_add_nmpa_query_cache.sql
+
+DROP TABLE IF EXISTS nmpa_query_cache;
@@ -0,0 +1,6 @@
+-- Rollback for 0052_add_products_company_name_norm.sql
+
+DROP INDEX IF EXISTS idx_products_company_name_norm;
+
+ALTER TABLE products
+    DROP COLUMN IF EXISTS company_name_norm;
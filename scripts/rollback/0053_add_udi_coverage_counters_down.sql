@@ -0,0 +1,3 @@
+-- Rollback for 0053_add_udi_coverage_counters.sql
+
+DROP TABLE IF EXISTS udi_coverage_counters;
@@ -0,0 +1,4 @@
+-- Rollback for 0054_add_lri_scores_latest.sql
+
+DROP TABLE IF EXISTS lri_scores_latest_state;
+DROP TABLE IF EXISTS lri_scores_latest;
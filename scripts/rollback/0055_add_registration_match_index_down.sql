@@ -0,0 +1,4 @@
+-- Rollback for 0055_add_registration_match_index.sql
+
+DROP TABLE IF EXISTS registration_match_index_state;
+DROP TABLE IF EXISTS registration_match_index;
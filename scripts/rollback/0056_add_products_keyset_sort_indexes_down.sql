@@ -0,0 +1,10 @@
+-- Rollback for 0056_add_products_keyset_sort_indexes.sql
+
+DROP INDEX IF EXISTS idx_products_name_asc_id;
+DROP INDEX IF EXISTS idx_products_name_desc_id;
+DROP INDEX IF EXISTS idx_products_expiry_date_asc_id;
+DROP INDEX IF EXISTS idx_products_expiry_date_desc_id;
+DROP INDEX IF EXISTS idx_products_approved_date_asc_id;
+DROP INDEX IF EXISTS idx_products_approved_date_desc_id;
+DROP INDEX IF EXISTS idx_products_updated_at_asc_id;
+DROP INDEX IF EXISTS idx_products_updated_at_desc_id;